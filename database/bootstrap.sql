@@ -56,16 +56,18 @@ CREATE TABLE IF NOT EXISTS sesiones (
     user_agent VARCHAR(255),
     expires_at TIMESTAMP NOT NULL,
     revoked BOOLEAN NOT NULL DEFAULT FALSE,
+    revoked_at TIMESTAMP NULL,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (usuario_id) REFERENCES usuarios(id),
     INDEX idx_usuario (usuario_id),
     INDEX idx_token (token_jti),
-    INDEX idx_expires (expires_at)
+    INDEX idx_expires (expires_at),
+    INDEX idx_revoked_at (revoked_at, token_jti)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Tabla: auditoria_logs (Trazabilidad de acciones)
 CREATE TABLE IF NOT EXISTS auditoria_logs (
-    id CHAR(36) NOT NULL PRIMARY KEY,
+    id CHAR(36) NOT NULL,
     
     -- Información del Usuario
     user_id CHAR(36),
@@ -96,13 +98,40 @@ CREATE TABLE IF NOT EXISTS auditoria_logs (
     -- Timestamp
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     
+    PRIMARY KEY (id, created_at),
+    
     -- Índices para búsqueda eficiente
     INDEX idx_user_id (user_id),
     INDEX idx_entidad (entidad, entidad_id),
     INDEX idx_accion (accion),
-    INDEX idx_created_at (created_at),
+    INDEX idx_created_at_id (created_at, id),
     INDEX idx_exitoso (exitoso)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+-- Particionada por mes: la consulta por rango de fechas solo lee sus meses y
+-- tools/auditoria_retencion.py archiva y elimina meses completos con DROP PARTITION.
+-- created_at forma parte de la PK porque MySQL exige la columna de partición en toda clave única.
+PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION p_antiguo VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+    PARTITION p202601 VALUES LESS THAN (UNIX_TIMESTAMP('2026-02-01 00:00:00')),
+    PARTITION p202602 VALUES LESS THAN (UNIX_TIMESTAMP('2026-03-01 00:00:00')),
+    PARTITION p202603 VALUES LESS THAN (UNIX_TIMESTAMP('2026-04-01 00:00:00')),
+    PARTITION p202604 VALUES LESS THAN (UNIX_TIMESTAMP('2026-05-01 00:00:00')),
+    PARTITION p202605 VALUES LESS THAN (UNIX_TIMESTAMP('2026-06-01 00:00:00')),
+    PARTITION p202606 VALUES LESS THAN (UNIX_TIMESTAMP('2026-07-01 00:00:00')),
+    PARTITION p202607 VALUES LESS THAN (UNIX_TIMESTAMP('2026-08-01 00:00:00')),
+    PARTITION p202608 VALUES LESS THAN (UNIX_TIMESTAMP('2026-09-01 00:00:00')),
+    PARTITION p202609 VALUES LESS THAN (UNIX_TIMESTAMP('2026-10-01 00:00:00')),
+    PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+    PARTITION p202611 VALUES LESS THAN (UNIX_TIMESTAMP('2026-12-01 00:00:00')),
+    PARTITION p202612 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00')),
+    PARTITION p202701 VALUES LESS THAN (UNIX_TIMESTAMP('2027-02-01 00:00:00')),
+    PARTITION p202702 VALUES LESS THAN (UNIX_TIMESTAMP('2027-03-01 00:00:00')),
+    PARTITION p202703 VALUES LESS THAN (UNIX_TIMESTAMP('2027-04-01 00:00:00')),
+    PARTITION p202704 VALUES LESS THAN (UNIX_TIMESTAMP('2027-05-01 00:00:00')),
+    PARTITION p202705 VALUES LESS THAN (UNIX_TIMESTAMP('2027-06-01 00:00:00')),
+    PARTITION p202706 VALUES LESS THAN (UNIX_TIMESTAMP('2027-07-01 00:00:00')),
+    PARTITION p_futuro VALUES LESS THAN MAXVALUE
+);
 
 -- Vista: usuarios con rol
 CREATE OR REPLACE VIEW v_usuarios_con_rol AS
@@ -235,7 +264,8 @@ CREATE TABLE IF NOT EXISTS clases (
     INDEX idx_curso (curso_id),
     INDEX idx_seccion (seccion_id),
     INDEX idx_periodo (periodo_id),
-    INDEX idx_docente (docente_user_id),
+    INDEX idx_docente_vigente (docente_user_id, is_deleted, status),
+    INDEX idx_updated_at_id (updated_at, id),
     CHECK (status IN ('ACTIVA', 'FINALIZADA', 'CANCELADA'))
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -291,13 +321,13 @@ CREATE TABLE IF NOT EXISTS umbrales_alerta (
     FOREIGN KEY (escala_id) REFERENCES escalas_calificacion(id),
     INDEX idx_grado (grado_id),
     INDEX idx_curso (curso_id),
-    INDEX idx_escala (escala_id),
+    INDEX idx_umbral_aplicable (escala_id, activo, is_deleted, curso_id, grado_id),
     INDEX idx_activo (activo)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Tabla: auditoria_logs (Trazabilidad de acciones académicas)
 CREATE TABLE IF NOT EXISTS auditoria_logs (
-    id CHAR(36) NOT NULL PRIMARY KEY,
+    id CHAR(36) NOT NULL,
     user_id CHAR(36),
     username VARCHAR(100),
     rol_nombre VARCHAR(50),
@@ -315,12 +345,38 @@ CREATE TABLE IF NOT EXISTS auditoria_logs (
     codigo_respuesta INT,
     mensaje_error TEXT,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at),
     INDEX idx_user_id (user_id),
     INDEX idx_entidad (entidad, entidad_id),
     INDEX idx_accion (accion),
-    INDEX idx_created_at (created_at),
+    INDEX idx_created_at_id (created_at, id),
     INDEX idx_exitoso (exitoso)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+-- Particionada por mes: la consulta por rango de fechas solo lee sus meses y
+-- tools/auditoria_retencion.py archiva y elimina meses completos con DROP PARTITION.
+-- created_at forma parte de la PK porque MySQL exige la columna de partición en toda clave única.
+PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION p_antiguo VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+    PARTITION p202601 VALUES LESS THAN (UNIX_TIMESTAMP('2026-02-01 00:00:00')),
+    PARTITION p202602 VALUES LESS THAN (UNIX_TIMESTAMP('2026-03-01 00:00:00')),
+    PARTITION p202603 VALUES LESS THAN (UNIX_TIMESTAMP('2026-04-01 00:00:00')),
+    PARTITION p202604 VALUES LESS THAN (UNIX_TIMESTAMP('2026-05-01 00:00:00')),
+    PARTITION p202605 VALUES LESS THAN (UNIX_TIMESTAMP('2026-06-01 00:00:00')),
+    PARTITION p202606 VALUES LESS THAN (UNIX_TIMESTAMP('2026-07-01 00:00:00')),
+    PARTITION p202607 VALUES LESS THAN (UNIX_TIMESTAMP('2026-08-01 00:00:00')),
+    PARTITION p202608 VALUES LESS THAN (UNIX_TIMESTAMP('2026-09-01 00:00:00')),
+    PARTITION p202609 VALUES LESS THAN (UNIX_TIMESTAMP('2026-10-01 00:00:00')),
+    PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+    PARTITION p202611 VALUES LESS THAN (UNIX_TIMESTAMP('2026-12-01 00:00:00')),
+    PARTITION p202612 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00')),
+    PARTITION p202701 VALUES LESS THAN (UNIX_TIMESTAMP('2027-02-01 00:00:00')),
+    PARTITION p202702 VALUES LESS THAN (UNIX_TIMESTAMP('2027-03-01 00:00:00')),
+    PARTITION p202703 VALUES LESS THAN (UNIX_TIMESTAMP('2027-04-01 00:00:00')),
+    PARTITION p202704 VALUES LESS THAN (UNIX_TIMESTAMP('2027-05-01 00:00:00')),
+    PARTITION p202705 VALUES LESS THAN (UNIX_TIMESTAMP('2027-06-01 00:00:00')),
+    PARTITION p202706 VALUES LESS THAN (UNIX_TIMESTAMP('2027-07-01 00:00:00')),
+    PARTITION p_futuro VALUES LESS THAN MAXVALUE
+);
 
 -- Vista: clases_detalle
 CREATE OR REPLACE VIEW v_clases_detalle AS
@@ -387,12 +443,17 @@ CREATE TABLE IF NOT EXISTS alumnos (
     foto_url VARCHAR(500),
     status ENUM('ACTIVO', 'RETIRADO', 'TRASLADADO') NOT NULL DEFAULT 'ACTIVO',
     is_deleted BOOLEAN NOT NULL DEFAULT FALSE,
+    -- Texto de búsqueda (FULLTEXT ngram): generado, así lo mantiene cualquier INSERT/UPDATE
+    search_text VARCHAR(500) GENERATED ALWAYS AS (
+        LOWER(REGEXP_REPLACE(CONCAT_WS(' ', nombres, apellido_paterno, apellido_materno, codigo_alumno, dni), '[^[:alnum:]]+', ' '))
+    ) STORED,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_codigo (codigo_alumno),
     INDEX idx_dni (dni),
     INDEX idx_nombres (nombres, apellido_paterno),
     INDEX idx_status (status),
+    FULLTEXT INDEX ft_alumnos_search (search_text) WITH PARSER ngram,
     CHECK (genero IN ('M', 'F', 'OTRO')),
     CHECK (status IN ('ACTIVO', 'RETIRADO', 'TRASLADADO'))
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -452,14 +513,15 @@ CREATE TABLE IF NOT EXISTS matriculas_clase (
     FOREIGN KEY (alumno_id) REFERENCES alumnos(id),
     UNIQUE KEY uk_alumno_clase (alumno_id, clase_id),
     INDEX idx_alumno (alumno_id),
-    INDEX idx_clase (clase_id),
+    INDEX idx_clase_status_vigente (clase_id, status, is_deleted, alumno_id),
     INDEX idx_status (status),
+    INDEX idx_updated_at_id (updated_at, id),
     CHECK (status IN ('ACTIVO', 'RETIRADO', 'CONGELADO'))
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Tabla: auditoria_logs (Trazabilidad de acciones de personas)
 CREATE TABLE IF NOT EXISTS auditoria_logs (
-    id CHAR(36) NOT NULL PRIMARY KEY,
+    id CHAR(36) NOT NULL,
     user_id CHAR(36),
     username VARCHAR(100),
     rol_nombre VARCHAR(50),
@@ -477,12 +539,38 @@ CREATE TABLE IF NOT EXISTS auditoria_logs (
     codigo_respuesta INT,
     mensaje_error TEXT,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at),
     INDEX idx_user_id (user_id),
     INDEX idx_entidad (entidad, entidad_id),
     INDEX idx_accion (accion),
-    INDEX idx_created_at (created_at),
+    INDEX idx_created_at_id (created_at, id),
     INDEX idx_exitoso (exitoso)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+-- Particionada por mes: la consulta por rango de fechas solo lee sus meses y
+-- tools/auditoria_retencion.py archiva y elimina meses completos con DROP PARTITION.
+-- created_at forma parte de la PK porque MySQL exige la columna de partición en toda clave única.
+PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION p_antiguo VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+    PARTITION p202601 VALUES LESS THAN (UNIX_TIMESTAMP('2026-02-01 00:00:00')),
+    PARTITION p202602 VALUES LESS THAN (UNIX_TIMESTAMP('2026-03-01 00:00:00')),
+    PARTITION p202603 VALUES LESS THAN (UNIX_TIMESTAMP('2026-04-01 00:00:00')),
+    PARTITION p202604 VALUES LESS THAN (UNIX_TIMESTAMP('2026-05-01 00:00:00')),
+    PARTITION p202605 VALUES LESS THAN (UNIX_TIMESTAMP('2026-06-01 00:00:00')),
+    PARTITION p202606 VALUES LESS THAN (UNIX_TIMESTAMP('2026-07-01 00:00:00')),
+    PARTITION p202607 VALUES LESS THAN (UNIX_TIMESTAMP('2026-08-01 00:00:00')),
+    PARTITION p202608 VALUES LESS THAN (UNIX_TIMESTAMP('2026-09-01 00:00:00')),
+    PARTITION p202609 VALUES LESS THAN (UNIX_TIMESTAMP('2026-10-01 00:00:00')),
+    PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+    PARTITION p202611 VALUES LESS THAN (UNIX_TIMESTAMP('2026-12-01 00:00:00')),
+    PARTITION p202612 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00')),
+    PARTITION p202701 VALUES LESS THAN (UNIX_TIMESTAMP('2027-02-01 00:00:00')),
+    PARTITION p202702 VALUES LESS THAN (UNIX_TIMESTAMP('2027-03-01 00:00:00')),
+    PARTITION p202703 VALUES LESS THAN (UNIX_TIMESTAMP('2027-04-01 00:00:00')),
+    PARTITION p202704 VALUES LESS THAN (UNIX_TIMESTAMP('2027-05-01 00:00:00')),
+    PARTITION p202705 VALUES LESS THAN (UNIX_TIMESTAMP('2027-06-01 00:00:00')),
+    PARTITION p202706 VALUES LESS THAN (UNIX_TIMESTAMP('2027-07-01 00:00:00')),
+    PARTITION p_futuro VALUES LESS THAN MAXVALUE
+);
 
 -- Vista: alumnos_con_padres
 CREATE OR REPLACE VIEW v_alumnos_con_padres AS
@@ -575,6 +663,10 @@ CREATE TABLE IF NOT EXISTS notas (
     INDEX idx_fecha (fecha_registro),
     INDEX idx_registrado_por (registrado_por_user_id),
     INDEX idx_columna_nota (columna_nota),
+    -- Paginación keyset de GET /v1/notas (ORDER BY created_at DESC, id DESC)
+    INDEX idx_notas_keyset (is_deleted, created_at, id),
+    -- Notas vigentes de una matrícula (y periodo): libreta, promedios
+    INDEX idx_notas_vigentes_matricula_periodo (is_deleted, matricula_clase_id, periodo_id),
     
     -- Índice compuesto para búsquedas de notas por alumno-curso-columna
     UNIQUE KEY unique_nota_columna (matricula_clase_id, tipo_evaluacion_id, periodo_id, columna_nota),
@@ -616,11 +708,15 @@ CREATE TABLE IF NOT EXISTS outbox_notificaciones (
     intentos INT NOT NULL DEFAULT 0,
     ultimo_error TEXT,
     fecha_envio TIMESTAMP NULL,
+    proximo_intento TIMESTAMP NULL,
+    procesando_desde TIMESTAMP NULL,
+    procesado_por VARCHAR(100) NULL,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (alerta_id) REFERENCES alertas_notificacion(id),
     INDEX idx_alerta (alerta_id),
     INDEX idx_estado (estado),
+    INDEX idx_outbox_claim (estado, proximo_intento),
     INDEX idx_tipo (tipo),
     INDEX idx_created (created_at),
     CHECK (tipo IN ('EMAIL', 'SMS', 'PUSH')),
@@ -629,7 +725,7 @@ CREATE TABLE IF NOT EXISTS outbox_notificaciones (
 
 -- Tabla: auditoria_logs (Trazabilidad de acciones de notas y alertas)
 CREATE TABLE IF NOT EXISTS auditoria_logs (
-    id CHAR(36) NOT NULL PRIMARY KEY,
+    id CHAR(36) NOT NULL,
     user_id CHAR(36),
     username VARCHAR(100),
     rol_nombre VARCHAR(50),
@@ -647,11 +743,122 @@ CREATE TABLE IF NOT EXISTS auditoria_logs (
     codigo_respuesta INT,
     mensaje_error TEXT,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at),
     INDEX idx_user_id (user_id),
     INDEX idx_entidad (entidad, entidad_id),
     INDEX idx_accion (accion),
-    INDEX idx_created_at (created_at),
+    INDEX idx_created_at_id (created_at, id),
     INDEX idx_exitoso (exitoso)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+-- Particionada por mes: la consulta por rango de fechas solo lee sus meses y
+-- tools/auditoria_retencion.py archiva y elimina meses completos con DROP PARTITION.
+-- created_at forma parte de la PK porque MySQL exige la columna de partición en toda clave única.
+PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION p_antiguo VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+    PARTITION p202601 VALUES LESS THAN (UNIX_TIMESTAMP('2026-02-01 00:00:00')),
+    PARTITION p202602 VALUES LESS THAN (UNIX_TIMESTAMP('2026-03-01 00:00:00')),
+    PARTITION p202603 VALUES LESS THAN (UNIX_TIMESTAMP('2026-04-01 00:00:00')),
+    PARTITION p202604 VALUES LESS THAN (UNIX_TIMESTAMP('2026-05-01 00:00:00')),
+    PARTITION p202605 VALUES LESS THAN (UNIX_TIMESTAMP('2026-06-01 00:00:00')),
+    PARTITION p202606 VALUES LESS THAN (UNIX_TIMESTAMP('2026-07-01 00:00:00')),
+    PARTITION p202607 VALUES LESS THAN (UNIX_TIMESTAMP('2026-08-01 00:00:00')),
+    PARTITION p202608 VALUES LESS THAN (UNIX_TIMESTAMP('2026-09-01 00:00:00')),
+    PARTITION p202609 VALUES LESS THAN (UNIX_TIMESTAMP('2026-10-01 00:00:00')),
+    PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+    PARTITION p202611 VALUES LESS THAN (UNIX_TIMESTAMP('2026-12-01 00:00:00')),
+    PARTITION p202612 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00')),
+    PARTITION p202701 VALUES LESS THAN (UNIX_TIMESTAMP('2027-02-01 00:00:00')),
+    PARTITION p202702 VALUES LESS THAN (UNIX_TIMESTAMP('2027-03-01 00:00:00')),
+    PARTITION p202703 VALUES LESS THAN (UNIX_TIMESTAMP('2027-04-01 00:00:00')),
+    PARTITION p202704 VALUES LESS THAN (UNIX_TIMESTAMP('2027-05-01 00:00:00')),
+    PARTITION p202705 VALUES LESS THAN (UNIX_TIMESTAMP('2027-06-01 00:00:00')),
+    PARTITION p202706 VALUES LESS THAN (UNIX_TIMESTAMP('2027-07-01 00:00:00')),
+    PARTITION p_futuro VALUES LESS THAN MAXVALUE
+);
+
+-- Tabla: matriculas_proyeccion (read-model local de matrículas/clases)
+-- Alimentada por los feeds de cambios de Personas (/v1/matriculas/cambios) y
+-- Académico (/v1/clases/cambios); evita llamadas HTTP para filtrar por rol.
+CREATE TABLE IF NOT EXISTS matriculas_proyeccion (
+    matricula_clase_id CHAR(36) NOT NULL PRIMARY KEY,
+    alumno_id CHAR(36) NOT NULL,
+    clase_id CHAR(36) NOT NULL,
+    curso_id CHAR(36),
+    docente_user_id CHAR(36),
+    seccion_id CHAR(36),
+    grado_id CHAR(36),
+    status VARCHAR(20) NOT NULL DEFAULT 'ACTIVO',
+    is_deleted BOOLEAN NOT NULL DEFAULT FALSE,
+    clase_is_deleted BOOLEAN NOT NULL DEFAULT FALSE,
+    synced_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_proy_docente (docente_user_id),
+    INDEX idx_proy_alumno (alumno_id),
+    INDEX idx_proy_clase (clase_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Tabla: proyeccion_sync_estado (marca de agua del feed de cambios por fuente)
+CREATE TABLE IF NOT EXISTS proyeccion_sync_estado (
+    fuente VARCHAR(30) NOT NULL PRIMARY KEY,
+    ultimo_updated_at TIMESTAMP NULL,
+    ultimo_id CHAR(36),
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Tabla: idempotency_keys (resultado de POST /v1/notas/batch por Idempotency-Key)
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    idempotency_key VARCHAR(100) NOT NULL,
+    user_id CHAR(36) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    estado VARCHAR(20) NOT NULL DEFAULT 'EN_PROCESO',
+    status_code INT NULL,
+    response_json LONGTEXT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (idempotency_key, user_id),
+    INDEX idx_idem_expires (expires_at),
+    CHECK (estado IN ('EN_PROCESO', 'COMPLETADO'))
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Tabla: eventos_dominio (NOTA_REGISTRADA -> alertas y outbox, procesado en segundo plano)
+CREATE TABLE IF NOT EXISTS eventos_dominio (
+    id CHAR(36) NOT NULL PRIMARY KEY,
+    tipo VARCHAR(50) NOT NULL,
+    agregado_id CHAR(36) NOT NULL,
+    payload JSON NOT NULL,
+    estado VARCHAR(20) NOT NULL DEFAULT 'PENDIENTE',
+    intentos INT NOT NULL DEFAULT 0,
+    proximo_intento TIMESTAMP NULL,
+    ultimo_error TEXT,
+    procesando_desde TIMESTAMP NULL,
+    procesado_por VARCHAR(100) NULL,
+    procesado_at TIMESTAMP NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_evento_claim (estado, tipo, proximo_intento),
+    INDEX idx_evento_agregado (agregado_id),
+    CHECK (estado IN ('PENDIENTE', 'PROCESANDO', 'PROCESADO', 'FALLIDO'))
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Tabla: promedios (agregados de notas por matrícula/periodo, mantenidos por notas-service)
+CREATE TABLE IF NOT EXISTS promedios (
+    matricula_clase_id CHAR(36) NOT NULL,
+    periodo_id CHAR(36) NOT NULL,
+    suma_numerico DECIMAL(14,4) NOT NULL DEFAULT 0,
+    cantidad_numerico INT NOT NULL DEFAULT 0,
+    suma_ponderada DECIMAL(14,4) NOT NULL DEFAULT 0,
+    peso_total DECIMAL(14,4) NOT NULL DEFAULT 0,
+    cantidad_notas INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (matricula_clase_id, periodo_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Tabla: histograma_notas (notas numéricas por clase y valor en centésimas, mantenida por notas-service)
+CREATE TABLE IF NOT EXISTS histograma_notas (
+    clase_id CHAR(36) NOT NULL,
+    centesimas SMALLINT NOT NULL,
+    cantidad INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (clase_id, centesimas)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Vista: notas_detalle
@@ -0,0 +1,32 @@
+-- Migration: proyección local de matrículas/clases en notas-service
+-- Crea el read-model que usa GET /v1/notas para filtrar por rol y enriquecer
+-- sin llamar a Personas/Académico, y añade índices (updated_at, id) para los
+-- feeds de cambios que lo alimentan.
+
+CREATE TABLE IF NOT EXISTS `sga_notas`.`matriculas_proyeccion` (
+    `matricula_clase_id` CHAR(36) NOT NULL PRIMARY KEY,
+    `alumno_id` CHAR(36) NOT NULL,
+    `clase_id` CHAR(36) NOT NULL,
+    `curso_id` CHAR(36),
+    `docente_user_id` CHAR(36),
+    `seccion_id` CHAR(36),
+    `grado_id` CHAR(36),
+    `status` VARCHAR(20) NOT NULL DEFAULT 'ACTIVO',
+    `is_deleted` BOOLEAN NOT NULL DEFAULT FALSE,
+    `clase_is_deleted` BOOLEAN NOT NULL DEFAULT FALSE,
+    `synced_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX `idx_proy_docente` (`docente_user_id`),
+    INDEX `idx_proy_alumno` (`alumno_id`),
+    INDEX `idx_proy_clase` (`clase_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS `sga_notas`.`proyeccion_sync_estado` (
+    `fuente` VARCHAR(30) NOT NULL PRIMARY KEY,
+    `ultimo_updated_at` TIMESTAMP NULL,
+    `ultimo_id` CHAR(36),
+    `updated_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Índices para los feeds de cambios (keyset por updated_at, id)
+ALTER TABLE `sga_personas`.`matriculas_clase` ADD INDEX `idx_updated_at_id` (`updated_at`, `id`);
+ALTER TABLE `sga_academico`.`clases` ADD INDEX `idx_updated_at_id` (`updated_at`, `id`);
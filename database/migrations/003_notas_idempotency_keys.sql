@@ -0,0 +1,19 @@
+-- Migration: Idempotency-Key para POST /v1/notas/batch
+-- Guarda el resultado de cada lote por (idempotency_key, user_id) para que un
+-- reintento devuelva la misma respuesta sin volver a escribir notas ni alertas.
+-- Las filas vencidas (expires_at) las purga el worker idempotency-cleanup.
+
+CREATE TABLE IF NOT EXISTS `sga_notas`.`idempotency_keys` (
+    `idempotency_key` VARCHAR(100) NOT NULL,
+    `user_id` CHAR(36) NOT NULL,
+    `request_hash` CHAR(64) NOT NULL,
+    `estado` VARCHAR(20) NOT NULL DEFAULT 'EN_PROCESO',
+    `status_code` INT NULL,
+    `response_json` LONGTEXT NULL,
+    `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    `updated_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    `expires_at` TIMESTAMP NOT NULL,
+    PRIMARY KEY (`idempotency_key`, `user_id`),
+    INDEX `idx_idem_expires` (`expires_at`),
+    CONSTRAINT `chk_idem_estado` CHECK (`estado` IN ('EN_PROCESO', 'COMPLETADO'))
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,10 @@
+-- Migration: columnas del despachador de outbox_notificaciones
+-- proximo_intento: reintento programado (backoff exponencial) de un envío FALLIDO
+-- procesando_desde / procesado_por: qué réplica reclamó la fila y desde cuándo,
+-- para devolver a PENDIENTE los lotes de réplicas que murieron a mitad de envío.
+
+ALTER TABLE `sga_notas`.`outbox_notificaciones`
+    ADD COLUMN `proximo_intento` TIMESTAMP NULL AFTER `fecha_envio`,
+    ADD COLUMN `procesando_desde` TIMESTAMP NULL AFTER `proximo_intento`,
+    ADD COLUMN `procesado_por` VARCHAR(100) NULL AFTER `procesando_desde`,
+    ADD INDEX `idx_outbox_claim` (`estado`, `proximo_intento`);
@@ -0,0 +1,22 @@
+-- Migration: eventos de dominio de notas-service
+-- POST /v1/notas y /v1/notas/batch escriben la nota y un evento NOTA_REGISTRADA en
+-- la misma transacción; el consumidor eventos-nota evalúa umbrales y genera alertas
+-- y outbox por lotes, fuera del request.
+
+CREATE TABLE IF NOT EXISTS `sga_notas`.`eventos_dominio` (
+    `id` CHAR(36) NOT NULL PRIMARY KEY,
+    `tipo` VARCHAR(50) NOT NULL,
+    `agregado_id` CHAR(36) NOT NULL,
+    `payload` JSON NOT NULL,
+    `estado` VARCHAR(20) NOT NULL DEFAULT 'PENDIENTE',
+    `intentos` INT NOT NULL DEFAULT 0,
+    `proximo_intento` TIMESTAMP NULL,
+    `ultimo_error` TEXT,
+    `procesando_desde` TIMESTAMP NULL,
+    `procesado_por` VARCHAR(100) NULL,
+    `procesado_at` TIMESTAMP NULL,
+    `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX `idx_evento_claim` (`estado`, `tipo`, `proximo_intento`),
+    INDEX `idx_evento_agregado` (`agregado_id`),
+    CONSTRAINT `chk_evento_estado` CHECK (`estado` IN ('PENDIENTE', 'PROCESANDO', 'PROCESADO', 'FALLIDO'))
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,30 @@
+-- Migration: tabla promedios de notas-service
+-- Agregados por (matrícula, periodo) que notas-service mantiene de forma incremental
+-- en la misma transacción que cada alta/edición/baja de nota. Los dashboards suman
+-- estas filas en lugar de promediar todas las notas en cada petición.
+
+CREATE TABLE IF NOT EXISTS `sga_notas`.`promedios` (
+    `matricula_clase_id` CHAR(36) NOT NULL,
+    `periodo_id` CHAR(36) NOT NULL,
+    `suma_numerico` DECIMAL(14,4) NOT NULL DEFAULT 0,
+    `cantidad_numerico` INT NOT NULL DEFAULT 0,
+    `suma_ponderada` DECIMAL(14,4) NOT NULL DEFAULT 0,
+    `peso_total` DECIMAL(14,4) NOT NULL DEFAULT 0,
+    `cantidad_notas` INT NOT NULL DEFAULT 0,
+    `updated_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (`matricula_clase_id`, `periodo_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Carga inicial desde las notas vigentes (peso de la nota, o peso_default de su tipo, o 1)
+REPLACE INTO `sga_notas`.`promedios`
+    (`matricula_clase_id`, `periodo_id`, `suma_numerico`, `cantidad_numerico`, `suma_ponderada`, `peso_total`, `cantidad_notas`)
+SELECT n.matricula_clase_id, n.periodo_id,
+    COALESCE(SUM(n.valor_numerico), 0),
+    COUNT(n.valor_numerico),
+    COALESCE(SUM(n.valor_numerico * COALESCE(n.peso, te.peso_default, 1)), 0),
+    COALESCE(SUM(CASE WHEN n.valor_numerico IS NOT NULL THEN COALESCE(n.peso, te.peso_default, 1) END), 0),
+    COUNT(*)
+FROM `sga_notas`.`notas` n
+LEFT JOIN `sga_notas`.`tipos_evaluacion` te ON n.tipo_evaluacion_id = te.id
+WHERE n.is_deleted = FALSE
+GROUP BY n.matricula_clase_id, n.periodo_id;
@@ -0,0 +1,21 @@
+-- Migration: tabla histograma_notas de notas-service
+-- Cantidad de notas numéricas vigentes por clase y valor (en centésimas de punto).
+-- notas-service la mantiene junto con promedios en cada alta/edición/baja de nota y
+-- los dashboards calculan tercio/quinto/décimo superior y percentiles recorriendo
+-- como mucho 2001 buckets en lugar de ordenar todas las notas con ROW_NUMBER.
+
+CREATE TABLE IF NOT EXISTS `sga_notas`.`histograma_notas` (
+    `clase_id` CHAR(36) NOT NULL,
+    `centesimas` SMALLINT NOT NULL,
+    `cantidad` INT NOT NULL DEFAULT 0,
+    `updated_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (`clase_id`, `centesimas`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Carga inicial desde las notas vigentes con matrícula existente
+REPLACE INTO `sga_notas`.`histograma_notas` (`clase_id`, `centesimas`, `cantidad`)
+SELECT m.clase_id, ROUND(n.valor_numerico * 100), COUNT(*)
+FROM `sga_notas`.`notas` n
+JOIN `sga_personas`.`matriculas_clase` m ON n.matricula_clase_id = m.id
+WHERE n.is_deleted = FALSE AND n.valor_numerico IS NOT NULL
+GROUP BY m.clase_id, ROUND(n.valor_numerico * 100);
@@ -0,0 +1,133 @@
+-- Migration: auditoria_logs particionada por mes en los cuatro servicios
+-- - PK (id, created_at): MySQL exige la columna de partición en toda clave única
+-- - idx_created_at_id (created_at, id) para la paginación keyset de GET /v1/auditoria
+-- - Una partición por mes: las consultas con desde/hasta solo leen sus meses y
+--   tools/auditoria_retencion.py archiva los meses vencidos a .jsonl.gz y los elimina
+--   con DROP PARTITION (instantáneo) en lugar de DELETE fila a fila
+-- - p_antiguo recoge todo lo anterior a 2026; p_futuro lo posterior al último mes
+--   creado (el job de retención la divide en meses nuevos antes de que reciba filas)
+--
+-- El ALTER reconstruye la tabla: ejecutar en una ventana de mantenimiento.
+-- Los límites se calculan en UTC, igual que created_at (AuditHelper usa utcnow).
+
+SET time_zone = '+00:00';
+
+ALTER TABLE `sga_iam`.`auditoria_logs`
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (`id`, `created_at`),
+    DROP INDEX `idx_created_at`,
+    ADD INDEX `idx_created_at_id` (`created_at`, `id`);
+
+ALTER TABLE `sga_iam`.`auditoria_logs`
+PARTITION BY RANGE (UNIX_TIMESTAMP(`created_at`)) (
+    PARTITION p_antiguo VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+    PARTITION p202601 VALUES LESS THAN (UNIX_TIMESTAMP('2026-02-01 00:00:00')),
+    PARTITION p202602 VALUES LESS THAN (UNIX_TIMESTAMP('2026-03-01 00:00:00')),
+    PARTITION p202603 VALUES LESS THAN (UNIX_TIMESTAMP('2026-04-01 00:00:00')),
+    PARTITION p202604 VALUES LESS THAN (UNIX_TIMESTAMP('2026-05-01 00:00:00')),
+    PARTITION p202605 VALUES LESS THAN (UNIX_TIMESTAMP('2026-06-01 00:00:00')),
+    PARTITION p202606 VALUES LESS THAN (UNIX_TIMESTAMP('2026-07-01 00:00:00')),
+    PARTITION p202607 VALUES LESS THAN (UNIX_TIMESTAMP('2026-08-01 00:00:00')),
+    PARTITION p202608 VALUES LESS THAN (UNIX_TIMESTAMP('2026-09-01 00:00:00')),
+    PARTITION p202609 VALUES LESS THAN (UNIX_TIMESTAMP('2026-10-01 00:00:00')),
+    PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+    PARTITION p202611 VALUES LESS THAN (UNIX_TIMESTAMP('2026-12-01 00:00:00')),
+    PARTITION p202612 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00')),
+    PARTITION p202701 VALUES LESS THAN (UNIX_TIMESTAMP('2027-02-01 00:00:00')),
+    PARTITION p202702 VALUES LESS THAN (UNIX_TIMESTAMP('2027-03-01 00:00:00')),
+    PARTITION p202703 VALUES LESS THAN (UNIX_TIMESTAMP('2027-04-01 00:00:00')),
+    PARTITION p202704 VALUES LESS THAN (UNIX_TIMESTAMP('2027-05-01 00:00:00')),
+    PARTITION p202705 VALUES LESS THAN (UNIX_TIMESTAMP('2027-06-01 00:00:00')),
+    PARTITION p202706 VALUES LESS THAN (UNIX_TIMESTAMP('2027-07-01 00:00:00')),
+    PARTITION p_futuro VALUES LESS THAN MAXVALUE
+);
+
+ALTER TABLE `sga_academico`.`auditoria_logs`
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (`id`, `created_at`),
+    DROP INDEX `idx_created_at`,
+    ADD INDEX `idx_created_at_id` (`created_at`, `id`);
+
+ALTER TABLE `sga_academico`.`auditoria_logs`
+PARTITION BY RANGE (UNIX_TIMESTAMP(`created_at`)) (
+    PARTITION p_antiguo VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+    PARTITION p202601 VALUES LESS THAN (UNIX_TIMESTAMP('2026-02-01 00:00:00')),
+    PARTITION p202602 VALUES LESS THAN (UNIX_TIMESTAMP('2026-03-01 00:00:00')),
+    PARTITION p202603 VALUES LESS THAN (UNIX_TIMESTAMP('2026-04-01 00:00:00')),
+    PARTITION p202604 VALUES LESS THAN (UNIX_TIMESTAMP('2026-05-01 00:00:00')),
+    PARTITION p202605 VALUES LESS THAN (UNIX_TIMESTAMP('2026-06-01 00:00:00')),
+    PARTITION p202606 VALUES LESS THAN (UNIX_TIMESTAMP('2026-07-01 00:00:00')),
+    PARTITION p202607 VALUES LESS THAN (UNIX_TIMESTAMP('2026-08-01 00:00:00')),
+    PARTITION p202608 VALUES LESS THAN (UNIX_TIMESTAMP('2026-09-01 00:00:00')),
+    PARTITION p202609 VALUES LESS THAN (UNIX_TIMESTAMP('2026-10-01 00:00:00')),
+    PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+    PARTITION p202611 VALUES LESS THAN (UNIX_TIMESTAMP('2026-12-01 00:00:00')),
+    PARTITION p202612 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00')),
+    PARTITION p202701 VALUES LESS THAN (UNIX_TIMESTAMP('2027-02-01 00:00:00')),
+    PARTITION p202702 VALUES LESS THAN (UNIX_TIMESTAMP('2027-03-01 00:00:00')),
+    PARTITION p202703 VALUES LESS THAN (UNIX_TIMESTAMP('2027-04-01 00:00:00')),
+    PARTITION p202704 VALUES LESS THAN (UNIX_TIMESTAMP('2027-05-01 00:00:00')),
+    PARTITION p202705 VALUES LESS THAN (UNIX_TIMESTAMP('2027-06-01 00:00:00')),
+    PARTITION p202706 VALUES LESS THAN (UNIX_TIMESTAMP('2027-07-01 00:00:00')),
+    PARTITION p_futuro VALUES LESS THAN MAXVALUE
+);
+
+ALTER TABLE `sga_personas`.`auditoria_logs`
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (`id`, `created_at`),
+    DROP INDEX `idx_created_at`,
+    ADD INDEX `idx_created_at_id` (`created_at`, `id`);
+
+ALTER TABLE `sga_personas`.`auditoria_logs`
+PARTITION BY RANGE (UNIX_TIMESTAMP(`created_at`)) (
+    PARTITION p_antiguo VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+    PARTITION p202601 VALUES LESS THAN (UNIX_TIMESTAMP('2026-02-01 00:00:00')),
+    PARTITION p202602 VALUES LESS THAN (UNIX_TIMESTAMP('2026-03-01 00:00:00')),
+    PARTITION p202603 VALUES LESS THAN (UNIX_TIMESTAMP('2026-04-01 00:00:00')),
+    PARTITION p202604 VALUES LESS THAN (UNIX_TIMESTAMP('2026-05-01 00:00:00')),
+    PARTITION p202605 VALUES LESS THAN (UNIX_TIMESTAMP('2026-06-01 00:00:00')),
+    PARTITION p202606 VALUES LESS THAN (UNIX_TIMESTAMP('2026-07-01 00:00:00')),
+    PARTITION p202607 VALUES LESS THAN (UNIX_TIMESTAMP('2026-08-01 00:00:00')),
+    PARTITION p202608 VALUES LESS THAN (UNIX_TIMESTAMP('2026-09-01 00:00:00')),
+    PARTITION p202609 VALUES LESS THAN (UNIX_TIMESTAMP('2026-10-01 00:00:00')),
+    PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+    PARTITION p202611 VALUES LESS THAN (UNIX_TIMESTAMP('2026-12-01 00:00:00')),
+    PARTITION p202612 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00')),
+    PARTITION p202701 VALUES LESS THAN (UNIX_TIMESTAMP('2027-02-01 00:00:00')),
+    PARTITION p202702 VALUES LESS THAN (UNIX_TIMESTAMP('2027-03-01 00:00:00')),
+    PARTITION p202703 VALUES LESS THAN (UNIX_TIMESTAMP('2027-04-01 00:00:00')),
+    PARTITION p202704 VALUES LESS THAN (UNIX_TIMESTAMP('2027-05-01 00:00:00')),
+    PARTITION p202705 VALUES LESS THAN (UNIX_TIMESTAMP('2027-06-01 00:00:00')),
+    PARTITION p202706 VALUES LESS THAN (UNIX_TIMESTAMP('2027-07-01 00:00:00')),
+    PARTITION p_futuro VALUES LESS THAN MAXVALUE
+);
+
+ALTER TABLE `sga_notas`.`auditoria_logs`
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (`id`, `created_at`),
+    DROP INDEX `idx_created_at`,
+    ADD INDEX `idx_created_at_id` (`created_at`, `id`);
+
+ALTER TABLE `sga_notas`.`auditoria_logs`
+PARTITION BY RANGE (UNIX_TIMESTAMP(`created_at`)) (
+    PARTITION p_antiguo VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+    PARTITION p202601 VALUES LESS THAN (UNIX_TIMESTAMP('2026-02-01 00:00:00')),
+    PARTITION p202602 VALUES LESS THAN (UNIX_TIMESTAMP('2026-03-01 00:00:00')),
+    PARTITION p202603 VALUES LESS THAN (UNIX_TIMESTAMP('2026-04-01 00:00:00')),
+    PARTITION p202604 VALUES LESS THAN (UNIX_TIMESTAMP('2026-05-01 00:00:00')),
+    PARTITION p202605 VALUES LESS THAN (UNIX_TIMESTAMP('2026-06-01 00:00:00')),
+    PARTITION p202606 VALUES LESS THAN (UNIX_TIMESTAMP('2026-07-01 00:00:00')),
+    PARTITION p202607 VALUES LESS THAN (UNIX_TIMESTAMP('2026-08-01 00:00:00')),
+    PARTITION p202608 VALUES LESS THAN (UNIX_TIMESTAMP('2026-09-01 00:00:00')),
+    PARTITION p202609 VALUES LESS THAN (UNIX_TIMESTAMP('2026-10-01 00:00:00')),
+    PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+    PARTITION p202611 VALUES LESS THAN (UNIX_TIMESTAMP('2026-12-01 00:00:00')),
+    PARTITION p202612 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00')),
+    PARTITION p202701 VALUES LESS THAN (UNIX_TIMESTAMP('2027-02-01 00:00:00')),
+    PARTITION p202702 VALUES LESS THAN (UNIX_TIMESTAMP('2027-03-01 00:00:00')),
+    PARTITION p202703 VALUES LESS THAN (UNIX_TIMESTAMP('2027-04-01 00:00:00')),
+    PARTITION p202704 VALUES LESS THAN (UNIX_TIMESTAMP('2027-05-01 00:00:00')),
+    PARTITION p202705 VALUES LESS THAN (UNIX_TIMESTAMP('2027-06-01 00:00:00')),
+    PARTITION p202706 VALUES LESS THAN (UNIX_TIMESTAMP('2027-07-01 00:00:00')),
+    PARTITION p_futuro VALUES LESS THAN MAXVALUE
+);
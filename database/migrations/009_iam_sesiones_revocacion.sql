@@ -0,0 +1,13 @@
+-- Migration: feed de sesiones revocadas de iam-service
+-- revoked_at marca cuándo se revocó la sesión (logout o cierre forzado por ADMIN).
+-- GET /v1/auth/revocaciones recorre las revocaciones por (revoked_at, token_jti) y
+-- cada servicio mantiene en memoria los JTIs revocados sin consultar la BD por petición.
+
+ALTER TABLE `sga_iam`.`sesiones`
+    ADD COLUMN `revoked_at` TIMESTAMP NULL AFTER `revoked`,
+    ADD INDEX `idx_revoked_at` (`revoked_at`, `token_jti`);
+
+-- Sesiones ya revocadas antes de la migración: se publican con su fecha de creación
+UPDATE `sga_iam`.`sesiones`
+SET `revoked_at` = `created_at`
+WHERE `revoked` = TRUE AND `revoked_at` IS NULL;
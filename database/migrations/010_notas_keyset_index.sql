@@ -0,0 +1,7 @@
+-- Migration: índice de paginación keyset de GET /v1/notas
+-- El listado ordena por created_at DESC, id DESC filtrando is_deleted = FALSE y pagina
+-- con un cursor (created_at, id): con este índice cada página es un rango sobre el
+-- índice, sin OFFSET ni filesort, y cuesta lo mismo en la página 1 que en la 100.
+
+ALTER TABLE `sga_notas`.`notas`
+    ADD INDEX `idx_notas_keyset` (`is_deleted`, `created_at`, `id`);
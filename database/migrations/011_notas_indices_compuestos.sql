@@ -0,0 +1,8 @@
+-- Migration: índices compuestos de sga_notas según los patrones de consulta
+-- Libreta de clase, promedios y notas por matrícula filtran siempre
+--   n.is_deleted = FALSE AND n.matricula_clase_id = ? [AND n.periodo_id = ?]
+-- idx_matricula solo resuelve la matrícula y obliga a leer cada fila para descartar
+-- eliminadas y otros periodos; con este índice el filtro completo se resuelve en el índice.
+
+ALTER TABLE `sga_notas`.`notas`
+    ADD INDEX `idx_notas_vigentes_matricula_periodo` (`is_deleted`, `matricula_clase_id`, `periodo_id`);
@@ -0,0 +1,9 @@
+-- Migration: índices compuestos de sga_personas según los patrones de consulta
+-- Alumnos de una clase (docente, libreta, exportes) filtran
+--   clase_id = ? AND status = 'ACTIVO' AND is_deleted = FALSE
+-- y solo necesitan alumno_id para el JOIN con alumnos: el índice es cubriente.
+-- idx_clase queda como prefijo del nuevo índice y se elimina.
+
+ALTER TABLE `sga_personas`.`matriculas_clase`
+    ADD INDEX `idx_clase_status_vigente` (`clase_id`, `status`, `is_deleted`, `alumno_id`),
+    DROP INDEX `idx_clase`;
@@ -0,0 +1,14 @@
+-- Migration: índices compuestos de sga_academico según los patrones de consulta
+-- Clases de un docente: docente_user_id = ? AND is_deleted = FALSE [AND status = ?]
+-- Umbral de alerta aplicable (find_by_escala, caché de umbrales en notas):
+--   escala_id = ? AND activo = TRUE AND is_deleted = FALSE AND curso_id <=> ? AND grado_id <=> ?
+-- idx_docente e idx_escala quedan como prefijos de los nuevos índices y se eliminan
+-- (el índice compuesto sigue sirviendo a la clave foránea de escala_id).
+
+ALTER TABLE `sga_academico`.`clases`
+    ADD INDEX `idx_docente_vigente` (`docente_user_id`, `is_deleted`, `status`),
+    DROP INDEX `idx_docente`;
+
+ALTER TABLE `sga_academico`.`umbrales_alerta`
+    ADD INDEX `idx_umbral_aplicable` (`escala_id`, `activo`, `is_deleted`, `curso_id`, `grado_id`),
+    DROP INDEX `idx_escala`;
@@ -0,0 +1,19 @@
+-- Migration: búsqueda indexada de alumnos (sga_personas)
+-- GET /v1/alumnos y GET /v1/matriculas-clase filtraban con LIKE '%x%' sobre cinco
+-- columnas: ningún índice B-tree sirve y cada búsqueda recorría la tabla completa.
+--
+-- search_text concentra nombres, apellidos, código y DNI en minúsculas y sin signos.
+-- Es una columna generada STORED: MySQL la calcula en cada INSERT/UPDATE, incluidos
+-- los de seed.sql y apply_updated_seed.sql que no pasan por el ORM, y al añadirla
+-- rellena las filas existentes. La collation *_ci ignora tildes al comparar.
+-- El índice FULLTEXT con parser ngram (ngram_token_size = 2 por defecto) resuelve
+-- subcadenas de nombres y apellidos con MATCH ... AGAINST en modo booleano.
+-- Las búsquedas por DNI o código usan prefijo sobre idx_dni / idx_codigo.
+
+ALTER TABLE `sga_personas`.`alumnos`
+    ADD COLUMN `search_text` VARCHAR(500) GENERATED ALWAYS AS (
+        LOWER(REGEXP_REPLACE(CONCAT_WS(' ', `nombres`, `apellido_paterno`, `apellido_materno`, `codigo_alumno`, `dni`), '[^[:alnum:]]+', ' '))
+    ) STORED AFTER `is_deleted`;
+
+ALTER TABLE `sga_personas`.`alumnos`
+    ADD FULLTEXT INDEX `ft_alumnos_search` (`search_text`) WITH PARSER ngram;
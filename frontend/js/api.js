@@ -1062,12 +1062,16 @@ const NotasService = {
         }
     },
 
-    async createNotasBatch(notasData) {
+    async createNotasBatch(notasData, idempotencyKey = null) {
         try {
+            // El llamador debe pasar la misma clave en cada reintento del mismo guardado
+            // (el servidor devuelve entonces el resultado ya registrado); sin clave, el
+            // envío no es reintentable de forma segura
+            const key = idempotencyKey || (window.crypto && crypto.randomUUID ? crypto.randomUUID() : `${Date.now()}-${Math.random().toString(16).slice(2)}`);
             const response = await fetch(`${API_CONFIG.NOTAS_SERVICE}/v1/notas/batch`, {
                 method: 'POST',
-                headers: getAuthHeaders(),
-                body: JSON.stringify({ notas: notasData })
+                headers: { ...getAuthHeaders(), 'Idempotency-Key': key },
+                body: JSON.stringify({ notas: notasData, idempotency_key: key })
             });
 
             if (!response.ok) throw new Error('Error al registrar notas en lote');
@@ -1130,6 +1134,26 @@ const NotasService = {
         return this.listNotas(alumnoId, claseId, periodoId, offset, limit);
     },
 
+    /**
+     * Libreta de una clase en una sola petición: alumnos × columnas, promedio ponderado y literal.
+     */
+    async getLibretaClase(claseId, periodoId = null) {
+        try {
+            const params = new URLSearchParams();
+            if (periodoId) params.append('periodo_id', periodoId);
+            const qs = params.toString();
+            const response = await fetch(
+                `${API_CONFIG.NOTAS_SERVICE}/v1/clases/${claseId}/libreta${qs ? `?${qs}` : ''}`,
+                { headers: getAuthHeaders() }
+            );
+
+            if (!response.ok) throw new Error('Error al obtener la libreta de la clase');
+            return { success: true, data: await response.json() };
+        } catch (error) {
+            return { success: false, error: error.message };
+        }
+    },
+
     async getNotasAlumno(alumnoId, offset = 0, limit = 50) {
         try {
             const response = await fetch(
@@ -27,7 +27,8 @@ const estadoMulticurso = {
     alumno: null,
     notas: [],
     numNotas: 4,
-    valores: null
+    valores: null,
+    guardadoPendiente: null
 };
 
 const estadoIndividual = {
@@ -36,9 +37,27 @@ const estadoIndividual = {
     clasesSeccion: [],
     notas: [],
     numNotas: 4,
-    valores: null
+    valores: null,
+    guardadoPendiente: null
 };
 
+/**
+ * Clave de idempotencia del guardado en lote de una vista.
+ * Se genera una vez por guardado y se reutiliza en cada reintento mientras el
+ * payload no cambie, así el servidor devuelve el resultado ya registrado en vez
+ * de duplicar notas y eventos. Se descarta al confirmarse el guardado.
+ */
+function claveGuardadoLote(estado, notasPayloads) {
+    const firma = JSON.stringify(notasPayloads);
+    if (!estado.guardadoPendiente || estado.guardadoPendiente.firma !== firma) {
+        const key = window.crypto && crypto.randomUUID
+            ? crypto.randomUUID()
+            : `${Date.now()}-${Math.random().toString(16).slice(2)}`;
+        estado.guardadoPendiente = { firma, key };
+    }
+    return estado.guardadoPendiente.key;
+}
+
 // Admin cache / pagination
 // Client-side cache (legacy) and server-mode pagination state
 let adminStudentsList = [];
@@ -2241,11 +2260,12 @@ function guardarTodasLasNotasMulticurso() {
                 return;
             }
 
-            const result = await NotasService.createNotasBatch(notasPayloads);
+            const result = await NotasService.createNotasBatch(notasPayloads, claveGuardadoLote(estadoMulticurso, notasPayloads));
 
             hideLoading();
 
             if (result.success) {
+                estadoMulticurso.guardadoPendiente = null;
                 const successCount = result.data.processed || notasPayloads.length;
                 showToast(`✅ Se guardaron ${successCount} calificaciones correctamente`, 'success');
 
@@ -2709,11 +2729,12 @@ function guardarTodasLasNotas() {
                 return;
             }
 
-            const result = await NotasService.createNotasBatch(notasPayloads);
+            const result = await NotasService.createNotasBatch(notasPayloads, claveGuardadoLote(estadoIndividual, notasPayloads));
 
             hideLoading();
 
             if (result.success) {
+                estadoIndividual.guardadoPendiente = null;
                 const successCount = result.data.processed || notasPayloads.length;
                 showToast(`✅ Se guardaron ${successCount} calificaciones correctamente`, 'success');
 
@@ -2722,12 +2743,14 @@ function guardarTodasLasNotas() {
                 affectedClases.forEach(claseId => {
                     try { invalidateCachedAlumnos(claseId); } catch (e) { }
                 });
+
+                // Recargar la página para sincronizar vista individual con datos persistidos
+                try { window.location.reload(); } catch (e) { console.warn('No se pudo recargar la página automáticamente:', e); }
             } else {
+                // Sin recargar: se conservan los valores y la clave para reintentar el mismo guardado
                 console.error('Error guardando notas individuales:', result.error);
                 showToast('Error al guardar calificaciones: ' + (result.error || 'Error desconocido'), 'danger');
             }
-            // Recargar la página para sincronizar vista individual con datos persistidos
-            try { window.location.reload(); } catch (e) { console.warn('No se pudo recargar la página automáticamente:', e); }
         } catch (e) {
             hideLoading();
             console.error('Error guardando notas individuales:', e);
@@ -2802,34 +2825,53 @@ function getFilteredAlumnosForExport() {
 }
 
 async function fetchNotasForAlumnos(alumnosList) {
-    // Intentar usar endpoint bulk si existe en NotasService
-    const bulkCandidates = ['getNotasPorAlumnos', 'getNotasPorAlumnosBulk', 'getNotasBulk', 'getNotasForStudents', 'listNotasForAlumnos'];
-    const bulkFnName = bulkCandidates.find(n => typeof NotasService[n] === 'function');
-    if (bulkFnName) {
-        try {
-            const ids = alumnosList.map(a => a.id);
-            const bulkRes = await NotasService[bulkFnName](ids);
-            if (bulkRes && bulkRes.success && bulkRes.data) {
-                // Esperamos un objeto { alumnoId: [notas] } o un array con entries
-                const map = bulkRes.data;
-                const out = alumnosList.map(alumno => {
-                    const notas = map[alumno.id] || (Array.isArray(map) ? (map.find(x => String(x.alumno_id) === String(alumno.id))?.notas || []) : []);
-                    // Cachear resultado por alumno
-                    try { sessionStorage.setItem(`notas_alumno_${alumno.id}`, JSON.stringify({ ts: Date.now(), data: Array.isArray(notas) ? notas : [] })); } catch (e) { }
-                    return { alumno, notas: Array.isArray(notas) ? notas : [] };
-                });
-                return out;
+    // Una petición de libreta por clase (en lugar de una por alumno)
+    const claseIds = [...new Set(alumnosList.flatMap(a => (a.cursos || []).map(c => c.clase_id)).filter(Boolean))];
+    const notasPorAlumno = new Map();
+    const clasesFallidas = new Set();
+    const concurrency = ALUMNOS_CONCURRENCY || 8;
+    for (let i = 0; i < claseIds.length; i += concurrency) {
+        const batch = claseIds.slice(i, i + concurrency);
+        // eslint-disable-next-line no-await-in-loop
+        const libretas = await Promise.all(batch.map(id => NotasService.getLibretaClase(id)));
+        libretas.forEach((res, idx) => {
+            if (!res || !res.success || !res.data) {
+                clasesFallidas.add(batch[idx]);
+                return;
             }
-        } catch (e) {
-            console.warn('Bulk fetch notas failed, falling back to per-alumno fetch:', e.message || e);
-        }
+            const clase = res.data.clase || {};
+            (res.data.alumnos || []).forEach(fila => {
+                const notas = notasPorAlumno.get(fila.alumno_id) || [];
+                Object.entries(fila.notas || {}).forEach(([columna, celda]) => {
+                    notas.push({
+                        id: celda.nota_id,
+                        matricula_clase_id: fila.matricula_clase_id,
+                        clase_id: clase.id,
+                        curso_id: clase.curso_id,
+                        periodo_id: celda.periodo_id,
+                        tipo_evaluacion_id: celda.tipo_evaluacion_id,
+                        columna_nota: columna,
+                        valor_numerico: celda.valor_numerico,
+                        valor_literal: celda.valor_literal,
+                        peso: celda.peso
+                    });
+                });
+                notasPorAlumno.set(fila.alumno_id, notas);
+            });
+        });
     }
 
-    // Fallback: fetch por alumno con concurrencia limitada
-    const out = [];
-    const concurrency = ALUMNOS_CONCURRENCY || 8;
-    for (let i = 0; i < alumnosList.length; i += concurrency) {
-        const batch = alumnosList.slice(i, i + concurrency);
+    const pendientes = alumnosList.filter(a => (a.cursos || []).length === 0 || (a.cursos || []).some(c => !c.clase_id || clasesFallidas.has(c.clase_id)));
+    const pendientesIds = new Set(pendientes.map(a => a.id));
+    const out = alumnosList.filter(a => !pendientesIds.has(a.id)).map(alumno => {
+        const notas = notasPorAlumno.get(alumno.id) || [];
+        try { sessionStorage.setItem(`notas_alumno_${alumno.id}`, JSON.stringify({ ts: Date.now(), data: notas })); } catch (e) { }
+        return { alumno, notas };
+    });
+
+    // Fallback: fetch por alumno con concurrencia limitada (clases cuya libreta no se pudo leer)
+    for (let i = 0; i < pendientes.length; i += concurrency) {
+        const batch = pendientes.slice(i, i + concurrency);
         const promises = batch.map(async alumno => {
             try {
                 const res = await NotasService.getNotasAlumno(alumno.id, 0, 100);
@@ -2858,6 +2900,45 @@ async function exportDocenteExcel() {
             return;
         }
 
+        // Exportación SIAGIE generada en el servidor: un solo request pivotea N1..Nk y calcula el promedio ponderado
+        try {
+            const params = new URLSearchParams({ layout: 'siagie', format: 'xlsx' });
+            const gradoId = document.getElementById('filtroGradoDocente')?.value;
+            const seccionId = document.getElementById('filtroSeccionDocente')?.value;
+            const claseFiltro = document.getElementById('filtroClase')?.value;
+            const periodoId = document.getElementById('filtroPeriodo')?.value;
+            if (gradoId) params.append('grado_id', gradoId);
+            if (seccionId) params.append('seccion_id', seccionId);
+            if (claseFiltro) params.append('clase_id', claseFiltro);
+            if (periodoId) params.append('periodo_id', periodoId);
+
+            const url = `${API_CONFIG.NOTAS_SERVICE}/v1/notas/export?${params.toString()}`;
+            const resp = await fetch(url, { headers: getAuthHeaders() });
+            if (resp.ok) {
+                const blob = await resp.blob();
+                const contentDisposition = resp.headers.get('Content-Disposition');
+                let filename = 'notas_export_siagie.xlsx';
+                if (contentDisposition) {
+                    const m = /filename="?([^";]+)"?/.exec(contentDisposition);
+                    if (m) filename = m[1];
+                }
+                const urlBlob = URL.createObjectURL(blob);
+                const a = document.createElement('a');
+                a.href = urlBlob;
+                a.download = filename;
+                document.body.appendChild(a);
+                a.click();
+                a.remove();
+                URL.revokeObjectURL(urlBlob);
+                hideLoading();
+                showToast('Exportación completada: ' + filename, 'success');
+                return;
+            }
+            console.warn('Server-side export failed with status', resp.status, '- falling back to client export');
+        } catch (e) {
+            console.warn('Server-side export failed, falling back to client fetch:', e);
+        }
+
         // Revisar si tenemos notas cacheadas en sessionStorage para cada alumno
         const alumnosSinCache = alumnosToExport.filter(a => !sessionStorage.getItem(`notas_alumno_${a.id}`));
 
@@ -2868,44 +2949,6 @@ async function exportDocenteExcel() {
         await loadSheetJS();
 
         if (useFullFetch) {
-            // Intentar usar endpoint server-side de exportación si está disponible (más rápido)
-            try {
-                const params = new URLSearchParams();
-                const gradoId = document.getElementById('filtroGradoDocente')?.value;
-                const seccionId = document.getElementById('filtroSeccionDocente')?.value;
-                const claseFiltro = document.getElementById('filtroClase')?.value;
-                const periodoId = document.getElementById('filtroPeriodo')?.value;
-                if (gradoId) params.append('grado_id', gradoId);
-                if (seccionId) params.append('seccion_id', seccionId);
-                if (claseFiltro) params.append('clase_id', claseFiltro);
-                if (periodoId) params.append('periodo_id', periodoId);
-
-                const url = `${API_CONFIG.NOTAS_SERVICE}/v1/notas/export?${params.toString()}`;
-                const resp = await fetch(url, { headers: getAuthHeaders() });
-                if (resp.ok) {
-                    const blob = await resp.blob();
-                    const contentDisposition = resp.headers.get('Content-Disposition');
-                    let filename = 'notas_export.csv';
-                    if (contentDisposition) {
-                        const m = /filename="?([^";]+)"?/.exec(contentDisposition);
-                        if (m) filename = m[1];
-                    }
-                    const urlBlob = URL.createObjectURL(blob);
-                    const a = document.createElement('a');
-                    a.href = urlBlob;
-                    a.download = filename;
-                    document.body.appendChild(a);
-                    a.click();
-                    a.remove();
-                    URL.revokeObjectURL(urlBlob);
-                    hideLoading();
-                    showToast('Exportación completada: ' + filename, 'success');
-                    return;
-                }
-            } catch (e) {
-                console.warn('Server-side export failed, falling back to client fetch:', e);
-            }
-
             // Fallback: ejecutar fetch (bulk o por alumno)
             alumnosConNotas = await fetchNotasForAlumnos(alumnosToExport);
         } else {
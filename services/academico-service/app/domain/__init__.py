@@ -1,6 +1,9 @@
 # Académico Service - Domain Package
 from .models import Grado, Seccion, Curso, Clase, Periodo, PeriodoTipo, EscalaCalificacion, UmbralAlerta, GradoNivel, TipoEscala
-from .ports import GradoRepository, SeccionRepository, CursoRepository, ClaseRepository, PeriodoRepository, PeriodoTipoRepository, EscalaCalificacionRepository, UmbralAlertaRepository
+from .ports import (
+    GradoRepository, SeccionRepository, CursoRepository, ClaseRepository, PeriodoRepository, PeriodoTipoRepository,
+    EscalaCalificacionRepository, UmbralAlertaRepository, AsyncCatalogoRepository, AsyncClaseRepository,
+)
 from .exceptions import (
     GradoNotFoundException,
     SeccionNotFoundException,
@@ -17,6 +20,7 @@ __all__ = [
     "GradoNivel", "TipoEscala",
     "GradoRepository", "SeccionRepository", "CursoRepository", "ClaseRepository",
     "PeriodoRepository", "PeriodoTipoRepository", "EscalaCalificacionRepository", "UmbralAlertaRepository",
+    "AsyncCatalogoRepository", "AsyncClaseRepository",
     "GradoNotFoundException", "SeccionNotFoundException", "CursoNotFoundException",
     "ClaseNotFoundException", "PeriodoNotFoundException", "EscalaNotFoundException",
     "CodigoAlreadyExistsException", "ClaseAlreadyExistsException",
@@ -1,6 +1,6 @@
 # Académico Service - Domain Ports
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from .models import Grado, Seccion, Curso, Clase, Periodo, PeriodoTipo, EscalaCalificacion, UmbralAlerta
 
 
@@ -126,3 +126,46 @@ class UmbralAlertaRepository(ABC):
     @abstractmethod
     def find_all(self, activo: Optional[bool] = None, offset: int = 0, limit: int = 20) -> List[UmbralAlerta]:
         pass
+
+
+class AsyncCatalogoRepository(ABC):
+    """Listados de grados, secciones y cursos sobre una sesión async (no bloquean el event loop)"""
+    
+    @abstractmethod
+    async def find_grados(self, nivel: Optional[str] = None, offset: int = 0, limit: int = 20) -> List[Grado]:
+        pass
+    
+    @abstractmethod
+    async def find_secciones(self, grado_id: Optional[str] = None, offset: int = 0, limit: int = 20) -> List[Seccion]:
+        pass
+    
+    @abstractmethod
+    async def find_cursos(self, offset: int = 0, limit: int = 20) -> List[Curso]:
+        pass
+
+
+class AsyncClaseRepository(ABC):
+    """Lecturas de clases sobre una sesión async (listados, clases del docente, lotes de Notas)"""
+    
+    @abstractmethod
+    async def find_by_id(self, clase_id: str, incluir_eliminadas: bool = False) -> Optional[Clase]:
+        pass
+    
+    @abstractmethod
+    async def find_by_docente(self, docente_user_id: str, periodo_id: Optional[str] = None) -> List[Clase]:
+        pass
+    
+    @abstractmethod
+    async def find_all(self, curso_id: Optional[str] = None, seccion_id: Optional[str] = None,
+                       periodo_id: Optional[str] = None, offset: int = 0, limit: int = 20) -> List[Clase]:
+        pass
+    
+    @abstractmethod
+    async def find_by_ids_con_grado(self, clase_ids: List[str]) -> List[Tuple[Clase, Optional[str]]]:
+        """(clase, grado_id de su sección) para un lote de IDs, incluidas las eliminadas"""
+        pass
+    
+    @abstractmethod
+    async def es_docente_activo(self, clase_id: str, docente_user_id: str) -> bool:
+        """La clase está ACTIVA y asignada a ese docente"""
+        pass
@@ -0,0 +1,91 @@
+# Académico Service - Infrastructure DB Async Repositories
+from typing import Optional, List, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain import *
+from .models import *
+from .repositories import grado_model_to_domain, seccion_model_to_domain, curso_model_to_domain, clase_model_to_domain
+
+
+class AsyncSqlAlchemyCatalogoRepository(AsyncCatalogoRepository):
+    """Variante async de los find_all de grados, secciones y cursos (mismas consultas)"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def find_grados(self, nivel: Optional[str] = None, offset: int = 0, limit: int = 20) -> List[Grado]:
+        query = select(GradoModel).where(GradoModel.is_deleted == False)
+        if nivel:
+            query = query.where(GradoModel.nivel == nivel)
+        result = await self.session.execute(query.offset(offset).limit(limit))
+        return [grado_model_to_domain(m) for m in result.scalars().all()]
+
+    async def find_secciones(self, grado_id: Optional[str] = None, offset: int = 0, limit: int = 20) -> List[Seccion]:
+        query = select(SeccionModel).where(SeccionModel.is_deleted == False)
+        if grado_id:
+            query = query.where(SeccionModel.grado_id == grado_id)
+        result = await self.session.execute(query.offset(offset).limit(limit))
+        return [seccion_model_to_domain(m) for m in result.scalars().all()]
+
+    async def find_cursos(self, offset: int = 0, limit: int = 20) -> List[Curso]:
+        result = await self.session.execute(
+            select(CursoModel).where(CursoModel.is_deleted == False).offset(offset).limit(limit)
+        )
+        return [curso_model_to_domain(m) for m in result.scalars().all()]
+
+
+class AsyncSqlAlchemyClaseRepository(AsyncClaseRepository):
+    """Lecturas de clases sin relaciones (curso/seccion/periodo no se cargan en AsyncSession)"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def find_by_id(self, clase_id: str, incluir_eliminadas: bool = False) -> Optional[Clase]:
+        query = select(ClaseModel).where(ClaseModel.id == clase_id)
+        if not incluir_eliminadas:
+            query = query.where(ClaseModel.is_deleted == False)
+        result = await self.session.execute(query)
+        model = result.scalars().first()
+        return clase_model_to_domain(model, con_relaciones=False) if model else None
+
+    async def find_by_docente(self, docente_user_id: str, periodo_id: Optional[str] = None) -> List[Clase]:
+        query = select(ClaseModel).where(
+            ClaseModel.docente_user_id == docente_user_id,
+            ClaseModel.is_deleted == False,
+        )
+        if periodo_id:
+            query = query.where(ClaseModel.periodo_id == periodo_id)
+        result = await self.session.execute(query)
+        return [clase_model_to_domain(m, con_relaciones=False) for m in result.scalars().all()]
+
+    async def find_all(self, curso_id: Optional[str] = None, seccion_id: Optional[str] = None,
+                       periodo_id: Optional[str] = None, offset: int = 0, limit: int = 20) -> List[Clase]:
+        query = select(ClaseModel).where(ClaseModel.is_deleted == False)
+        if curso_id:
+            query = query.where(ClaseModel.curso_id == curso_id)
+        if seccion_id:
+            query = query.where(ClaseModel.seccion_id == seccion_id)
+        if periodo_id:
+            query = query.where(ClaseModel.periodo_id == periodo_id)
+        result = await self.session.execute(query.offset(offset).limit(limit))
+        return [clase_model_to_domain(m, con_relaciones=False) for m in result.scalars().all()]
+
+    async def find_by_ids_con_grado(self, clase_ids: List[str]) -> List[Tuple[Clase, Optional[str]]]:
+        if not clase_ids:
+            return []
+        result = await self.session.execute(
+            select(ClaseModel, SeccionModel.grado_id).outerjoin(
+                SeccionModel, SeccionModel.id == ClaseModel.seccion_id
+            ).where(ClaseModel.id.in_(clase_ids))
+        )
+        return [(clase_model_to_domain(m, con_relaciones=False), grado_id) for m, grado_id in result.all()]
+
+    async def es_docente_activo(self, clase_id: str, docente_user_id: str) -> bool:
+        result = await self.session.execute(
+            select(ClaseModel.id).where(
+                ClaseModel.id == clase_id,
+                ClaseModel.docente_user_id == docente_user_id,
+                ClaseModel.status == "ACTIVA",
+            ).limit(1)
+        )
+        return result.first() is not None
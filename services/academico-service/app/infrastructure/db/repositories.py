@@ -63,7 +63,8 @@ def periodo_model_to_domain(model: PeriodoModel) -> Periodo:
     )
 
 
-def clase_model_to_domain(model: ClaseModel) -> Clase:
+def clase_model_to_domain(model: ClaseModel, con_relaciones: bool = True) -> Clase:
+    """con_relaciones=False no toca curso/seccion/periodo (en AsyncSession no hay carga perezosa)"""
     clase = Clase(
         id=model.id,
         curso_id=model.curso_id,
@@ -75,6 +76,8 @@ def clase_model_to_domain(model: ClaseModel) -> Clase:
         created_at=model.created_at,
         updated_at=model.updated_at,
     )
+    if not con_relaciones:
+        return clase
     if model.curso:
         clase.curso = curso_model_to_domain(model.curso)
     if model.seccion:
@@ -3,13 +3,20 @@ from fastapi import APIRouter, Depends, Header, status, Query
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional
-from datetime import date
-from shared.common import DomainException, AlreadyExistsException, extract_bearer_token, decode_jwt_token
+from datetime import date, datetime
+from shared.common import DomainException, AlreadyExistsException, UnauthorizedException, ForbiddenException, extract_bearer_token, decode_jwt_token, get_http_client, listar_auditoria, MAX_AUDITORIA_LIMIT
 from app.infrastructure.http.dependencies import *
+from app.infrastructure.db.async_repositories import AsyncSqlAlchemyCatalogoRepository, AsyncSqlAlchemyClaseRepository
 
 
 router = APIRouter(prefix="/v1", tags=["academico"])
 
+# Límite de IDs por llamada bulk (los clientes trocean listas más grandes)
+MAX_BULK_IDS = 1000
+
+# Segundos que debe tener un cambio antes de publicarse en el feed de cambios
+FEED_SETTLE_SECONDS = 5
+
 
 # Request Models
 class CreateGradoRequest(BaseModel):
@@ -96,6 +103,23 @@ class UpdatePeriodoRequest(BaseModel):
     status: Optional[str] = None
 
 
+class CreateUmbralRequest(BaseModel):
+    escala_id: str
+    grado_id: Optional[str] = None
+    curso_id: Optional[str] = None
+    valor_minimo_numerico: Optional[float] = None
+    valor_minimo_literal: Optional[str] = None
+    descripcion: Optional[str] = None
+    activo: bool = True
+
+
+class UpdateUmbralRequest(BaseModel):
+    valor_minimo_numerico: Optional[float] = None
+    valor_minimo_literal: Optional[str] = None
+    descripcion: Optional[str] = None
+    activo: Optional[bool] = None
+
+
 # Endpoints
 @router.post("/grados", status_code=status.HTTP_201_CREATED)
 async def create_grado(
@@ -150,11 +174,9 @@ async def list_grados(
     nivel: Optional[str] = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    from app.infrastructure.db.repositories import SqlAlchemyGradoRepository
-    repo = SqlAlchemyGradoRepository(db)
-    grados = repo.find_all(nivel=nivel, offset=offset, limit=limit)
+    grados = await AsyncSqlAlchemyCatalogoRepository(db).find_grados(nivel=nivel, offset=offset, limit=limit)
     return {
         "grados": [
             {
@@ -320,11 +342,9 @@ async def create_curso(
 async def list_cursos(
     offset: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    from app.infrastructure.db.repositories import SqlAlchemyCursoRepository
-    repo = SqlAlchemyCursoRepository(db)
-    cursos = repo.find_all(offset=offset, limit=limit)
+    cursos = await AsyncSqlAlchemyCatalogoRepository(db).find_cursos(offset=offset, limit=limit)
     return {
         "cursos": [
             {
@@ -503,11 +523,9 @@ async def list_secciones(
     grado_id: Optional[str] = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    from app.infrastructure.db.repositories import SqlAlchemySeccionRepository
-    repo = SqlAlchemySeccionRepository(db)
-    secciones = repo.find_all(grado_id=grado_id, offset=offset, limit=limit)
+    secciones = await AsyncSqlAlchemyCatalogoRepository(db).find_secciones(grado_id=grado_id, offset=offset, limit=limit)
     return {
         "secciones": [
             {
@@ -967,11 +985,10 @@ async def list_clases(
     offset: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=1000),
     authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    from app.infrastructure.db.repositories import SqlAlchemyClaseRepository
-    repo = SqlAlchemyClaseRepository(db)
-    clases = repo.find_all(
+    repo = AsyncSqlAlchemyClaseRepository(db)
+    clases = await repo.find_all(
         curso_id=curso_id,
         seccion_id=seccion_id,
         periodo_id=periodo_id,
@@ -987,40 +1004,38 @@ async def list_clases(
     docentes_map = {}
     
     if clase_ids:
-        import httpx
-        
         # 1. Consultar conteo de matriculas en Personas Service
         try:
-            async with httpx.AsyncClient() as client:
-                # Personas Service (Port 8003)
-                personas_url = "http://localhost:8003/v1/matriculas/counts"
-                # Forward authorization header if available
-                headers = {"Authorization": authorization} if authorization else {}
+            client = get_http_client()
+            # Personas Service (Port 8003)
+            personas_url = "http://localhost:8003/v1/matriculas/counts"
+            # Forward authorization header if available
+            headers = {"Authorization": authorization} if authorization else {}
                 
-                resp = await client.post(personas_url, json={"clase_ids": clase_ids}, headers=headers)
-                if resp.status_code == 200:
-                    alumnos_count_map = resp.json()
-                else:
-                    print(f"Error fetching matriculas counts: {resp.status_code} {resp.text}")
+            resp = await client.post(personas_url, json={"clase_ids": clase_ids}, headers=headers)
+            if resp.status_code == 200:
+                alumnos_count_map = resp.json()
+            else:
+                print(f"Error fetching matriculas counts: {resp.status_code} {resp.text}")
 
-                # 2. Consultar datos de docentes en IAM Service (Port 8001)
-                if docente_ids:
-                    iam_url = "http://localhost:8001/v1/admin/users/bulk"
-                    resp_iam = await client.post(iam_url, json={"user_ids": docente_ids}, headers=headers)
+            # 2. Consultar datos de docentes en IAM Service (Port 8001)
+            if docente_ids:
+                iam_url = "http://localhost:8001/v1/admin/users/bulk"
+                resp_iam = await client.post(iam_url, json={"user_ids": docente_ids}, headers=headers)
                     
-                    if resp_iam.status_code == 200:
-                        users_data = resp_iam.json().get("users", [])
-                        for u in users_data:
-                            nombre_completo = f"{u.get('nombres') or ''} {u.get('apellidos') or ''}".strip()
-                            if not nombre_completo:
-                                nombre_completo = u.get('username')
+                if resp_iam.status_code == 200:
+                    users_data = resp_iam.json().get("users", [])
+                    for u in users_data:
+                        nombre_completo = f"{u.get('nombres') or ''} {u.get('apellidos') or ''}".strip()
+                        if not nombre_completo:
+                            nombre_completo = u.get('username')
                             
-                            docentes_map[u['id']] = {
-                                "username": u.get('username'),
-                                "nombre_completo": nombre_completo
-                            }
-                    else:
-                        print(f"Error fetching users bulk: {resp_iam.status_code} {resp_iam.text}")
+                        docentes_map[u['id']] = {
+                            "username": u.get('username'),
+                            "nombre_completo": nombre_completo
+                        }
+                else:
+                    print(f"Error fetching users bulk: {resp_iam.status_code} {resp_iam.text}")
                         
         except Exception as e:
             # Log error but don't fail the request
@@ -1051,14 +1066,66 @@ async def list_clases(
 
 
 
+@router.get("/clases/cambios")
+async def get_clases_cambios(
+    desde: Optional[datetime] = Query(None, description="updated_at del último cambio procesado"),
+    desde_id: Optional[str] = Query(None, description="id del último cambio procesado"),
+    limit: int = Query(500, ge=1, le=MAX_BULK_IDS),
+    db: Session = Depends(get_db),
+):
+    """
+    Endpoint usado por Notas Service: feed de cambios de clases (docente, curso,
+    sección, bajas lógicas) ordenado por (updated_at, id) para su proyección local.
+    """
+    try:
+        from app.infrastructure.db.models import ClaseModel, SeccionModel
+        from sqlalchemy import and_, or_, func, text
+        
+        query = db.query(ClaseModel, SeccionModel.grado_id).outerjoin(
+            SeccionModel, SeccionModel.id == ClaseModel.seccion_id
+        ).filter(
+            # Solo cambios asentados: una transacción aún abierta no debe quedar detrás de la marca de agua
+            ClaseModel.updated_at < func.date_sub(func.now(), text(f"INTERVAL {FEED_SETTLE_SECONDS} SECOND"))
+        )
+        if desde is not None:
+            query = query.filter(or_(
+                ClaseModel.updated_at > desde,
+                and_(ClaseModel.updated_at == desde, ClaseModel.id > (desde_id or ""))
+            ))
+        rows = query.order_by(ClaseModel.updated_at.asc(), ClaseModel.id.asc()).limit(limit).all()
+        
+        return {
+            "clases": [
+                {
+                    "id": clase.id,
+                    "curso_id": clase.curso_id,
+                    "seccion_id": clase.seccion_id,
+                    "grado_id": grado_id,
+                    "periodo_id": clase.periodo_id,
+                    "docente_user_id": clase.docente_user_id,
+                    "status": clase.status,
+                    "is_deleted": clase.is_deleted,
+                    "updated_at": clase.updated_at.isoformat() if clase.updated_at else None,
+                } for clase, grado_id in rows
+            ],
+            "has_more": len(rows) == limit,
+        }
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"error": "INTERNAL_ERROR", "message": str(e)}
+        )
+
+
 @router.get("/clases/{clase_id}")
 async def get_clase(
     clase_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Obtener información de una clase por ID"""
-    from app.infrastructure.db.models import ClaseModel
-    clase = db.query(ClaseModel).filter(ClaseModel.id == clase_id).first()
+    clase = await AsyncSqlAlchemyClaseRepository(db).find_by_id(clase_id, incluir_eliminadas=True)
     if not clase:
         return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"error": "NotFound", "message": "Clase no encontrada"})
 
@@ -1072,6 +1139,50 @@ async def get_clase(
     }
 
 
+class ClaseIdsRequest(BaseModel):
+    clase_ids: list[str]
+
+
+@router.post("/clases/bulk")
+async def get_clases_bulk(
+    request: ClaseIdsRequest,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Endpoint usado por Notas Service: resuelve un lote de clases en una sola consulta"""
+    try:
+        if len(request.clase_ids) > MAX_BULK_IDS:
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"error": "ValidationError", "message": f"Máximo {MAX_BULK_IDS} clases por solicitud"}
+            )
+        if not request.clase_ids:
+            return {"clases": []}
+        
+        rows = await AsyncSqlAlchemyClaseRepository(db).find_by_ids_con_grado(list(set(request.clase_ids)))
+        
+        return {
+            "clases": [
+                {
+                    "id": clase.id,
+                    "curso_id": clase.curso_id,
+                    "seccion_id": clase.seccion_id,
+                    "grado_id": grado_id,
+                    "periodo_id": clase.periodo_id,
+                    "docente_user_id": clase.docente_user_id,
+                    "status": clase.status,
+                    "is_deleted": clase.is_deleted,
+                } for clase, grado_id in rows
+            ]
+        }
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"error": "INTERNAL_ERROR", "message": str(e)}
+        )
+
+
 @router.put("/clases/{clase_id}")
 async def update_clase(
     clase_id: str,
@@ -1114,23 +1225,22 @@ async def update_clase(
         if request.status is not None:
             if request.status in ["INACTIVO", "CANCELADA"] and clase_model.status == "ACTIVO":
                 # Check for active enrollments before deactivating
-                import httpx
                 try:
-                    async with httpx.AsyncClient() as client:
-                        personas_url = "http://localhost:8003/v1/matriculas/counts"
-                        headers = {"Authorization": authorization} if authorization else {}
-                        resp = await client.post(personas_url, json={"clase_ids": [clase_id]}, headers=headers)
+                    client = get_http_client()
+                    personas_url = "http://localhost:8003/v1/matriculas/counts"
+                    headers = {"Authorization": authorization} if authorization else {}
+                    resp = await client.post(personas_url, json={"clase_ids": [clase_id]}, headers=headers)
                         
-                        if resp.status_code == 200:
-                            counts = resp.json()
-                            if counts.get(clase_id, 0) > 0:
-                                return JSONResponse(
-                                    status_code=status.HTTP_409_CONFLICT,
-                                    content={
-                                        "error": "Conflict", 
-                                        "message": f"No se puede desactivar la clase porque tiene {counts[clase_id]} alumnos inscritos."
-                                    }
-                                )
+                    if resp.status_code == 200:
+                        counts = resp.json()
+                        if counts.get(clase_id, 0) > 0:
+                            return JSONResponse(
+                                status_code=status.HTTP_409_CONFLICT,
+                                content={
+                                    "error": "Conflict", 
+                                    "message": f"No se puede desactivar la clase porque tiene {counts[clase_id]} alumnos inscritos."
+                                }
+                            )
                 except Exception as e:
                     print(f"Error checking enrollments: {e}")
                     # Fail safe: don't block update if check fails, or block? 
@@ -1204,7 +1314,7 @@ async def get_clases_docente(
     periodo_id: Optional[str] = Query(None),
     authorization: Optional[str] = Header(None),
     settings = Depends(get_settings),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
         token = extract_bearer_token(authorization)
@@ -1218,9 +1328,7 @@ async def get_clases_docente(
                 content={"error": "Forbidden", "message": "Solo DOCENTE o ADMIN"}
             )
         
-        from app.infrastructure.db.repositories import SqlAlchemyClaseRepository
-        repo = SqlAlchemyClaseRepository(db)
-        clases = repo.find_by_docente(user_id, periodo_id)
+        clases = await AsyncSqlAlchemyClaseRepository(db).find_by_docente(user_id, periodo_id)
         
         return {
             "clases": [
@@ -1246,7 +1354,7 @@ async def get_alumnos_de_clase(
     clase_id: str,
     authorization: Optional[str] = Header(None),
     settings = Depends(get_settings),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Obtener alumnos matriculados en una clase - para ADMIN y DOCENTE"""
     try:
@@ -1263,39 +1371,31 @@ async def get_alumnos_de_clase(
         
         # Si es docente, verificar que la clase le pertenece
         if rol == "DOCENTE":
-            from app.infrastructure.db.models import ClaseModel
-            clase = db.query(ClaseModel).filter(
-                ClaseModel.id == clase_id,
-                ClaseModel.docente_user_id == user_id,
-                ClaseModel.status == "ACTIVA"
-            ).first()
-            
-            if not clase:
+            if not await AsyncSqlAlchemyClaseRepository(db).es_docente_activo(clase_id, user_id):
                 return JSONResponse(
                     status_code=status.HTTP_403_FORBIDDEN,
                     content={"error": "Forbidden", "message": "No tienes acceso a esta clase"}
                 )
         
         # Hacer llamada al servicio de personas para obtener alumnos matriculados
-        import httpx
-        async with httpx.AsyncClient() as client:
-            personas_url = "http://localhost:8003/v1/clases/{}/alumnos".format(clase_id)
-            headers = {"Authorization": authorization} if authorization else {}
+        client = get_http_client()
+        personas_url = "http://localhost:8003/v1/clases/{}/alumnos".format(clase_id)
+        headers = {"Authorization": authorization} if authorization else {}
             
-            response = await client.get(personas_url, headers=headers)
+        response = await client.get(personas_url, headers=headers)
             
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 404:
-                return JSONResponse(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    content={"error": "NotFound", "message": "Clase no encontrada o sin alumnos matriculados"}
-                )
-            else:
-                return JSONResponse(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    content={"error": "INTERNAL_ERROR", "message": "Error al obtener alumnos"}
-                )
+        if response.status_code == 200:
+            return response.json()
+        elif response.status_code == 404:
+            return JSONResponse(
+                status_code=status.HTTP_404_NOT_FOUND,
+                content={"error": "NotFound", "message": "Clase no encontrada o sin alumnos matriculados"}
+            )
+        else:
+            return JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"error": "INTERNAL_ERROR", "message": "Error al obtener alumnos"}
+            )
         
     except Exception as e:
         import traceback
@@ -1359,19 +1459,9 @@ async def list_umbrales(
         if grado_id:
             query = query.filter(UmbralAlertaModel.grado_id == grado_id)
 
-        modelos = query.offset(offset).limit(limit).all()
-        result = []
-        for m in modelos:
-            result.append({
-                "id": m.id,
-                "grado_id": m.grado_id,
-                "curso_id": m.curso_id,
-                "escala_id": m.escala_id,
-                "valor_minimo_literal": str(m.valor_minimo_literal) if m.valor_minimo_literal is not None else None,
-                "valor_minimo_numerico": float(m.valor_minimo_numerico) if m.valor_minimo_numerico is not None else None,
-                "descripcion": m.descripcion,
-                "activo": bool(m.activo),
-            })
+        # Orden estable para que Notas pueda recorrer todas las páginas
+        modelos = query.order_by(UmbralAlertaModel.id).offset(offset).limit(limit).all()
+        result = [_umbral_to_dict(m) for m in modelos]
 
         return {"umbrales": result, "total": len(result), "offset": offset, "limit": limit}
     except Exception as e:
@@ -1380,6 +1470,200 @@ async def list_umbrales(
         return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content={"error": "INTERNAL_ERROR", "message": str(e)})
 
 
+def _umbral_to_dict(m) -> dict:
+    return {
+        "id": m.id,
+        "grado_id": m.grado_id,
+        "curso_id": m.curso_id,
+        "escala_id": m.escala_id,
+        "valor_minimo_literal": str(m.valor_minimo_literal) if m.valor_minimo_literal is not None else None,
+        "valor_minimo_numerico": float(m.valor_minimo_numerico) if m.valor_minimo_numerico is not None else None,
+        "descripcion": m.descripcion,
+        "activo": bool(m.activo),
+    }
+
+
+async def _publicar_cambio_umbrales(settings, token: str, umbral_id: str, accion: str) -> None:
+    """
+    Avisa a Notas de que cambió la tabla de umbrales para que recargue su caché.
+    Se reenvía el token del ADMIN que hizo el cambio (Notas rechaza avisos sin él).
+    Es best-effort: si Notas no responde, su caché se recarga al vencer el TTL.
+    """
+    notas_url = settings.NOTAS_SERVICE_URL or "http://localhost:8004"
+    try:
+        client = get_http_client()
+        resp = await client.post(
+            f"{notas_url}/v1/internal/umbrales/invalidar",
+            json={"umbral_id": umbral_id, "accion": accion},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        if resp.status_code != 200:
+            print(f"Error notificando cambio de umbrales a Notas: {resp.status_code} {resp.text}")
+    except Exception as e:
+        print(f"Error notificando cambio de umbrales a Notas: {e}")
+
+
+@router.post("/admin/umbrales", status_code=status.HTTP_201_CREATED)
+async def create_umbral(
+    request: CreateUmbralRequest,
+    authorization: Optional[str] = Header(None),
+    settings = Depends(get_settings),
+    db: Session = Depends(get_db),
+):
+    """Crear umbral de alerta (Solo ADMIN)"""
+    try:
+        token = extract_bearer_token(authorization)
+        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
+        rol = payload.get("rol_nombre")
+
+        if rol != "ADMIN":
+            return JSONResponse(
+                status_code=status.HTTP_403_FORBIDDEN,
+                content={"error": "Forbidden", "message": "Solo ADMIN puede crear umbrales"}
+            )
+
+        if request.valor_minimo_numerico is None and not request.valor_minimo_literal:
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"error": "ValidationError", "message": "Debe indicar valor_minimo_numerico o valor_minimo_literal"}
+            )
+
+        from app.infrastructure.db.repositories import SqlAlchemyEscalaCalificacionRepository, SqlAlchemyUmbralAlertaRepository
+        from app.infrastructure.db.models import UmbralAlertaModel
+        from app.domain import UmbralAlerta
+        from shared.common import generate_uuid
+
+        if not SqlAlchemyEscalaCalificacionRepository(db).find_by_id(request.escala_id):
+            return JSONResponse(
+                status_code=status.HTTP_404_NOT_FOUND,
+                content={"error": "NotFound", "message": "Escala no encontrada"}
+            )
+
+        umbral = SqlAlchemyUmbralAlertaRepository(db).create(UmbralAlerta(
+            id=generate_uuid(),
+            escala_id=request.escala_id,
+            grado_id=request.grado_id,
+            curso_id=request.curso_id,
+            valor_minimo_numerico=request.valor_minimo_numerico,
+            valor_minimo_literal=request.valor_minimo_literal,
+            descripcion=request.descripcion,
+            activo=request.activo,
+        ))
+        await _publicar_cambio_umbrales(settings, token, umbral.id, "CREATE")
+
+        modelo = db.query(UmbralAlertaModel).filter(UmbralAlertaModel.id == umbral.id).first()
+        return _umbral_to_dict(modelo)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"error": "INTERNAL_ERROR", "message": str(e)}
+        )
+
+
+@router.put("/admin/umbrales/{umbral_id}")
+async def update_umbral(
+    umbral_id: str,
+    request: UpdateUmbralRequest,
+    authorization: Optional[str] = Header(None),
+    settings = Depends(get_settings),
+    db: Session = Depends(get_db),
+):
+    """Actualizar umbral de alerta (Solo ADMIN)"""
+    try:
+        token = extract_bearer_token(authorization)
+        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
+        rol = payload.get("rol_nombre")
+
+        if rol != "ADMIN":
+            return JSONResponse(
+                status_code=status.HTTP_403_FORBIDDEN,
+                content={"error": "Forbidden", "message": "Solo ADMIN puede actualizar umbrales"}
+            )
+
+        from app.infrastructure.db.models import UmbralAlertaModel
+        modelo = db.query(UmbralAlertaModel).filter(
+            UmbralAlertaModel.id == umbral_id,
+            UmbralAlertaModel.is_deleted == False
+        ).first()
+
+        if not modelo:
+            return JSONResponse(
+                status_code=status.HTTP_404_NOT_FOUND,
+                content={"error": "NotFound", "message": "Umbral no encontrado"}
+            )
+
+        # Actualizar solo los campos enviados
+        if request.valor_minimo_numerico is not None:
+            modelo.valor_minimo_numerico = request.valor_minimo_numerico
+        if request.valor_minimo_literal is not None:
+            modelo.valor_minimo_literal = request.valor_minimo_literal
+        if request.descripcion is not None:
+            modelo.descripcion = request.descripcion
+        if request.activo is not None:
+            modelo.activo = request.activo
+
+        db.commit()
+        db.refresh(modelo)
+        await _publicar_cambio_umbrales(settings, token, umbral_id, "UPDATE")
+
+        return _umbral_to_dict(modelo)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"error": "INTERNAL_ERROR", "message": str(e)}
+        )
+
+
+@router.delete("/admin/umbrales/{umbral_id}")
+async def delete_umbral(
+    umbral_id: str,
+    authorization: Optional[str] = Header(None),
+    settings = Depends(get_settings),
+    db: Session = Depends(get_db),
+):
+    """Eliminar umbral de alerta (Solo ADMIN)"""
+    try:
+        token = extract_bearer_token(authorization)
+        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
+        rol = payload.get("rol_nombre")
+
+        if rol != "ADMIN":
+            return JSONResponse(
+                status_code=status.HTTP_403_FORBIDDEN,
+                content={"error": "Forbidden", "message": "Solo ADMIN puede eliminar umbrales"}
+            )
+
+        from app.infrastructure.db.models import UmbralAlertaModel
+        modelo = db.query(UmbralAlertaModel).filter(
+            UmbralAlertaModel.id == umbral_id,
+            UmbralAlertaModel.is_deleted == False
+        ).first()
+
+        if not modelo:
+            return JSONResponse(
+                status_code=status.HTTP_404_NOT_FOUND,
+                content={"error": "NotFound", "message": "Umbral no encontrado"}
+            )
+
+        # Soft delete
+        modelo.is_deleted = True
+        db.commit()
+        await _publicar_cambio_umbrales(settings, token, umbral_id, "DELETE")
+
+        return {"message": "Umbral eliminado correctamente", "id": umbral_id}
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"error": "INTERNAL_ERROR", "message": str(e)}
+        )
+
+
 @router.get("/admin/escalas")
 async def list_escalas_admin(
     offset: int = Query(0, ge=0),
@@ -1522,3 +1806,65 @@ async def get_docentes_activos(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"error": "INTERNAL_ERROR", "message": str(e)}
         )
+
+
+@router.get("/auditoria")
+async def list_auditoria(
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    limit: int = Query(50, ge=1, le=MAX_AUDITORIA_LIMIT),
+    desde: Optional[datetime] = Query(None, description="created_at mínimo (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="created_at máximo (exclusivo)"),
+    user_id: Optional[str] = Query(None),
+    entidad: Optional[str] = Query(None),
+    entidad_id: Optional[str] = Query(None),
+    accion: Optional[str] = Query(None),
+    exitoso: Optional[bool] = Query(None),
+    authorization: Optional[str] = Header(None),
+    settings = Depends(get_settings),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Auditoría de Académico Service (solo ADMIN), paginada por cursor sobre (created_at, id)"""
+    try:
+        token = extract_bearer_token(authorization)
+        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
+        if payload.get("rol_nombre") != "ADMIN":
+            return JSONResponse(
+                status_code=status.HTTP_403_FORBIDDEN,
+                content={"error": "Forbidden", "message": "Solo ADMIN puede consultar la auditoría"}
+            )
+
+        return await listar_auditoria(
+            db,
+            limit=limit,
+            cursor=cursor,
+            desde=desde,
+            hasta=hasta,
+            user_id=user_id,
+            entidad=entidad,
+            entidad_id=entidad_id,
+            accion=accion,
+            exitoso=exitoso,
+        )
+    except UnauthorizedException as e:
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"error": e.code, "message": e.message}
+        )
+    except ForbiddenException as e:
+        return JSONResponse(
+            status_code=status.HTTP_403_FORBIDDEN,
+            content={"error": e.code, "message": e.message}
+        )
+    except DomainException as e:
+        # Cursor o filtros inválidos
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": e.code, "message": e.message}
+        )
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"error": "INTERNAL_ERROR", "message": str(e)}
+        )
@@ -2,7 +2,7 @@
 from fastapi import APIRouter, Depends, Header, status, Query
 from fastapi.responses import JSONResponse
 from typing import Optional
-from shared.common import DomainException, extract_bearer_token, decode_jwt_token
+from shared.common import DomainException, extract_bearer_token, decode_jwt_token, get_http_client
 from app.infrastructure.http.dependencies import get_settings
 from sqlalchemy.orm import Session
 from app.infrastructure.http.dependencies import get_db
@@ -143,25 +143,24 @@ async def get_alumnos_clase_docente(
             )
         
         # Hacer llamada al servicio de personas
-        import httpx
-        async with httpx.AsyncClient() as client:
-            personas_url = f"http://localhost:8003/v1/docente/clases/{clase_id}/alumnos"
-            headers = {"Authorization": authorization} if authorization else {}
+        client = get_http_client()
+        personas_url = f"http://localhost:8003/v1/docente/clases/{clase_id}/alumnos"
+        headers = {"Authorization": authorization} if authorization else {}
             
-            response = await client.get(personas_url, headers=headers)
+        response = await client.get(personas_url, headers=headers)
             
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 404:
-                return JSONResponse(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    content={"error": "NotFound", "message": "Clase no encontrada o sin alumnos matriculados"}
-                )
-            else:
-                return JSONResponse(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    content={"error": "INTERNAL_ERROR", "message": "Error al obtener alumnos"}
-                )
+        if response.status_code == 200:
+            return response.json()
+        elif response.status_code == 404:
+            return JSONResponse(
+                status_code=status.HTTP_404_NOT_FOUND,
+                content={"error": "NotFound", "message": "Clase no encontrada o sin alumnos matriculados"}
+            )
+        else:
+            return JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"error": "INTERNAL_ERROR", "message": "Error al obtener alumnos"}
+            )
         
     except Exception as e:
         import traceback
@@ -1,7 +1,14 @@
 # Académico Service - Main Application
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from shared.common import get_settings, create_db_engine, create_session_factory
+from fastapi.responses import PlainTextResponse
+from shared.common import (
+    get_settings, create_db_engine, create_session_factory, create_async_db_engine, create_async_session_factory,
+    init_http_client, close_http_client, render_pool_metrics,
+    init_audit_sink, close_audit_sink,
+    init_token_verifier, init_revocaciones, close_revocaciones,
+)
 from app.infrastructure.http import dependencies
 from app.infrastructure.http.router_admin import router as admin_router
 from app.infrastructure.http.router_docente import router as docente_router
@@ -14,14 +21,40 @@ settings.DB_NAME = "sga_academico"
 print(f"🔧 CORS_ORIGINS type: {type(settings.CORS_ORIGINS)}")
 print(f"🔧 CORS_ORIGINS value: {settings.CORS_ORIGINS}")
 
-engine = create_db_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+engine = create_db_engine(settings.DATABASE_URL, echo=settings.DEBUG, settings=settings)
 session_factory = create_session_factory(engine)
 dependencies.set_session_factory(session_factory)
 
+# Clave JWT preparada una vez; los tokens verificados se reutilizan hasta su exp
+init_token_verifier(settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM, settings.JWT_VERIFY_CACHE_SIZE)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Cliente HTTP compartido (keep-alive) para llamadas a otros servicios
+    init_http_client(settings)
+    
+    # Engine async (aiomysql) para los handlers que consultan con AsyncSession
+    async_engine = create_async_db_engine(settings.ASYNC_DATABASE_URL, echo=settings.DEBUG, settings=settings)
+    dependencies.set_async_session_factory(create_async_session_factory(async_engine))
+    
+    # Auditoría por lotes: los handlers encolan y un task escribe en segundo plano
+    init_audit_sink(session_factory, settings)
+    
+    # JTIs revocados en memoria, al día con el feed de revocaciones de IAM
+    init_revocaciones(settings)
+    yield
+    await close_revocaciones()
+    await close_audit_sink()
+    await close_http_client()
+    await async_engine.dispose()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     debug=settings.DEBUG,
+    lifespan=lifespan,
 )
 
 # CORS - Configuración explícita
@@ -66,6 +99,12 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Métricas del pool de conexiones a BD (formato Prometheus)"""
+    return render_pool_metrics(settings.APP_NAME)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8002)
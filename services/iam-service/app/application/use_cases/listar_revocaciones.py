@@ -0,0 +1,32 @@
+# IAM Service - Use Case: Feed de sesiones revocadas
+from datetime import datetime, timedelta
+from typing import Optional
+from app.domain import SesionRepository
+
+
+class ListarRevocacionesUseCase:
+    """
+    Caso de uso: Página del feed de JTIs revocados, ordenado por (revoked_at, token_jti).
+    
+    Lo consumen los RevocationPoller de cada servicio. Solo publica revocaciones de
+    sesiones no expiradas y con al menos settle_seconds de antigüedad, para que una
+    transacción aún abierta no quede detrás del cursor de los consumidores.
+    """
+    
+    def __init__(self, sesion_repository: SesionRepository, settle_seconds: int = 2):
+        self.sesion_repository = sesion_repository
+        self.settle_seconds = settle_seconds
+    
+    def execute(self, desde: Optional[datetime], desde_jti: Optional[str], limit: int) -> dict:
+        hasta = datetime.utcnow() - timedelta(seconds=self.settle_seconds)
+        sesiones = self.sesion_repository.find_revoked_since(desde, desde_jti, hasta, limit)
+        return {
+            "revocaciones": [
+                {
+                    "jti": s.token_jti,
+                    "expires_at": s.expires_at.isoformat() if s.expires_at else None,
+                    "revoked_at": s.revoked_at.isoformat() if s.revoked_at else None,
+                } for s in sesiones
+            ],
+            "has_more": len(sesiones) == limit,
+        }
@@ -1,8 +1,10 @@
 # IAM Service - Use Case: Login
 from datetime import datetime, timedelta
+from typing import Optional
 from sqlalchemy.orm import Session
 from shared.common import (
-    verify_password, 
+    PasswordHasherPool,
+    get_password_pool,
     create_jwt_token, 
     generate_uuid,
     AuditHelper,
@@ -28,6 +30,7 @@ class LoginUseCase:
         jwt_secret: str,
         jwt_algorithm: str = "HS256",
         jwt_expiration_minutes: int = 1440,
+        password_pool: Optional[PasswordHasherPool] = None,
     ):
         self.usuario_repository = usuario_repository
         self.sesion_repository = sesion_repository
@@ -35,8 +38,9 @@ class LoginUseCase:
         self.jwt_secret = jwt_secret
         self.jwt_algorithm = jwt_algorithm
         self.jwt_expiration_minutes = jwt_expiration_minutes
+        self.password_pool = password_pool or get_password_pool()
     
-    def execute(
+    async def execute(
         self,
         email: str,
         password: str,
@@ -44,8 +48,8 @@ class LoginUseCase:
         user_agent: str = None,
     ) -> dict:
 
-        # Buscar usuario por email
-        usuario = self.usuario_repository.find_by_email(email)
+        # Buscar usuario por email, con su rol en la misma consulta
+        usuario = self.usuario_repository.find_by_email_with_rol(email)
         if not usuario:
             # AUDITORÍA: Login fallido - usuario no existe
             try:
@@ -70,8 +74,8 @@ class LoginUseCase:
             
             raise InvalidCredentialsException("Credenciales inválidas")
         
-        # Verificar password
-        if not verify_password(password, usuario.password_hash):
+        # Verificar password (bcrypt en el pool: no bloquea el event loop; 429 si está saturado)
+        if not await self.password_pool.verify(password, usuario.password_hash):
             # AUDITORÍA: Login fallido - contraseña incorrecta
             try:
                 AuditHelper.log_action(
@@ -122,8 +126,7 @@ class LoginUseCase:
             
             raise UserInactiveException(f"Usuario {usuario.status.lower()}")
         
-        # Cargar información del rol
-        usuario_con_rol = self.usuario_repository.find_by_id_with_rol(usuario.id)
+        rol_nombre = usuario.rol.nombre if usuario.rol else None
         
         # Generar JTI (JWT ID) único
         jti = generate_uuid()
@@ -133,7 +136,7 @@ class LoginUseCase:
             "user_id": usuario.id,
             "username": usuario.username,
             "email": usuario.email,
-            "rol_nombre": usuario_con_rol.rol.nombre if usuario_con_rol.rol else None,
+            "rol_nombre": rol_nombre,
             "jti": jti,
         }
         
@@ -156,15 +159,15 @@ class LoginUseCase:
             expires_at=expires_at,
             revoked=False,
         )
-        self.sesion_repository.create(sesion)
+        self.sesion_repository.create(sesion, commit=False)
         
-        # AUDITORÍA: Login exitoso
-        try:
-            AuditHelper.log_action(
-                session=self.db_session,
+        # AUDITORÍA: Login exitoso (al AuditSink, o en la misma transacción que la sesión)
+        AuditHelper.log_actions(
+            self.db_session,
+            [dict(
                 user_id=usuario.id,
                 username=usuario.username,
-                rol_nombre=usuario_con_rol.rol.nombre if usuario_con_rol.rol else None,
+                rol_nombre=rol_nombre,
                 accion=AccionAuditoria.LOGIN,
                 entidad="Usuario",
                 entidad_id=usuario.id,
@@ -175,12 +178,14 @@ class LoginUseCase:
                 metodo_http="POST",
                 exitoso=True,
                 codigo_respuesta=200,
-            )
-        except:
-            pass  # No fallar si falla la auditoría
+            )],
+            commit=False,
+        )
+        # Un único commit para sesión + auditoría
+        self.db_session.commit()
         
         return {
             "access_token": token,
             "token_type": "bearer",
-            "user": usuario_con_rol.to_dict_safe(),
+            "user": usuario.to_dict_safe(),
         }
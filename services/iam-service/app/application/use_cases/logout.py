@@ -0,0 +1,58 @@
+# IAM Service - Use Case: Logout
+from typing import Optional
+from sqlalchemy.orm import Session
+from shared.common import AuditHelper, AccionAuditoria, Principal, get_revocation_set
+from app.domain import SesionRepository
+
+
+class LogoutUseCase:
+    """Caso de uso: Cerrar la sesión del token actual (revoca su JTI)"""
+    
+    def __init__(self, sesion_repository: SesionRepository, db_session: Session):
+        self.sesion_repository = sesion_repository
+        self.db_session = db_session
+    
+    def execute(
+        self,
+        principal: Principal,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+    ) -> dict:
+        """
+        Revoca la sesión del token. IAM la rechaza desde ya; el resto de servicios
+        en cuanto su RevocationPoller lee el feed de revocaciones (segundos).
+        
+        Args:
+            principal: Usuario autenticado (con el jti del token)
+        
+        Returns:
+            Dict con mensaje de confirmación
+        """
+        if principal.jti:
+            self.sesion_repository.revoke(principal.jti)
+            revocaciones = get_revocation_set()
+            if revocaciones is not None:
+                revocaciones.add(principal.jti, principal.exp)
+        
+        # AUDITORÍA: Logout
+        try:
+            AuditHelper.log_action(
+                session=self.db_session,
+                user_id=principal.user_id,
+                username=principal.username,
+                rol_nombre=principal.rol,
+                accion=AccionAuditoria.LOGOUT,
+                entidad="Sesion",
+                entidad_id=principal.jti,
+                descripcion=f"Logout de {principal.username}",
+                ip_address=ip_address,
+                user_agent=user_agent,
+                endpoint="/v1/auth/logout",
+                metodo_http="POST",
+                exitoso=True,
+                codigo_respuesta=200,
+            )
+        except Exception:
+            pass
+        
+        return {"message": "Sesión cerrada"}
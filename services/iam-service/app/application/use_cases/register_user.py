@@ -1,8 +1,10 @@
 # IAM Service - Use Case: Register User
+from typing import Optional
 from sqlalchemy.orm import Session
 from shared.common import (
     generate_uuid, 
-    hash_password, 
+    PasswordHasherPool,
+    get_password_pool,
     validate_password_strength,
     AuditHelper,
     AccionAuditoria,
@@ -26,12 +28,14 @@ class RegisterUserUseCase:
         usuario_repository: UsuarioRepository,
         rol_repository: RolRepository,
         db_session: Session,
+        password_pool: Optional[PasswordHasherPool] = None,
     ):
         self.usuario_repository = usuario_repository
         self.rol_repository = rol_repository
         self.db_session = db_session
+        self.password_pool = password_pool or get_password_pool()
     
-    def execute(
+    async def execute(
         self,
         username: str,
         email: str,
@@ -84,7 +88,7 @@ class RegisterUserUseCase:
             raise RolNotFoundException(f"El rol {rol_nombre} no existe")
         
         # Hash de contraseña
-        password_hash = hash_password(password)
+        password_hash = await self.password_pool.hash(password)
         
         # Crear usuario
         nuevo_usuario = Usuario(
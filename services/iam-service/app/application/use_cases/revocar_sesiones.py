@@ -0,0 +1,72 @@
+# IAM Service - Use Case: Cierre forzado de sesiones de un usuario
+from typing import Optional
+from sqlalchemy.orm import Session
+from shared.common import ForbiddenException, AuditHelper, AccionAuditoria, Principal, get_revocation_set
+from app.domain import UsuarioRepository, SesionRepository, UserNotFoundException
+
+
+class RevocarSesionesUseCase:
+    """Caso de uso: Revocar todas las sesiones vigentes de un usuario (solo ADMIN)"""
+    
+    def __init__(
+        self,
+        usuario_repository: UsuarioRepository,
+        sesion_repository: SesionRepository,
+        db_session: Session,
+    ):
+        self.usuario_repository = usuario_repository
+        self.sesion_repository = sesion_repository
+        self.db_session = db_session
+    
+    def execute(
+        self,
+        principal: Principal,
+        user_id: str,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+    ) -> dict:
+        """
+        Revoca las sesiones no expiradas del usuario
+        
+        Returns:
+            Dict con: {user_id, sesiones_revocadas}
+        
+        Raises:
+            ForbiddenException: Si el usuario actual no es ADMIN
+            UserNotFoundException: Si el usuario no existe
+        """
+        if principal.rol != "ADMIN":
+            raise ForbiddenException("Solo los administradores pueden cerrar sesiones de otros usuarios")
+        
+        usuario = self.usuario_repository.find_by_id(user_id)
+        if not usuario:
+            raise UserNotFoundException(f"Usuario con ID {user_id} no encontrado")
+        
+        sesiones = self.sesion_repository.revoke_all_for_user(user_id)
+        revocaciones = get_revocation_set()
+        if revocaciones is not None:
+            for sesion in sesiones:
+                revocaciones.add(sesion.token_jti, sesion.expires_at)
+        
+        # AUDITORÍA: Cierre forzado de sesiones
+        try:
+            AuditHelper.log_action(
+                session=self.db_session,
+                user_id=principal.user_id,
+                username=principal.username,
+                rol_nombre=principal.rol,
+                accion=AccionAuditoria.REVOKE_SESSIONS,
+                entidad="Usuario",
+                entidad_id=user_id,
+                descripcion=f"Cierre forzado de {len(sesiones)} sesiones de {usuario.username}",
+                ip_address=ip_address,
+                user_agent=user_agent,
+                endpoint=f"/v1/admin/users/{user_id}/revocar-sesiones",
+                metodo_http="POST",
+                exitoso=True,
+                codigo_respuesta=200,
+            )
+        except Exception:
+            pass
+        
+        return {"user_id": user_id, "sesiones_revocadas": len(sesiones)}
@@ -71,4 +71,5 @@ class Sesion:
     user_agent: Optional[str] = None
     expires_at: Optional[datetime] = None
     revoked: bool = False
+    revoked_at: Optional[datetime] = None
     created_at: Optional[datetime] = None
@@ -1,5 +1,6 @@
 # IAM Service - Domain Ports (Interfaces)
 from abc import ABC, abstractmethod
+from datetime import datetime
 from typing import Optional, List
 from .models import Usuario, Rol, Sesion
 
@@ -57,13 +58,19 @@ class UsuarioRepository(ABC):
     def find_by_id_with_rol(self, usuario_id: str) -> Optional[Usuario]:
         """Obtiene usuario con información del rol cargada"""
         pass
+    
+    @abstractmethod
+    def find_by_email_with_rol(self, email: str) -> Optional[Usuario]:
+        """Obtiene usuario y rol por email en una sola consulta (login)"""
+        pass
 
 
 class SesionRepository(ABC):
     """Puerto para repositorio de sesiones"""
     
     @abstractmethod
-    def create(self, sesion: Sesion) -> Sesion:
+    def create(self, sesion: Sesion, commit: bool = True) -> Sesion:
+        """Registra la sesión; con commit=False queda en la transacción del llamador"""
         pass
     
     @abstractmethod
@@ -73,3 +80,19 @@ class SesionRepository(ABC):
     @abstractmethod
     def revoke(self, token_jti: str) -> bool:
         pass
+    
+    @abstractmethod
+    def revoke_all_for_user(self, usuario_id: str) -> List[Sesion]:
+        """Revoca las sesiones vigentes del usuario y las devuelve"""
+        pass
+    
+    @abstractmethod
+    def find_revoked_since(
+        self,
+        desde: Optional[datetime],
+        desde_jti: Optional[str],
+        hasta: datetime,
+        limit: int,
+    ) -> List[Sesion]:
+        """Sesiones no expiradas revocadas tras el cursor (revoked_at, token_jti) y antes de `hasta`"""
+        pass
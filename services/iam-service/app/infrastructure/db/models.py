@@ -61,6 +61,7 @@ class SesionModel(Base):
     user_agent = Column(String(255))
     expires_at = Column(TIMESTAMP, nullable=False, index=True)
     revoked = Column(Boolean, nullable=False, default=False)
+    revoked_at = Column(TIMESTAMP, nullable=True)
     created_at = Column(TIMESTAMP, nullable=False, server_default=func.current_timestamp())
     
     # Relaciones
@@ -1,6 +1,8 @@
 # IAM Service - Infrastructure Repositories
+from datetime import datetime
 from typing import Optional, List
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, joinedload
 from app.domain import (
     Usuario,
     Rol,
@@ -57,6 +59,7 @@ def sesion_model_to_domain(model: SesionModel) -> Sesion:
         user_agent=model.user_agent,
         expires_at=model.expires_at,
         revoked=model.revoked,
+        revoked_at=model.revoked_at,
         created_at=model.created_at,
     )
 
@@ -179,6 +182,16 @@ class SqlAlchemyUsuarioRepository(UsuarioRepository):
                 self.session.refresh(model)
             return usuario_model_to_domain(model)
         return None
+    
+    def find_by_email_with_rol(self, email: str) -> Optional[Usuario]:
+        # JOIN con roles en la misma consulta (como v_usuarios_con_rol), sin lazy load
+        model = self.session.query(UsuarioModel).options(
+            joinedload(UsuarioModel.rol)
+        ).filter(
+            UsuarioModel.email == email,
+            UsuarioModel.is_deleted == False
+        ).first()
+        return usuario_model_to_domain(model) if model else None
 
 
 class SqlAlchemySesionRepository(SesionRepository):
@@ -187,7 +200,7 @@ class SqlAlchemySesionRepository(SesionRepository):
     def __init__(self, session: Session):
         self.session = session
     
-    def create(self, sesion: Sesion) -> Sesion:
+    def create(self, sesion: Sesion, commit: bool = True) -> Sesion:
         model = SesionModel(
             id=sesion.id,
             usuario_id=sesion.usuario_id,
@@ -198,6 +211,9 @@ class SqlAlchemySesionRepository(SesionRepository):
             revoked=sesion.revoked,
         )
         self.session.add(model)
+        if not commit:
+            # El INSERT sale con el commit del llamador; sin refresh (un SELECT menos)
+            return sesion
         self.session.commit()
         self.session.refresh(model)
         return sesion_model_to_domain(model)
@@ -209,7 +225,42 @@ class SqlAlchemySesionRepository(SesionRepository):
     def revoke(self, token_jti: str) -> bool:
         model = self.session.query(SesionModel).filter(SesionModel.token_jti == token_jti).first()
         if model:
-            model.revoked = True
-            self.session.commit()
+            if not model.revoked:
+                model.revoked = True
+                model.revoked_at = datetime.utcnow()
+                self.session.commit()
             return True
         return False
+    
+    def revoke_all_for_user(self, usuario_id: str) -> List[Sesion]:
+        ahora = datetime.utcnow()
+        models = self.session.query(SesionModel).filter(
+            SesionModel.usuario_id == usuario_id,
+            SesionModel.revoked == False,
+            SesionModel.expires_at > ahora,
+        ).all()
+        for model in models:
+            model.revoked = True
+            model.revoked_at = ahora
+        self.session.commit()
+        return [sesion_model_to_domain(m) for m in models]
+    
+    def find_revoked_since(
+        self,
+        desde: Optional[datetime],
+        desde_jti: Optional[str],
+        hasta: datetime,
+        limit: int,
+    ) -> List[Sesion]:
+        query = self.session.query(SesionModel).filter(
+            SesionModel.revoked == True,
+            SesionModel.revoked_at < hasta,
+            SesionModel.expires_at > datetime.utcnow(),
+        )
+        if desde is not None:
+            query = query.filter(or_(
+                SesionModel.revoked_at > desde,
+                and_(SesionModel.revoked_at == desde, SesionModel.token_jti > (desde_jti or "")),
+            ))
+        models = query.order_by(SesionModel.revoked_at.asc(), SesionModel.token_jti.asc()).limit(limit).all()
+        return [sesion_model_to_domain(m) for m in models]
@@ -2,8 +2,10 @@
 from functools import lru_cache
 from functools import lru_cache
 from fastapi import Depends
+from typing import AsyncGenerator
 from sqlalchemy.orm import Session
-from shared.common import get_settings as get_common_settings, Settings
+from sqlalchemy.ext.asyncio import AsyncSession
+from shared.common import get_settings as get_common_settings, Settings, get_password_pool
 from shared.common.database import get_db_session
 from app.infrastructure.db.repositories import (
     SqlAlchemyUsuarioRepository,
@@ -14,10 +16,14 @@ from app.application.use_cases.register_user import RegisterUserUseCase
 from app.application.use_cases.login import LoginUseCase
 from app.application.use_cases.get_current_user import GetCurrentUserUseCase
 from app.application.use_cases.list_users import ListUsersUseCase
+from app.application.use_cases.logout import LogoutUseCase
+from app.application.use_cases.revocar_sesiones import RevocarSesionesUseCase
+from app.application.use_cases.listar_revocaciones import ListarRevocacionesUseCase
 
 
 # Importar el session factory (se inicializará en main.py)
 _session_factory = None
+_async_session_factory = None
 
 
 def set_session_factory(factory):
@@ -37,6 +43,19 @@ def get_db() -> Session:
         db.close()
 
 
+def set_async_session_factory(factory):
+    global _async_session_factory
+    _async_session_factory = factory
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Sesión async: las consultas no bloquean el event loop mientras esperan a MySQL"""
+    if _async_session_factory is None:
+        raise RuntimeError("Async session factory not initialized")
+    async with _async_session_factory() as db:
+        yield db
+
+
 @lru_cache()
 def get_settings() -> Settings:
     """Dependency para obtener configuración"""
@@ -48,7 +67,7 @@ def get_register_user_use_case(db: Session = Depends(get_db)):
     """Factory para RegisterUserUseCase"""
     usuario_repo = SqlAlchemyUsuarioRepository(db)
     rol_repo = SqlAlchemyRolRepository(db)
-    return RegisterUserUseCase(usuario_repo, rol_repo, db)
+    return RegisterUserUseCase(usuario_repo, rol_repo, db, password_pool=get_password_pool())
 
 
 def get_login_use_case(
@@ -65,6 +84,7 @@ def get_login_use_case(
         jwt_secret=settings.JWT_SECRET_KEY,
         jwt_algorithm=settings.JWT_ALGORITHM,
         jwt_expiration_minutes=settings.JWT_EXPIRATION_MINUTES,
+        password_pool=get_password_pool(),
     )
 
 
@@ -78,3 +98,22 @@ def get_list_users_use_case(db: Session = Depends(get_db)):
     """Factory para ListUsersUseCase"""
     usuario_repo = SqlAlchemyUsuarioRepository(db)
     return ListUsersUseCase(usuario_repo)
+
+
+def get_logout_use_case(db: Session = Depends(get_db)):
+    """Factory para LogoutUseCase"""
+    sesion_repo = SqlAlchemySesionRepository(db)
+    return LogoutUseCase(sesion_repo, db)
+
+
+def get_revocar_sesiones_use_case(db: Session = Depends(get_db)):
+    """Factory para RevocarSesionesUseCase"""
+    usuario_repo = SqlAlchemyUsuarioRepository(db)
+    sesion_repo = SqlAlchemySesionRepository(db)
+    return RevocarSesionesUseCase(usuario_repo, sesion_repo, db)
+
+
+def get_listar_revocaciones_use_case(db: Session = Depends(get_db)):
+    """Factory para ListarRevocacionesUseCase"""
+    sesion_repo = SqlAlchemySesionRepository(db)
+    return ListarRevocacionesUseCase(sesion_repo)
@@ -5,12 +5,18 @@ from pydantic import BaseModel
 from typing import Optional
 from shared.common import (
     DomainException,
+    TooManyRequestsException,
+    UnauthorizedException,
+    ForbiddenException,
     extract_bearer_token,
     decode_jwt_token,
+    authenticate,
 )
+from app.domain import UserNotFoundException
 from app.infrastructure.http.dependencies import (
     get_list_users_use_case,
     get_register_user_use_case,
+    get_revocar_sesiones_use_case,
     get_settings,
 )
 
@@ -59,7 +65,7 @@ async def create_user(
             )
         
         # Ejecutar caso de uso
-        usuario = use_case.execute(
+        usuario = await use_case.execute(
             username=request.username,
             email=request.email,
             password=request.password,
@@ -79,6 +85,12 @@ async def create_user(
             "status": usuario.status,
         }
         
+    except TooManyRequestsException as e:
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"error": e.code, "message": e.message},
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except DomainException as e:
         status_code = status.HTTP_403_FORBIDDEN if "Forbidden" in e.__class__.__name__ else status.HTTP_400_BAD_REQUEST
         return JSONResponse(
@@ -98,7 +110,7 @@ async def update_user(
     try:
         from app.infrastructure.db.repositories import SqlAlchemyUsuarioRepository, SqlAlchemyRolRepository
         from app.infrastructure.db.models import UsuarioModel
-        from shared.common import hash_password
+        from shared.common import get_password_pool
         from app.main import SessionLocal
         
         # Extraer y decodificar token
@@ -134,7 +146,7 @@ async def update_user(
                 usuario_model.email = request.email
             
             if request.password is not None and request.password.strip():
-                usuario_model.password_hash = hash_password(request.password)
+                usuario_model.password_hash = await get_password_pool().hash(request.password)
             
             if request.rol_nombre is not None:
                 rol_repo = SqlAlchemyRolRepository(db)
@@ -283,6 +295,39 @@ async def list_users(
         )
 
 
+@router.post("/users/{user_id}/revocar-sesiones")
+async def revocar_sesiones(
+    user_id: str,
+    authorization: Optional[str] = Header(None),
+    use_case = Depends(get_revocar_sesiones_use_case),
+    settings = Depends(get_settings),
+):
+    """Cierre forzado: revoca todas las sesiones vigentes del usuario (solo ADMIN)"""
+    try:
+        principal = authenticate(authorization, settings)
+        return use_case.execute(principal, user_id)
+    except UnauthorizedException as e:
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"error": e.code, "message": e.message}
+        )
+    except ForbiddenException as e:
+        return JSONResponse(
+            status_code=status.HTTP_403_FORBIDDEN,
+            content={"error": e.code, "message": e.message}
+        )
+    except UserNotFoundException as e:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"error": e.code, "message": e.message}
+        )
+    except DomainException as e:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": e.code, "message": e.message}
+        )
+
+
 class UserIdsRequest(BaseModel):
     user_ids: list[str]
 
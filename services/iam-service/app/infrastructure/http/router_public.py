@@ -1,24 +1,38 @@
 # IAM Service - HTTP Router Public
-from fastapi import APIRouter, Depends, Header, status
+from fastapi import APIRouter, Depends, Header, status, Query
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, EmailStr
 from typing import Optional
+from datetime import datetime
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from shared.common import (
     DomainException,
+    TooManyRequestsException,
+    UnauthorizedException,
+    ForbiddenException,
     extract_bearer_token,
     decode_jwt_token,
+    listar_auditoria,
+    MAX_AUDITORIA_LIMIT,
+    authenticate,
 )
 from app.infrastructure.http.dependencies import (
     get_register_user_use_case,
     get_login_use_case,
     get_current_user_use_case,
     get_settings,
+    get_async_db,
+    get_logout_use_case,
+    get_listar_revocaciones_use_case,
 )
 
 
 router = APIRouter(prefix="/v1", tags=["auth"])
 
+# Máximo de revocaciones por página del feed
+MAX_REVOCACIONES_LIMIT = 5000
+
 
 # Schemas
 class RegisterRequest(BaseModel):
@@ -43,7 +57,7 @@ async def register(
 ):
     """Registrar nuevo usuario"""
     try:
-        usuario = use_case.execute(
+        usuario = await use_case.execute(
             username=request.username,
             email=request.email,
             password=request.password,
@@ -52,6 +66,12 @@ async def register(
             apellidos=request.apellidos,
         )
         return usuario.to_dict_safe()
+    except TooManyRequestsException as e:
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"error": e.code, "message": e.message},
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except DomainException as e:
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -66,11 +86,17 @@ async def login(
 ):
     """Login y obtener JWT token"""
     try:
-        result = use_case.execute(
+        result = await use_case.execute(
             email=request.email,
             password=request.password,
         )
         return result
+    except TooManyRequestsException as e:
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"error": e.code, "message": e.message},
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except DomainException as e:
         return JSONResponse(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -78,6 +104,45 @@ async def login(
         )
 
 
+@router.post("/auth/logout")
+async def logout(
+    authorization: Optional[str] = Header(None),
+    use_case = Depends(get_logout_use_case),
+    settings = Depends(get_settings),
+):
+    """Cerrar sesión: revoca el token actual en todos los servicios"""
+    try:
+        principal = authenticate(authorization, settings)
+        return use_case.execute(principal)
+    except DomainException as e:
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"error": e.code, "message": e.message}
+        )
+
+
+@router.get("/auth/revocaciones")
+async def list_revocaciones(
+    desde: Optional[datetime] = Query(None, description="revoked_at de la última revocación procesada"),
+    desde_jti: Optional[str] = Query(None, description="jti de la última revocación procesada"),
+    limit: int = Query(1000, ge=1, le=MAX_REVOCACIONES_LIMIT),
+    use_case = Depends(get_listar_revocaciones_use_case),
+):
+    """
+    Endpoint usado por los demás servicios: feed de JTIs revocados y aún no expirados,
+    ordenado por (revoked_at, jti), para su RevocationSet en memoria.
+    """
+    try:
+        return use_case.execute(desde, desde_jti, limit)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"error": "InternalError", "message": str(e)}
+        )
+
+
 @router.get("/users/me")
 async def get_current_user(
     authorization: Optional[str] = Header(None),
@@ -99,3 +164,65 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             content={"error": e.code, "message": e.message}
         )
+
+
+@router.get("/auditoria")
+async def list_auditoria(
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    limit: int = Query(50, ge=1, le=MAX_AUDITORIA_LIMIT),
+    desde: Optional[datetime] = Query(None, description="created_at mínimo (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="created_at máximo (exclusivo)"),
+    user_id: Optional[str] = Query(None),
+    entidad: Optional[str] = Query(None),
+    entidad_id: Optional[str] = Query(None),
+    accion: Optional[str] = Query(None),
+    exitoso: Optional[bool] = Query(None),
+    authorization: Optional[str] = Header(None),
+    settings = Depends(get_settings),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Auditoría de IAM Service (solo ADMIN), paginada por cursor sobre (created_at, id)"""
+    try:
+        token = extract_bearer_token(authorization)
+        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
+        if payload.get("rol_nombre") != "ADMIN":
+            return JSONResponse(
+                status_code=status.HTTP_403_FORBIDDEN,
+                content={"error": "Forbidden", "message": "Solo ADMIN puede consultar la auditoría"}
+            )
+
+        return await listar_auditoria(
+            db,
+            limit=limit,
+            cursor=cursor,
+            desde=desde,
+            hasta=hasta,
+            user_id=user_id,
+            entidad=entidad,
+            entidad_id=entidad_id,
+            accion=accion,
+            exitoso=exitoso,
+        )
+    except UnauthorizedException as e:
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"error": e.code, "message": e.message}
+        )
+    except ForbiddenException as e:
+        return JSONResponse(
+            status_code=status.HTTP_403_FORBIDDEN,
+            content={"error": e.code, "message": e.message}
+        )
+    except DomainException as e:
+        # Cursor o filtros inválidos
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": e.code, "message": e.message}
+        )
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"error": "InternalError", "message": str(e)}
+        )
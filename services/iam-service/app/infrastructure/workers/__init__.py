@@ -0,0 +1 @@
+# IAM Service - Infrastructure Workers Package Init
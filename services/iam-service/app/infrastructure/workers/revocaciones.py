@@ -0,0 +1,26 @@
+# IAM Service - Worker: feed de revocaciones leído de la propia BD
+import asyncio
+from datetime import datetime
+from typing import Optional
+from app.infrastructure.db.repositories import SqlAlchemySesionRepository
+from app.application.use_cases.listar_revocaciones import ListarRevocacionesUseCase
+
+
+def build_revocaciones_fetch(session_factory):
+    """
+    fetch del RevocationPoller de IAM: la misma página que GET /v1/auth/revocaciones,
+    leída directamente de sga_iam.sesiones en lugar de llamarse a sí mismo por HTTP
+    """
+
+    def leer(desde: Optional[str], desde_jti: Optional[str], limit: int) -> dict:
+        db = session_factory()
+        try:
+            use_case = ListarRevocacionesUseCase(SqlAlchemySesionRepository(db))
+            return use_case.execute(datetime.fromisoformat(desde) if desde else None, desde_jti, limit)
+        finally:
+            db.close()
+
+    async def fetch(desde: Optional[str], desde_jti: Optional[str], limit: int) -> dict:
+        return await asyncio.to_thread(leer, desde, desde_jti, limit)
+
+    return fetch
@@ -1,8 +1,16 @@
 # IAM Service - Main Application
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from shared.common import get_settings, create_db_engine, create_session_factory
+from fastapi.responses import PlainTextResponse
+from shared.common import (
+    get_settings, create_db_engine, create_session_factory, create_async_db_engine, create_async_session_factory,
+    render_pool_metrics, init_audit_sink, close_audit_sink,
+    init_token_verifier, init_revocaciones, close_revocaciones,
+    init_password_pool, close_password_pool,
+)
 from app.infrastructure.http import dependencies
+from app.infrastructure.workers.revocaciones import build_revocaciones_fetch
 from app.infrastructure.http.router_public import router as public_router
 from app.infrastructure.http.router_admin import router as admin_router
 from app.infrastructure.http.router_docente import router as docente_router
@@ -18,18 +26,44 @@ print(f"🔧 CORS_ORIGINS type: {type(settings.CORS_ORIGINS)}")
 print(f"🔧 CORS_ORIGINS value: {settings.CORS_ORIGINS}")
 
 # Crear engine y session factory
-engine = create_db_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+engine = create_db_engine(settings.DATABASE_URL, echo=settings.DEBUG, settings=settings)
 session_factory = create_session_factory(engine)
 SessionLocal = session_factory  # Exportar para uso en routers
 
 # Inyectar session factory en dependencies
 dependencies.set_session_factory(session_factory)
 
+# Clave JWT preparada una vez; los tokens verificados se reutilizan hasta su exp
+init_token_verifier(settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM, settings.JWT_VERIFY_CACHE_SIZE)
+
+# bcrypt en un pool acotado de threads: login/registro no bloquean el event loop
+init_password_pool(settings)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Engine async (aiomysql) para los handlers que consultan con AsyncSession
+    async_engine = create_async_db_engine(settings.ASYNC_DATABASE_URL, echo=settings.DEBUG, settings=settings)
+    dependencies.set_async_session_factory(create_async_session_factory(async_engine))
+    
+    # Auditoría por lotes: los handlers encolan y un task escribe en segundo plano
+    init_audit_sink(session_factory, settings)
+    
+    # JTIs revocados en memoria: IAM lee su propio feed de la BD
+    init_revocaciones(settings, fetch=build_revocaciones_fetch(session_factory))
+    yield
+    await close_revocaciones()
+    await close_audit_sink()
+    close_password_pool()
+    await async_engine.dispose()
+
+
 # Crear aplicación FastAPI
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     debug=settings.DEBUG,
+    lifespan=lifespan,
 )
 
 # CORS - Configuración explícita
@@ -66,6 +100,12 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Métricas del pool de conexiones a BD (formato Prometheus)"""
+    return render_pool_metrics(settings.APP_NAME)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
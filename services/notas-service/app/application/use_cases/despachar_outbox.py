@@ -0,0 +1,80 @@
+# Notas Service - Use Case: Despachar outbox de notificaciones
+import asyncio
+from typing import List, Optional, Tuple
+from app.domain import OutboxNotificacion, OutboxRepository, NotificacionTransport
+
+
+class DespacharOutboxUseCase:
+    """
+    Caso de uso que drena outbox_notificaciones.
+
+    1. Devuelve a PENDIENTE los mensajes PROCESANDO abandonados por réplicas caídas
+    2. Reclama un lote (FOR UPDATE SKIP LOCKED) y lo pasa a PROCESANDO
+    3. Envía el lote por el transporte con concurrencia limitada
+    4. Marca ENVIADO en bloque; los fallos quedan FALLIDO con reintento
+       programado (backoff exponencial) hasta agotar max_intentos
+    """
+
+    def __init__(
+        self,
+        outbox_repository: OutboxRepository,
+        transport: NotificacionTransport,
+        worker_id: str,
+        batch_size: int = 100,
+        concurrency: int = 10,
+        max_intentos: int = 5,
+        backoff_base_seconds: int = 30,
+        backoff_max_seconds: int = 3600,
+        stale_after_seconds: int = 300,
+    ):
+        self.outbox_repository = outbox_repository
+        self.transport = transport
+        self.worker_id = worker_id
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_intentos = max_intentos
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.stale_after_seconds = stale_after_seconds
+
+    async def execute(self) -> dict:
+        liberados = self.outbox_repository.release_stale(self.stale_after_seconds)
+        lote = self.outbox_repository.claim_batch(self.worker_id, self.batch_size)
+        if not lote:
+            return {"reclamados": 0, "enviados": 0, "fallidos": 0, "liberados": liberados}
+
+        semaforo = asyncio.Semaphore(self.concurrency)
+
+        async def enviar(outbox: OutboxNotificacion) -> Optional[str]:
+            async with semaforo:
+                try:
+                    await self.transport.send(outbox)
+                    return None
+                except Exception as e:
+                    return f"{type(e).__name__}: {e}"
+
+        errores = await asyncio.gather(*[enviar(o) for o in lote])
+
+        enviados: List[str] = []
+        fallos: List[Tuple[str, str, Optional[int]]] = []
+        for outbox, error in zip(lote, errores):
+            if error is None:
+                enviados.append(outbox.id)
+            else:
+                fallos.append((outbox.id, error[:2000], self._reintentar_en(outbox.intentos + 1)))
+
+        self.outbox_repository.mark_enviados(enviados, self.worker_id)
+        self.outbox_repository.mark_fallidos(fallos, self.worker_id)
+
+        return {
+            "reclamados": len(lote),
+            "enviados": len(enviados),
+            "fallidos": len(fallos),
+            "liberados": liberados,
+        }
+
+    def _reintentar_en(self, intentos: int) -> Optional[int]:
+        """Segundos hasta el próximo intento, o None si ya no se reintenta"""
+        if intentos >= self.max_intentos:
+            return None
+        return min(self.backoff_base_seconds * (2 ** (intentos - 1)), self.backoff_max_seconds)
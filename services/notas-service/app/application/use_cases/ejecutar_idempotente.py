@@ -0,0 +1,157 @@
+# Notas Service - Use Case: Ejecutar una petición con Idempotency-Key
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from app.domain import (
+    IdempotencyRepository,
+    IdempotencyKeyReusedException,
+    IdempotencyInProgressException,
+)
+
+logger = logging.getLogger(__name__)
+
+# Peticiones en curso en este proceso: (user_id, key) -> evento que se activa al terminar
+_EN_CURSO: Dict[Tuple[str, str], asyncio.Event] = {}
+
+
+def hash_request(payload: Any) -> str:
+    """Huella estable del cuerpo de la petición (para detectar claves reutilizadas con otro contenido)"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class EjecutarIdempotenteUseCase:
+    """
+    Ejecuta un handler como mucho una vez por (user_id, Idempotency-Key).
+
+    1. Reserva la clave (INSERT en estado EN_PROCESO)
+    2. Si ya estaba COMPLETADO devuelve la respuesta guardada sin ejecutar nada
+    3. Si otra petición la tiene EN_PROCESO espera a que termine: en el mismo
+       proceso con un asyncio.Event, entre réplicas consultando la BD
+    4. Una reserva EN_PROCESO sin progreso más allá de stale_after_seconds
+       (p. ej. la réplica murió) o ya expirada se reclama y se vuelve a ejecutar
+
+    Mientras el handler corre, un hilo renueva la reserva (updated_at) cada
+    heartbeat_seconds, así un lote que tarda más que stale_after_seconds no se
+    considera abandonado ni lo reclama otra réplica. La renovación usa
+    lease_repository, con su propia sesión: la de la petición está ocupada con el lote.
+    Si el handler falla la reserva se libera para que el reintento pueda ejecutarse.
+    El repositorio es síncrono (PyMySQL): sus llamadas corren en un hilo con
+    asyncio.to_thread para no bloquear el event loop mientras espera a MySQL.
+    """
+
+    def __init__(
+        self,
+        idempotency_repository: IdempotencyRepository,
+        ttl_seconds: int = 86400,
+        wait_timeout_seconds: float = 30.0,
+        stale_after_seconds: int = 120,
+        poll_interval_seconds: float = 0.5,
+        lease_repository: Optional[IdempotencyRepository] = None,
+        heartbeat_seconds: Optional[float] = None,
+    ):
+        self.idempotency_repository = idempotency_repository
+        self.lease_repository = lease_repository or idempotency_repository
+        # Varias renovaciones dentro de la ventana: una que falle no deja vencer la reserva
+        self.heartbeat_seconds = heartbeat_seconds or stale_after_seconds / 3
+        self.ttl_seconds = ttl_seconds
+        self.wait_timeout_seconds = wait_timeout_seconds
+        self.stale_after_seconds = stale_after_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+
+    async def execute(
+        self,
+        key: str,
+        user_id: str,
+        request_hash: str,
+        handler: Callable[[], Awaitable[Tuple[int, dict]]],
+    ) -> Tuple[int, dict]:
+        """Devuelve (status_code, body), ejecutando handler solo si la clave no tiene resultado"""
+        repo = self.idempotency_repository
+
+        if await asyncio.to_thread(repo.reservar, key, user_id, request_hash, self.ttl_seconds):
+            return await self._ejecutar(key, user_id, handler)
+
+        deadline = time.monotonic() + self.wait_timeout_seconds
+        while True:
+            record = await asyncio.to_thread(repo.find, key, user_id, self.stale_after_seconds)
+
+            if record is None:
+                # Expirada o liberada por un intento fallido: reclamarla o reservarla de nuevo
+                if await self._tomar_control(key, user_id, request_hash) \
+                        or await asyncio.to_thread(repo.reservar, key, user_id, request_hash, self.ttl_seconds):
+                    return await self._ejecutar(key, user_id, handler)
+            else:
+                if record.request_hash != request_hash:
+                    raise IdempotencyKeyReusedException(
+                        "La Idempotency-Key ya se usó con una petición distinta"
+                    )
+                if record.estado == "COMPLETADO":
+                    return record.status_code or 200, json.loads(record.response_json or "{}")
+                if record.en_proceso_vencido and await self._tomar_control(key, user_id, request_hash):
+                    return await self._ejecutar(key, user_id, handler)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise IdempotencyInProgressException(
+                    "Hay una petición en curso con la misma Idempotency-Key, reintente más tarde"
+                )
+            await self._esperar((user_id, key), remaining)
+
+    async def _ejecutar(self, key: str, user_id: str, handler) -> Tuple[int, dict]:
+        evento = _EN_CURSO.setdefault((user_id, key), asyncio.Event())
+        completado = False
+        # Hilo y no tarea asyncio: sigue renovando aunque el handler bloquee el event loop
+        parar = threading.Event()
+        latido = threading.Thread(
+            target=self._renovar_mientras, args=(key, user_id, parar), name="idempotency-lease", daemon=True
+        )
+        latido.start()
+        try:
+            status_code, body = await handler()
+            await asyncio.to_thread(
+                self.idempotency_repository.completar,
+                key, user_id, status_code, json.dumps(body, default=str),
+            )
+            completado = True
+            return status_code, body
+        finally:
+            # Esperar una renovación en curso: su sesión se cierra al terminar la petición
+            parar.set()
+            await asyncio.to_thread(latido.join)
+            if not completado:
+                try:
+                    await asyncio.to_thread(self.idempotency_repository.liberar, key, user_id)
+                except Exception:
+                    pass  # La reserva se podrá reclamar al quedar vencida
+            evento.set()
+            _EN_CURSO.pop((user_id, key), None)
+
+    def _renovar_mientras(self, key: str, user_id: str, parar: threading.Event) -> None:
+        while not parar.wait(self.heartbeat_seconds):
+            try:
+                if not self.lease_repository.renovar(key, user_id):
+                    return  # Ya completada o liberada
+            except Exception as e:
+                logger.warning("No se pudo renovar la Idempotency-Key %s: %s", key, e)
+
+    async def _tomar_control(self, key: str, user_id: str, request_hash: str) -> bool:
+        return await asyncio.to_thread(
+            self.idempotency_repository.tomar_control,
+            key, user_id, request_hash, self.ttl_seconds, self.stale_after_seconds,
+        )
+
+    async def _esperar(self, clave: Tuple[str, str], remaining: float) -> None:
+        evento = _EN_CURSO.get(clave)
+        if evento is None:
+            # La petición original está en otra réplica: consultar la BD periódicamente
+            await asyncio.sleep(min(self.poll_interval_seconds, remaining))
+            return
+        try:
+            await asyncio.wait_for(evento.wait(), timeout=remaining)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,70 @@
+# Notas Service - Use Case: exportación de notas en formato SIAGIE (una fila por alumno-curso-periodo)
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Sequence
+from app.application.use_cases.obtener_libreta import _orden_columna, promedio_ponderado
+
+# Columnas de notas que siempre se exportan aunque estén vacías (N1..N4 del registro oficial)
+COLUMNAS_MINIMAS = ["N1", "N2", "N3", "N4"]
+
+CABECERA_SIAGIE = ["Grado", "Sección", "Alumno", "Documento", "Curso", "Docente", "Periodo", "Promedio"]
+
+
+def columnas_siagie(columnas: Iterable[str]) -> List[str]:
+    """N1..N4 más las columnas presentes en las notas, en orden N1, N2, ..., N10"""
+    todas = set(COLUMNAS_MINIMAS) | {(c or "N1").upper() for c in columnas}
+    return sorted(todas, key=_orden_columna)
+
+
+def _nombre(apellido_paterno: Any, apellido_materno: Any, nombres: Any) -> str:
+    apellidos = " ".join(p for p in (apellido_paterno, apellido_materno) if p)
+    return ", ".join(p for p in (apellidos, nombres) if p)
+
+
+def _celda(nota: Mapping) -> Any:
+    if nota.get("valor_numerico") is not None:
+        return nota["valor_numerico"]
+    return nota.get("valor_literal") or ""
+
+
+def _fila(grupo: List[Mapping], columnas: Sequence[str]) -> List[Any]:
+    primera = grupo[0]
+    celdas: Dict[str, Any] = {}
+    for nota in grupo:
+        # Filas ordenadas por updated_at: la nota más reciente de la columna queda en la celda
+        celdas[(nota.get("columna_nota") or "N1").upper()] = _celda(nota)
+
+    promedio, literal = promedio_ponderado(grupo)
+    if promedio is not None:
+        promedio = Decimal(str(promedio)).quantize(Decimal("0.01"))
+
+    return [
+        primera["grado_nombre"],
+        primera["seccion_nombre"],
+        _nombre(primera["alumno_apellidos"], primera["alumno_apellido_materno"], primera["alumno_nombres"]),
+        primera["numero_documento"] or "",
+        primera["curso_nombre"],
+        _nombre(primera["docente_apellidos"], None, primera["docente_nombres"]),
+        primera["periodo_nombre"] or "",
+        promedio if promedio is not None else (literal or ""),
+    ] + [celdas.get(c, "") for c in columnas]
+
+
+def pivotar_siagie(filas: Iterable[Mapping], columnas: Sequence[str]) -> Iterator[List[Any]]:
+    """
+    Una fila por (matricula_clase_id, periodo_id) con una celda por columna_nota y el
+    promedio ponderado (mismas reglas que la libreta), en una sola pasada.
+
+    `filas` debe venir ordenado de modo que las notas de una misma matrícula y periodo
+    sean contiguas; solo se retiene en memoria el grupo en curso.
+    """
+    grupo: List[Mapping] = []
+    clave = None
+    for fila in filas:
+        actual = (fila["matricula_clase_id"], fila["periodo_id"])
+        if grupo and actual != clave:
+            yield _fila(grupo, columnas)
+            grupo = []
+        clave = actual
+        grupo.append(fila)
+    if grupo:
+        yield _fila(grupo, columnas)
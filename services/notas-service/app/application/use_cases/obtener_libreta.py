@@ -0,0 +1,151 @@
+# Notas Service - Use Case: Libreta de notas de una clase (alumnos × columnas)
+import re
+from typing import Dict, List, Optional
+from shared.common import NotFoundException, ForbiddenException
+from app.domain import AsyncNotaRepository
+
+# Escala literal MINEDU sobre la nota vigesimal (mismos rangos que usa el frontend)
+LITERAL_POR_MINIMO = [(17, "AD"), (14, "A"), (11, "B"), (0, "C")]
+
+# Puntos para promediar cursos calificados solo con literales
+PUNTOS_LITERAL = {"AD": 4, "A": 3, "B": 2, "C": 1}
+LITERAL_POR_PUNTOS = {v: k for k, v in PUNTOS_LITERAL.items()}
+
+
+def numerico_a_literal(valor: Optional[float]) -> Optional[str]:
+    if valor is None:
+        return None
+    for minimo, literal in LITERAL_POR_MINIMO:
+        if valor >= minimo:
+            return literal
+    return "C"
+
+
+def _orden_columna(columna: str):
+    """N1, N2, ..., N10 en orden numérico; otras columnas al final en orden alfabético"""
+    m = re.match(r"^([A-Za-z]*)(\d+)$", columna)
+    return (0, m.group(1), int(m.group(2))) if m else (1, columna, 0)
+
+
+def _peso(fila: Dict) -> float:
+    """Peso de la nota; si no tiene, el peso por defecto de su tipo de evaluación"""
+    if fila.get("peso") is not None:
+        return float(fila["peso"])
+    if fila.get("peso_default") is not None:
+        return float(fila["peso_default"])
+    return 1.0
+
+
+def promedio_ponderado(notas: List[Dict]) -> tuple:
+    """(promedio numérico ponderado, literal); (None, literal) si el curso es solo literal"""
+    suma = peso_total = 0.0
+    for n in notas:
+        if n.get("valor_numerico") is not None:
+            suma += float(n["valor_numerico"]) * _peso(n)
+            peso_total += _peso(n)
+    if peso_total > 0:
+        promedio = round(suma / peso_total, 2)
+        return promedio, numerico_a_literal(promedio)
+
+    suma = peso_total = 0.0
+    for n in notas:
+        puntos = PUNTOS_LITERAL.get((n.get("valor_literal") or "").upper())
+        if puntos is not None:
+            suma += puntos * _peso(n)
+            peso_total += _peso(n)
+    if peso_total > 0:
+        return None, LITERAL_POR_PUNTOS[min(max(int(suma / peso_total + 0.5), 1), 4)]
+    return None, None
+
+
+class ObtenerLibretaUseCase:
+    """
+    Libreta de una clase en una sola consulta.
+
+    1. Lee clase, matrículas, alumnos y notas con un único SELECT (AsyncNotaRepository.find_libreta_clase)
+    2. Pivota a una fila por alumno y una celda por columna_nota
+    3. Calcula el promedio ponderado por peso (o peso_default del tipo de evaluación)
+       y su equivalente literal; los cursos solo literales se promedian en puntos AD=4..C=1
+
+    Un DOCENTE solo puede ver la libreta de sus clases.
+    """
+
+    def __init__(self, nota_repository: AsyncNotaRepository):
+        self.nota_repository = nota_repository
+
+    async def execute(self, clase_id: str, user_id: str, rol: str, periodo_id: Optional[str] = None) -> dict:
+        if rol not in ("ADMIN", "DOCENTE"):
+            raise ForbiddenException("Solo ADMIN o DOCENTE pueden ver la libreta de una clase")
+
+        filas = await self.nota_repository.find_libreta_clase(clase_id, periodo_id)
+        if not filas:
+            raise NotFoundException("Clase no encontrada")
+
+        clase = filas[0]
+        if rol == "DOCENTE" and clase["docente_user_id"] != user_id:
+            raise ForbiddenException("Solo puedes ver la libreta de tus propias clases")
+
+        alumnos: Dict[str, dict] = {}
+        notas_por_matricula: Dict[str, List[Dict]] = {}
+        columnas = set()
+        for fila in filas:
+            matricula_id = fila.get("matricula_clase_id")
+            if not matricula_id:
+                continue  # Clase sin alumnos matriculados
+            alumno = alumnos.get(matricula_id)
+            if alumno is None:
+                alumno = alumnos[matricula_id] = {
+                    "matricula_clase_id": matricula_id,
+                    "matricula_status": fila["matricula_status"],
+                    "alumno_id": fila["alumno_id"],
+                    "codigo_alumno": fila["codigo_alumno"],
+                    "dni": fila["dni"],
+                    "nombres": fila["nombres"],
+                    "apellido_paterno": fila["apellido_paterno"],
+                    "apellido_materno": fila["apellido_materno"],
+                    "notas": {},
+                }
+                notas_por_matricula[matricula_id] = []
+            if not fila.get("nota_id"):
+                continue
+            columna = (fila.get("columna_nota") or "N1").upper()
+            columnas.add(columna)
+            # Filas ordenadas por updated_at: la nota más reciente de la columna queda en la celda
+            alumno["notas"][columna] = {
+                "nota_id": fila["nota_id"],
+                "valor_numerico": fila["valor_numerico"],
+                "valor_literal": fila["valor_literal"],
+                "peso": _peso(fila),
+                "tipo_evaluacion_id": fila["tipo_evaluacion_id"],
+                "periodo_id": fila["periodo_id"],
+            }
+            notas_por_matricula[matricula_id].append(fila)
+
+        promedios = []
+        for matricula_id, alumno in alumnos.items():
+            promedio, promedio_literal = promedio_ponderado(notas_por_matricula[matricula_id])
+            alumno["promedio"] = promedio
+            alumno["promedio_literal"] = promedio_literal
+            if promedio is not None:
+                promedios.append(promedio)
+
+        promedio_general = round(sum(promedios) / len(promedios), 2) if promedios else None
+
+        return {
+            "clase": {
+                "id": clase["clase_id"],
+                "curso_id": clase["curso_id"],
+                "curso_nombre": clase["curso_nombre"],
+                "seccion_id": clase["seccion_id"],
+                "seccion_nombre": clase["seccion_nombre"],
+                "grado_id": clase["grado_id"],
+                "periodo_id": clase["clase_periodo_id"],
+                "docente_user_id": clase["docente_user_id"],
+            },
+            "periodo_id": periodo_id,
+            "columnas": sorted(columnas, key=_orden_columna),
+            "alumnos": list(alumnos.values()),
+            "total_alumnos": len(alumnos),
+            "promedio_general": promedio_general,
+            "promedio_general_literal": numerico_a_literal(promedio_general),
+        }
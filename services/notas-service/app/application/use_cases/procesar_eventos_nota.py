@@ -0,0 +1,236 @@
+# Notas Service - Use Case: Procesar eventos NOTA_REGISTRADA (alertas y notificaciones)
+import asyncio
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from shared.common import generate_uuid
+from app.domain import (
+    AlertaNotificacion,
+    OutboxNotificacion,
+    AlertaRepository,
+    OutboxRepository,
+    EventoDominioRepository,
+    MatriculaProyeccionRepository,
+)
+from app.infrastructure.clients.personas_client import PersonasServiceClient
+from app.infrastructure.clients.academico_client import AcademicoServiceClient
+from app.infrastructure.cache.umbral_cache import UmbralCache
+from app.application.use_cases.registrar_nota import EVENTO_NOTA_REGISTRADA
+
+
+class DependenciaNoDisponibleError(Exception):
+    """Un servicio externo no respondió; el lote se reintenta más tarde"""
+    pass
+
+
+class ProcesarEventosNotaUseCase:
+    """
+    Consumidor de eventos NOTA_REGISTRADA.
+
+    Por cada lote reclamado:
+    1. Resuelve alumno, curso y grado de cada matrícula (proyección local;
+       Personas/Académico bulk como respaldo)
+    2. Busca el umbral por escala/curso/grado en la UmbralCache en memoria
+    3. Crea una alerta por cada nota por debajo del umbral
+    4. Obtiene los padres de todos los alumnos con alerta en una llamada (relaciones/bulk)
+       y escribe un outbox por padre con email
+    5. Guarda alertas, outbox y el estado PROCESADO de los eventos en una transacción
+
+    Si Personas/Académico no responden (o no resuelven alguna matrícula que falta en
+    la proyección), los eventos vuelven a PENDIENTE y se reintentan con backoff
+    exponencial hasta max_intentos.
+    Un alumno sin padres genera la alerta sin notificaciones (antes se rechazaba la nota).
+
+    Los repositorios usan la sesión síncrona (PyMySQL): cada acceso a la BD corre en un
+    hilo con asyncio.to_thread para no bloquear el event loop de las peticiones HTTP.
+    """
+
+    def __init__(
+        self,
+        evento_repository: EventoDominioRepository,
+        alerta_repository: AlertaRepository,
+        outbox_repository: OutboxRepository,
+        proyeccion_repository: MatriculaProyeccionRepository,
+        personas_client: PersonasServiceClient,
+        academico_client: AcademicoServiceClient,
+        umbral_cache: UmbralCache,
+        db_session: Session,
+        worker_id: str,
+        batch_size: int = 200,
+        max_intentos: int = 10,
+        backoff_base_seconds: int = 5,
+        backoff_max_seconds: int = 600,
+        stale_after_seconds: int = 120,
+    ):
+        self.evento_repository = evento_repository
+        self.alerta_repository = alerta_repository
+        self.outbox_repository = outbox_repository
+        self.proyeccion_repository = proyeccion_repository
+        self.personas_client = personas_client
+        self.academico_client = academico_client
+        self.umbral_cache = umbral_cache
+        self.db_session = db_session
+        self.worker_id = worker_id
+        self.batch_size = batch_size
+        self.max_intentos = max_intentos
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.stale_after_seconds = stale_after_seconds
+
+    async def execute(self) -> dict:
+        eventos = await asyncio.to_thread(self._reclamar)
+        if not eventos:
+            return {"eventos": 0, "alertas": 0, "notificaciones": 0}
+
+        evento_ids = [e.id for e in eventos]
+        try:
+            alertas, outboxes = await self._evaluar(eventos)
+            await asyncio.to_thread(self._guardar, alertas, outboxes, evento_ids)
+        except Exception as e:
+            await asyncio.to_thread(self.db_session.rollback)
+            await asyncio.to_thread(
+                self.evento_repository.mark_fallidos,
+                evento_ids,
+                self.worker_id,
+                f"{type(e).__name__}: {e}"[:2000],
+                self.max_intentos,
+                self.backoff_base_seconds,
+                self.backoff_max_seconds,
+            )
+            raise
+
+        return {"eventos": len(eventos), "alertas": len(alertas), "notificaciones": len(outboxes)}
+
+    def _reclamar(self) -> list:
+        self.evento_repository.release_stale(self.stale_after_seconds)
+        return self.evento_repository.claim_batch(EVENTO_NOTA_REGISTRADA, self.worker_id, self.batch_size)
+
+    def _guardar(self, alertas: List[AlertaNotificacion], outboxes: List[OutboxNotificacion], evento_ids: List[str]) -> None:
+        """Alertas, outbox y eventos PROCESADO en una sola transacción"""
+        self.alerta_repository.create_many(alertas, commit=False)
+        self.outbox_repository.create_many(outboxes, commit=False)
+        self.evento_repository.mark_procesados(evento_ids, self.worker_id)
+        self.db_session.commit()
+
+    async def _evaluar(self, eventos) -> tuple:
+        payloads = [e.payload for e in eventos]
+
+        # 1. Alumno, curso y grado por matrícula
+        matricula_ids = list({p["matricula_clase_id"] for p in payloads})
+        matriculas: Dict[str, dict] = {
+            mid: {"alumno_id": proy.alumno_id, "curso_id": proy.curso_id, "grado_id": proy.grado_id}
+            for mid, proy in (await asyncio.to_thread(self.proyeccion_repository.find_by_matricula_ids, matricula_ids)).items()
+        }
+        faltantes = [mid for mid in matricula_ids if mid not in matriculas]
+        if faltantes:
+            remotas = await self.personas_client.get_matriculas_bulk(faltantes)
+            if remotas is None:
+                raise DependenciaNoDisponibleError("Personas Service no devolvió las matrículas")
+            clases = await self.academico_client.get_clases_bulk(
+                {m.get("clase_id") for m in remotas.values() if m.get("clase_id")}
+            ) if remotas else {}
+            # Personas/Académico devuelven {} ante un error: sin datos no se puede decidir
+            # la alerta, así que el lote se reintenta en vez de marcarse PROCESADO
+            sin_resolver = [
+                mid for mid in faltantes
+                if mid not in remotas or remotas[mid].get("clase_id") not in clases
+            ]
+            if sin_resolver:
+                raise DependenciaNoDisponibleError(
+                    f"No se pudieron resolver {len(sin_resolver)} matrícula(s) en Personas/Académico: {sin_resolver[:5]}"
+                )
+            for mid, m in remotas.items():
+                clase = clases.get(m.get("clase_id")) or {}
+                matriculas[mid] = {
+                    "alumno_id": m.get("alumno_id"),
+                    "curso_id": clase.get("curso_id"),
+                    "grado_id": clase.get("grado_id"),
+                }
+
+        # 2. Umbrales desde la tabla en memoria (sin llamadas a Académico por nota)
+        if not self.umbral_cache.cargado and not await self.umbral_cache.refresh():
+            raise DependenciaNoDisponibleError("Académico Service no devolvió los umbrales de alerta")
+
+        # 3. Alertas
+        alertas: List[AlertaNotificacion] = []
+        contexto = []  # (alerta, payload, umbral)
+        for p in payloads:
+            matricula = matriculas.get(p["matricula_clase_id"]) or {}
+            alumno_id = matricula.get("alumno_id")
+            umbral = await self.umbral_cache.get(
+                p.get("escala_id"), matricula.get("curso_id"), matricula.get("grado_id")
+            ) if p.get("escala_id") else None
+            if not alumno_id or not umbral or not self._nota_por_debajo_umbral(p, umbral):
+                continue
+            alerta = AlertaNotificacion(
+                id=generate_uuid(),
+                nota_id=p["nota_id"],
+                alumno_id=alumno_id,
+                padre_id=None,  # Se asigna al recorrer padres
+                tipo_alerta="NOTA_BAJA",
+                mensaje=f"Nota por debajo del umbral: {p.get('valor_numerico') or p.get('valor_literal')}",
+            )
+            alertas.append(alerta)
+            contexto.append((alerta, p, umbral))
+
+        if not alertas:
+            return alertas, []
+
+        # 4. Padres de todos los alumnos con alerta en una sola llamada
+        padres_por_alumno = await self.personas_client.get_padres_by_alumnos_bulk({a.alumno_id for a in alertas})
+        if padres_por_alumno is None:
+            raise DependenciaNoDisponibleError("Personas Service no devolvió los padres de los alumnos")
+
+        outboxes: List[OutboxNotificacion] = []
+        for alerta, p, umbral in contexto:
+            padres = padres_por_alumno.get(alerta.alumno_id) or []
+            if not padres:
+                print(f"[eventos-nota] Alumno {alerta.alumno_id} sin padres asignados: alerta {alerta.id} sin notificación")
+            for padre in padres:
+                if padre.get("email"):
+                    outboxes.append(OutboxNotificacion(
+                        id=generate_uuid(),
+                        alerta_id=alerta.id,
+                        tipo="EMAIL",
+                        destinatario=padre["email"],
+                        asunto="⚠️ Alerta de Nota Baja",
+                        mensaje=self._generar_mensaje_email(
+                            padre,
+                            alerta.alumno_id,
+                            p.get("valor_numerico") or p.get("valor_literal"),
+                            umbral,
+                        ),
+                        estado="PENDIENTE",
+                        intentos=0,
+                    ))
+
+        return alertas, outboxes
+
+    def _nota_por_debajo_umbral(self, payload: dict, umbral: dict) -> bool:
+        """Evalúa si la nota está por debajo del umbral definido"""
+        valor_numerico: Optional[float] = payload.get("valor_numerico")
+        valor_literal: Optional[str] = payload.get("valor_literal")
+        if valor_numerico is not None and umbral.get("valor_minimo_numerico"):
+            return valor_numerico < float(umbral["valor_minimo_numerico"])
+
+        # TODO: Comparar valores literales (AD > A > B > C)
+        if valor_literal and umbral.get("valor_minimo_literal"):
+            # Simplificado: asumimos que si tiene un literal diferente está mal
+            return valor_literal != umbral["valor_minimo_literal"]
+
+        return False
+
+    def _generar_mensaje_email(self, padre: dict, alumno_id: str, nota_valor: str, umbral: dict) -> str:
+        """Genera el mensaje del email para el padre"""
+        return f"""
+Estimado(a) {padre.get('nombres', '')} {padre.get('apellido_paterno', '')}:
+
+Le informamos que su hijo(a) ha obtenido una calificación por debajo del umbral establecido.
+
+Calificación obtenida: {nota_valor}
+Umbral mínimo: {umbral.get('valor_minimo_numerico') or umbral.get('valor_minimo_literal')}
+
+Por favor, contacte con el docente para más información.
+
+Saludos cordiales,
+Sistema de Gestión Académica
+        """.strip()
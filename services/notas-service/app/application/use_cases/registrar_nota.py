@@ -1,52 +1,76 @@
-# Notas Service - Use Case: Registrar Nota (⭐ CRÍTICO - CON INTEGRACIÓN)
+# Notas Service - Use Case: Registrar Nota (⭐ CRÍTICO)
+import logging
 from datetime import date as dt_date
+from typing import List, Optional
 from sqlalchemy.orm import Session
 from shared.common import (
-    generate_uuid, 
+    generate_uuid,
     ValidationException,
     AuditHelper,
     AccionAuditoria,
 )
 from app.domain import (
     Nota,
-    AlertaNotificacion,
-    OutboxNotificacion,
+    EventoDominio,
     NotaRepository,
-    AlertaRepository,
-    OutboxRepository,
+    EventoDominioRepository,
+    TipoEvaluacionRepository,
 )
-from app.infrastructure.clients.personas_client import PersonasServiceClient
-from app.infrastructure.clients.academico_client import AcademicoServiceClient
+
+logger = logging.getLogger(__name__)
+
+EVENTO_NOTA_REGISTRADA = "NOTA_REGISTRADA"
+
+# Límites de las columnas de notas (DECIMAL(5,2), VARCHAR(10), VARCHAR(20))
+MAXIMO_DECIMAL = 999.99
+MAXIMO_VALOR_LITERAL = 10
+MAXIMO_COLUMNA_NOTA = 20
+
+
+def validar_item_nota(item: dict, tipos_existentes: Optional[set] = None) -> Optional[str]:
+    """Mensaje de error de un item del lote, o None si puede escribirse"""
+    if not item.get("valor_literal") and item.get("valor_numerico") is None:
+        return "Debe proporcionar valor_literal o valor_numerico"
+    for campo in ("matricula_clase_id", "tipo_evaluacion_id", "periodo_id", "escala_id"):
+        if not item.get(campo):
+            return f"Falta {campo}"
+    if tipos_existentes is not None and item["tipo_evaluacion_id"] not in tipos_existentes:
+        return "Tipo de evaluación no encontrado"
+    for campo in ("valor_numerico", "peso"):
+        valor = item.get(campo)
+        if valor is not None and not (0 <= valor <= MAXIMO_DECIMAL):
+            return f"{campo} fuera de rango (0 a {MAXIMO_DECIMAL})"
+    if item.get("valor_literal") and len(item["valor_literal"]) > MAXIMO_VALOR_LITERAL:
+        return f"valor_literal admite hasta {MAXIMO_VALOR_LITERAL} caracteres"
+    if item.get("columna_nota") and len(item["columna_nota"]) > MAXIMO_COLUMNA_NOTA:
+        return f"columna_nota admite hasta {MAXIMO_COLUMNA_NOTA} caracteres"
+    return None
 
 
 class RegistrarNotaUseCase:
     """
     Caso de uso para registrar una nota.
-    
-    1. Crea la nota en la BD
-    2. Evalúa si está por debajo del umbral definido
-    3. Si está por debajo:
-       a. Crea alerta
-       b. Obtiene padres del alumno (HTTP call a Personas Service)
-       c. Crea outbox para cada padre
+
+    1. Crea/actualiza la nota en la BD
+    2. En la misma transacción escribe un evento NOTA_REGISTRADA
+
+    La evaluación de umbrales, las alertas y las notificaciones a los padres las
+    hace después el consumidor de eventos (ver ProcesarEventosNotaUseCase), así que
+    guardar una nota no depende de la latencia de Personas ni de Académico.
     """
-    
+
     def __init__(
         self,
         nota_repository: NotaRepository,
-        alerta_repository: AlertaRepository,
-        outbox_repository: OutboxRepository,
-        personas_client: PersonasServiceClient,
-        academico_client: AcademicoServiceClient,
+        evento_repository: EventoDominioRepository,
         db_session: Session,
+        tipo_evaluacion_repository: Optional[TipoEvaluacionRepository] = None,
     ):
         self.nota_repository = nota_repository
-        self.alerta_repository = alerta_repository
-        self.outbox_repository = outbox_repository
-        self.personas_client = personas_client
-        self.academico_client = academico_client
+        self.evento_repository = evento_repository
         self.db_session = db_session
-    
+        self.tipo_evaluacion_repository = tipo_evaluacion_repository
+
     async def execute(
         self,
         matricula_clase_id: str,
@@ -59,15 +83,11 @@ class RegistrarNotaUseCase:
         peso: float = None,
         observaciones: str = None,
         columna_nota: str = "N1",
-        auth_token: str = None,
-        # Argumentos opcionales para optimización (cache)
-        matricula_info_cache: dict = None,
-        umbral_cache: dict = None,
     ) -> dict:
         # Validaciones
         if not valor_literal and valor_numerico is None:
             raise ValidationException("Debe proporcionar valor_literal o valor_numerico")
-        
+
         # Crear nota
         nueva_nota = Nota(
             id=generate_uuid(),
@@ -83,83 +103,16 @@ class RegistrarNotaUseCase:
             fecha_registro=dt_date.today(),
             registrado_por_user_id=registrado_por_user_id,
         )
-        
-        nota_creada = self.nota_repository.create(nueva_nota)
-        # Log simple para depuración: confirmar creación/actualización en stdout
+
+        # Nota + evento en una sola transacción
         try:
-            print(f"[DEBUG NOTA] nota creada/actualizada id={nota_creada.id} matricula_clase_id={nota_creada.matricula_clase_id} valor_numerico={nota_creada.valor_numerico}")
+            nota_creada = self.nota_repository.create(nueva_nota, commit=False)
+            self.evento_repository.add_many([self._evento_nota_registrada(nota_creada, nueva_nota)])
+            self.db_session.commit()
         except Exception:
-            pass
-        
-        # Evaluar umbrales y generar alertas
-        alerta_generada = False
-        alertas_enviadas = 0
-        
-        # Obtener información de matrícula (alumno_id, clase_id)
-        if matricula_info_cache:
-            matricula_info = matricula_info_cache
-        else:
-            matricula_info = await self.personas_client.get_matricula_info(
-                matricula_clase_id, 
-                auth_token
-            )
-        
-        if matricula_info and matricula_info.get("alumno_id"):
-            alumno_id = matricula_info["alumno_id"]
-            
-            # Obtener umbral (podría ser específico del curso/grado o global)
-            if umbral_cache:
-                umbral = umbral_cache
-            else:
-                umbral = await self.academico_client.get_umbral_alerta(
-                    escala_id=escala_id,
-                    token=auth_token
-                )
-            
-            # Verificar si la nota está por debajo del umbral
-            if umbral and self._nota_por_debajo_umbral(nota_creada, umbral):
-                # Crear alerta
-                alerta = AlertaNotificacion(
-                    id=generate_uuid(),
-                    nota_id=nota_creada.id,
-                    alumno_id=alumno_id,
-                    padre_id=None,  # Se asigna al recorrer padres
-                    tipo_alerta="NOTA_BAJA",
-                    mensaje=f"Nota por debajo del umbral: {valor_numerico or valor_literal}",
-                )
-                alerta_creada = self.alerta_repository.create(alerta)
-                alerta_generada = True
-                
-                # Obtener padres del alumno (HTTP call a Personas Service)
-                padres = await self.personas_client.get_padres_by_alumno(
-                    alumno_id, 
-                    auth_token
-                )
-                
-                if not padres:
-                    raise ValidationException("El alumno no tiene padres asignados. No se puede registrar la nota.")
-                
-                # Crear outbox para cada padre
-                for padre in padres:
-                    if padre.get("email"):
-                        outbox = OutboxNotificacion(
-                            id=generate_uuid(),
-                            alerta_id=alerta_creada.id,
-                            tipo="EMAIL",
-                            destinatario=padre["email"],
-                            asunto="⚠️ Alerta de Nota Baja",
-                            mensaje=self._generar_mensaje_email(
-                                padre,
-                                alumno_id,
-                                valor_numerico or valor_literal,
-                                umbral
-                            ),
-                            estado="PENDIENTE",
-                            intentos=0,
-                        )
-                        self.outbox_repository.create(outbox)
-                        alertas_enviadas += 1
-        
+            self.db_session.rollback()
+            raise
+
         # AUDITORÍA: Registro de nota (CRÍTICO)
         try:
             AuditHelper.log_action(
@@ -179,7 +132,6 @@ class RegistrarNotaUseCase:
                     "valor_numerico": valor_numerico,
                     "valor_literal": valor_literal,
                     "peso": peso,
-                    "alerta_generada": alerta_generada,
                 },
                 endpoint="/v1/notas",
                 metodo_http="POST",
@@ -188,7 +140,7 @@ class RegistrarNotaUseCase:
             )
         except:
             pass  # No fallar si falla la auditoría
-        
+
         return {
             "nota": {
                 "id": nota_creada.id,
@@ -196,34 +148,159 @@ class RegistrarNotaUseCase:
                 "valor_numerico": nota_creada.valor_numerico,
                 "fecha_registro": nota_creada.fecha_registro.isoformat(),
             },
-            "alerta_generada": alerta_generada,
-            "notificaciones_pendientes": alertas_enviadas,
+            # Las alertas se evalúan de forma asíncrona; se mantienen los campos por compatibilidad
+            "alerta_generada": False,
+            "notificaciones_pendientes": 0,
         }
-    
-    def _nota_por_debajo_umbral(self, nota: Nota, umbral: dict) -> bool:
-        """Evalúa si la nota está por debajo del umbral definido"""
-        if nota.valor_numerico is not None and umbral.get("valor_minimo_numerico"):
-            return nota.valor_numerico < float(umbral["valor_minimo_numerico"])
-        
-        # TODO: Comparar valores literales (AD > A > B > C)
-        if nota.valor_literal and umbral.get("valor_minimo_literal"):
-            # Simplificado: asumimos que si tiene un literal diferente está mal
-            return nota.valor_literal != umbral["valor_minimo_literal"]
-        
-        return False
-    
-    def _generar_mensaje_email(self, padre: dict, alumno_id: str, nota_valor: str, umbral: dict) -> str:
-        """Genera el mensaje del email para el padre"""
-        return f"""
-Estimado(a) {padre.get('nombres', '')} {padre.get('apellido_paterno', '')}:
-
-Le informamos que su hijo(a) ha obtenido una calificación por debajo del umbral establecido.
-
-Calificación obtenida: {nota_valor}
-Umbral mínimo: {umbral.get('valor_minimo_numerico') or umbral.get('valor_minimo_literal')}
-
-Por favor, contacte con el docente para más información.
-
-Saludos cordiales,
-Sistema de Gestión Académica
-        """.strip()
+
+    async def execute_batch(
+        self,
+        items: List[dict],
+        registrado_por_user_id: str,
+    ) -> List[dict]:
+        """
+        Registra un lote de notas en modo masivo.
+
+        1. Valida cada item (campos, rangos de columna, tipo de evaluación existente)
+        2. Upsert multi-fila de las notas válidas y lectura final en bloque por la
+           clave unique_nota_columna
+        3. Un evento NOTA_REGISTRADA por nota, en la misma transacción
+        4. Auditoría con un único INSERT
+
+        Si aun así el upsert del lote falla en la BD, se reintenta item por item en
+        savepoints: solo los items que fallan quedan con status "error".
+
+        Cada item es un dict con los mismos campos que execute(). Devuelve un
+        resultado por item, en el mismo orden: {matricula_clase_id, status, nota_id|message}.
+        """
+        results: List[Optional[dict]] = [None] * len(items)
+        pendientes = []  # (índice, Nota)
+
+        tipos_existentes = None
+        if self.tipo_evaluacion_repository is not None:
+            tipos_existentes = set(self.tipo_evaluacion_repository.find_existing_ids(
+                [item.get("tipo_evaluacion_id") for item in items]
+            ))
+
+        for idx, item in enumerate(items):
+            error = validar_item_nota(item, tipos_existentes)
+            if error:
+                results[idx] = self._resultado_error(item.get("matricula_clase_id"), error)
+                continue
+            pendientes.append((idx, Nota(
+                id=generate_uuid(),
+                matricula_clase_id=item["matricula_clase_id"],
+                tipo_evaluacion_id=item["tipo_evaluacion_id"],
+                periodo_id=item["periodo_id"],
+                escala_id=item["escala_id"],
+                valor_literal=item.get("valor_literal"),
+                valor_numerico=item.get("valor_numerico"),
+                peso=item.get("peso"),
+                observaciones=item.get("observaciones"),
+                columna_nota=item.get("columna_nota") or "N1",
+                fecha_registro=dt_date.today(),
+                registrado_por_user_id=registrado_por_user_id,
+            )))
+
+        if not pendientes:
+            return results
+
+        # Notas + eventos en una sola transacción
+        try:
+            notas_guardadas = self.nota_repository.bulk_upsert([nota for _, nota in pendientes], commit=False)
+            self.evento_repository.add_many([
+                self._evento_nota_registrada(nota, nota_original)
+                for (_, nota_original), nota in zip(pendientes, notas_guardadas)
+            ])
+            self.db_session.commit()
+        except Exception:
+            self.db_session.rollback()
+            pendientes, notas_guardadas = self._upsert_por_item(pendientes, results)
+            if not pendientes:
+                return results
+
+        # AUDITORÍA: un único INSERT para todo el lote
+        try:
+            AuditHelper.log_actions(self.db_session, [
+                {
+                    "user_id": registrado_por_user_id,
+                    "username": None,
+                    "rol_nombre": None,
+                    "accion": AccionAuditoria.CREATE_NOTA,
+                    "entidad": "Nota",
+                    "entidad_id": nota.id,
+                    "descripcion": f"Nota registrada: {nota_original.valor_numerico or nota_original.valor_literal}",
+                    "datos_nuevos": {
+                        "matricula_clase_id": nota.matricula_clase_id,
+                        "tipo_evaluacion_id": nota.tipo_evaluacion_id,
+                        "periodo_id": nota.periodo_id,
+                        "escala_id": nota_original.escala_id,
+                        "valor_numerico": nota_original.valor_numerico,
+                        "valor_literal": nota_original.valor_literal,
+                        "peso": nota_original.peso,
+                    },
+                    "endpoint": "/v1/notas/batch",
+                    "metodo_http": "POST",
+                    "exitoso": True,
+                    "codigo_respuesta": 201,
+                }
+                for (_, nota_original), nota in zip(pendientes, notas_guardadas)
+            ])
+        except Exception:
+            self.db_session.rollback()  # No fallar si falla la auditoría
+
+        for (idx, _), nota in zip(pendientes, notas_guardadas):
+            results[idx] = {
+                "matricula_clase_id": nota.matricula_clase_id,
+                "status": "ok",
+                "nota_id": nota.id,
+            }
+
+        return results
+
+    def _upsert_por_item(self, pendientes: List[tuple], results: List[Optional[dict]]) -> tuple:
+        """
+        Camino lento tras un fallo del upsert del lote: cada nota (con su evento) en
+        su propio savepoint. Marca los fallos en results y devuelve las guardadas.
+        """
+        guardadas_pendientes, notas_guardadas = [], []
+        try:
+            for idx, nota_original in pendientes:
+                try:
+                    with self.db_session.begin_nested():
+                        (nota,) = self.nota_repository.bulk_upsert([nota_original], commit=False)
+                        self.evento_repository.add_many([self._evento_nota_registrada(nota, nota_original)])
+                except Exception as e:
+                    logger.warning("Nota %s del lote rechazada por la BD: %s", idx, e)
+                    results[idx] = self._resultado_error(
+                        nota_original.matricula_clase_id,
+                        f"No se pudo guardar la nota: {getattr(e, 'orig', e)}",
+                    )
+                    continue
+                guardadas_pendientes.append((idx, nota_original))
+                notas_guardadas.append(nota)
+            self.db_session.commit()
+        except Exception:
+            self.db_session.rollback()
+            raise
+        return guardadas_pendientes, notas_guardadas
+
+    @staticmethod
+    def _resultado_error(matricula_clase_id: Optional[str], message: str) -> dict:
+        return {"matricula_clase_id": matricula_clase_id, "status": "error", "message": message}
+
+    def _evento_nota_registrada(self, nota: Nota, nota_original: Nota) -> EventoDominio:
+        """Evento con los datos que necesita el consumidor para evaluar el umbral sin releer la nota"""
+        return EventoDominio(
+            id=generate_uuid(),
+            tipo=EVENTO_NOTA_REGISTRADA,
+            agregado_id=nota.id,
+            payload={
+                "nota_id": nota.id,
+                "matricula_clase_id": nota.matricula_clase_id,
+                "escala_id": nota_original.escala_id,
+                "valor_numerico": nota_original.valor_numerico,
+                "valor_literal": nota_original.valor_literal,
+                "registrado_por_user_id": nota_original.registrado_por_user_id,
+            },
+        )
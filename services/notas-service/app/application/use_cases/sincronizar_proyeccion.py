@@ -0,0 +1,118 @@
+# Notas Service - Use Case: Sincronizar proyección local de matrículas/clases
+import asyncio
+from datetime import datetime
+from typing import Optional, Tuple
+from app.domain import MatriculaProyeccion, MatriculaProyeccionRepository
+from app.infrastructure.clients.personas_client import PersonasServiceClient
+from app.infrastructure.clients.academico_client import AcademicoServiceClient
+
+FUENTE_MATRICULAS = "matriculas"
+FUENTE_CLASES = "clases"
+
+
+class SincronizarProyeccionUseCase:
+    """
+    Caso de uso que mantiene la tabla matriculas_proyeccion al día.
+
+    1. Lee el feed de cambios de matrículas (Personas) desde la última marca de agua
+       y actualiza alumno_id/clase_id/status/is_deleted.
+    2. Lee el feed de cambios de clases (Académico) y propaga curso, docente,
+       sección y grado a las matrículas de cada clase.
+    3. Completa las matrículas nuevas cuya clase aún no tiene detalle (clases bulk).
+
+    Cada página se aplica y su marca de agua (updated_at, id) se guarda antes de pedir
+    la siguiente, por lo que una sincronización interrumpida continúa donde se quedó.
+    Los feeds solo publican cambios ya asentados (ver FEED_SETTLE_SECONDS en cada
+    servicio), así que avanzar la marca de agua no salta transacciones en curso.
+    El repositorio usa la sesión síncrona: sus llamadas corren en un hilo
+    (asyncio.to_thread) para no bloquear el event loop del servicio.
+    """
+
+    def __init__(
+        self,
+        proyeccion_repository: MatriculaProyeccionRepository,
+        personas_client: PersonasServiceClient,
+        academico_client: AcademicoServiceClient,
+        page_size: int = 500,
+    ):
+        self.proyeccion_repository = proyeccion_repository
+        self.personas_client = personas_client
+        self.academico_client = academico_client
+        self.page_size = page_size
+
+    async def execute(self) -> dict:
+        matriculas = await self._sync_matriculas()
+        clases = await self._sync_clases()
+        completadas = await self._completar_clases_pendientes()
+        return {
+            "matriculas_aplicadas": matriculas,
+            "clases_aplicadas": clases,
+            "clases_completadas": completadas,
+        }
+
+    async def _punto_de_partida(self, fuente: str) -> Tuple[Optional[str], Optional[str]]:
+        ultimo_updated_at, ultimo_id = await asyncio.to_thread(self.proyeccion_repository.get_watermark, fuente)
+        if ultimo_updated_at is None:
+            return None, None
+        return ultimo_updated_at.isoformat(), ultimo_id
+
+    async def _sync_matriculas(self) -> int:
+        desde, desde_id = await self._punto_de_partida(FUENTE_MATRICULAS)
+        aplicadas = 0
+        while True:
+            page = await self.personas_client.get_matriculas_cambios(desde, desde_id, self.page_size)
+            if page is None:
+                break
+            items = page.get("matriculas", [])
+            if not items:
+                break
+            await asyncio.to_thread(self.proyeccion_repository.upsert_matriculas, [
+                MatriculaProyeccion(
+                    matricula_clase_id=m["id"],
+                    alumno_id=m["alumno_id"],
+                    clase_id=m["clase_id"],
+                    status=m.get("status") or "ACTIVO",
+                    is_deleted=bool(m.get("is_deleted", False)),
+                ) for m in items
+            ])
+            aplicadas += len(items)
+            desde, desde_id = items[-1]["updated_at"], items[-1]["id"]
+            if desde:
+                await asyncio.to_thread(
+                    self.proyeccion_repository.save_watermark,
+                    FUENTE_MATRICULAS, datetime.fromisoformat(desde), desde_id,
+                )
+            if not page.get("has_more"):
+                break
+        return aplicadas
+
+    async def _sync_clases(self) -> int:
+        desde, desde_id = await self._punto_de_partida(FUENTE_CLASES)
+        aplicadas = 0
+        while True:
+            page = await self.academico_client.get_clases_cambios(desde, desde_id, self.page_size)
+            if page is None:
+                break
+            items = page.get("clases", [])
+            if not items:
+                break
+            await asyncio.to_thread(self.proyeccion_repository.update_clases, items)
+            aplicadas += len(items)
+            desde, desde_id = items[-1]["updated_at"], items[-1]["id"]
+            if desde:
+                await asyncio.to_thread(
+                    self.proyeccion_repository.save_watermark,
+                    FUENTE_CLASES, datetime.fromisoformat(desde), desde_id,
+                )
+            if not page.get("has_more"):
+                break
+        return aplicadas
+
+    async def _completar_clases_pendientes(self) -> int:
+        clase_ids = await asyncio.to_thread(self.proyeccion_repository.find_clase_ids_sin_detalle)
+        if not clase_ids:
+            return 0
+        clases = await self.academico_client.get_clases_bulk(clase_ids)
+        if clases:
+            await asyncio.to_thread(self.proyeccion_repository.update_clases, list(clases.values()))
+        return len(clases)
@@ -1,10 +1,19 @@
 # Notas Service - Domain Package
-from .models import Nota, TipoEvaluacion, AlertaNotificacion, OutboxNotificacion
-from .ports import NotaRepository, TipoEvaluacionRepository, AlertaRepository, OutboxRepository
+from .models import Nota, TipoEvaluacion, AlertaNotificacion, OutboxNotificacion, MatriculaProyeccion, IdempotencyRecord, EventoDominio, HistogramaNotas, centesimas
+from .ports import (
+    NotaRepository, TipoEvaluacionRepository, AlertaRepository, OutboxRepository,
+    MatriculaProyeccionRepository, IdempotencyRepository, NotificacionTransport, EventoDominioRepository,
+    PromedioRepository, HistogramaNotasRepository, AsyncNotaRepository, AsyncAlertaRepository,
+)
 from .exceptions import *
 
 __all__ = [
-    "Nota", "TipoEvaluacion", "AlertaNotificacion", "OutboxNotificacion",
+    "Nota", "TipoEvaluacion", "AlertaNotificacion", "OutboxNotificacion", "MatriculaProyeccion",
+    "IdempotencyRecord", "EventoDominio", "HistogramaNotas", "centesimas",
     "NotaRepository", "TipoEvaluacionRepository", "AlertaRepository", "OutboxRepository",
+    "MatriculaProyeccionRepository", "IdempotencyRepository", "NotificacionTransport",
+    "EventoDominioRepository", "PromedioRepository", "HistogramaNotasRepository",
+    "AsyncNotaRepository", "AsyncAlertaRepository",
     "NotaNotFoundException", "TipoEvaluacionNotFoundException", "InvalidNotaException",
+    "IdempotencyKeyReusedException", "IdempotencyInProgressException", "ServicioNoDisponibleException",
 ]
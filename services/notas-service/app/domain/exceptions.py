@@ -12,3 +12,18 @@ class TipoEvaluacionNotFoundException(DomainException):
 
 class InvalidNotaException(DomainException):
     pass
+
+
+class IdempotencyKeyReusedException(DomainException):
+    """La misma Idempotency-Key se envió con un cuerpo distinto"""
+    pass
+
+
+class IdempotencyInProgressException(DomainException):
+    """Otra petición con la misma Idempotency-Key sigue en curso"""
+    pass
+
+
+class ServicioNoDisponibleException(DomainException):
+    """Un servicio del que depende la petición no respondió; el reintento puede funcionar"""
+    pass
@@ -1,7 +1,8 @@
 # Notas Service - Domain Models
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date, datetime
-from typing import Optional
+import math
+from typing import Optional, Dict, Any
 
 
 @dataclass
@@ -61,5 +62,99 @@ class OutboxNotificacion:
     intentos: int = 0
     ultimo_error: Optional[str] = None
     fecha_envio: Optional[datetime] = None
+    proximo_intento: Optional[datetime] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+
+
+@dataclass
+class MatriculaProyeccion:
+    """Copia local (read-model) de una matrícula y los datos de su clase"""
+    matricula_clase_id: str
+    alumno_id: str
+    clase_id: str
+    curso_id: Optional[str] = None
+    docente_user_id: Optional[str] = None
+    seccion_id: Optional[str] = None
+    grado_id: Optional[str] = None
+    status: str = "ACTIVO"
+    is_deleted: bool = False
+    clase_is_deleted: bool = False
+    synced_at: Optional[datetime] = None
+
+
+@dataclass
+class IdempotencyRecord:
+    """Resultado guardado de una petición identificada por Idempotency-Key"""
+    idempotency_key: str
+    user_id: str
+    request_hash: str
+    estado: str = "EN_PROCESO"  # EN_PROCESO, COMPLETADO
+    status_code: Optional[int] = None
+    response_json: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    en_proceso_vencido: bool = False  # EN_PROCESO sin progreso más allá del tiempo permitido
+
+
+@dataclass
+class EventoDominio:
+    """Evento de dominio escrito en la misma transacción que el cambio que lo origina"""
+    id: str
+    tipo: str  # NOTA_REGISTRADA
+    agregado_id: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    estado: str = "PENDIENTE"  # PENDIENTE, PROCESANDO, PROCESADO, FALLIDO
+    intentos: int = 0
+    ultimo_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    procesado_at: Optional[datetime] = None
+
+
+def centesimas(valor: float) -> int:
+    """Bucket de una nota numérica en el histograma: la nota en centésimas de punto"""
+    return int(round(float(valor) * 100))
+
+
+@dataclass
+class HistogramaNotas:
+    """
+    Histograma exacto de las notas numéricas de un ámbito (global o un conjunto de clases).
+
+    Las notas son vigesimales con dos decimales, así que hay como mucho 2001 buckets
+    (centésimas de punto -> cantidad de notas) y cualquier conteo o percentil se
+    resuelve recorriendo los buckets, sin ordenar las notas.
+    """
+    conteos: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return sum(self.conteos.values())
+
+    def top_count(self, divisor: int) -> int:
+        """Notas en el 1/divisor superior: FLOOR(total/divisor), como el ranking con ROW_NUMBER"""
+        return self.total // divisor
+
+    def nota_en_posicion(self, posicion: int) -> Optional[float]:
+        """Nota en la posición dada (1 = la más alta) del orden descendente"""
+        if posicion < 1:
+            return None
+        acumulado = 0
+        for bucket in sorted(self.conteos, reverse=True):
+            acumulado += self.conteos[bucket]
+            if acumulado >= posicion:
+                return bucket / 100
+        return None
+
+    def corte_top(self, divisor: int) -> Optional[float]:
+        """Nota mínima dentro del 1/divisor superior (None si el grupo está vacío)"""
+        return self.nota_en_posicion(self.top_count(divisor))
+
+    def percentil(self, p: float) -> Optional[float]:
+        """Percentil p (0-100) por rango más cercano sobre el orden ascendente"""
+        total = self.total
+        if total == 0:
+            return None
+        rango = min(max(math.ceil(p / 100 * total), 1), total)
+        return self.nota_en_posicion(total - rango + 1)
@@ -1,12 +1,17 @@
 # Notas Service - Domain Ports
 from abc import ABC, abstractmethod
-from typing import Optional, List
-from .models import Nota, TipoEvaluacion, AlertaNotificacion, OutboxNotificacion
+from datetime import datetime
+from typing import Optional, List, Dict, Tuple
+from .models import Nota, TipoEvaluacion, AlertaNotificacion, OutboxNotificacion, MatriculaProyeccion, IdempotencyRecord, EventoDominio, HistogramaNotas
 
 
 class NotaRepository(ABC):
     @abstractmethod
-    def create(self, nota: Nota) -> Nota:
+    def create(self, nota: Nota, commit: bool = True) -> Nota:
+        pass
+    
+    @abstractmethod
+    def bulk_upsert(self, notas: List[Nota], commit: bool = True) -> List[Nota]:
         pass
     
     @abstractmethod
@@ -20,6 +25,19 @@ class NotaRepository(ABC):
     @abstractmethod
     def find_by_clase(self, clase_id: str) -> List[Nota]:
         pass
+    
+    @abstractmethod
+    def find_libreta_clase(self, clase_id: str, periodo_id: Optional[str] = None) -> List[Dict]:
+        pass
+    
+    @abstractmethod
+    def update(self, nota_id: str, cambios: Dict, commit: bool = True) -> Optional[Nota]:
+        """Aplica los campos de `cambios` a la nota; None si no existe"""
+        pass
+    
+    @abstractmethod
+    def soft_delete(self, nota_id: str, commit: bool = True) -> bool:
+        pass
 
 
 class TipoEvaluacionRepository(ABC):
@@ -30,6 +48,11 @@ class TipoEvaluacionRepository(ABC):
     @abstractmethod
     def find_all(self) -> List[TipoEvaluacion]:
         pass
+    
+    @abstractmethod
+    def find_existing_ids(self, tipo_ids: List[str]) -> List[str]:
+        """Los ids de la lista que existen en tipos_evaluacion (FK de notas)"""
+        pass
 
 
 class AlertaRepository(ABC):
@@ -37,6 +60,10 @@ class AlertaRepository(ABC):
     def create(self, alerta: AlertaNotificacion) -> AlertaNotificacion:
         pass
     
+    @abstractmethod
+    def create_many(self, alertas: List[AlertaNotificacion], commit: bool = True) -> List[AlertaNotificacion]:
+        pass
+    
     @abstractmethod
     def find_by_padre(self, padre_id: str) -> List[AlertaNotificacion]:
         pass
@@ -47,6 +74,195 @@ class OutboxRepository(ABC):
     def create(self, outbox: OutboxNotificacion) -> OutboxNotificacion:
         pass
     
+    @abstractmethod
+    def create_many(self, outboxes: List[OutboxNotificacion], commit: bool = True) -> List[OutboxNotificacion]:
+        pass
+    
     @abstractmethod
     def find_pendientes(self, limit: int = 10) -> List[OutboxNotificacion]:
         pass
+    
+    @abstractmethod
+    def claim_batch(self, worker_id: str, limit: int = 100) -> List[OutboxNotificacion]:
+        pass
+    
+    @abstractmethod
+    def mark_enviados(self, outbox_ids: List[str], worker_id: str) -> int:
+        pass
+    
+    @abstractmethod
+    def mark_fallidos(self, fallos: List[Tuple[str, str, Optional[int]]], worker_id: str) -> int:
+        pass
+    
+    @abstractmethod
+    def release_stale(self, stale_after_seconds: int) -> int:
+        pass
+
+
+class NotificacionTransport(ABC):
+    """Canal de salida de las notificaciones del outbox (SMTP, log, ...)"""
+    
+    @abstractmethod
+    async def send(self, outbox: OutboxNotificacion) -> None:
+        """Envía el mensaje; lanza excepción si el envío falla"""
+        pass
+    
+    async def close(self) -> None:
+        pass
+
+
+class MatriculaProyeccionRepository(ABC):
+    @abstractmethod
+    def upsert_matriculas(self, matriculas: List[MatriculaProyeccion]) -> int:
+        pass
+    
+    @abstractmethod
+    def update_clases(self, clases: List[Dict]) -> int:
+        pass
+    
+    @abstractmethod
+    def find_clase_ids_sin_detalle(self, limit: int = 1000) -> List[str]:
+        pass
+    
+    @abstractmethod
+    def find_by_matricula_ids(self, matricula_ids: List[str]) -> Dict[str, MatriculaProyeccion]:
+        pass
+    
+    @abstractmethod
+    def get_watermark(self, fuente: str) -> Tuple[Optional[datetime], Optional[str]]:
+        pass
+    
+    @abstractmethod
+    def save_watermark(self, fuente: str, updated_at: datetime, last_id: str) -> None:
+        pass
+
+
+class IdempotencyRepository(ABC):
+    @abstractmethod
+    def reservar(self, key: str, user_id: str, request_hash: str, ttl_seconds: int) -> bool:
+        """Inserta la clave en estado EN_PROCESO. Devuelve False si ya existía."""
+        pass
+    
+    @abstractmethod
+    def find(self, key: str, user_id: str, stale_after_seconds: int) -> Optional[IdempotencyRecord]:
+        pass
+    
+    @abstractmethod
+    def tomar_control(self, key: str, user_id: str, request_hash: str, ttl_seconds: int, stale_after_seconds: int) -> bool:
+        """Reclama una clave expirada o EN_PROCESO abandonada. Devuelve True si se obtuvo."""
+        pass
+    
+    @abstractmethod
+    def completar(self, key: str, user_id: str, status_code: int, response_json: str) -> None:
+        pass
+    
+    @abstractmethod
+    def liberar(self, key: str, user_id: str) -> None:
+        pass
+    
+    @abstractmethod
+    def renovar(self, key: str, user_id: str) -> bool:
+        """Extiende la reserva EN_PROCESO (updated_at). Devuelve False si ya no está EN_PROCESO."""
+        pass
+    
+    @abstractmethod
+    def delete_expired(self, limit: int = 1000) -> int:
+        pass
+
+
+class EventoDominioRepository(ABC):
+    @abstractmethod
+    def add_many(self, eventos: List[EventoDominio]) -> None:
+        """Agrega los eventos a la transacción en curso (sin confirmar)"""
+        pass
+    
+    @abstractmethod
+    def claim_batch(self, tipo: str, worker_id: str, limit: int = 200) -> List[EventoDominio]:
+        pass
+    
+    @abstractmethod
+    def mark_procesados(self, evento_ids: List[str], worker_id: str) -> None:
+        """Marca los eventos como PROCESADO dentro de la transacción en curso (sin confirmar)"""
+        pass
+    
+    @abstractmethod
+    def mark_fallidos(
+        self,
+        evento_ids: List[str],
+        worker_id: str,
+        error: str,
+        max_intentos: int,
+        backoff_base_seconds: int = 5,
+        backoff_max_seconds: int = 600,
+    ) -> None:
+        pass
+    
+    @abstractmethod
+    def release_stale(self, stale_after_seconds: int) -> int:
+        pass
+
+
+class PromedioRepository(ABC):
+    """Agregados de notas por (matrícula, periodo) para dashboards"""
+    
+    @abstractmethod
+    def aplicar_deltas(self, deltas: Dict[Tuple[str, str], Tuple[float, int, float, float, int]]) -> None:
+        """Suma (suma, cantidad, suma_ponderada, peso_total, cantidad_notas) a cada clave, sin confirmar"""
+        pass
+    
+    @abstractmethod
+    def recalcular(self, tipo_evaluacion_id: Optional[str] = None, commit: bool = True) -> int:
+        """Recalcula desde las notas (todas, o las matrículas con notas de un tipo de evaluación)"""
+        pass
+    
+    @abstractmethod
+    def top_cursos(self, limit: int = 5, clase_ids: Optional[List[str]] = None) -> List[Dict]:
+        pass
+    
+    @abstractmethod
+    def alumnos_promedio_bajo(
+        self,
+        limit: int = 10,
+        clase_ids: Optional[List[str]] = None,
+        alumno_ids: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        pass
+
+
+class HistogramaNotasRepository(ABC):
+    """Histograma de notas numéricas por clase, para rankings y percentiles de dashboards"""
+    
+    @abstractmethod
+    def aplicar_deltas(self, deltas: Dict[Tuple[str, int], int]) -> None:
+        """Suma cantidades por (matricula_clase_id, centésimas), sin confirmar"""
+        pass
+    
+    @abstractmethod
+    def recalcular(self) -> int:
+        """Reconstruye el histograma desde las notas vigentes"""
+        pass
+    
+    @abstractmethod
+    def obtener(self, clase_ids: Optional[List[str]] = None) -> HistogramaNotas:
+        """Histograma global o de un conjunto de clases"""
+        pass
+
+
+class AsyncNotaRepository(ABC):
+    """Lecturas de notas sobre una sesión async (no bloquean el event loop)"""
+    
+    @abstractmethod
+    async def find_by_id(self, nota_id: str) -> Optional[Nota]:
+        pass
+    
+    @abstractmethod
+    async def find_libreta_clase(self, clase_id: str, periodo_id: Optional[str] = None) -> List[Dict]:
+        pass
+
+
+class AsyncAlertaRepository(ABC):
+    """Lecturas de alertas sobre una sesión async"""
+    
+    @abstractmethod
+    async def find_by_padre(self, padre_id: str) -> List[AlertaNotificacion]:
+        pass
@@ -0,0 +1 @@
+# Notas Service - Infrastructure Cache Package Init
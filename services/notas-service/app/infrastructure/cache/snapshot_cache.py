@@ -0,0 +1,120 @@
+# Notas Service - Caché de snapshots de dashboards (stale-while-revalidate)
+import asyncio
+import time
+import traceback
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+
+@dataclass
+class Snapshot:
+    data: dict
+    generated_at: datetime
+    stale: bool = False
+
+
+class SnapshotCache:
+    """
+    Snapshots de dashboards por clave (rol + ámbito: admin global, docente o padre por user_id).
+
+    - Un snapshot con menos de ttl_seconds se sirve tal cual
+    - Entre ttl_seconds y max_stale_seconds se sirve el snapshot viejo y se lanza
+      un único recálculo en segundo plano
+    - Sin snapshot (o más viejo que max_stale_seconds) la petición espera el recálculo
+
+    Las peticiones concurrentes de una misma clave comparten el mismo recálculo, así
+    que cuando todos los administradores abren el dashboard a la vez MySQL ve una sola
+    ejecución de las consultas. Si el recálculo falla y hay snapshot, se sigue sirviendo.
+    """
+
+    def __init__(self, ttl_seconds: float = 60, max_stale_seconds: float = 600, max_entries: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.max_entries = max_entries
+        self._snapshots: "OrderedDict[str, tuple]" = OrderedDict()  # clave -> (Snapshot, instante monotónico)
+        self._en_curso: Dict[str, asyncio.Task] = {}
+
+    async def get(self, clave: str, calcular: Callable[[], Awaitable[dict]]) -> Snapshot:
+        entrada = self._snapshots.get(clave)
+        if entrada is not None:
+            snapshot, cargado_en = entrada
+            self._snapshots.move_to_end(clave)
+            edad = time.monotonic() - cargado_en
+            if edad < self.ttl_seconds:
+                return snapshot
+            if edad < self.max_stale_seconds:
+                self._recalcular(clave, calcular)
+                return Snapshot(snapshot.data, snapshot.generated_at, stale=True)
+
+        try:
+            return await asyncio.shield(self._recalcular(clave, calcular))
+        except Exception:
+            if entrada is not None:
+                # Mejor un snapshot viejo que un error
+                return Snapshot(entrada[0].data, entrada[0].generated_at, stale=True)
+            raise
+
+    def invalidar(self, clave: Optional[str] = None) -> None:
+        if clave is None:
+            self._snapshots.clear()
+        else:
+            self._snapshots.pop(clave, None)
+
+    def _recalcular(self, clave: str, calcular: Callable[[], Awaitable[dict]]) -> asyncio.Task:
+        """Devuelve el recálculo en curso de la clave o lanza uno nuevo"""
+        tarea = self._en_curso.get(clave)
+        if tarea is None:
+            tarea = asyncio.create_task(self._ejecutar(clave, calcular), name=f"snapshot:{clave}")
+            # Un recálculo en segundo plano puede fallar sin que nadie lo espere (ya se registró)
+            tarea.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._en_curso[clave] = tarea
+        return tarea
+
+    async def _ejecutar(self, clave: str, calcular: Callable[[], Awaitable[dict]]) -> Snapshot:
+        try:
+            data = await calcular()
+            snapshot = Snapshot(data, datetime.now(timezone.utc))
+            self._snapshots[clave] = (snapshot, time.monotonic())
+            self._snapshots.move_to_end(clave)
+            while len(self._snapshots) > self.max_entries:
+                self._snapshots.popitem(last=False)
+            return snapshot
+        except Exception:
+            print(f"[dashboard-cache] Error recalculando {clave}")
+            traceback.print_exc()
+            raise
+        finally:
+            self._en_curso.pop(clave, None)
+
+
+_dashboard_cache: Optional[SnapshotCache] = None
+
+
+def init_dashboard_cache(ttl_seconds: float = 60, max_stale_seconds: float = 600, max_entries: int = 1000) -> SnapshotCache:
+    global _dashboard_cache
+    _dashboard_cache = SnapshotCache(ttl_seconds, max_stale_seconds, max_entries)
+    return _dashboard_cache
+
+
+def get_dashboard_cache() -> SnapshotCache:
+    if _dashboard_cache is None:
+        raise RuntimeError("Caché de dashboards no inicializada")
+    return _dashboard_cache
+
+
+# Conteos de GET /v1/notas: el total aproximado se sirve desde aquí en lugar de un COUNT(*) por página
+_conteo_cache: Optional[SnapshotCache] = None
+
+
+def init_conteo_cache(ttl_seconds: float = 60, max_stale_seconds: float = 900, max_entries: int = 5000) -> SnapshotCache:
+    global _conteo_cache
+    _conteo_cache = SnapshotCache(ttl_seconds, max_stale_seconds, max_entries)
+    return _conteo_cache
+
+
+def get_conteo_cache() -> SnapshotCache:
+    if _conteo_cache is None:
+        raise RuntimeError("Caché de conteos no inicializada")
+    return _conteo_cache
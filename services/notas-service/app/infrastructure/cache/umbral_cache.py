@@ -0,0 +1,137 @@
+# Notas Service - Caché en memoria de umbrales de alerta
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+from app.infrastructure.clients.academico_client import AcademicoServiceClient
+
+# (escala_id, curso_id, grado_id) con None como comodín
+_Clave = Tuple[str, Optional[str], Optional[str]]
+
+
+class UmbralCache:
+    """
+    Tabla de umbrales de alerta activos de Académico, en memoria del proceso.
+
+    - Se carga entera al arrancar el servicio (GET /v1/umbrales paginado)
+    - Se recarga al leer si pasaron más de ttl_seconds desde la última carga
+    - Académico avisa de cada alta/edición/baja (POST /v1/internal/umbrales/invalidar)
+      y la tabla se recarga en ese momento; el TTL cubre a las réplicas que no
+      recibieron el aviso
+
+    Si Académico no responde se sigue usando la última tabla cargada y se
+    vuelve a intentar pasados reintento_seconds.
+    La búsqueda sigue el mismo orden que find_by_escala en Académico:
+    escala+curso+grado, escala+curso, escala+grado y escala global.
+    """
+
+    def __init__(
+        self,
+        academico_client: AcademicoServiceClient,
+        ttl_seconds: float = 300,
+        reintento_seconds: float = 30,
+    ):
+        self.academico_client = academico_client
+        self.ttl_seconds = ttl_seconds
+        self.reintento_seconds = reintento_seconds
+        self._umbrales: Dict[_Clave, Dict] = {}
+        self._cargado_en: Optional[float] = None
+        self._version = 0  # Se incrementa en cada invalidación
+        self._lock = asyncio.Lock()
+
+    @property
+    def cargado(self) -> bool:
+        return self._cargado_en is not None
+
+    @property
+    def total(self) -> int:
+        return len(self._umbrales)
+
+    def _vencido(self) -> bool:
+        return self._cargado_en is None or time.monotonic() - self._cargado_en >= self.ttl_seconds
+
+    def invalidar(self) -> None:
+        """Marca la tabla como vencida; la próxima lectura (o refresh) la recarga"""
+        self._version += 1
+        if self._cargado_en is not None:
+            self._cargado_en = float("-inf")
+
+    async def refresh(self, solo_si_vencido: bool = False) -> bool:
+        """Recarga la tabla desde Académico. Devuelve False si no se pudo cargar."""
+        async with self._lock:
+            # Las lecturas concurrentes que encontraron la tabla vencida esperan
+            # aquí la recarga en curso en vez de repetir la llamada
+            if solo_si_vencido and not self._vencido():
+                return True
+            version = self._version
+            umbrales = await self.academico_client.get_umbrales()
+            if umbrales is None:
+                if self._cargado_en is not None:
+                    # Seguir con la tabla anterior y no reintentar en cada lectura
+                    self._cargado_en = time.monotonic() - max(self.ttl_seconds - self.reintento_seconds, 0)
+                return False
+            self._umbrales = self._indexar(umbrales)
+            # Si llegó una invalidación durante la carga, la tabla ya nace vencida
+            self._cargado_en = time.monotonic() if version == self._version else float("-inf")
+            return True
+
+    async def get(
+        self,
+        escala_id: str,
+        curso_id: Optional[str] = None,
+        grado_id: Optional[str] = None,
+    ) -> Optional[Dict]:
+        """Umbral aplicable a una escala/curso/grado, o None si no hay ninguno definido"""
+        if self._vencido():
+            await self.refresh(solo_si_vencido=True)
+        return self.buscar(escala_id, curso_id, grado_id)
+
+    def buscar(
+        self,
+        escala_id: str,
+        curso_id: Optional[str] = None,
+        grado_id: Optional[str] = None,
+    ) -> Optional[Dict]:
+        """Búsqueda sobre la tabla ya cargada, sin recargar"""
+        candidatas: List[_Clave] = []
+        if curso_id and grado_id:
+            candidatas.append((escala_id, curso_id, grado_id))
+        if curso_id:
+            candidatas.append((escala_id, curso_id, None))
+        if grado_id:
+            candidatas.append((escala_id, None, grado_id))
+        candidatas.append((escala_id, None, None))
+        for clave in candidatas:
+            umbral = self._umbrales.get(clave)
+            if umbral is not None:
+                return umbral
+        return None
+
+    @staticmethod
+    def _indexar(umbrales: List[Dict]) -> Dict[_Clave, Dict]:
+        tabla: Dict[_Clave, Dict] = {}
+        for u in umbrales:
+            if not u.get("activo", True) or not u.get("escala_id"):
+                continue
+            clave = (u["escala_id"], u.get("curso_id") or None, u.get("grado_id") or None)
+            # Con duplicados para la misma clave se queda el primero, como el .first() de Académico
+            tabla.setdefault(clave, u)
+        return tabla
+
+
+_umbral_cache: Optional[UmbralCache] = None
+
+
+def init_umbral_cache(
+    academico_client: AcademicoServiceClient,
+    ttl_seconds: float = 300,
+    reintento_seconds: float = 30,
+) -> UmbralCache:
+    global _umbral_cache
+    _umbral_cache = UmbralCache(academico_client, ttl_seconds, reintento_seconds)
+    return _umbral_cache
+
+
+def get_umbral_cache() -> UmbralCache:
+    if _umbral_cache is None:
+        raise RuntimeError("UmbralCache no inicializada")
+    return _umbral_cache
@@ -1,13 +1,22 @@
 # Notas Service - HTTP Client for Académico Service
+import asyncio
 import httpx
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Iterable
+from shared.common import get_http_client
+from .personas_client import chunked
 
 
 class AcademicoServiceClient:
     """Cliente HTTP para comunicarse con Académico Service"""
     
-    def __init__(self, base_url: str = "http://localhost:8002"):
+    def __init__(self, base_url: str = "http://localhost:8002", http_client: Optional[httpx.AsyncClient] = None):
         self.base_url = base_url
+        self._http_client = http_client
+    
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Cliente HTTP compartido (pool keep-alive del proceso)"""
+        return self._http_client or get_http_client()
     
     async def get_umbral_alerta(
         self, 
@@ -27,23 +36,98 @@ class AcademicoServiceClient:
         if grado_id:
             params["grado_id"] = grado_id
         
-        async with httpx.AsyncClient() as client:
+        try:
+            response = await self.http.get(
+                f"{self.base_url}/v1/umbrales",
+                params=params,
+                headers=headers
+            )
+            if response.status_code == 200:
+                data = response.json()
+                # Académico returns {"umbrales": [...]} so normalize
+                if isinstance(data, dict):
+                    items = data.get("umbrales", [])
+                else:
+                    items = data
+                return items[0] if items else None
+            return None
+        except Exception as e:
+            print(f"Error calling Académico Service: {e}")
+            return None
+    
+    async def get_umbrales(self, page_size: int = 500) -> Optional[List[Dict]]:
+        """
+        Lee todos los umbrales de alerta (GET /v1/umbrales paginado).
+        Devuelve None si el servicio no respondió, para no confundirlo con "sin umbrales".
+        """
+        umbrales: List[Dict] = []
+        offset = 0
+        while True:
             try:
-                response = await client.get(
+                response = await self.http.get(
                     f"{self.base_url}/v1/umbrales",
-                    params=params,
-                    headers=headers,
-                    timeout=10.0
+                    params={"offset": offset, "limit": page_size},
                 )
-                if response.status_code == 200:
-                    data = response.json()
-                    # Académico returns {"umbrales": [...]} so normalize
-                    if isinstance(data, dict):
-                        items = data.get("umbrales", [])
-                    else:
-                        items = data
-                    return items[0] if items else None
-                return None
+                if response.status_code != 200:
+                    print(f"Error calling Académico Service umbrales: {response.status_code} {response.text}")
+                    return None
+                items = response.json().get("umbrales", [])
             except Exception as e:
                 print(f"Error calling Académico Service: {e}")
                 return None
+            umbrales.extend(items)
+            if len(items) < page_size:
+                return umbrales
+            offset += page_size
+
+    async def get_clases_bulk(self, clase_ids: Iterable[str], token: str = None) -> Dict[str, Dict]:
+        """
+        Obtiene varias clases con POST /v1/clases/bulk.
+        Las listas grandes se trocean y los lotes se consultan en paralelo.
+        Devuelve {clase_id: {id, curso_id, seccion_id, grado_id, periodo_id, docente_user_id, status}}.
+        """
+        headers = {}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        
+        async def fetch_chunk(chunk: List[str]) -> List[Dict]:
+            try:
+                response = await self.http.post(
+                    f"{self.base_url}/v1/clases/bulk",
+                    json={"clase_ids": chunk},
+                    headers=headers
+                )
+                if response.status_code == 200:
+                    return response.json().get("clases", [])
+                print(f"Error calling Académico Service bulk: {response.status_code} {response.text}")
+            except Exception as e:
+                print(f"Error calling Académico Service: {e}")
+            return []
+        
+        results = await asyncio.gather(*[fetch_chunk(c) for c in chunked(clase_ids)])
+        return {c["id"]: c for items in results for c in items}
+    
+    async def get_clases_cambios(
+        self,
+        desde: Optional[str] = None,
+        desde_id: Optional[str] = None,
+        limit: int = 500,
+    ) -> Optional[Dict]:
+        """
+        Lee una página del feed de cambios GET /v1/clases/cambios (orden updated_at, id).
+        Devuelve {"clases": [...], "has_more": bool} o None si el servicio no respondió.
+        """
+        params = {"limit": limit}
+        if desde:
+            params["desde"] = desde
+        if desde_id:
+            params["desde_id"] = desde_id
+        try:
+            response = await self.http.get(f"{self.base_url}/v1/clases/cambios", params=params)
+            if response.status_code == 200:
+                return response.json()
+            print(f"Error calling Académico Service feed: {response.status_code} {response.text}")
+            return None
+        except Exception as e:
+            print(f"Error calling Académico Service: {e}")
+            return None
@@ -1,13 +1,44 @@
 # Notas Service - HTTP Client for Personas Service
+import asyncio
 import httpx
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable
+from shared.common import Settings, get_http_client, get_settings, get_service_token
+
+# Nombre con el que Notas firma sus tokens de servicio (sub del JWT)
+SERVICIO = "notas-service"
+
+# Tamaño de lote para los endpoints bulk (Personas acepta hasta 1000 IDs por llamada)
+BULK_CHUNK_SIZE = 500
+
+
+def chunked(ids: Iterable[str], size: int = BULK_CHUNK_SIZE) -> List[List[str]]:
+    """Divide una lista de IDs (sin duplicados ni vacíos) en lotes de tamaño fijo"""
+    unique = list(dict.fromkeys(i for i in ids if i))
+    return [unique[i:i + size] for i in range(0, len(unique), size)]
 
 
 class PersonasServiceClient:
     """Cliente HTTP para comunicarse con Personas Service"""
     
-    def __init__(self, base_url: str = "http://localhost:8003"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8003",
+        http_client: Optional[httpx.AsyncClient] = None,
+        settings: Optional[Settings] = None,
+    ):
         self.base_url = base_url
+        self._http_client = http_client
+        self._settings = settings
+    
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Cliente HTTP compartido (pool keep-alive del proceso)"""
+        return self._http_client or get_http_client()
+    
+    def _headers_servicio(self) -> Dict[str, str]:
+        """Authorization con el token de servicio de Notas (endpoints internos de Personas)"""
+        token = get_service_token(SERVICIO, self._settings or get_settings())
+        return {"Authorization": f"Bearer {token}"}
     
     async def get_padres_by_alumno(self, alumno_id: str, token: str = None) -> List[Dict]:
         """Obtiene los padres de un alumno"""
@@ -15,33 +46,31 @@ class PersonasServiceClient:
         if token:
             headers["Authorization"] = f"Bearer {token}"
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/v1/relaciones/alumno/{alumno_id}",
-                    headers=headers,
-                    timeout=10.0
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    # Personas Service returns {"relaciones": [...]} where each item contains a nested "padre".
-                    if isinstance(data, dict):
-                        items = data.get("relaciones", [])
-                    else:
-                        items = data
+        try:
+            response = await self.http.get(
+                f"{self.base_url}/v1/relaciones/alumno/{alumno_id}",
+                headers=headers
+            )
+            if response.status_code == 200:
+                data = response.json()
+                # Personas Service returns {"relaciones": [...]} where each item contains a nested "padre".
+                if isinstance(data, dict):
+                    items = data.get("relaciones", [])
+                else:
+                    items = data
 
-                    # Normalize to a list of padre dicts (flatten relaciones -> padre)
-                    padres = []
-                    for it in items:
-                        if isinstance(it, dict) and it.get("padre"):
-                            padres.append(it.get("padre"))
-                        elif isinstance(it, dict) and it.get("email"):
-                            padres.append(it)
-                    return padres
-                return []
-            except Exception as e:
-                print(f"Error calling Personas Service: {e}")
-                return []
+                # Normalize to a list of padre dicts (flatten relaciones -> padre)
+                padres = []
+                for it in items:
+                    if isinstance(it, dict) and it.get("padre"):
+                        padres.append(it.get("padre"))
+                    elif isinstance(it, dict) and it.get("email"):
+                        padres.append(it)
+                return padres
+            return []
+        except Exception as e:
+            print(f"Error calling Personas Service: {e}")
+            return []
     
     async def get_matricula_info(self, matricula_id: str, token: str = None) -> Optional[Dict]:
         """Obtiene información de una matrícula"""
@@ -49,16 +78,100 @@ class PersonasServiceClient:
         if token:
             headers["Authorization"] = f"Bearer {token}"
         
-        async with httpx.AsyncClient() as client:
+        try:
+            response = await self.http.get(
+                f"{self.base_url}/v1/matriculas/{matricula_id}",
+                headers=headers
+            )
+            if response.status_code == 200:
+                return response.json()
+            return None
+        except Exception as e:
+            print(f"Error calling Personas Service: {e}")
+            return None
+    
+    async def get_matriculas_bulk(self, matricula_ids: Iterable[str], token: str = None) -> Optional[Dict[str, Dict]]:
+        """
+        Obtiene varias matrículas con POST /v1/matriculas/bulk.
+        Las listas grandes se trocean y los lotes se consultan en paralelo.
+        Devuelve {matricula_id: {id, alumno_id, clase_id, status}} (las inexistentes no
+        aparecen) o None si algún lote falló, para distinguir "no existe" de "no respondió".
+        """
+        headers = {}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        
+        async def fetch_chunk(chunk: List[str]) -> Optional[List[Dict]]:
             try:
-                response = await client.get(
-                    f"{self.base_url}/v1/matriculas/{matricula_id}",
-                    headers=headers,
-                    timeout=10.0
+                response = await self.http.post(
+                    f"{self.base_url}/v1/matriculas/bulk",
+                    json={"matricula_ids": chunk},
+                    headers=headers
                 )
                 if response.status_code == 200:
-                    return response.json()
-                return None
+                    return response.json().get("matriculas", [])
+                print(f"Error calling Personas Service bulk: {response.status_code} {response.text}")
             except Exception as e:
                 print(f"Error calling Personas Service: {e}")
-                return None
+            return None
+        
+        results = await asyncio.gather(*[fetch_chunk(c) for c in chunked(matricula_ids)])
+        if any(r is None for r in results):
+            return None
+        return {m["id"]: m for items in results for m in items}
+    
+    async def get_padres_by_alumnos_bulk(self, alumno_ids: Iterable[str], token: str = None) -> Optional[Dict[str, List[Dict]]]:
+        """
+        Obtiene los padres de varios alumnos con POST /v1/relaciones/bulk.
+        Devuelve {alumno_id: [padre, ...]} (los alumnos sin padres no aparecen)
+        o None si algún lote falló, para que el llamador pueda reintentar.
+        Personas solo acepta tokens de servicio o ADMIN: sin `token` se usa el de Notas.
+        """
+        headers = {"Authorization": f"Bearer {token}"} if token else self._headers_servicio()
+        
+        async def fetch_chunk(chunk: List[str]) -> Optional[Dict[str, List[Dict]]]:
+            try:
+                response = await self.http.post(
+                    f"{self.base_url}/v1/relaciones/bulk",
+                    json={"alumno_ids": chunk},
+                    headers=headers
+                )
+                if response.status_code == 200:
+                    return response.json().get("padres_por_alumno", {})
+                print(f"Error calling Personas Service bulk: {response.status_code} {response.text}")
+            except Exception as e:
+                print(f"Error calling Personas Service: {e}")
+            return None
+        
+        results = await asyncio.gather(*[fetch_chunk(c) for c in chunked(alumno_ids)])
+        if any(r is None for r in results):
+            return None
+        return {alumno_id: padres for r in results for alumno_id, padres in r.items()}
+    
+    async def get_matriculas_cambios(
+        self,
+        desde: Optional[str] = None,
+        desde_id: Optional[str] = None,
+        limit: int = 500,
+    ) -> Optional[Dict]:
+        """
+        Lee una página del feed de cambios GET /v1/matriculas/cambios (orden updated_at, id).
+        Devuelve {"matriculas": [...], "has_more": bool} o None si el servicio no respondió.
+        Se llama con el token de servicio de Notas (Personas exige SERVICE o ADMIN).
+        """
+        params = {"limit": limit}
+        if desde:
+            params["desde"] = desde
+        if desde_id:
+            params["desde_id"] = desde_id
+        try:
+            response = await self.http.get(
+                f"{self.base_url}/v1/matriculas/cambios", params=params, headers=self._headers_servicio()
+            )
+            if response.status_code == 200:
+                return response.json()
+            print(f"Error calling Personas Service feed: {response.status_code} {response.text}")
+            return None
+        except Exception as e:
+            print(f"Error calling Personas Service: {e}")
+            return None
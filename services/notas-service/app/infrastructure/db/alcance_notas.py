@@ -0,0 +1,94 @@
+# Notas Service - Alcance de GET /v1/notas por rol (proyección local + respaldo remoto)
+from typing import Dict, List, Optional
+from sqlalchemy import or_, select
+from sqlalchemy.sql.elements import ColumnElement
+from .models import NotaModel, MatriculaProyeccionModel
+
+# Matrículas sin proyectar que se resuelven en Personas/Académico por petición
+# (el desfase del worker de sincronización deja pocas; más allá se esperan al próximo ciclo)
+MAX_MATRICULAS_SIN_PROYECCION = 500
+
+
+def filtro_proyeccion(
+    rol: str,
+    user_id: Optional[str],
+    hijo_ids: Optional[List[str]] = None,
+    clase_id: Optional[str] = None,
+    alumno_id: Optional[str] = None,
+) -> Optional[ColumnElement]:
+    """
+    Condición sobre la proyección (outer join) que limita las notas visibles para el rol
+    y los filtros clase_id/alumno_id; None si no hay ninguna restricción (ADMIN sin filtros).
+    """
+    proy = MatriculaProyeccionModel
+    condiciones = []
+    if rol == "PADRE":
+        condiciones += [proy.alumno_id.in_(hijo_ids or []), proy.is_deleted == False]
+    elif rol == "DOCENTE":
+        condiciones += [proy.docente_user_id == user_id, proy.clase_is_deleted == False, proy.is_deleted == False]
+    if clase_id and rol == "ADMIN":  # Solo ADMIN puede filtrar por clase específica directamente
+        condiciones.append(proy.clase_id == clase_id)
+    if alumno_id and rol in ["ADMIN", "DOCENTE"]:  # DOCENTE puede filtrar por alumno si está en sus clases
+        condiciones.append(proy.alumno_id == alumno_id)
+    if not condiciones:
+        return None
+    condicion = condiciones[0]
+    for c in condiciones[1:]:
+        condicion = condicion & c
+    return condicion
+
+
+def matriculas_sin_proyeccion_query(
+    periodo_id: Optional[str] = None,
+    tipo_evaluacion_id: Optional[str] = None,
+    limit: int = MAX_MATRICULAS_SIN_PROYECCION,
+):
+    """Matrículas con notas que el worker de sincronización todavía no copió a la proyección"""
+    proy = MatriculaProyeccionModel
+    query = select(NotaModel.matricula_clase_id).distinct().outerjoin(
+        proy, proy.matricula_clase_id == NotaModel.matricula_clase_id
+    ).where(NotaModel.is_deleted == False, proy.matricula_clase_id.is_(None))
+    if periodo_id:
+        query = query.where(NotaModel.periodo_id == periodo_id)
+    if tipo_evaluacion_id:
+        query = query.where(NotaModel.tipo_evaluacion_id == tipo_evaluacion_id)
+    return query.limit(limit)
+
+
+def matriculas_remotas_en_alcance(
+    matriculas: Dict[str, Dict],
+    clases: Dict[str, Dict],
+    rol: str,
+    user_id: Optional[str],
+    hijo_ids: Optional[List[str]] = None,
+    clase_id: Optional[str] = None,
+    alumno_id: Optional[str] = None,
+) -> List[str]:
+    """
+    Las mismas reglas que filtro_proyeccion aplicadas a matrículas resueltas en
+    Personas ({id: {alumno_id, clase_id}}) y clases de Académico ({id: {docente_user_id, is_deleted}}).
+    Una matrícula cuya clase no se pudo resolver queda fuera (no se concede acceso a ciegas).
+    """
+    hijos = set(hijo_ids or [])
+    visibles = []
+    for mid, m in matriculas.items():
+        clase = clases.get(m.get("clase_id"))
+        if clase is None:
+            continue
+        if rol == "PADRE" and m.get("alumno_id") not in hijos:
+            continue
+        if rol == "DOCENTE" and (clase.get("docente_user_id") != user_id or clase.get("is_deleted")):
+            continue
+        if clase_id and rol == "ADMIN" and m.get("clase_id") != clase_id:
+            continue
+        if alumno_id and rol in ["ADMIN", "DOCENTE"] and m.get("alumno_id") != alumno_id:
+            continue
+        visibles.append(mid)
+    return visibles
+
+
+def criterio_alcance_notas(filtro: ColumnElement, matriculas_remotas: List[str]) -> ColumnElement:
+    """Notas que cumplen el filtro en la proyección o cuya matrícula (sin proyectar) se autorizó en remoto"""
+    if not matriculas_remotas:
+        return filtro
+    return or_(filtro, NotaModel.matricula_clase_id.in_(matriculas_remotas))
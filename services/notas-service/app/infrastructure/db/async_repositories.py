@@ -0,0 +1,36 @@
+# Notas Service - Infrastructure DB Async Repositories
+from typing import Optional, List, Dict
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain import *
+from .models import *
+from .repositories import nota_model_to_domain, alerta_model_to_domain, libreta_clase_query
+
+
+class AsyncSqlAlchemyNotaRepository(AsyncNotaRepository):
+    """Variante async de las lecturas de SqlAlchemyNotaRepository (mismas consultas)"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def find_by_id(self, nota_id: str) -> Optional[Nota]:
+        result = await self.session.execute(
+            select(NotaModel).where(NotaModel.id == nota_id, NotaModel.is_deleted == False)
+        )
+        model = result.scalars().first()
+        return nota_model_to_domain(model) if model else None
+
+    async def find_libreta_clase(self, clase_id: str, periodo_id: Optional[str] = None) -> List[Dict]:
+        result = await self.session.execute(*libreta_clase_query(clase_id, periodo_id))
+        return [dict(row) for row in result.mappings()]
+
+
+class AsyncSqlAlchemyAlertaRepository(AsyncAlertaRepository):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def find_by_padre(self, padre_id: str) -> List[AlertaNotificacion]:
+        result = await self.session.execute(
+            select(AlertaNotificacionModel).where(AlertaNotificacionModel.padre_id == padre_id)
+        )
+        return [alerta_model_to_domain(m) for m in result.scalars().all()]
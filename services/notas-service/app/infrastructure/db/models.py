@@ -1,5 +1,5 @@
 # Notas Service - Infrastructure DB Models
-from sqlalchemy import Column, String, Integer, Boolean, TIMESTAMP, ForeignKey, Date, Text, Float, JSON
+from sqlalchemy import Column, String, Integer, Boolean, TIMESTAMP, ForeignKey, Date, Text, Float, JSON, Index, Numeric
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from shared.common import Base
@@ -67,7 +67,10 @@ class AlertaNotificacionModel(Base):
 
 class OutboxNotificacionModel(Base):
     __tablename__ = "outbox_notificaciones"
-    __table_args__ = {"schema": "sga_notas"}
+    __table_args__ = (
+        Index("idx_outbox_claim", "estado", "proximo_intento"),
+        {"schema": "sga_notas"},
+    )
     
     id = Column(String(36), primary_key=True)
     tipo = Column(String(20), nullable=False)  # EMAIL, SMS
@@ -80,7 +83,124 @@ class OutboxNotificacionModel(Base):
     intentos = Column(Integer, nullable=False, default=0)
     ultimo_error = Column(Text)
     fecha_envio = Column(TIMESTAMP)
+    proximo_intento = Column(TIMESTAMP)  # Reintento programado (backoff) de un envío FALLIDO
+    procesando_desde = Column(TIMESTAMP)
+    procesado_por = Column(String(100))  # Réplica del despachador que reclamó la fila
     created_at = Column(TIMESTAMP, nullable=False, server_default=func.current_timestamp())
     updated_at = Column(TIMESTAMP, nullable=False, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
     
     alerta = relationship("AlertaNotificacionModel", back_populates="outbox")
+
+
+class MatriculaProyeccionModel(Base):
+    """Proyección local de matrículas/clases (alimentada por el feed de cambios de Personas y Académico)"""
+    __tablename__ = "matriculas_proyeccion"
+    __table_args__ = (
+        Index("idx_proy_docente", "docente_user_id"),
+        Index("idx_proy_alumno", "alumno_id"),
+        Index("idx_proy_clase", "clase_id"),
+        {"schema": "sga_notas"},
+    )
+    
+    matricula_clase_id = Column(String(36), primary_key=True)
+    alumno_id = Column(String(36), nullable=False)
+    clase_id = Column(String(36), nullable=False)
+    curso_id = Column(String(36))
+    docente_user_id = Column(String(36))
+    seccion_id = Column(String(36))
+    grado_id = Column(String(36))
+    status = Column(String(20), nullable=False, default="ACTIVO")
+    is_deleted = Column(Boolean, nullable=False, default=False)
+    clase_is_deleted = Column(Boolean, nullable=False, default=False)
+    synced_at = Column(TIMESTAMP, nullable=False, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+
+class ProyeccionSyncEstadoModel(Base):
+    """Marca de agua (updated_at, id) del último cambio aplicado por cada fuente"""
+    __tablename__ = "proyeccion_sync_estado"
+    __table_args__ = {"schema": "sga_notas"}
+    
+    fuente = Column(String(30), primary_key=True)  # matriculas, clases
+    ultimo_updated_at = Column(TIMESTAMP)
+    ultimo_id = Column(String(36))
+    updated_at = Column(TIMESTAMP, nullable=False, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+
+class IdempotencyKeyModel(Base):
+    """Resultado de peticiones con Idempotency-Key (se purga al vencer expires_at)"""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        Index("idx_idem_expires", "expires_at"),
+        {"schema": "sga_notas"},
+    )
+    
+    idempotency_key = Column(String(100), primary_key=True)
+    user_id = Column(String(36), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    estado = Column(String(20), nullable=False, default="EN_PROCESO")  # EN_PROCESO, COMPLETADO
+    status_code = Column(Integer)
+    response_json = Column(Text(length=4294967295))
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.current_timestamp())
+    updated_at = Column(TIMESTAMP, nullable=False, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+    expires_at = Column(TIMESTAMP, nullable=False)
+
+
+class EventoDominioModel(Base):
+    """Eventos de dominio pendientes de procesar (outbox interno: alertas por nota baja)"""
+    __tablename__ = "eventos_dominio"
+    __table_args__ = (
+        Index("idx_evento_claim", "estado", "tipo", "proximo_intento"),
+        Index("idx_evento_agregado", "agregado_id"),
+        {"schema": "sga_notas"},
+    )
+    
+    id = Column(String(36), primary_key=True)
+    tipo = Column(String(50), nullable=False)
+    agregado_id = Column(String(36), nullable=False)
+    payload = Column(JSON, nullable=False)
+    estado = Column(String(20), nullable=False, default="PENDIENTE")
+    intentos = Column(Integer, nullable=False, default=0)
+    proximo_intento = Column(TIMESTAMP)  # Reintento con backoff tras un fallo
+    ultimo_error = Column(Text)
+    procesando_desde = Column(TIMESTAMP)
+    procesado_por = Column(String(100))
+    procesado_at = Column(TIMESTAMP)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.current_timestamp())
+
+
+class PromedioModel(Base):
+    """
+    Agregados de notas por (matrícula, periodo), mantenidos en la misma transacción
+    que cada alta/edición/baja de nota. Los dashboards suman estas filas en vez de
+    recorrer todas las notas.
+    """
+    __tablename__ = "promedios"
+    __table_args__ = (
+        {"schema": "sga_notas"},
+    )
+    
+    matricula_clase_id = Column(String(36), primary_key=True)
+    periodo_id = Column(String(36), primary_key=True)
+    suma_numerico = Column(Numeric(14, 4), nullable=False, default=0)  # Σ valor_numerico
+    cantidad_numerico = Column(Integer, nullable=False, default=0)
+    suma_ponderada = Column(Numeric(14, 4), nullable=False, default=0)  # Σ valor_numerico × peso
+    peso_total = Column(Numeric(14, 4), nullable=False, default=0)
+    cantidad_notas = Column(Integer, nullable=False, default=0)  # Incluye notas literales
+    updated_at = Column(TIMESTAMP, nullable=False, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+
+class HistogramaNotaModel(Base):
+    """
+    Cantidad de notas numéricas vigentes por clase y valor (en centésimas de punto),
+    mantenida junto con promedios. Los rankings por tercio/quinto/décimo y los
+    percentiles de los dashboards se leen de aquí sin ordenar las notas.
+    """
+    __tablename__ = "histograma_notas"
+    __table_args__ = (
+        {"schema": "sga_notas"},
+    )
+    
+    clase_id = Column(String(36), primary_key=True)
+    centesimas = Column(Integer, primary_key=True)  # valor_numerico × 100 (0..2000)
+    cantidad = Column(Integer, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP, nullable=False, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
@@ -1,5 +1,7 @@
 # Notas Service - Infrastructure DB Repositories
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
+from datetime import datetime
+from sqlalchemy import update, delete, select, bindparam, tuple_, and_, or_, case, text
 from sqlalchemy.orm import Session
 from app.domain import *
 from .models import *
@@ -8,6 +10,47 @@ from datetime import date as dt_date
 from sqlalchemy.dialects.mysql import insert as mysql_insert
 
 
+BULK_UPSERT_CHUNK_SIZE = 500
+
+
+def _nota_key(nota) -> Tuple[str, str, str, str]:
+    """Clave lógica de una nota (índice unique_nota_columna)"""
+    return (nota.matricula_clase_id, nota.tipo_evaluacion_id, nota.periodo_id, nota.columna_nota or "N1")
+
+
+# Aporte de una nota a su fila de promedios: (suma, cantidad, suma_ponderada, peso_total, cantidad_notas)
+_AporteNota = Tuple[float, int, float, float, int]
+
+
+def _aporte_nota(nota, pesos_default: Dict[str, Optional[float]]) -> Optional[Tuple[Tuple[str, str], _AporteNota]]:
+    """Clave (matrícula, periodo) y aporte de una nota a promedios; None si está eliminada"""
+    if nota.is_deleted:
+        return None
+    clave = (nota.matricula_clase_id, nota.periodo_id)
+    if nota.valor_numerico is None:
+        return clave, (0.0, 0, 0.0, 0.0, 1)
+    peso = nota.peso if nota.peso is not None else pesos_default.get(nota.tipo_evaluacion_id)
+    peso = float(peso) if peso is not None else 1.0
+    valor = float(nota.valor_numerico)
+    return clave, (valor, 1, valor * peso, peso, 1)
+
+
+def _acumular_aporte(deltas: Dict, aporte, signo: int) -> None:
+    if aporte is None:
+        return
+    clave, valores = aporte
+    actual = deltas.get(clave, (0.0, 0, 0.0, 0.0, 0))
+    deltas[clave] = tuple(a + signo * v for a, v in zip(actual, valores))
+
+
+def _acumular_bucket(deltas: Dict, nota, signo: int) -> None:
+    """Suma o resta una nota numérica vigente en su bucket (matrícula, centésimas) del histograma"""
+    if nota.is_deleted or nota.valor_numerico is None:
+        return
+    clave = (nota.matricula_clase_id, centesimas(nota.valor_numerico))
+    deltas[clave] = deltas.get(clave, 0) + signo
+
+
 def nota_model_to_domain(model: NotaModel) -> Nota:
     return Nota(
         id=model.id,
@@ -63,21 +106,70 @@ def outbox_model_to_domain(model: OutboxNotificacionModel) -> OutboxNotificacion
         mensaje=model.mensaje,
         alerta_id=model.alerta_id,
         asunto=model.asunto,
-        metadata=str(model.metadata) if model.metadata else None,
+        metadata=str(model.meta_data) if model.meta_data else None,
         estado=model.estado,
         intentos=model.intentos,
         ultimo_error=model.ultimo_error,
         fecha_envio=model.fecha_envio,
+        proximo_intento=model.proximo_intento,
         created_at=model.created_at,
         updated_at=model.updated_at,
     )
 
 
+def proyeccion_model_to_domain(model: MatriculaProyeccionModel) -> MatriculaProyeccion:
+    return MatriculaProyeccion(
+        matricula_clase_id=model.matricula_clase_id,
+        alumno_id=model.alumno_id,
+        clase_id=model.clase_id,
+        curso_id=model.curso_id,
+        docente_user_id=model.docente_user_id,
+        seccion_id=model.seccion_id,
+        grado_id=model.grado_id,
+        status=model.status,
+        is_deleted=model.is_deleted,
+        clase_is_deleted=model.clase_is_deleted,
+        synced_at=model.synced_at,
+    )
+
+
+_LIBRETA_CLASE_SQL = """
+SELECT
+    cl.id AS clase_id, cl.docente_user_id, cl.periodo_id AS clase_periodo_id,
+    c.id AS curso_id, c.nombre AS curso_nombre,
+    s.id AS seccion_id, s.nombre AS seccion_nombre, s.grado_id,
+    m.id AS matricula_clase_id, m.status AS matricula_status,
+    a.id AS alumno_id, a.codigo_alumno, a.dni, a.nombres,
+    a.apellido_paterno, a.apellido_materno,
+    n.id AS nota_id, n.columna_nota, n.tipo_evaluacion_id, n.periodo_id,
+    n.valor_numerico, n.valor_literal, n.peso, te.peso_default
+FROM sga_academico.clases cl
+JOIN sga_academico.cursos c ON cl.curso_id = c.id
+JOIN sga_academico.secciones s ON cl.seccion_id = s.id
+LEFT JOIN sga_personas.matriculas_clase m ON m.clase_id = cl.id AND m.is_deleted = FALSE
+LEFT JOIN sga_personas.alumnos a ON m.alumno_id = a.id
+LEFT JOIN sga_notas.notas n ON n.matricula_clase_id = m.id AND n.is_deleted = FALSE{filtro_periodo}
+LEFT JOIN sga_notas.tipos_evaluacion te ON n.tipo_evaluacion_id = te.id
+WHERE cl.id = :clase_id AND cl.is_deleted = FALSE
+ORDER BY a.apellido_paterno, a.apellido_materno, a.nombres, m.id, n.updated_at
+"""
+
+
+def libreta_clase_query(clase_id: str, periodo_id: Optional[str] = None):
+    """(sentencia, parámetros) de la libreta de una clase; compartida por los repositorios sync y async"""
+    params = {"clase_id": clase_id}
+    filtro_periodo = ""
+    if periodo_id:
+        filtro_periodo = " AND n.periodo_id = :periodo_id"
+        params["periodo_id"] = periodo_id
+    return text(_LIBRETA_CLASE_SQL.format(filtro_periodo=filtro_periodo)), params
+
+
 class SqlAlchemyNotaRepository(NotaRepository):
     def __init__(self, session: Session):
         self.session = session
     
-    def create(self, nota: Nota) -> Nota:
+    def create(self, nota: Nota, commit: bool = True) -> Nota:
         # Usar INSERT ... ON DUPLICATE KEY UPDATE para evitar rollback por concurrencia
         table = NotaModel.__table__
         insert_stmt = mysql_insert(table).values(
@@ -110,8 +202,11 @@ class SqlAlchemyNotaRepository(NotaRepository):
         upsert = insert_stmt.on_duplicate_key_update(**update_dict)
 
         try:
+            previas = self._filas_por_clave([_nota_key(nota)])
             self.session.execute(upsert)
-            self.session.commit()
+            self._actualizar_agregados(previas, [nota])
+            if commit:
+                self.session.commit()
         except Exception:
             self.session.rollback()
             raise
@@ -131,6 +226,82 @@ class SqlAlchemyNotaRepository(NotaRepository):
             raise IntegrityError("Upsert failed, row not found after upsert", None, None)
 
         return nota_model_to_domain(model)
+
+    def bulk_upsert(self, notas: List[Nota], commit: bool = True) -> List[Nota]:
+        """
+        Inserta/actualiza un lote de notas por la clave unique_nota_columna, todo en una
+        transacción, y recupera las filas finales con una sola consulta por bloque.
+        Las que ya existen se actualizan por id (un UPDATE por bloque) y las nuevas se
+        insertan con un INSERT multi-fila; la última nota de cada clave gana.
+        Devuelve las notas en el mismo orden de entrada.
+
+        No se usa INSERT ... ON DUPLICATE KEY UPDATE ni lecturas FOR UPDATE por la clave
+        única: ambos toman next-key locks (huecos del índice) y dos lotes de la misma
+        clase se bloqueaban mutuamente al insertar. Si otra transacción inserta la misma
+        clave a la vez, el INSERT falla por duplicado y el llamador reintenta (en
+        execute_batch, item por item), ya viendo la fila como existente.
+        """
+        if not notas:
+            return []
+        table = NotaModel.__table__
+        finales = {_nota_key(n): n for n in notas}
+        try:
+            previas = self._filas_por_clave(list(finales))
+            ids_existentes = {_nota_key(f): f.id for f in previas}
+            existentes = [(ids_existentes[k], n) for k, n in finales.items() if k in ids_existentes]
+            nuevas = [n for k, n in finales.items() if k not in ids_existentes]
+            for start in range(0, len(existentes), BULK_UPSERT_CHUNK_SIZE):
+                self._actualizar_por_id(existentes[start:start + BULK_UPSERT_CHUNK_SIZE])
+            for start in range(0, len(nuevas), BULK_UPSERT_CHUNK_SIZE):
+                self.session.execute(table.insert().values([
+                    {
+                        "id": n.id,
+                        "matricula_clase_id": n.matricula_clase_id,
+                        "tipo_evaluacion_id": n.tipo_evaluacion_id,
+                        "periodo_id": n.periodo_id,
+                        "escala_id": n.escala_id,
+                        "fecha_registro": n.fecha_registro,
+                        "registrado_por_user_id": n.registrado_por_user_id,
+                        "valor_literal": n.valor_literal,
+                        "valor_numerico": n.valor_numerico,
+                        "peso": n.peso,
+                        "observaciones": n.observaciones,
+                        "columna_nota": n.columna_nota,
+                        "is_deleted": n.is_deleted,
+                    }
+                    for n in nuevas[start:start + BULK_UPSERT_CHUNK_SIZE]
+                ]))
+            self._actualizar_agregados(previas, notas)
+            if commit:
+                self.session.commit()
+        except Exception:
+            # Con commit=False la transacción (o el savepoint) es del llamador
+            if commit:
+                self.session.rollback()
+            raise
+
+        # Lectura final por la clave única (matricula, tipo, periodo, columna)
+        keys = list(dict.fromkeys(_nota_key(n) for n in notas))
+        key_columns = tuple_(
+            NotaModel.matricula_clase_id,
+            NotaModel.tipo_evaluacion_id,
+            NotaModel.periodo_id,
+            NotaModel.columna_nota,
+        )
+        by_key: Dict[Tuple[str, str, str, str], Nota] = {}
+        for start in range(0, len(keys), BULK_UPSERT_CHUNK_SIZE):
+            models = self.session.query(NotaModel).filter(
+                key_columns.in_(keys[start:start + BULK_UPSERT_CHUNK_SIZE]),
+                NotaModel.is_deleted == False,
+            ).all()
+            for model in models:
+                by_key[_nota_key(model)] = nota_model_to_domain(model)
+
+        missing = [k for k in keys if k not in by_key]
+        if missing:
+            raise IntegrityError(f"Bulk upsert failed, {len(missing)} rows not found after upsert", None, None)
+
+        return [by_key[_nota_key(n)] for n in notas]
     
     def find_by_id(self, nota_id: str) -> Optional[Nota]:
         model = self.session.query(NotaModel).filter(
@@ -158,6 +329,142 @@ class SqlAlchemyNotaRepository(NotaRepository):
         # Similar al anterior, necesitamos filtrar por matriculas de esa clase
         return []
 
+    def find_libreta_clase(self, clase_id: str, periodo_id: Optional[str] = None) -> List[Dict]:
+        """
+        Filas de la libreta de una clase en una sola consulta: una por nota, o una
+        sin nota para el alumno que todavía no tiene ninguna (LEFT JOIN).
+        Si la clase no existe no devuelve filas.
+        """
+        result = self.session.execute(*libreta_clase_query(clase_id, periodo_id))
+        return [dict(row) for row in result.mappings()]
+
+    def update(self, nota_id: str, cambios: Dict, commit: bool = True) -> Optional[Nota]:
+        model = self.session.query(NotaModel).filter(
+            NotaModel.id == nota_id,
+            NotaModel.is_deleted == False
+        ).with_for_update().first()
+        if not model:
+            return None
+        try:
+            pesos = self._pesos_default({model.tipo_evaluacion_id, cambios.get("tipo_evaluacion_id")})
+            deltas: Dict = {}
+            buckets: Dict = {}
+            _acumular_aporte(deltas, _aporte_nota(model, pesos), -1)
+            _acumular_bucket(buckets, model, -1)
+            for campo, valor in cambios.items():
+                setattr(model, campo, valor)
+            _acumular_aporte(deltas, _aporte_nota(model, pesos), 1)
+            _acumular_bucket(buckets, model, 1)
+            self.session.flush()
+            SqlAlchemyPromedioRepository(self.session).aplicar_deltas(deltas)
+            SqlAlchemyHistogramaNotasRepository(self.session).aplicar_deltas(buckets)
+            if commit:
+                self.session.commit()
+                self.session.refresh(model)
+        except Exception:
+            self.session.rollback()
+            raise
+        return nota_model_to_domain(model)
+
+    def soft_delete(self, nota_id: str, commit: bool = True) -> bool:
+        model = self.session.query(NotaModel).filter(
+            NotaModel.id == nota_id,
+            NotaModel.is_deleted == False
+        ).with_for_update().first()
+        if not model:
+            return False
+        try:
+            deltas: Dict = {}
+            buckets: Dict = {}
+            _acumular_aporte(deltas, _aporte_nota(model, self._pesos_default({model.tipo_evaluacion_id})), -1)
+            _acumular_bucket(buckets, model, -1)
+            model.is_deleted = True
+            self.session.flush()
+            SqlAlchemyPromedioRepository(self.session).aplicar_deltas(deltas)
+            SqlAlchemyHistogramaNotasRepository(self.session).aplicar_deltas(buckets)
+            if commit:
+                self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return True
+
+    def _filas_por_clave(self, keys: List[Tuple[str, str, str, str]]) -> List:
+        """
+        Estado actual de las notas con esas claves únicas, para descontar su aporte a
+        promedios e histograma antes de sobrescribirlas. Se localizan con una lectura
+        sin bloqueo y se bloquean por id (solo esos registros, sin huecos del índice),
+        en orden de id para que dos lotes no se crucen.
+        Se lee con Core para no dejar objetos obsoletos en la sesión tras la escritura.
+        """
+        keys = list(dict.fromkeys(keys))
+        table = NotaModel.__table__
+        key_columns = tuple_(table.c.matricula_clase_id, table.c.tipo_evaluacion_id, table.c.periodo_id, table.c.columna_nota)
+        ids = []
+        for start in range(0, len(keys), BULK_UPSERT_CHUNK_SIZE):
+            ids.extend(self.session.execute(
+                select(table.c.id).where(key_columns.in_(keys[start:start + BULK_UPSERT_CHUNK_SIZE]))
+            ).scalars().all())
+        ids.sort()
+        filas = []
+        for start in range(0, len(ids), BULK_UPSERT_CHUNK_SIZE):
+            filas.extend(self.session.execute(
+                select(
+                    table.c.id, table.c.matricula_clase_id, table.c.tipo_evaluacion_id, table.c.periodo_id,
+                    table.c.columna_nota, table.c.valor_numerico, table.c.peso, table.c.is_deleted,
+                ).where(table.c.id.in_(ids[start:start + BULK_UPSERT_CHUNK_SIZE]))
+                .order_by(table.c.id).with_for_update()
+            ).all())
+        return filas
+
+    def _actualizar_por_id(self, existentes: List[Tuple[str, Nota]]) -> None:
+        """Sobrescribe notas existentes (id, nota) con un único UPDATE ... CASE id"""
+        table = NotaModel.__table__
+        ids = [nota_id for nota_id, _ in existentes]
+
+        def por_id(campo: str):
+            return case({nota_id: getattr(n, campo) for nota_id, n in existentes}, value=table.c.id)
+
+        self.session.execute(
+            update(table).where(table.c.id.in_(ids)).values(
+                valor_literal=por_id("valor_literal"),
+                valor_numerico=por_id("valor_numerico"),
+                peso=por_id("peso"),
+                observaciones=por_id("observaciones"),
+                registrado_por_user_id=por_id("registrado_por_user_id"),
+                fecha_registro=por_id("fecha_registro"),
+                is_deleted=por_id("is_deleted"),
+                updated_at=func.current_timestamp(),
+            )
+        )
+
+    def _pesos_default(self, tipo_ids) -> Dict[str, Optional[float]]:
+        tipo_ids = [t for t in tipo_ids if t]
+        if not tipo_ids:
+            return {}
+        rows = self.session.query(TipoEvaluacionModel.id, TipoEvaluacionModel.peso_default).filter(
+            TipoEvaluacionModel.id.in_(tipo_ids)
+        ).all()
+        return {tipo_id: peso for tipo_id, peso in rows}
+
+    def _actualizar_agregados(self, previas: List, notas: List[Nota]) -> None:
+        """
+        Resta de promedios e histograma el aporte de las filas que había y suma el de
+        las notas escritas (la última por clave gana)
+        """
+        finales = {_nota_key(n): n for n in notas}
+        pesos = self._pesos_default({f.tipo_evaluacion_id for f in previas} | {n.tipo_evaluacion_id for n in finales.values()})
+        deltas: Dict = {}
+        buckets: Dict = {}
+        for fila in previas:
+            _acumular_aporte(deltas, _aporte_nota(fila, pesos), -1)
+            _acumular_bucket(buckets, fila, -1)
+        for nota in finales.values():
+            _acumular_aporte(deltas, _aporte_nota(nota, pesos), 1)
+            _acumular_bucket(buckets, nota, 1)
+        SqlAlchemyPromedioRepository(self.session).aplicar_deltas(deltas)
+        SqlAlchemyHistogramaNotasRepository(self.session).aplicar_deltas(buckets)
+
 
 class SqlAlchemyTipoEvaluacionRepository(TipoEvaluacionRepository):
     def __init__(self, session: Session):
@@ -174,6 +481,13 @@ class SqlAlchemyTipoEvaluacionRepository(TipoEvaluacionRepository):
             TipoEvaluacionModel.status == "ACTIVO"
         ).all()
         return [tipo_evaluacion_model_to_domain(m) for m in models]
+    
+    def find_existing_ids(self, tipo_ids: List[str]) -> List[str]:
+        tipo_ids = list({t for t in tipo_ids if t})
+        if not tipo_ids:
+            return []
+        rows = self.session.query(TipoEvaluacionModel.id).filter(TipoEvaluacionModel.id.in_(tipo_ids)).all()
+        return [tipo_id for (tipo_id,) in rows]
 
 
 class SqlAlchemyAlertaRepository(AlertaRepository):
@@ -195,6 +509,29 @@ class SqlAlchemyAlertaRepository(AlertaRepository):
         self.session.commit()
         self.session.refresh(model)
         return alerta_model_to_domain(model)
+
+    def create_many(self, alertas: List[AlertaNotificacion], commit: bool = True) -> List[AlertaNotificacion]:
+        """Inserta varias alertas en un solo flush"""
+        if not alertas:
+            return []
+        self.session.add_all([
+            AlertaNotificacionModel(
+                id=a.id,
+                nota_id=a.nota_id,
+                alumno_id=a.alumno_id,
+                padre_id=a.padre_id,
+                tipo_alerta=a.tipo_alerta,
+                mensaje=a.mensaje,
+                leida=a.leida,
+                fecha_lectura=a.fecha_lectura,
+            )
+            for a in alertas
+        ])
+        if commit:
+            self.session.commit()
+        else:
+            self.session.flush()
+        return alertas
     
     def find_by_padre(self, padre_id: str) -> List[AlertaNotificacion]:
         models = self.session.query(AlertaNotificacionModel).filter(
@@ -215,7 +552,7 @@ class SqlAlchemyOutboxRepository(OutboxRepository):
             mensaje=outbox.mensaje,
             alerta_id=outbox.alerta_id,
             asunto=outbox.asunto,
-            metadata=outbox.metadata, # JSON handling might need adjustment depending on DB
+            meta_data=outbox.metadata, # JSON handling might need adjustment depending on DB
             estado=outbox.estado,
             intentos=outbox.intentos,
         )
@@ -223,9 +560,723 @@ class SqlAlchemyOutboxRepository(OutboxRepository):
         self.session.commit()
         self.session.refresh(model)
         return outbox_model_to_domain(model)
+
+    def create_many(self, outboxes: List[OutboxNotificacion], commit: bool = True) -> List[OutboxNotificacion]:
+        """Inserta varios mensajes de outbox en un solo flush"""
+        if not outboxes:
+            return []
+        self.session.add_all([
+            OutboxNotificacionModel(
+                id=o.id,
+                tipo=o.tipo,
+                destinatario=o.destinatario,
+                mensaje=o.mensaje,
+                alerta_id=o.alerta_id,
+                asunto=o.asunto,
+                meta_data=o.metadata,
+                estado=o.estado,
+                intentos=o.intentos,
+            )
+            for o in outboxes
+        ])
+        if commit:
+            self.session.commit()
+        else:
+            self.session.flush()
+        return outboxes
     
     def find_pendientes(self, limit: int = 10) -> List[OutboxNotificacion]:
         models = self.session.query(OutboxNotificacionModel).filter(
             OutboxNotificacionModel.estado == "PENDIENTE"
         ).limit(limit).all()
         return [outbox_model_to_domain(m) for m in models]
+
+    def claim_batch(self, worker_id: str, limit: int = 100) -> List[OutboxNotificacion]:
+        """
+        Reclama hasta `limit` mensajes listos para enviar (PENDIENTE o FALLIDO con
+        reintento vencido) y los pasa a PROCESANDO a nombre de `worker_id`.
+        SELECT ... FOR UPDATE SKIP LOCKED permite que varias réplicas reclamen en
+        paralelo sin bloquearse ni repartirse la misma fila.
+        """
+        try:
+            ids = [row.id for row in self.session.query(OutboxNotificacionModel.id).filter(
+                or_(
+                    OutboxNotificacionModel.estado == "PENDIENTE",
+                    and_(
+                        OutboxNotificacionModel.estado == "FALLIDO",
+                        OutboxNotificacionModel.proximo_intento <= func.now(),
+                    ),
+                )
+            ).order_by(OutboxNotificacionModel.created_at).limit(limit).with_for_update(skip_locked=True).all()]
+            if not ids:
+                self.session.commit()
+                return []
+            self.session.execute(
+                update(OutboxNotificacionModel.__table__)
+                .where(OutboxNotificacionModel.id.in_(ids))
+                .values(
+                    estado="PROCESANDO",
+                    procesando_desde=func.now(),
+                    procesado_por=worker_id,
+                    proximo_intento=None,
+                )
+            )
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        models = self.session.query(OutboxNotificacionModel).filter(
+            OutboxNotificacionModel.id.in_(ids)
+        ).order_by(OutboxNotificacionModel.created_at).all()
+        return [outbox_model_to_domain(m) for m in models]
+
+    def mark_enviados(self, outbox_ids: List[str], worker_id: str) -> int:
+        if not outbox_ids:
+            return 0
+        result = self.session.execute(
+            update(OutboxNotificacionModel.__table__)
+            .where(
+                OutboxNotificacionModel.id.in_(outbox_ids),
+                OutboxNotificacionModel.estado == "PROCESANDO",
+                OutboxNotificacionModel.procesado_por == worker_id,
+            )
+            .values(
+                estado="ENVIADO",
+                intentos=OutboxNotificacionModel.intentos + 1,
+                ultimo_error=None,
+                fecha_envio=func.now(),
+                procesando_desde=None,
+            )
+        )
+        self.session.commit()
+        return result.rowcount
+
+    def mark_fallidos(self, fallos: List[Tuple[str, str, Optional[int]]], worker_id: str) -> int:
+        """
+        Marca envíos fallidos. Cada fallo es (id, error, reintentar_en_segundos);
+        reintentar_en_segundos=None deja el mensaje FALLIDO definitivamente.
+        """
+        actualizados = 0
+        try:
+            for outbox_id, error, reintentar_en in fallos:
+                result = self.session.execute(
+                    update(OutboxNotificacionModel.__table__)
+                    .where(
+                        OutboxNotificacionModel.id == outbox_id,
+                        OutboxNotificacionModel.estado == "PROCESANDO",
+                        OutboxNotificacionModel.procesado_por == worker_id,
+                    )
+                    .values(
+                        estado="FALLIDO",
+                        intentos=OutboxNotificacionModel.intentos + 1,
+                        ultimo_error=error,
+                        procesando_desde=None,
+                        proximo_intento=_segundos_adelante(reintentar_en) if reintentar_en is not None else None,
+                    )
+                )
+                actualizados += result.rowcount
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return actualizados
+
+    def release_stale(self, stale_after_seconds: int) -> int:
+        """Devuelve a PENDIENTE los mensajes PROCESANDO de réplicas que murieron a mitad de lote"""
+        result = self.session.execute(
+            update(OutboxNotificacionModel.__table__)
+            .where(
+                OutboxNotificacionModel.estado == "PROCESANDO",
+                OutboxNotificacionModel.procesando_desde < _segundos_atras(stale_after_seconds),
+            )
+            .values(estado="PENDIENTE", procesando_desde=None, procesado_por=None)
+        )
+        self.session.commit()
+        return result.rowcount
+
+
+class SqlAlchemyMatriculaProyeccionRepository(MatriculaProyeccionRepository):
+    def __init__(self, session: Session):
+        self.session = session
+    
+    def upsert_matriculas(self, matriculas: List[MatriculaProyeccion]) -> int:
+        """Inserta/actualiza los datos propios de la matrícula (los de la clase se completan aparte)"""
+        if not matriculas:
+            return 0
+        table = MatriculaProyeccionModel.__table__
+        insert_stmt = mysql_insert(table).values([
+            {
+                "matricula_clase_id": m.matricula_clase_id,
+                "alumno_id": m.alumno_id,
+                "clase_id": m.clase_id,
+                "status": m.status,
+                "is_deleted": m.is_deleted,
+            } for m in matriculas
+        ])
+        # Lista de tuplas para fijar el orden del SET: MySQL evalúa las asignaciones
+        # de izquierda a derecha y curso_id debe compararse con el clase_id previo
+        upsert = insert_stmt.on_duplicate_key_update([
+            ("alumno_id", insert_stmt.inserted.alumno_id),
+            # Si cambió la clase, se invalidan sus datos para volver a resolverlos
+            ("curso_id", func.if_(table.c.clase_id == insert_stmt.inserted.clase_id, table.c.curso_id, None)),
+            ("clase_id", insert_stmt.inserted.clase_id),
+            ("status", insert_stmt.inserted.status),
+            ("is_deleted", insert_stmt.inserted.is_deleted),
+            ("synced_at", func.current_timestamp()),
+        ])
+        try:
+            self.session.execute(upsert)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return len(matriculas)
+    
+    def update_clases(self, clases: List[Dict]) -> int:
+        """Propaga curso/docente/sección/grado de cada clase a todas sus matrículas proyectadas"""
+        if not clases:
+            return 0
+        table = MatriculaProyeccionModel.__table__
+        stmt = update(table).where(table.c.clase_id == bindparam("b_clase_id")).values(
+            curso_id=bindparam("b_curso_id"),
+            docente_user_id=bindparam("b_docente_user_id"),
+            seccion_id=bindparam("b_seccion_id"),
+            grado_id=bindparam("b_grado_id"),
+            clase_is_deleted=bindparam("b_clase_is_deleted"),
+            synced_at=func.current_timestamp(),
+        )
+        params = [
+            {
+                "b_clase_id": c["id"],
+                "b_curso_id": c.get("curso_id"),
+                "b_docente_user_id": c.get("docente_user_id"),
+                "b_seccion_id": c.get("seccion_id"),
+                "b_grado_id": c.get("grado_id"),
+                "b_clase_is_deleted": bool(c.get("is_deleted", False)),
+            } for c in clases
+        ]
+        try:
+            self.session.connection().execute(stmt, params)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return len(clases)
+    
+    def find_clase_ids_sin_detalle(self, limit: int = 1000) -> List[str]:
+        rows = self.session.query(MatriculaProyeccionModel.clase_id).filter(
+            MatriculaProyeccionModel.curso_id.is_(None)
+        ).distinct().limit(limit).all()
+        return [r[0] for r in rows]
+    
+    def find_by_matricula_ids(self, matricula_ids: List[str]) -> Dict[str, MatriculaProyeccion]:
+        if not matricula_ids:
+            return {}
+        models = self.session.query(MatriculaProyeccionModel).filter(
+            MatriculaProyeccionModel.matricula_clase_id.in_(list(set(matricula_ids)))
+        ).all()
+        return {m.matricula_clase_id: proyeccion_model_to_domain(m) for m in models}
+    
+    def get_watermark(self, fuente: str) -> Tuple[Optional[datetime], Optional[str]]:
+        model = self.session.query(ProyeccionSyncEstadoModel).filter(
+            ProyeccionSyncEstadoModel.fuente == fuente
+        ).first()
+        if not model:
+            return None, None
+        return model.ultimo_updated_at, model.ultimo_id
+    
+    def save_watermark(self, fuente: str, updated_at: datetime, last_id: str) -> None:
+        table = ProyeccionSyncEstadoModel.__table__
+        insert_stmt = mysql_insert(table).values(fuente=fuente, ultimo_updated_at=updated_at, ultimo_id=last_id)
+        upsert = insert_stmt.on_duplicate_key_update(
+            ultimo_updated_at=insert_stmt.inserted.ultimo_updated_at,
+            ultimo_id=insert_stmt.inserted.ultimo_id,
+        )
+        try:
+            self.session.execute(upsert)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+
+def _segundos_atras(segundos: int):
+    """NOW() - INTERVAL n SECOND evaluado en la BD (evita desfases de reloj entre réplicas)"""
+    return func.date_sub(func.now(), text(f"INTERVAL {int(segundos)} SECOND"))
+
+
+def _segundos_adelante(segundos: int):
+    return func.date_add(func.now(), text(f"INTERVAL {int(segundos)} SECOND"))
+
+
+class SqlAlchemyIdempotencyRepository(IdempotencyRepository):
+    def __init__(self, session: Session):
+        self.session = session
+    
+    def reservar(self, key: str, user_id: str, request_hash: str, ttl_seconds: int) -> bool:
+        table = IdempotencyKeyModel.__table__
+        try:
+            self.session.execute(table.insert().values(
+                idempotency_key=key,
+                user_id=user_id,
+                request_hash=request_hash,
+                estado="EN_PROCESO",
+                expires_at=_segundos_adelante(ttl_seconds),
+            ))
+            self.session.commit()
+            return True
+        except IntegrityError:
+            self.session.rollback()
+            return False
+    
+    def find(self, key: str, user_id: str, stale_after_seconds: int) -> Optional[IdempotencyRecord]:
+        # Cerrar la transacción actual para leer un snapshot nuevo (REPEATABLE READ)
+        self.session.commit()
+        vencido = and_(
+            IdempotencyKeyModel.estado == "EN_PROCESO",
+            IdempotencyKeyModel.updated_at < _segundos_atras(stale_after_seconds),
+        )
+        row = self.session.query(IdempotencyKeyModel, vencido).filter(
+            IdempotencyKeyModel.idempotency_key == key,
+            IdempotencyKeyModel.user_id == user_id,
+            IdempotencyKeyModel.expires_at > func.now(),
+        ).first()
+        if not row:
+            return None
+        model, en_proceso_vencido = row
+        return IdempotencyRecord(
+            idempotency_key=model.idempotency_key,
+            user_id=model.user_id,
+            request_hash=model.request_hash,
+            estado=model.estado,
+            status_code=model.status_code,
+            response_json=model.response_json,
+            created_at=model.created_at,
+            updated_at=model.updated_at,
+            expires_at=model.expires_at,
+            en_proceso_vencido=bool(en_proceso_vencido),
+        )
+    
+    def tomar_control(self, key: str, user_id: str, request_hash: str, ttl_seconds: int, stale_after_seconds: int) -> bool:
+        # UPDATE condicional: solo una petición puede reclamar la fila (bloqueo de fila de InnoDB)
+        result = self.session.execute(
+            update(IdempotencyKeyModel.__table__)
+            .where(
+                IdempotencyKeyModel.idempotency_key == key,
+                IdempotencyKeyModel.user_id == user_id,
+                or_(
+                    IdempotencyKeyModel.expires_at <= func.now(),
+                    and_(
+                        IdempotencyKeyModel.estado == "EN_PROCESO",
+                        IdempotencyKeyModel.updated_at < _segundos_atras(stale_after_seconds),
+                    ),
+                ),
+            )
+            .values(
+                request_hash=request_hash,
+                estado="EN_PROCESO",
+                status_code=None,
+                response_json=None,
+                created_at=func.now(),
+                updated_at=func.now(),
+                expires_at=_segundos_adelante(ttl_seconds),
+            )
+        )
+        self.session.commit()
+        return result.rowcount == 1
+    
+    def completar(self, key: str, user_id: str, status_code: int, response_json: str) -> None:
+        self.session.execute(
+            update(IdempotencyKeyModel.__table__)
+            .where(
+                IdempotencyKeyModel.idempotency_key == key,
+                IdempotencyKeyModel.user_id == user_id,
+            )
+            .values(
+                estado="COMPLETADO",
+                status_code=status_code,
+                response_json=response_json,
+                updated_at=func.now(),
+            )
+        )
+        self.session.commit()
+    
+    def liberar(self, key: str, user_id: str) -> None:
+        self.session.execute(
+            delete(IdempotencyKeyModel.__table__).where(
+                IdempotencyKeyModel.idempotency_key == key,
+                IdempotencyKeyModel.user_id == user_id,
+                IdempotencyKeyModel.estado == "EN_PROCESO",
+            )
+        )
+        self.session.commit()
+    
+    def renovar(self, key: str, user_id: str) -> bool:
+        result = self.session.execute(
+            update(IdempotencyKeyModel.__table__)
+            .where(
+                IdempotencyKeyModel.idempotency_key == key,
+                IdempotencyKeyModel.user_id == user_id,
+                IdempotencyKeyModel.estado == "EN_PROCESO",
+            )
+            .values(updated_at=func.now())
+        )
+        self.session.commit()
+        return result.rowcount == 1
+    
+    def delete_expired(self, limit: int = 1000) -> int:
+        result = self.session.execute(
+            text("DELETE FROM sga_notas.idempotency_keys WHERE expires_at <= NOW() LIMIT :limit"),
+            {"limit": limit},
+        )
+        self.session.commit()
+        return result.rowcount
+
+
+def evento_model_to_domain(model: EventoDominioModel) -> EventoDominio:
+    return EventoDominio(
+        id=model.id,
+        tipo=model.tipo,
+        agregado_id=model.agregado_id,
+        payload=model.payload or {},
+        estado=model.estado,
+        intentos=model.intentos,
+        ultimo_error=model.ultimo_error,
+        created_at=model.created_at,
+        procesado_at=model.procesado_at,
+    )
+
+
+class SqlAlchemyEventoDominioRepository(EventoDominioRepository):
+    def __init__(self, session: Session):
+        self.session = session
+    
+    def add_many(self, eventos: List[EventoDominio]) -> None:
+        if not eventos:
+            return
+        self.session.execute(EventoDominioModel.__table__.insert(), [
+            {
+                "id": e.id,
+                "tipo": e.tipo,
+                "agregado_id": e.agregado_id,
+                "payload": e.payload,
+                "estado": e.estado,
+                "intentos": e.intentos,
+            }
+            for e in eventos
+        ])
+    
+    def claim_batch(self, tipo: str, worker_id: str, limit: int = 200) -> List[EventoDominio]:
+        """Reclama eventos PENDIENTE con FOR UPDATE SKIP LOCKED y los pasa a PROCESANDO"""
+        try:
+            ids = [row.id for row in self.session.query(EventoDominioModel.id).filter(
+                EventoDominioModel.estado == "PENDIENTE",
+                EventoDominioModel.tipo == tipo,
+                or_(
+                    EventoDominioModel.proximo_intento.is_(None),
+                    EventoDominioModel.proximo_intento <= func.now(),
+                ),
+            ).order_by(EventoDominioModel.created_at).limit(limit).with_for_update(skip_locked=True).all()]
+            if not ids:
+                self.session.commit()
+                return []
+            self.session.execute(
+                update(EventoDominioModel.__table__)
+                .where(EventoDominioModel.id.in_(ids))
+                .values(estado="PROCESANDO", procesando_desde=func.now(), procesado_por=worker_id)
+            )
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        models = self.session.query(EventoDominioModel).filter(
+            EventoDominioModel.id.in_(ids)
+        ).order_by(EventoDominioModel.created_at).all()
+        return [evento_model_to_domain(m) for m in models]
+    
+    def mark_procesados(self, evento_ids: List[str], worker_id: str) -> None:
+        if not evento_ids:
+            return
+        self.session.execute(
+            update(EventoDominioModel.__table__)
+            .where(
+                EventoDominioModel.id.in_(evento_ids),
+                EventoDominioModel.estado == "PROCESANDO",
+                EventoDominioModel.procesado_por == worker_id,
+            )
+            .values(
+                estado="PROCESADO",
+                intentos=EventoDominioModel.intentos + 1,
+                proximo_intento=None,
+                procesado_at=func.now(),
+                procesando_desde=None,
+                ultimo_error=None,
+            )
+        )
+    
+    def mark_fallidos(
+        self,
+        evento_ids: List[str],
+        worker_id: str,
+        error: str,
+        max_intentos: int,
+        backoff_base_seconds: int = 5,
+        backoff_max_seconds: int = 600,
+    ) -> None:
+        """
+        Devuelve los eventos a PENDIENTE con reintento diferido (backoff exponencial
+        según sus intentos), o FALLIDO al agotar max_intentos.
+        Solo toca los eventos que este worker sigue teniendo en PROCESANDO: si release_stale
+        ya los devolvió y otro worker los reclamó, esa réplica decide su estado.
+        """
+        if not evento_ids:
+            return
+        agotado = EventoDominioModel.intentos + 1 >= max_intentos
+        try:
+            # MySQL aplica el SET de izquierda a derecha: estado y proximo_intento se calculan
+            # con los intentos anteriores y `intentos` se incrementa al final. El retardo es
+            # base * 2^(intentos anteriores), igual que DespacharOutboxUseCase._reintentar_en
+            self.session.execute(
+                update(EventoDominioModel.__table__)
+                .where(
+                    EventoDominioModel.id.in_(evento_ids),
+                    EventoDominioModel.estado == "PROCESANDO",
+                    EventoDominioModel.procesado_por == worker_id,
+                )
+                .ordered_values(
+                    (EventoDominioModel.estado, case((agotado, "FALLIDO"), else_="PENDIENTE")),
+                    (EventoDominioModel.proximo_intento, case(
+                        (agotado, None),
+                        else_=func.date_add(func.now(), text(
+                            "INTERVAL LEAST(:backoff_base * POW(2, intentos), :backoff_max) SECOND"
+                        ).bindparams(backoff_base=backoff_base_seconds, backoff_max=backoff_max_seconds)),
+                    )),
+                    (EventoDominioModel.ultimo_error, error),
+                    (EventoDominioModel.procesando_desde, None),
+                    (EventoDominioModel.intentos, EventoDominioModel.intentos + 1),
+                )
+            )
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+    
+    def release_stale(self, stale_after_seconds: int) -> int:
+        result = self.session.execute(
+            update(EventoDominioModel.__table__)
+            .where(
+                EventoDominioModel.estado == "PROCESANDO",
+                EventoDominioModel.procesando_desde < _segundos_atras(stale_after_seconds),
+            )
+            .values(estado="PENDIENTE", procesando_desde=None, procesado_por=None)
+        )
+        self.session.commit()
+        return result.rowcount
+
+
+class SqlAlchemyPromedioRepository(PromedioRepository):
+    # Agregados de una (matrícula, periodo) calculados desde sus notas vigentes
+    _AGREGADOS_SQL = """
+        SELECT n.matricula_clase_id, n.periodo_id,
+            COALESCE(SUM(n.valor_numerico), 0),
+            COUNT(n.valor_numerico),
+            COALESCE(SUM(n.valor_numerico * COALESCE(n.peso, te.peso_default, 1)), 0),
+            COALESCE(SUM(CASE WHEN n.valor_numerico IS NOT NULL THEN COALESCE(n.peso, te.peso_default, 1) END), 0),
+            COUNT(*)
+        FROM sga_notas.notas n
+        LEFT JOIN sga_notas.tipos_evaluacion te ON n.tipo_evaluacion_id = te.id
+        WHERE n.is_deleted = FALSE{filtro}
+        GROUP BY n.matricula_clase_id, n.periodo_id
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def aplicar_deltas(self, deltas: Dict[Tuple[str, str], Tuple[float, int, float, float, int]]) -> None:
+        filas = [
+            {
+                "matricula_clase_id": matricula_clase_id,
+                "periodo_id": periodo_id,
+                "suma_numerico": suma,
+                "cantidad_numerico": cantidad,
+                "suma_ponderada": suma_ponderada,
+                "peso_total": peso_total,
+                "cantidad_notas": cantidad_notas,
+            }
+            for (matricula_clase_id, periodo_id), (suma, cantidad, suma_ponderada, peso_total, cantidad_notas) in deltas.items()
+            if any((suma, cantidad, suma_ponderada, peso_total, cantidad_notas))
+        ]
+        if not filas:
+            return
+        table = PromedioModel.__table__
+        for start in range(0, len(filas), BULK_UPSERT_CHUNK_SIZE):
+            insert_stmt = mysql_insert(table).values(filas[start:start + BULK_UPSERT_CHUNK_SIZE])
+            self.session.execute(insert_stmt.on_duplicate_key_update(
+                suma_numerico=table.c.suma_numerico + insert_stmt.inserted.suma_numerico,
+                cantidad_numerico=table.c.cantidad_numerico + insert_stmt.inserted.cantidad_numerico,
+                suma_ponderada=table.c.suma_ponderada + insert_stmt.inserted.suma_ponderada,
+                peso_total=table.c.peso_total + insert_stmt.inserted.peso_total,
+                cantidad_notas=table.c.cantidad_notas + insert_stmt.inserted.cantidad_notas,
+                updated_at=func.current_timestamp(),
+            ))
+
+    def recalcular(self, tipo_evaluacion_id: Optional[str] = None, commit: bool = True) -> int:
+        params = {}
+        filtro = ""
+        borrar = "DELETE FROM sga_notas.promedios"
+        if tipo_evaluacion_id:
+            # Solo las (matrícula, periodo) que tienen alguna nota de ese tipo
+            claves = "SELECT DISTINCT matricula_clase_id, periodo_id FROM sga_notas.notas WHERE tipo_evaluacion_id = :tipo_evaluacion_id"
+            filtro = f" AND (n.matricula_clase_id, n.periodo_id) IN ({claves})"
+            borrar = f"DELETE p FROM sga_notas.promedios p JOIN ({claves}) k ON p.matricula_clase_id = k.matricula_clase_id AND p.periodo_id = k.periodo_id"
+            params["tipo_evaluacion_id"] = tipo_evaluacion_id
+        try:
+            self.session.execute(text(borrar), params)
+            result = self.session.execute(text(
+                "INSERT INTO sga_notas.promedios "
+                "(matricula_clase_id, periodo_id, suma_numerico, cantidad_numerico, suma_ponderada, peso_total, cantidad_notas)"
+                + self._AGREGADOS_SQL.format(filtro=filtro)
+            ), params)
+            if commit:
+                self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return result.rowcount
+
+    def top_cursos(self, limit: int = 5, clase_ids: Optional[List[str]] = None) -> List[Dict]:
+        sql = """
+        SELECT c.id AS curso_id, c.nombre AS curso_nombre,
+            SUM(p.suma_numerico) / SUM(p.cantidad_numerico) AS avg_grade,
+            SUM(p.cantidad_numerico) AS cnt
+        FROM sga_notas.promedios p
+        JOIN sga_personas.matriculas_clase m ON p.matricula_clase_id = m.id
+        JOIN sga_academico.clases cl ON m.clase_id = cl.id
+        JOIN sga_academico.cursos c ON cl.curso_id = c.id
+        WHERE p.cantidad_numerico > 0{filtro}
+        GROUP BY c.id, c.nombre
+        ORDER BY avg_grade DESC
+        LIMIT :limit
+        """
+        params = {"limit": limit}
+        filtro = ""
+        if clase_ids is not None:
+            filtro = " AND cl.id IN :clase_ids"
+            params["clase_ids"] = clase_ids
+        stmt = text(sql.format(filtro=filtro))
+        if clase_ids is not None:
+            stmt = stmt.bindparams(bindparam("clase_ids", expanding=True))
+        return [
+            {**dict(row), "avg_grade": float(row["avg_grade"]), "cnt": int(row["cnt"])}
+            for row in self.session.execute(stmt, params).mappings()
+        ]
+
+    def alumnos_promedio_bajo(
+        self,
+        limit: int = 10,
+        clase_ids: Optional[List[str]] = None,
+        alumno_ids: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        sql = """
+        SELECT a.id AS alumno_id, CONCAT(a.nombres, ' ', a.apellido_paterno) AS nombre,
+            SUM(p.suma_numerico) / SUM(p.cantidad_numerico) AS avg_grade
+        FROM sga_notas.promedios p
+        JOIN sga_personas.matriculas_clase m ON p.matricula_clase_id = m.id
+        JOIN sga_personas.alumnos a ON m.alumno_id = a.id
+        WHERE p.cantidad_numerico > 0 AND a.is_deleted = FALSE{filtro}
+        GROUP BY a.id, a.nombres, a.apellido_paterno
+        ORDER BY avg_grade ASC
+        LIMIT :limit
+        """
+        params = {"limit": limit}
+        filtro = ""
+        expanding = []
+        if clase_ids is not None:
+            filtro += " AND m.clase_id IN :clase_ids"
+            params["clase_ids"] = clase_ids
+            expanding.append(bindparam("clase_ids", expanding=True))
+        if alumno_ids is not None:
+            filtro += " AND a.id IN :alumno_ids"
+            params["alumno_ids"] = alumno_ids
+            expanding.append(bindparam("alumno_ids", expanding=True))
+        stmt = text(sql.format(filtro=filtro))
+        if expanding:
+            stmt = stmt.bindparams(*expanding)
+        return [
+            {**dict(row), "avg_grade": float(row["avg_grade"])}
+            for row in self.session.execute(stmt, params).mappings()
+        ]
+
+
+class SqlAlchemyHistogramaNotasRepository(HistogramaNotasRepository):
+    def __init__(self, session: Session):
+        self.session = session
+
+    def aplicar_deltas(self, deltas: Dict[Tuple[str, int], int]) -> None:
+        deltas = {clave: cantidad for clave, cantidad in deltas.items() if cantidad}
+        if not deltas:
+            return
+        matricula_ids = list({matricula_id for matricula_id, _ in deltas})
+        stmt = text(
+            "SELECT id, clase_id FROM sga_personas.matriculas_clase WHERE id IN :matricula_ids"
+        ).bindparams(bindparam("matricula_ids", expanding=True))
+        clase_por_matricula: Dict[str, str] = {}
+        for start in range(0, len(matricula_ids), BULK_UPSERT_CHUNK_SIZE):
+            rows = self.session.execute(stmt, {"matricula_ids": matricula_ids[start:start + BULK_UPSERT_CHUNK_SIZE]})
+            clase_por_matricula.update({row[0]: row[1] for row in rows})
+
+        por_clase: Dict[Tuple[str, int], int] = {}
+        for (matricula_id, bucket), cantidad in deltas.items():
+            clase_id = clase_por_matricula.get(matricula_id)
+            if clase_id is None:
+                continue  # Sin matrícula no cuenta, igual que el JOIN del recálculo
+            por_clase[(clase_id, bucket)] = por_clase.get((clase_id, bucket), 0) + cantidad
+        # Orden fijo de claves para que dos transacciones no se bloqueen en orden inverso
+        filas = [
+            {"clase_id": clase_id, "centesimas": bucket, "cantidad": cantidad}
+            for (clase_id, bucket), cantidad in sorted(por_clase.items())
+            if cantidad
+        ]
+        if not filas:
+            return
+        table = HistogramaNotaModel.__table__
+        for start in range(0, len(filas), BULK_UPSERT_CHUNK_SIZE):
+            insert_stmt = mysql_insert(table).values(filas[start:start + BULK_UPSERT_CHUNK_SIZE])
+            self.session.execute(insert_stmt.on_duplicate_key_update(
+                cantidad=table.c.cantidad + insert_stmt.inserted.cantidad,
+                updated_at=func.current_timestamp(),
+            ))
+
+    def recalcular(self) -> int:
+        try:
+            self.session.execute(text("DELETE FROM sga_notas.histograma_notas"))
+            result = self.session.execute(text("""
+                INSERT INTO sga_notas.histograma_notas (clase_id, centesimas, cantidad)
+                SELECT m.clase_id, ROUND(n.valor_numerico * 100), COUNT(*)
+                FROM sga_notas.notas n
+                JOIN sga_personas.matriculas_clase m ON n.matricula_clase_id = m.id
+                WHERE n.is_deleted = FALSE AND n.valor_numerico IS NOT NULL
+                GROUP BY m.clase_id, ROUND(n.valor_numerico * 100)
+            """))
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return result.rowcount
+
+    def obtener(self, clase_ids: Optional[List[str]] = None) -> HistogramaNotas:
+        sql = """
+        SELECT centesimas, SUM(cantidad) AS cantidad
+        FROM sga_notas.histograma_notas
+        {filtro}
+        GROUP BY centesimas
+        HAVING SUM(cantidad) > 0
+        """
+        if clase_ids is None:
+            rows = self.session.execute(text(sql.format(filtro="")))
+        elif not clase_ids:
+            return HistogramaNotas()
+        else:
+            stmt = text(sql.format(filtro="WHERE clase_id IN :clase_ids")).bindparams(bindparam("clase_ids", expanding=True))
+            rows = self.session.execute(stmt, {"clase_ids": clase_ids})
+        return HistogramaNotas({int(row[0]): int(row[1]) for row in rows})
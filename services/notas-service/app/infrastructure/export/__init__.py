@@ -0,0 +1 @@
+# Notas Service - Infrastructure Export Package Init
@@ -0,0 +1,180 @@
+# Notas Service - Escritor XLSX en streaming (memoria constante)
+import datetime
+import math
+import re
+import zipfile
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Bytes acumulados antes de entregar un trozo al cliente
+CHUNK_BYTES = 64 * 1024
+
+# Caracteres de control que XML 1.0 no admite (openpyxl rechaza la celda entera)
+_ILEGALES_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{nombre}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# Estilo 0: normal; estilo 1: cabecera en negrita
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_SHEET_INICIO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetData>'
+)
+_SHEET_FIN = '</sheetData></worksheet>'
+
+
+def columna_excel(indice: int) -> str:
+    """0 -> 'A', 25 -> 'Z', 26 -> 'AA'"""
+    letras = ""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _celda(ref: str, valor: Any, estilo: int) -> str:
+    s = f' s="{estilo}"' if estilo else ""
+    if valor is None or valor == "":
+        return ""
+    if isinstance(valor, bool):
+        return f'<c r="{ref}" t="b"{s}><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, float, Decimal)) and math.isfinite(valor):
+        return f'<c r="{ref}"{s}><v>{valor}</v></c>'
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        valor = valor.isoformat()
+    texto = escape(_ILEGALES_XML.sub("", str(valor)))
+    return f'<c r="{ref}" t="inlineStr"{s}><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+class _Buffer:
+    """Destino no 'seekable' del ZipFile: acumula lo escrito hasta que el generador lo entrega"""
+
+    def __init__(self):
+        self._partes: List[bytes] = []
+        self.tamano = 0
+
+    def write(self, datos) -> int:
+        if datos:
+            self._partes.append(bytes(datos))
+            self.tamano += len(datos)
+        return len(datos)
+
+    def flush(self) -> None:
+        pass
+
+    def vaciar(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        self.tamano = 0
+        return datos
+
+
+def stream_xlsx(
+    filas: Iterable[Sequence[Any]],
+    cabecera: Optional[Sequence[str]] = None,
+    nombre_hoja: str = "Hoja1",
+    chunk_bytes: int = CHUNK_BYTES,
+) -> Iterator[bytes]:
+    """
+    Genera un .xlsx de una hoja a medida que llegan las filas, en trozos de ~chunk_bytes.
+
+    - Escribe el zip sin buscar hacia atrás (descriptores de datos tras cada entrada),
+      así que nada del archivo queda retenido más allá del trozo en curso
+    - Textos como inlineStr: no hay tabla de strings compartidos que mantener en memoria
+    - Es un generador síncrono: StreamingResponse lo itera en el threadpool, fuera
+      del event loop, igual que el CSV
+    """
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _RELS)
+        zf.writestr("xl/workbook.xml", _WORKBOOK.format(nombre=escape(nombre_hoja[:31], {'"': "&quot;"})))
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        zf.writestr("xl/styles.xml", _STYLES)
+        # Primer byte: las partes fijas salen antes de leer la primera fila del cursor
+        yield buffer.vaciar()
+
+        columnas: List[str] = []
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as hoja:
+            hoja.write(_SHEET_INICIO.encode("utf-8"))
+            numero = 0
+            pendientes: List[str] = []
+            pendientes_bytes = 0
+
+            def _fila(valores: Sequence[Any], estilo: int) -> str:
+                while len(columnas) < len(valores):
+                    columnas.append(columna_excel(len(columnas)))
+                celdas = "".join(
+                    _celda(f"{columnas[i]}{numero}", v, estilo) for i, v in enumerate(valores)
+                )
+                return f'<row r="{numero}">{celdas}</row>'
+
+            if cabecera:
+                numero += 1
+                pendientes.append(_fila(cabecera, 1))
+
+            for valores in filas:
+                numero += 1
+                xml = _fila(valores, 0)
+                pendientes.append(xml)
+                pendientes_bytes += len(xml)
+                if pendientes_bytes >= chunk_bytes:
+                    hoja.write("".join(pendientes).encode("utf-8"))
+                    pendientes.clear()
+                    pendientes_bytes = 0
+                    if buffer.tamano:
+                        yield buffer.vaciar()
+
+            pendientes.append(_SHEET_FIN)
+            hoja.write("".join(pendientes).encode("utf-8"))
+    yield buffer.vaciar()
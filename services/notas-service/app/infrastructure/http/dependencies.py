@@ -1,15 +1,23 @@
 # Notas Service - HTTP Dependencies
 from functools import lru_cache
+from typing import AsyncGenerator
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
 from shared.common import get_settings as get_common_settings, Settings
 from app.infrastructure.db.repositories import *
+from app.infrastructure.db.async_repositories import *
 from app.infrastructure.clients.personas_client import PersonasServiceClient
 from app.infrastructure.clients.academico_client import AcademicoServiceClient
+from app.infrastructure.cache.umbral_cache import UmbralCache, get_umbral_cache
+from app.infrastructure.cache.snapshot_cache import SnapshotCache, get_dashboard_cache, get_conteo_cache
 from app.application.use_cases.registrar_nota import RegistrarNotaUseCase
+from app.application.use_cases.ejecutar_idempotente import EjecutarIdempotenteUseCase
+from app.application.use_cases.obtener_libreta import ObtenerLibretaUseCase
 
 
 _session_factory = None
+_async_session_factory = None
 
 
 def set_session_factory(factory):
@@ -17,6 +25,13 @@ def set_session_factory(factory):
     _session_factory = factory
 
 
+def get_session_factory():
+    """Factory de sesiones para trabajo fuera del ciclo de una petición"""
+    if _session_factory is None:
+        raise RuntimeError("Session factory not initialized")
+    return _session_factory
+
+
 def get_db() -> Session:
     if _session_factory is None:
         raise RuntimeError("Session factory not initialized")
@@ -27,6 +42,27 @@ def get_db() -> Session:
         db.close()
 
 
+def get_lease_db() -> Session:
+    """
+    Segunda sesión de la petición: renueva la reserva de la Idempotency-Key mientras
+    la sesión de get_db está ocupada con el lote (no conecta hasta el primer uso)
+    """
+    yield from get_db()
+
+
+def set_async_session_factory(factory):
+    global _async_session_factory
+    _async_session_factory = factory
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Sesión async: las consultas no bloquean el event loop mientras esperan a MySQL"""
+    if _async_session_factory is None:
+        raise RuntimeError("Async session factory not initialized")
+    async with _async_session_factory() as db:
+        yield db
+
+
 @lru_cache()
 def get_settings() -> Settings:
     return get_common_settings()
@@ -35,7 +71,7 @@ def get_settings() -> Settings:
 def get_personas_client(settings = Depends(get_settings)) -> PersonasServiceClient:
     # Asumimos que la URL viene en settings, si no usamos default
     base_url = getattr(settings, "PERSONAS_SERVICE_URL", "http://localhost:8003")
-    return PersonasServiceClient(base_url=base_url)
+    return PersonasServiceClient(base_url=base_url, settings=settings)
 
 
 def get_academico_client(settings = Depends(get_settings)) -> AcademicoServiceClient:
@@ -45,18 +81,28 @@ def get_academico_client(settings = Depends(get_settings)) -> AcademicoServiceCl
 
 def get_registrar_nota_use_case(
     db: Session = Depends(get_db),
-    personas_client: PersonasServiceClient = Depends(get_personas_client),
-    academico_client: AcademicoServiceClient = Depends(get_academico_client),
 ):
-    nota_repo = SqlAlchemyNotaRepository(db)
-    alerta_repo = SqlAlchemyAlertaRepository(db)
-    outbox_repo = SqlAlchemyOutboxRepository(db)
-    
     return RegistrarNotaUseCase(
-        nota_repository=nota_repo,
-        alerta_repository=alerta_repo,
-        outbox_repository=outbox_repo,
-        personas_client=personas_client,
-        academico_client=academico_client,
-        db_session=db,  # Agregar sesión para auditoría
+        nota_repository=SqlAlchemyNotaRepository(db),
+        evento_repository=SqlAlchemyEventoDominioRepository(db),
+        db_session=db,  # Transacción nota + evento y auditoría
+        tipo_evaluacion_repository=SqlAlchemyTipoEvaluacionRepository(db),
     )
+
+
+def get_ejecutar_idempotente_use_case(
+    db: Session = Depends(get_db),
+    lease_db: Session = Depends(get_lease_db),
+    settings = Depends(get_settings),
+):
+    return EjecutarIdempotenteUseCase(
+        idempotency_repository=SqlAlchemyIdempotencyRepository(db),
+        lease_repository=SqlAlchemyIdempotencyRepository(lease_db),
+        ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+        wait_timeout_seconds=settings.IDEMPOTENCY_WAIT_TIMEOUT_SECONDS,
+        stale_after_seconds=settings.IDEMPOTENCY_STALE_SECONDS,
+    )
+
+
+def get_obtener_libreta_use_case(db: AsyncSession = Depends(get_async_db)):
+    return ObtenerLibretaUseCase(nota_repository=AsyncSqlAlchemyNotaRepository(db))
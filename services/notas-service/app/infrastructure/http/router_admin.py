@@ -1,24 +1,22 @@
 # Notas Service - HTTP Router Admin
+import asyncio
+import logging
 from fastapi import APIRouter, Depends, Header, status, Query
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional
+from datetime import datetime
 from sqlalchemy.orm import Session
-from shared.common import DomainException, extract_bearer_token, decode_jwt_token, AuditHelper, AccionAuditoria
+from shared.common import DomainException, ForbiddenException, NotFoundException, UnauthorizedException, ValidationException, extract_bearer_token, authenticate, verify_token, AuditHelper, AccionAuditoria, get_http_client, listar_auditoria, MAX_AUDITORIA_LIMIT, encode_keyset_cursor, decode_keyset_cursor
 from app.infrastructure.http.dependencies import *
-import asyncio
+from app.application.use_cases.ejecutar_idempotente import hash_request
+from app.domain import IdempotencyKeyReusedException, IdempotencyInProgressException, ServicioNoDisponibleException, HistogramaNotas
+from app.application.use_cases.exportar_siagie import CABECERA_SIAGIE, columnas_siagie, pivotar_siagie
+from app.infrastructure.export.xlsx_stream import stream_xlsx, XLSX_MEDIA_TYPE
 
 
 router = APIRouter(prefix="/v1", tags=["notas"])
-
-
-def _extract_user_and_role(payload: dict):
-    """Extrae user_id y rol de un payload JWT con nombres de claim alternativos."""
-    user_id = payload.get('user_id') or payload.get('sub')
-    rol = (payload.get('rol_nombre') or payload.get('rol') or payload.get('role') or '')
-    if isinstance(rol, str):
-        rol = rol.upper()
-    return user_id, rol
+logger = logging.getLogger(__name__)
 
 
 def _log_http_response(label: str, resp, url: str = None):
@@ -99,11 +97,9 @@ async def registrar_nota(
     settings = Depends(get_settings),
 ):
     try:
-        import httpx
-        
         token = extract_bearer_token(authorization)
-        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
-        user_id, rol = _extract_user_and_role(payload)
+        principal = verify_token(token, settings)
+        user_id, rol = principal.user_id, principal.rol
         
         if rol not in ["DOCENTE", "ADMIN"]:
             return JSONResponse(
@@ -113,44 +109,43 @@ async def registrar_nota(
         
         # Si es DOCENTE, validar que la matrícula pertenece a una de sus clases
         if rol == "DOCENTE":
-            async with httpx.AsyncClient() as client:
-                # Obtener la matrícula para saber a qué clase pertenece
-                mat_response = await client.get(
-                    f"{settings.PERSONAS_SERVICE_URL}/v1/matriculas/{request.matricula_clase_id}",
-                    headers={"Authorization": f"Bearer {token}"}
+            client = get_http_client()
+            # Obtener la matrícula para saber a qué clase pertenece
+            mat_response = await client.get(
+                f"{settings.PERSONAS_SERVICE_URL}/v1/matriculas/{request.matricula_clase_id}",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            _log_http_response("registrar_nota.get_matricula", mat_response, f"{settings.PERSONAS_SERVICE_URL}/v1/matriculas/{request.matricula_clase_id}")
+            if mat_response.status_code != 200:
+                return JSONResponse(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    content={"error": "NotFound", "message": "Matrícula no encontrada"}
                 )
-                _log_http_response("registrar_nota.get_matricula", mat_response, f"{settings.PERSONAS_SERVICE_URL}/v1/matriculas/{request.matricula_clase_id}")
-                if mat_response.status_code != 200:
-                    return JSONResponse(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        content={"error": "NotFound", "message": "Matrícula no encontrada"}
-                    )
                 
-                matricula = mat_response.json()
-                clase_id = matricula.get("clase_id")
+            matricula = mat_response.json()
+            clase_id = matricula.get("clase_id")
                 
-                # Verificar que el docente tiene asignada esa clase
-                clases_response = await client.get(
-                    f"{settings.ACADEMICO_SERVICE_URL}/v1/docente/clases?limit=100",
-                    headers={"Authorization": f"Bearer {token}"}
+            # Verificar que el docente tiene asignada esa clase
+            clases_response = await client.get(
+                f"{settings.ACADEMICO_SERVICE_URL}/v1/docente/clases?limit=100",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            _log_http_response("registrar_nota.get_clases_docente", clases_response, f"{settings.ACADEMICO_SERVICE_URL}/v1/docente/clases?limit=100")
+            if clases_response.status_code != 200:
+                return JSONResponse(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    content={"error": "Forbidden", "message": "No se pudieron verificar las clases del docente"}
                 )
-                _log_http_response("registrar_nota.get_clases_docente", clases_response, f"{settings.ACADEMICO_SERVICE_URL}/v1/docente/clases?limit=100")
-                if clases_response.status_code != 200:
-                    return JSONResponse(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        content={"error": "Forbidden", "message": "No se pudieron verificar las clases del docente"}
-                    )
                 
-                clases_docente = clases_response.json().get("clases", [])
-                clase_ids_docente = [c["id"] for c in clases_docente]
+            clases_docente = clases_response.json().get("clases", [])
+            clase_ids_docente = [c["id"] for c in clases_docente]
                 
-                if clase_id not in clase_ids_docente:
-                    return JSONResponse(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        content={"error": "Forbidden", "message": "No tienes permiso para registrar notas en esta clase"}
-                    )
+            if clase_id not in clase_ids_docente:
+                return JSONResponse(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    content={"error": "Forbidden", "message": "No tienes permiso para registrar notas en esta clase"}
+                )
         
-        # Pasar el token original para las llamadas a otros servicios
         result = await use_case.execute(
             matricula_clase_id=request.matricula_clase_id,
             tipo_evaluacion_id=request.tipo_evaluacion_id,
@@ -162,7 +157,6 @@ async def registrar_nota(
             peso=request.peso,
             observaciones=request.observaciones,
             columna_nota=request.columna_nota,
-            auth_token=token  # Token para llamadas HTTP a otros servicios
         )
         
         return result
@@ -178,18 +172,21 @@ async def registrar_nota(
 async def registrar_notas_batch(
     request: RegistrarNotasBatchRequest,
     authorization: Optional[str] = Header(None),
+    idempotency_key_header: Optional[str] = Header(None, alias="Idempotency-Key"),
     use_case = Depends(get_registrar_nota_use_case),
+    idempotencia = Depends(get_ejecutar_idempotente_use_case),
     settings = Depends(get_settings),
+    personas_client = Depends(get_personas_client),
 ):
     """Registrar un lote de notas por parte de un docente.
     Devuelve resultado por item sin detener el procesamiento ante errores parciales.
+    Con Idempotency-Key (cabecera o campo idempotency_key) un reintento devuelve el
+    resultado guardado sin volver a escribir notas ni generar alertas.
     """
     try:
-        import httpx
-
         token = extract_bearer_token(authorization)
-        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
-        user_id, rol = _extract_user_and_role(payload)
+        principal = verify_token(token, settings)
+        user_id, rol = principal.user_id, principal.rol
 
         if rol not in ["DOCENTE", "ADMIN"]:
             return JSONResponse(
@@ -197,123 +194,82 @@ async def registrar_notas_batch(
                 content={"error": "Forbidden", "message": "Solo DOCENTE o ADMIN pueden registrar notas"}
             )
 
-        # Obtener clases del docente (para verificar pertenencia)
-        clase_ids_docente = []
-        if rol == "DOCENTE":
-            async with httpx.AsyncClient() as client:
+        async def procesar():
+            # Obtener clases del docente (para verificar pertenencia)
+            clase_ids_docente = []
+            if rol == "DOCENTE":
+                client = get_http_client()
                 resp = await client.get(f"{settings.ACADEMICO_SERVICE_URL}/v1/docente/clases?limit=100", headers={"Authorization": f"Bearer {token}"})
                 _log_http_response("registrar_notas_batch.get_clases_docente", resp, f"{settings.ACADEMICO_SERVICE_URL}/v1/docente/clases?limit=100")
                 if resp.status_code == 200:
                     clase_ids_docente = [c.get("id") for c in resp.json().get("clases", [])]
                 else:
-                    return JSONResponse(status_code=status.HTTP_403_FORBIDDEN, content={"error": "Forbidden", "message": "No se pudieron obtener las clases del docente"})
-
-        results = []
-        
-        # 1. Identificar matrículas únicas para consultar en paralelo
-        unique_matricula_ids = list(set(n.matricula_clase_id for n in request.notas))
-        matriculas_map = {} # matricula_id -> { clase_id: ... }
-
-        # 2. Consultar matrículas en paralelo
-        async with httpx.AsyncClient() as client:
-            # Función auxiliar para fetch
-            async def fetch_matricula(mid):
-                try:
-                    resp = await client.get(
-                        f"{settings.PERSONAS_SERVICE_URL}/v1/matriculas/{mid}", 
-                        headers={"Authorization": f"Bearer {token}"}
-                    )
-                    if resp.status_code == 200:
-                        return mid, resp.json()
-                except Exception as e:
-                    print(f"Error fetching matricula {mid}: {e}")
-                return mid, None
-
-            # Ejecutar consultas
-            tasks = [fetch_matricula(mid) for mid in unique_matricula_ids]
-            responses = await asyncio.gather(*tasks)
-            
-            for mid, data in responses:
-                if data:
-                    matriculas_map[mid] = data
-
-        # 3. Consultar Umbrales en paralelo (Optimización)
-        unique_escala_ids = list(set(n.escala_id for n in request.notas if n.escala_id))
-        umbrales_map = {}
-        
-        if unique_escala_ids:
-            async with httpx.AsyncClient() as client:
-                async def fetch_umbral(eid):
-                    try:
-                        resp = await client.get(
-                            f"{settings.ACADEMICO_SERVICE_URL}/v1/escalas/{eid}/umbral", # Asumiendo endpoint, si no existe el use case lo maneja
-                            headers={"Authorization": f"Bearer {token}"}
-                        )
-                        # Nota: El cliente academico usa get_umbral_alerta que llama a /v1/configuracion/umbral-alerta?escala_id=...
-                        # Vamos a replicar la logica del cliente para ser consistentes o usar el cliente si es posible.
-                        # Dado que no tenemos el cliente instanciado aqui facilmente (esta en use_case), hacemos la llamada directa.
-                        # Mejor aun: instanciamos el cliente o hacemos la llamada HTTP raw correcta.
-                        # Endpoint real usado en AcademicoServiceClient: /v1/configuracion/umbral-alerta
-                        resp = await client.get(
-                            f"{settings.ACADEMICO_SERVICE_URL}/v1/configuracion/umbral-alerta",
-                            params={"escala_id": eid},
-                            headers={"Authorization": f"Bearer {token}"}
-                        )
-                        if resp.status_code == 200:
-                            return eid, resp.json()
-                    except Exception:
-                        pass
-                    return eid, None
-
-                tasks_umbral = [fetch_umbral(eid) for eid in unique_escala_ids]
-                responses_umbral = await asyncio.gather(*tasks_umbral)
-                for eid, data in responses_umbral:
-                    if data:
-                        umbrales_map[eid] = data
-
-        # 4. Procesar notas en paralelo
-        async def process_single_note(n):
-            try:
-                # Verificar matricula
+                    raise ForbiddenException("No se pudieron obtener las clases del docente", code="Forbidden")
+
+            # 1. Identificar matrículas únicas
+            unique_matricula_ids = list(set(n.matricula_clase_id for n in request.notas))
+
+            # 2. Consultar matrículas en lote (POST /v1/matriculas/bulk): matricula_id -> { clase_id: ... }
+            matriculas_map = await personas_client.get_matriculas_bulk(unique_matricula_ids, token=token)
+            if matriculas_map is None:
+                # Fallo transitorio: se propaga para que la Idempotency-Key se libere y el
+                # reintento vuelva a ejecutar el lote (no se guarda como resultado)
+                raise ServicioNoDisponibleException("Personas Service no respondió, reintente más tarde")
+
+            # 3. Validar matrícula y pertenencia del docente antes de escribir
+            results = [None] * len(request.notas)
+            items = []
+            indices = []
+            for idx, n in enumerate(request.notas):
                 mdata = matriculas_map.get(n.matricula_clase_id)
                 if not mdata:
-                    return {"matricula_clase_id": n.matricula_clase_id, "status": "error", "message": "Matrícula no encontrada (o error de conexión)"}
-                
-                clase_id = mdata.get("clase_id")
-
-                # Verificar pertenencia del docente a la clase (si es docente)
-                if rol == "DOCENTE" and clase_id not in clase_ids_docente:
-                    return {"matricula_clase_id": n.matricula_clase_id, "status": "error", "message": "Sin permiso para registrar nota en esta clase"}
-
-                # Llamar al caso de uso existente (ahora optimizado con cache)
-                out = await use_case.execute(
-                    matricula_clase_id=n.matricula_clase_id,
-                    tipo_evaluacion_id=n.tipo_evaluacion_id,
-                    periodo_id=n.periodo_id,
-                    escala_id=n.escala_id,
-                    registrado_por_user_id=user_id,
-                    valor_literal=n.valor_literal,
-                    valor_numerico=n.valor_numerico,
-                    peso=n.peso,
-                    observaciones=n.observaciones,
-                    columna_nota=n.columna_nota,
-                    auth_token=token,
-                    matricula_info_cache=mdata,
-                    umbral_cache=umbrales_map.get(n.escala_id)
-                )
-                nota_id = out.get("nota", {}).get("id")
-                return {"matricula_clase_id": n.matricula_clase_id, "status": "ok", "nota_id": nota_id}
+                    results[idx] = {"matricula_clase_id": n.matricula_clase_id, "status": "error", "message": "Matrícula no encontrada"}
+                    continue
+                if rol == "DOCENTE" and mdata.get("clase_id") not in clase_ids_docente:
+                    results[idx] = {"matricula_clase_id": n.matricula_clase_id, "status": "error", "message": "Sin permiso para registrar nota en esta clase"}
+                    continue
+                items.append(n.dict())
+                indices.append(idx)
 
-            except DomainException as de:
-                return {"matricula_clase_id": n.matricula_clase_id, "status": "error", "message": de.message}
-            except Exception as e:
-                return {"matricula_clase_id": n.matricula_clase_id, "status": "error", "message": str(e)}
+            # 4. Registro masivo: upsert multi-fila + eventos + auditoría en pocas sentencias.
+            # Un fallo de la transacción completa (BD caída, deadlock) no se convierte en
+            # errores por item: se propaga como 500 y la Idempotency-Key queda libre
+            if items:
+                try:
+                    batch_results = await use_case.execute_batch(
+                        items=items,
+                        registrado_por_user_id=user_id,
+                    )
+                except DomainException as de:
+                    batch_results = [{"matricula_clase_id": it["matricula_clase_id"], "status": "error", "message": de.message} for it in items]
+                for idx, item_result in zip(indices, batch_results):
+                    results[idx] = item_result
 
-        # Ejecutar todas las notas en paralelo
-        # Usamos return_exceptions=False porque manejamos excepciones dentro de process_single_note
-        results = await asyncio.gather(*[process_single_note(n) for n in request.notas])
+            return status.HTTP_200_OK, {"results": results}
 
-        return {"results": results}
+        idempotency_key = idempotency_key_header or request.idempotency_key
+        try:
+            if idempotency_key:
+                status_code, body = await idempotencia.execute(
+                    key=idempotency_key,
+                    user_id=user_id,
+                    request_hash=hash_request(request.dict(exclude={"idempotency_key"})),
+                    handler=procesar,
+                )
+            else:
+                status_code, body = await procesar()
+        except ForbiddenException as e:
+            return JSONResponse(status_code=status.HTTP_403_FORBIDDEN, content={"error": e.code, "message": e.message})
+        except ServicioNoDisponibleException as e:
+            return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"error": e.code, "message": e.message})
+        except IdempotencyKeyReusedException as e:
+            return JSONResponse(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content={"error": e.code, "message": e.message})
+        except IdempotencyInProgressException as e:
+            return JSONResponse(status_code=status.HTTP_409_CONFLICT, content={"error": e.code, "message": e.message})
+
+        if status_code != status.HTTP_200_OK:
+            return JSONResponse(status_code=status_code, content=body)
+        return body
 
     except Exception as e:
         import traceback
@@ -327,195 +283,148 @@ async def list_notas(
     clase_id: Optional[str] = Query(None),
     periodo_id: Optional[str] = Query(None),
     tipo_evaluacion_id: Optional[str] = Query(None),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    include_total: bool = Query(False, description="COUNT exacto en lugar del total aproximado"),
+    offset: int = Query(0, ge=0, description="Obsoleto: usar cursor (se ignora si viene cursor)"),
     limit: int = Query(1000, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None),
     settings = Depends(get_settings),
+    personas_client = Depends(get_personas_client),
+    academico_client = Depends(get_academico_client),
+    conteo_cache: SnapshotCache = Depends(get_conteo_cache),
 ):
-    """Listar notas con filtros basados en rol"""
+    """Listar notas con filtros basados en rol.
+
+    Paginación keyset sobre (created_at, id) con idx_notas_keyset: cada página sigue
+    a `cursor` sin OFFSET, así que la página 100 cuesta lo mismo que la primera.
+    `total` es aproximado (conteo cacheado por rol + filtros, ver NOTAS_TOTAL_CACHE_*)
+    salvo con include_total=true; `total_exacto` indica cuál se devolvió.
+    """
     try:
         token = extract_bearer_token(authorization)
-        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
-        user_id, rol = _extract_user_and_role(payload)
-        
-        from app.infrastructure.db.repositories import SqlAlchemyNotaRepository
-        from app.infrastructure.db.models import NotaModel
-        from sqlalchemy import and_
-        import httpx
+        principal = verify_token(token, settings)
+        user_id, rol = principal.user_id, principal.rol
         
-        repo = SqlAlchemyNotaRepository(db)
+        from sqlalchemy import select, func, and_, or_
+        from app.infrastructure.db.models import NotaModel, MatriculaProyeccionModel
+        from app.infrastructure.db.repositories import nota_model_to_domain
+        from app.infrastructure.db.alcance_notas import (
+            filtro_proyeccion, matriculas_sin_proyeccion_query, matriculas_remotas_en_alcance, criterio_alcance_notas,
+        )
         
-        # Construir query base
-        query = db.query(NotaModel).filter(NotaModel.is_deleted == False)
+        # Construir query base: las notas se cruzan con la proyección local de matrículas
+        # (matrícula -> alumno, clase, curso, docente) para filtrar por rol y enriquecer
+        proy = MatriculaProyeccionModel
+        query = select(NotaModel, proy.clase_id, proy.curso_id).outerjoin(
+            proy, proy.matricula_clase_id == NotaModel.matricula_clase_id
+        ).where(NotaModel.is_deleted == False)
         
         # PADRE: Solo puede ver notas de sus hijos
+        hijo_ids = None
         if rol == "PADRE":
             # Obtener IDs de hijos del padre usando el endpoint de relaciones
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{settings.PERSONAS_SERVICE_URL}/v1/relaciones/padre/{user_id}",
-                    headers={"Authorization": f"Bearer {token}"}
+            client = get_http_client()
+            response = await client.get(
+                f"{settings.PERSONAS_SERVICE_URL}/v1/relaciones/padre/{user_id}",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            _log_http_response("list_notas.padre.get_hijos", response, f"{settings.PERSONAS_SERVICE_URL}/v1/relaciones/padre/{user_id}")
+            if response.status_code != 200:
+                return JSONResponse(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    content={"error": "Forbidden", "message": "No se pudieron obtener los hijos del padre"}
                 )
-                _log_http_response("list_notas.padre.get_hijos", response, f"{settings.PERSONAS_SERVICE_URL}/v1/relaciones/padre/{user_id}")
-                if response.status_code != 200:
-                    return JSONResponse(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        content={"error": "Forbidden", "message": "No se pudieron obtener los hijos del padre"}
-                    )
-                hijos_data = response.json()
-                hijo_ids = [h.get("alumno_id") for h in hijos_data.get("hijos", [])]
-
-                if not hijo_ids:
-                    return {"notas": [], "total": 0}
-
-                # Obtener matrículas de los hijos
-                matriculas_ids = []
-                for hijo_id in hijo_ids:
-                    mat_response = await client.get(
-                        f"{settings.PERSONAS_SERVICE_URL}/v1/matriculas?alumno_id={hijo_id}&limit=100",
-                        headers={"Authorization": f"Bearer {token}"}
-                    )
-                    _log_http_response("list_notas.padre.get_matriculas_hijo", mat_response, f"{settings.PERSONAS_SERVICE_URL}/v1/matriculas?alumno_id={hijo_id}&limit=100")
-                    if mat_response.status_code == 200:
-                        mats = mat_response.json().get("matriculas", [])
-                        matriculas_ids.extend([m["id"] for m in mats])
+            hijos_data = response.json()
+            hijo_ids = [h.get("alumno_id") for h in hijos_data.get("hijos", [])]
 
-                if not matriculas_ids:
-                    return {"notas": [], "total": 0}
-
-                query = query.filter(NotaModel.matricula_clase_id.in_(matriculas_ids))
-        
-        # DOCENTE: Solo puede ver notas de sus clases asignadas
-        elif rol == "DOCENTE":
-            # Obtener clases del docente
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{settings.ACADEMICO_SERVICE_URL}/v1/docente/clases?limit=100",
-                    headers={"Authorization": f"Bearer {token}"}
-                )
-                _log_http_response("list_notas.docente.get_clases", response, f"{settings.ACADEMICO_SERVICE_URL}/v1/docente/clases?limit=100")
-                if response.status_code != 200:
-                    return JSONResponse(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        content={"error": "Forbidden", "message": "No se pudieron obtener las clases del docente"}
-                    )
-                clases_data = response.json()
-                clase_ids = [c["id"] for c in clases_data.get("clases", [])]
-                
-                if not clase_ids:
-                    return {"notas": [], "total": 0}
-                
-                # Obtener matrículas de esas clases
-                matriculas_ids = []
-                for cid in clase_ids:
-                    mat_response = await client.get(
-                        f"{settings.PERSONAS_SERVICE_URL}/v1/matriculas?clase_id={cid}&limit=100",
-                        headers={"Authorization": f"Bearer {token}"}
-                    )
-                    _log_http_response("list_notas.docente.get_matriculas_clase", mat_response, f"{settings.PERSONAS_SERVICE_URL}/v1/matriculas?clase_id={cid}&limit=100")
-                    if mat_response.status_code == 200:
-                        mats = mat_response.json().get("matriculas", [])
-                        matriculas_ids.extend([m["id"] for m in mats])
-                
-                if not matriculas_ids:
-                    return {"notas": [], "total": 0}
-                
-                query = query.filter(NotaModel.matricula_clase_id.in_(matriculas_ids))
-        
-        # ADMIN: Puede ver todas las notas (no se aplica filtro adicional)
+            if not hijo_ids:
+                return {"notas": [], "total": 0, "total_exacto": True, "next_cursor": None, "has_more": False}
         
         # Aplicar filtros adicionales
         if periodo_id:
-            query = query.filter(NotaModel.periodo_id == periodo_id)
+            query = query.where(NotaModel.periodo_id == periodo_id)
         if tipo_evaluacion_id:
-            query = query.filter(NotaModel.tipo_evaluacion_id == tipo_evaluacion_id)
-        if clase_id and rol == "ADMIN":  # Solo ADMIN puede filtrar por clase específica directamente
-            async with httpx.AsyncClient() as client:
-                mat_response = await client.get(
-                    f"{settings.PERSONAS_SERVICE_URL}/v1/matriculas?clase_id={clase_id}&limit=100",
-                    headers={"Authorization": f"Bearer {token}"}
-                )
-                _log_http_response("list_notas.admin.get_matriculas_clase", mat_response, f"{settings.PERSONAS_SERVICE_URL}/v1/matriculas?clase_id={clase_id}&limit=100")
-                if mat_response.status_code == 200:
-                    mats = mat_response.json().get("matriculas", [])
-                    mat_ids = [m["id"] for m in mats]
-                    if mat_ids:
-                        query = query.filter(NotaModel.matricula_clase_id.in_(mat_ids))
-        if alumno_id and rol in ["ADMIN", "DOCENTE"]:  # DOCENTE puede filtrar por alumno si está en sus clases
-            async with httpx.AsyncClient() as client:
-                mat_response = await client.get(
-                    f"{settings.PERSONAS_SERVICE_URL}/v1/matriculas?alumno_id={alumno_id}&limit=100",
-                    headers={"Authorization": f"Bearer {token}"}
-                )
-                _log_http_response("list_notas.filter.alumno.get_matriculas", mat_response, f"{settings.PERSONAS_SERVICE_URL}/v1/matriculas?alumno_id={alumno_id}&limit=100")
-                if mat_response.status_code == 200:
-                    mats = mat_response.json().get("matriculas", [])
-                    mat_ids = [m["id"] for m in mats]
-                    if mat_ids:
-                        query = query.filter(NotaModel.matricula_clase_id.in_(mat_ids))
-        
-        # Paginación
-        total = query.count()
-        models = query.order_by(NotaModel.created_at.desc()).offset(offset).limit(limit).all()
+            query = query.where(NotaModel.tipo_evaluacion_id == tipo_evaluacion_id)
+        
+        # Alcance por rol (PADRE: sus hijos; DOCENTE: sus clases; ADMIN: todo) y filtros
+        # clase_id/alumno_id, resueltos sobre la proyección local de matrículas
+        filtro = filtro_proyeccion(rol, user_id, hijo_ids, clase_id, alumno_id)
+        remotas = {}  # matrícula sin proyectar -> {alumno_id, clase_id}, resuelta en Personas
+        clases_remotas = {}
+        if filtro is not None:
+            # Las matrículas que el worker aún no proyectó se resuelven en Personas/Académico
+            # con las mismas reglas; si no responden, esas notas quedan fuera (no se concede acceso)
+            sin_proyeccion = (await db.execute(matriculas_sin_proyeccion_query(periodo_id, tipo_evaluacion_id))).scalars().all()
+            if sin_proyeccion:
+                remotas = await personas_client.get_matriculas_bulk(list(sin_proyeccion), token=token) or {}
+                if remotas:
+                    clases_remotas = await academico_client.get_clases_bulk(
+                        list({m.get("clase_id") for m in remotas.values()}), token=token
+                    )
+            autorizadas = matriculas_remotas_en_alcance(
+                remotas, clases_remotas, rol, user_id, hijo_ids, clase_id, alumno_id
+            )
+            query = query.where(criterio_alcance_notas(filtro, autorizadas))
         
-        from app.infrastructure.db.repositories import nota_model_to_domain
-        notas = [nota_model_to_domain(m) for m in models]
-
-        # Enriquecer las notas con clase_id y curso_id consultando Personas/Académico
-        try:
-            import httpx
-            async with httpx.AsyncClient() as client:
-                # Map matricula_id -> {clase_id, alumno_id}
-                matricula_map = {}
-                for n in notas:
-                    mid = n.matricula_clase_id
-                    if mid in matricula_map:
-                        continue
-                    try:
-                        resp = await client.get(f"{settings.PERSONAS_SERVICE_URL}/v1/matriculas/{mid}", headers={"Authorization": f"Bearer {token}"})
-                        _log_http_response("list_notas.get_matricula", resp, f"{settings.PERSONAS_SERVICE_URL}/v1/matriculas/{mid}")
-                        if resp.status_code == 200:
-                            mdata = resp.json()
-                            matricula_map[mid] = {
-                                "clase_id": mdata.get("clase_id"),
-                                "alumno_id": mdata.get("alumno_id")
-                            }
-                        else:
-                            matricula_map[mid] = {"clase_id": None, "alumno_id": None}
-                    except Exception:
-                        matricula_map[mid] = {"clase_id": None, "alumno_id": None}
-
-                # Map clase_id -> curso_id
-                clase_map = {}
-                clase_ids = set([v.get("clase_id") for v in matricula_map.values() if v.get("clase_id")])
-                for cid in clase_ids:
-                    try:
-                        resp = await client.get(f"{settings.ACADEMICO_SERVICE_URL}/v1/clases/{cid}", headers={"Authorization": f"Bearer {token}"})
-                        _log_http_response("list_notas.get_clase", resp, f"{settings.ACADEMICO_SERVICE_URL}/v1/clases/{cid}")
-                        if resp.status_code == 200:
-                            cdata = resp.json()
-                            clase_map[cid] = cdata.get("curso_id")
-                        else:
-                            clase_map[cid] = None
-                    except Exception:
-                        clase_map[cid] = None
-
-        except Exception as e:
-            # No bloquear la respuesta si falla el enriquecimiento; devolver sin curso/clase
-            print(f"[DEBUG NOTAS] Enriquecimiento notas falló: {e}")
+        # Total: COUNT exacto solo si se pide; por defecto el conteo cacheado de estos filtros
+        conteo_query = select(func.count()).select_from(query.subquery())
+        if include_total:
+            total = (await db.execute(conteo_query)).scalar_one()
+        else:
+            clave = "|".join(str(v) for v in (
+                "notas", rol, user_id if rol != "ADMIN" else "*", periodo_id, tipo_evaluacion_id,
+                clase_id if rol == "ADMIN" else None, alumno_id if rol in ["ADMIN", "DOCENTE"] else None,
+            ))
+            total = (await conteo_cache.get(clave, lambda: _snapshot_en_thread(_contar, conteo_query))).data["total"]
+        
+        # Paginación keyset (AsyncSession: el worker sigue atendiendo otras peticiones mientras MySQL responde)
+        if cursor:
+            cursor_created_at, cursor_id = decode_keyset_cursor(cursor, "Cursor de notas inválido")
+            query = query.where(or_(
+                NotaModel.created_at < cursor_created_at,
+                and_(NotaModel.created_at == cursor_created_at, NotaModel.id < cursor_id),
+            ))
+        elif offset:
+            query = query.offset(offset)
+        query = query.order_by(NotaModel.created_at.desc(), NotaModel.id.desc()).limit(limit + 1)
+        rows = (await db.execute(query)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_keyset_cursor(rows[-1][0].created_at, rows[-1][0].id) if has_more else None
+        
+        notas = []
+        enriquecimiento = {}  # matricula_id -> (clase_id, curso_id)
+        for model, proy_clase_id, proy_curso_id in rows:
+            notas.append(nota_model_to_domain(model))
+            if proy_clase_id:
+                enriquecimiento[model.matricula_clase_id] = (proy_clase_id, proy_curso_id)
+
+        # Matrículas aún no proyectadas ya resueltas al aplicar el alcance
+        for mid, m in remotas.items():
+            if mid not in enriquecimiento:
+                cid = m.get("clase_id")
+                enriquecimiento[mid] = (cid, (clases_remotas.get(cid) or {}).get("curso_id"))
+
+        # Resto de matrículas aún no proyectadas (p. ej. recién creadas): enriquecer con una
+        # llamada bulk por servicio
+        faltantes = [n.matricula_clase_id for n in notas if n.matricula_clase_id not in enriquecimiento]
+        if faltantes:
+            try:
+                matriculas_data = await personas_client.get_matriculas_bulk(faltantes, token=token) or {}
+                clases_data = await academico_client.get_clases_bulk(
+                    [m.get("clase_id") for m in matriculas_data.values()], token=token
+                )
+                for mid, m in matriculas_data.items():
+                    cid = m.get("clase_id")
+                    enriquecimiento[mid] = (cid, (clases_data.get(cid) or {}).get("curso_id"))
+            except Exception as e:
+                # No bloquear la respuesta si falla el enriquecimiento; devolver sin curso/clase
+                logger.warning("Enriquecimiento de notas falló: %s", e)
 
         notas_out = []
         for n in notas:
-            clase_id = None
-            curso_id = None
-            try:
-                mm = matricula_map.get(n.matricula_clase_id) if 'matricula_map' in locals() else None
-                if mm:
-                    clase_id = mm.get('clase_id')
-                    curso_id = clase_map.get(clase_id) if clase_id and 'clase_map' in locals() else None
-            except Exception:
-                pass
+            clase_id, curso_id = enriquecimiento.get(n.matricula_clase_id, (None, None))
 
             notas_out.append({
                 "id": n.id,
@@ -534,7 +443,34 @@ async def list_notas(
                 "created_at": n.created_at.isoformat() if n.created_at else None,
             })
 
-        return {"notas": notas_out, "total": total}
+        return {
+            "notas": notas_out,
+            "total": total,
+            "total_exacto": include_total,
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+        }
+    except UnauthorizedException as e:
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"error": e.code, "message": e.message}
+        )
+    except ValidationException as e:
+        # Cursor o filtros inválidos
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": e.code, "message": e.message}
+        )
+    except ForbiddenException as e:
+        return JSONResponse(
+            status_code=status.HTTP_403_FORBIDDEN,
+            content={"error": e.code, "message": e.message}
+        )
+    except DomainException as e:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": e.code, "message": e.message}
+        )
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -549,33 +485,30 @@ async def export_notas_csv(
     grado_id: Optional[str] = Query(None),
     seccion_id: Optional[str] = Query(None),
     curso_id: Optional[str] = Query(None),
+    clase_id: Optional[str] = Query(None),
     periodo_id: Optional[str] = Query(None),
     format: str = Query('csv', regex='^(csv|xlsx)$'),
+    layout: str = Query('filas', regex='^(filas|siagie)$'),
     authorization: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     settings = Depends(get_settings),
 ):
     """Exportar notas como CSV o XLSX - consulta optimizada con JOINs y streaming.
     - DOCENTE solo exporta sus clases (filtrado por clases.docente_user_id)
-    - ADMIN puede exportar todo o filtrar por grado/seccion/curso/periodo
+    - ADMIN puede exportar todo o filtrar por grado/seccion/curso/clase/periodo
     - Query param `format` acepta 'csv' (default) or 'xlsx'
+    - Query param `layout`: 'filas' (default, una fila por nota) o 'siagie'
+      (Grado, Sección, Alumno, Documento, Curso, Docente, Periodo, Promedio, N1..Nk:
+      una fila por alumno-curso-periodo con el promedio ponderado)
     """
     try:
-        token = extract_bearer_token(authorization)
-        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
-        user_id, rol = _extract_user_and_role(payload)
+        principal = authenticate(authorization, settings)
+        user_id, rol = principal.user_id, principal.rol
 
         from sqlalchemy import text
 
-        # Base SQL con joins para enriquecer en una sola consulta
-        sql = """
-        SELECT
-            g.id AS grado_id, g.nombre AS grado_nombre,
-            s.id AS seccion_id, s.nombre AS seccion_nombre,
-            a.id AS alumno_id, a.nombres AS alumno_nombres, a.apellido_paterno AS alumno_apellidos, a.numero_documento,
-            c.id AS curso_id, c.nombre AS curso_nombre,
-            cl.id AS clase_id,
-            n.matricula_clase_id, n.columna_nota, n.valor_numerico, n.valor_literal, n.periodo_id, n.created_at
+        # FROM/WHERE común a las dos disposiciones, con JOINs para enriquecer en una sola consulta
+        from_sql = """
         FROM sga_notas.notas n
         JOIN sga_personas.matriculas_clase m ON n.matricula_clase_id = m.id
         JOIN sga_personas.alumnos a ON m.alumno_id = a.id
@@ -583,45 +516,92 @@ async def export_notas_csv(
         JOIN sga_academico.cursos c ON cl.curso_id = c.id
         JOIN sga_academico.secciones s ON cl.seccion_id = s.id
         JOIN sga_academico.grados g ON s.grado_id = g.id
-        WHERE n.is_deleted = FALSE
         """
+        where_sql = " WHERE n.is_deleted = FALSE"
 
         params = {}
 
         # Rol-based restriction: si es DOCENTE, filtrar por su user_id en clases
         if rol == 'DOCENTE':
-            sql += " AND cl.docente_user_id = :docente_user_id"
+            where_sql += " AND cl.docente_user_id = :docente_user_id"
             params['docente_user_id'] = user_id
 
         # Aplicar filtros opcionales
         if grado_id:
-            sql += " AND g.id = :grado_id"
+            where_sql += " AND g.id = :grado_id"
             params['grado_id'] = grado_id
         if seccion_id:
-            sql += " AND s.id = :seccion_id"
+            where_sql += " AND s.id = :seccion_id"
             params['seccion_id'] = seccion_id
         if curso_id:
-            sql += " AND c.id = :curso_id"
+            where_sql += " AND c.id = :curso_id"
             params['curso_id'] = curso_id
+        if clase_id:
+            where_sql += " AND cl.id = :clase_id"
+            params['clase_id'] = clase_id
         if periodo_id:
-            sql += " AND n.periodo_id = :periodo_id"
+            where_sql += " AND n.periodo_id = :periodo_id"
             params['periodo_id'] = periodo_id
 
-        sql += " ORDER BY g.nombre, s.nombre, a.apellido_paterno, a.nombres, c.nombre, n.created_at"
-
-        # Ejecutar la consulta en modo streaming
-        conn = db.connection().execution_options(stream_results=True)
-        result = conn.execute(text(sql), params)
-
         from fastapi.responses import StreamingResponse
         import csv
         import io
 
+        if layout == 'siagie':
+            # Columnas N1..Nk presentes en el filtro (la cabecera sale antes que la primera fila)
+            columnas = columnas_siagie(
+                r[0] for r in db.execute(text("SELECT DISTINCT n.columna_nota " + from_sql + where_sql), params)
+            )
+            # Notas de una matrícula y periodo contiguas: el pivote agrupa en una sola pasada
+            sql = """
+            SELECT
+                g.nombre AS grado_nombre, s.nombre AS seccion_nombre,
+                a.nombres AS alumno_nombres, a.apellido_paterno AS alumno_apellidos,
+                a.apellido_materno AS alumno_apellido_materno, a.dni AS numero_documento,
+                c.nombre AS curso_nombre,
+                u.nombres AS docente_nombres, u.apellidos AS docente_apellidos,
+                p.nombre AS periodo_nombre,
+                n.matricula_clase_id, n.periodo_id, n.columna_nota,
+                n.valor_numerico, n.valor_literal, n.peso, te.peso_default
+            """ + from_sql + """
+            LEFT JOIN sga_academico.periodos p ON n.periodo_id = p.id
+            LEFT JOIN sga_iam.usuarios u ON cl.docente_user_id = u.id
+            LEFT JOIN sga_notas.tipos_evaluacion te ON n.tipo_evaluacion_id = te.id
+            """ + where_sql + """
+            ORDER BY g.nombre, s.nombre, a.apellido_paterno, a.apellido_materno, a.nombres, c.nombre,
+                n.matricula_clase_id, p.fecha_inicio, n.periodo_id, n.updated_at
+            """
+            header = CABECERA_SIAGIE + columnas
+        else:
+            sql = """
+            SELECT
+                g.id AS grado_id, g.nombre AS grado_nombre,
+                s.id AS seccion_id, s.nombre AS seccion_nombre,
+                a.id AS alumno_id, a.nombres AS alumno_nombres, a.apellido_paterno AS alumno_apellidos, a.dni AS numero_documento,
+                c.id AS curso_id, c.nombre AS curso_nombre,
+                cl.id AS clase_id,
+                n.matricula_clase_id, n.columna_nota, n.valor_numerico, n.valor_literal, n.periodo_id, n.created_at
+            """ + from_sql + where_sql + " ORDER BY g.nombre, s.nombre, a.apellido_paterno, a.nombres, c.nombre, n.created_at"
+            header = ['grado_id','grado_nombre','seccion_id','seccion_nombre','alumno_id','alumno_apellidos','alumno_nombres','numero_documento','curso_id','curso_nombre','clase_id','matricula_clase_id','columna_nota','valor_numerico','valor_literal','periodo_id','created_at']
+
+        # Ejecutar la consulta en modo streaming (filas como mappings: acceso por nombre de columna)
+        conn = db.connection().execution_options(stream_results=True)
+        result = conn.execute(text(sql), params).mappings()
+
+        def filas():
+            if layout == 'siagie':
+                yield from pivotar_siagie(result, columnas)
+                return
+            for row in result:
+                yield [row['grado_id'], row['grado_nombre'], row['seccion_id'], row['seccion_nombre'], row['alumno_id'], row['alumno_apellidos'], row['alumno_nombres'], row['numero_documento'], row['curso_id'], row['curso_nombre'], row['clase_id'], row['matricula_clase_id'], row['columna_nota'], row['valor_numerico'], row['valor_literal'], row['periodo_id'], row['created_at'].isoformat() if row['created_at'] else '']
+
+        sufijo = '_siagie' if layout == 'siagie' else ''
+        filename = f"notas_export{sufijo}_{rol.lower()}_{(grado_id or 'all')}.{format}"
+        headers = {"Content-Disposition": f"attachment; filename=\"{filename}\""}
+
         # CSV export (default)
         if format == 'csv':
             def row_generator():
-                # Cabecera
-                header = ['grado_id','grado_nombre','seccion_id','seccion_nombre','alumno_id','alumno_apellidos','alumno_nombres','numero_documento','curso_id','curso_nombre','clase_id','matricula_clase_id','columna_nota','valor_numerico','valor_literal','periodo_id','created_at']
                 output = io.StringIO()
                 writer = csv.writer(output)
                 writer.writerow(header)
@@ -629,64 +609,72 @@ async def export_notas_csv(
                 output.seek(0)
                 output.truncate(0)
 
-                for row in result:
-                    try:
-                        writer.writerow([row['grado_id'], row['grado_nombre'], row['seccion_id'], row['seccion_nombre'], row['alumno_id'], row['alumno_apellidos'], row['alumno_nombres'], row['numero_documento'], row['curso_id'], row['curso_nombre'], row['clase_id'], row['matricula_clase_id'], row['columna_nota'], row['valor_numerico'], row['valor_literal'], row['periodo_id'], row['created_at'].isoformat() if row['created_at'] else ''])
-                        yield output.getvalue()
-                        output.seek(0)
-                        output.truncate(0)
-                    except Exception:
-                        # no bloquear por fila con problema
-                        continue
-
-            filename = f"notas_export_{rol.lower()}_{(grado_id or 'all')}.csv"
-            headers = {"Content-Disposition": f"attachment; filename=\"{filename}\""}
-            return StreamingResponse(row_generator(), media_type='text/csv', headers=headers)
+                for fila in filas():
+                    writer.writerow(fila)
+                    yield output.getvalue()
+                    output.seek(0)
+                    output.truncate(0)
 
-        # XLSX export using openpyxl
-        else:
-            try:
-                from openpyxl import Workbook
-            except Exception:
-                return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content={"error": "MissingDependency", "message": "openpyxl is required for xlsx export"})
+            return StreamingResponse(row_generator(), media_type='text/csv', headers=headers)
 
-            wb = Workbook(write_only=True)
-            ws = wb.create_sheet()
-            header = ['grado_id','grado_nombre','seccion_id','seccion_nombre','alumno_id','alumno_apellidos','alumno_nombres','numero_documento','curso_id','curso_nombre','clase_id','matricula_clase_id','columna_nota','valor_numerico','valor_literal','periodo_id','created_at']
-            ws.append(header)
+        # XLSX en streaming: las partes del zip salen a medida que el cursor entrega filas
+        return StreamingResponse(stream_xlsx(filas(), cabecera=header, nombre_hoja="Notas"), media_type=XLSX_MEDIA_TYPE, headers=headers)
 
-            for row in result:
-                try:
-                    ws.append([row['grado_id'], row['grado_nombre'], row['seccion_id'], row['seccion_nombre'], row['alumno_id'], row['alumno_apellidos'], row['alumno_nombres'], row['numero_documento'], row['curso_id'], row['curso_nombre'], row['clase_id'], row['matricula_clase_id'], row['columna_nota'], row['valor_numerico'], row['valor_literal'], row['periodo_id'], row['created_at'].isoformat() if row['created_at'] else ''])
-                except Exception:
-                    continue
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content={"error": "INTERNAL_ERROR", "message": str(e)})
 
-            bio = io.BytesIO()
-            wb.save(bio)
-            bio.seek(0)
 
-            filename = f"notas_export_{rol.lower()}_{(grado_id or 'all')}.xlsx"
-            headers = {"Content-Disposition": f"attachment; filename=\"{filename}\""}
-            return StreamingResponse(iter([bio.getvalue()]), media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', headers=headers)
+@router.get("/clases/{clase_id}/libreta")
+async def get_libreta_clase(
+    clase_id: str,
+    periodo_id: Optional[str] = Query(None),
+    authorization: Optional[str] = Header(None),
+    use_case = Depends(get_obtener_libreta_use_case),
+    settings = Depends(get_settings),
+):
+    """
+    Libreta completa de una clase en una respuesta: alumnos × columna_nota,
+    promedio ponderado y equivalente literal por alumno.
+    - DOCENTE solo ve sus clases; ADMIN ve cualquiera
+    - periodo_id opcional para limitar las notas a un periodo
+    """
+    try:
+        principal = authenticate(authorization, settings)
+        user_id, rol = principal.user_id, principal.rol
 
+        return await use_case.execute(clase_id=clase_id, user_id=user_id, rol=rol, periodo_id=periodo_id)
+    except ForbiddenException as e:
+        return JSONResponse(
+            status_code=status.HTTP_403_FORBIDDEN,
+            content={"error": "Forbidden", "message": e.message}
+        )
+    except NotFoundException as e:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"error": "NotFound", "message": e.message}
+        )
     except Exception as e:
         import traceback
         traceback.print_exc()
-        return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content={"error": "INTERNAL_ERROR", "message": str(e)})
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"error": "INTERNAL_ERROR", "message": str(e)}
+        )
 
 
 @router.get("/alertas")
 async def list_alertas(
     padre_id: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None),
     settings = Depends(get_settings),
 ):
     try:
-        token = extract_bearer_token(authorization)
-        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
-        rol = payload.get("rol_nombre")
-        user_id = payload.get("user_id")
+        principal = authenticate(authorization, settings)
+        rol = principal.rol
+        user_id = principal.user_id
 
         # Si es PADRE, forzamos a ver solo sus alertas
         if rol == "PADRE":
@@ -697,11 +685,10 @@ async def list_alertas(
         else:
             target_padre_id = padre_id
 
-        from app.infrastructure.db.repositories import SqlAlchemyAlertaRepository
-        repo = SqlAlchemyAlertaRepository(db)
+        repo = AsyncSqlAlchemyAlertaRepository(db)
         
         if target_padre_id:
-            alertas = repo.find_by_padre(target_padre_id)
+            alertas = await repo.find_by_padre(target_padre_id)
         else:
             # Admin ve todo (no implementado find_all en repo, retornamos vacio por seguridad)
             alertas = []
@@ -724,336 +711,251 @@ async def list_alertas(
         )
 
 
+async def _snapshot_en_thread(calcular, *args) -> dict:
+    """Ejecuta el cálculo de un dashboard en un thread con su propia sesión.
+
+    El recálculo puede seguir en segundo plano cuando la petición que lo lanzó
+    ya respondió, así que no puede usar la sesión de esa petición.
+    """
+    def _ejecutar():
+        db = get_session_factory()()
+        try:
+            return calcular(db, *args)
+        finally:
+            db.close()
+    return await asyncio.to_thread(_ejecutar)
+
+
+def _contar(db: Session, conteo_query) -> dict:
+    return {"total": db.execute(conteo_query).scalar_one()}
+
+
+def _ranking_histograma(histograma: HistogramaNotas) -> dict:
+    """Conteos del tercio/quinto/décimo superior, nota de corte de cada grupo y percentiles"""
+    return {
+        "tercio_top_count": histograma.top_count(3),
+        "quinto_top_count": histograma.top_count(5),
+        "decimo_top_count": histograma.top_count(10),
+        "total_notes": histograma.total,
+        "cortes": {
+            "tercio": histograma.corte_top(3),
+            "quinto": histograma.corte_top(5),
+            "decimo": histograma.corte_top(10),
+        },
+        "percentiles": {f"p{p}": histograma.percentil(p) for p in (25, 50, 75, 90)},
+    }
+
+
+def _respuesta_snapshot(snapshot) -> dict:
+    return {**snapshot.data, "generated_at": snapshot.generated_at.isoformat(), "stale": snapshot.stale}
+
+
 @router.get("/dashboard/admin")
 async def dashboard_admin(
-    db: Session = Depends(get_db),
-    settings = Depends(get_settings),
+    cache: SnapshotCache = Depends(get_dashboard_cache),
 ):
     """Métricas agregadas para el dashboard de ADMIN.
     - conteo en tercios/quintos/décimos (top por nota)
     - cursos con mayor promedio
     - alumnos con promedios más bajos
     - porcentaje por género
+
+    Se sirve desde un snapshot (ver DASHBOARD_CACHE_*); generated_at indica cuándo se calculó.
     """
     try:
-        from sqlalchemy import text, bindparam
-
-        # 1) Top tercio/quinto/décimo
-        q_rank = text("""
-        WITH ranked AS (
-            SELECT n.id, n.valor_numerico, m.alumno_id,
-                ROW_NUMBER() OVER (ORDER BY n.valor_numerico DESC) AS rn,
-                COUNT(*) OVER () AS total
-            FROM sga_notas.notas n
-            JOIN sga_personas.matriculas_clase m ON n.matricula_clase_id = m.id
-            WHERE n.is_deleted = FALSE AND n.valor_numerico IS NOT NULL
-        )
-        SELECT
-            COALESCE(SUM(CASE WHEN rn <= FLOOR(total/3) THEN 1 ELSE 0 END),0) AS tercio_top_count,
-            COALESCE(SUM(CASE WHEN rn <= FLOOR(total/5) THEN 1 ELSE 0 END),0) AS quinto_top_count,
-            COALESCE(SUM(CASE WHEN rn <= FLOOR(total/10) THEN 1 ELSE 0 END),0) AS decimo_top_count,
-            COALESCE(MAX(total),0) AS total_count
-        FROM ranked;
-        """)
-
-        r = db.execute(q_rank).fetchone()
-        tercio = int(r[0] or 0)
-        quinto = int(r[1] or 0)
-        decimo = int(r[2] or 0)
-        total_notes = int(r[3] or 0)
-
-        # 2) Cursos con promedio más alto (con manejo de errores)
-        try:
-            q_courses = text("""
-                SELECT c.id AS curso_id, c.nombre AS curso_nombre, AVG(n.valor_numerico) AS avg_grade, COUNT(*) AS cnt
-                FROM sga_notas.notas n
-                JOIN sga_personas.matriculas_clase m ON n.matricula_clase_id = m.id
-                JOIN sga_academico.clases cl ON m.clase_id = cl.id
-                JOIN sga_academico.cursos c ON cl.curso_id = c.id
-                WHERE n.is_deleted = FALSE AND n.valor_numerico IS NOT NULL
-                GROUP BY c.id, c.nombre
-                ORDER BY avg_grade DESC
-                LIMIT 5;
-                """)
-            courses = []
-            for row in db.execute(q_courses).fetchall():
-                try:
-                    courses.append(dict(row._mapping))
-                except Exception:
-                    try:
-                        courses.append(dict(row))
-                    except Exception:
-                        # best-effort: convert to tuple values with numbered keys
-                        courses.append({f"col_{i}": v for i, v in enumerate(row)})
-        except Exception as e:
-            print("[DEBUG DASHBOARD ADMIN] courses query failed:", e)
-            courses = []
-
-        # 3) Alumnos con notas más bajas (promedio) (con manejo de errores)
-        try:
-            q_low_students = text("""
-                SELECT a.id AS alumno_id, CONCAT(a.nombres, ' ', a.apellido_paterno) AS nombre, AVG(n.valor_numerico) AS avg_grade
-                FROM sga_notas.notas n
-                JOIN sga_personas.matriculas_clase m ON n.matricula_clase_id = m.id
-                JOIN sga_personas.alumnos a ON m.alumno_id = a.id
-                WHERE n.is_deleted = FALSE AND n.valor_numerico IS NOT NULL AND a.is_deleted = FALSE
-                GROUP BY a.id, a.nombres, a.apellido_paterno
-                ORDER BY avg_grade ASC
-                LIMIT 10;
-                """)
-            low_students = []
-            for row in db.execute(q_low_students).fetchall():
-                try:
-                    low_students.append(dict(row._mapping))
-                except Exception:
-                    try:
-                        low_students.append(dict(row))
-                    except Exception:
-                        low_students.append({f"col_{i}": v for i, v in enumerate(row)})
-        except Exception as e:
-            print("[DEBUG DASHBOARD ADMIN] low_students query failed:", e)
-            low_students = []
-
-        # 4) Porcentaje por género (con manejo de errores)
-        try:
-            q_gender = text("""
-                SELECT
-                    SUM(CASE WHEN a.genero = 'M' THEN 1 ELSE 0 END) AS male,
-                    SUM(CASE WHEN a.genero = 'F' THEN 1 ELSE 0 END) AS female,
-                    SUM(CASE WHEN a.genero NOT IN ('M','F') THEN 1 ELSE 0 END) AS other,
-                    COUNT(*) AS total
-                FROM sga_personas.alumnos a
-                WHERE a.is_deleted = FALSE;
-                """)
-            g = db.execute(q_gender).fetchone()
-            male = int(g[0] or 0)
-            female = int(g[1] or 0)
-            other = int(g[2] or 0)
-            total_students = int(g[3] or 0)
-            gender_pct = {
-                "male_pct": round((male/total_students*100) if total_students>0 else 0,2),
-                "female_pct": round((female/total_students*100) if total_students>0 else 0,2),
-                "other_pct": round((other/total_students*100) if total_students>0 else 0,2),
-                "total_students": total_students
-            }
-        except Exception as e:
-            print("[DEBUG DASHBOARD ADMIN] gender query failed:", e)
-            gender_pct = {"male_pct":0,"female_pct":0,"other_pct":0,"total_students":0}
-
-        return {
-            "tercio_top_count": tercio,
-            "quinto_top_count": quinto,
-            "decimo_top_count": decimo,
-            "total_notes": total_notes,
-            "top_courses": courses,
-            "low_students": low_students,
-            "gender": gender_pct
-        }
+        snapshot = await cache.get("admin", lambda: _snapshot_en_thread(_calcular_dashboard_admin))
+        return _respuesta_snapshot(snapshot)
     except Exception as e:
         import traceback
         traceback.print_exc()
         return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content={"error":"INTERNAL_ERROR","message":str(e)})
 
 
-@router.get("/dashboard/docente")
-async def dashboard_docente(
-    authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db),
-    settings = Depends(get_settings),
-):
-    """Métricas del dashboard para DOCENTE (limitadas a sus clases)."""
+def _calcular_dashboard_admin(db: Session) -> dict:
+    from sqlalchemy import text, bindparam
+
+    # 1) Top tercio/quinto/décimo y percentiles desde el histograma de notas
+    ranking = _ranking_histograma(SqlAlchemyHistogramaNotasRepository(db).obtener())
+
+    # 2) y 3) Cursos con promedio más alto y alumnos con promedio más bajo,
+    # desde la tabla promedios (agregados por matrícula/periodo) en vez de todas las notas
+    promedio_repository = SqlAlchemyPromedioRepository(db)
     try:
-        token = extract_bearer_token(authorization)
-        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
-        user_id = payload.get('user_id') or payload.get('sub')
-
-        from sqlalchemy import text, bindparam
-
-        # Obtener clases del docente
-        q_clases = text("SELECT id FROM sga_academico.clases WHERE docente_user_id = :user_id AND is_deleted = FALSE")
-        clase_rows = db.execute(q_clases, {"user_id": user_id}).fetchall()
-        clase_ids = [r[0] for r in clase_rows]
-        if not clase_ids:
-            return {"message": "No hay clases asignadas", "top_courses": [], "low_students": [], "gender": {}}
-
-        # Filtrar notas por clases del docente (mediante matriculas)
-        q_rank = text(f"""
-        WITH ranked AS (
-            SELECT n.id, n.valor_numerico, m.alumno_id,
-                ROW_NUMBER() OVER (ORDER BY n.valor_numerico DESC) AS rn,
-                COUNT(*) OVER () AS total
-            FROM sga_notas.notas n
-            JOIN sga_personas.matriculas_clase m ON n.matricula_clase_id = m.id
-            JOIN sga_academico.clases cl ON m.clase_id = cl.id
-            WHERE n.is_deleted = FALSE AND n.valor_numerico IS NOT NULL AND cl.id IN :clase_ids
-        )
-        SELECT
-            COALESCE(SUM(CASE WHEN rn <= FLOOR(total/3) THEN 1 ELSE 0 END),0) AS tercio_top_count,
-            COALESCE(SUM(CASE WHEN rn <= FLOOR(total/5) THEN 1 ELSE 0 END),0) AS quinto_top_count,
-            COALESCE(SUM(CASE WHEN rn <= FLOOR(total/10) THEN 1 ELSE 0 END),0) AS decimo_top_count,
-            COALESCE(MAX(total),0) AS total_count
-        FROM ranked;
-        """)
-        q_rank = q_rank.bindparams(bindparam('clase_ids', expanding=True))
-        r = db.execute(q_rank, {"clase_ids": clase_ids}).fetchone()
-        tercio = int(r[0] or 0)
-        quinto = int(r[1] or 0)
-        decimo = int(r[2] or 0)
-
-        # Top cursos (por promedio) dentro de sus clases
-        q_courses = text(f"""
-        SELECT c.id AS curso_id, c.nombre AS curso_nombre, AVG(n.valor_numerico) AS avg_grade
-        FROM sga_notas.notas n
-        JOIN sga_personas.matriculas_clase m ON n.matricula_clase_id = m.id
-        JOIN sga_academico.clases cl ON m.clase_id = cl.id
-        JOIN sga_academico.cursos c ON cl.curso_id = c.id
-        WHERE n.is_deleted = FALSE AND n.valor_numerico IS NOT NULL AND cl.id IN :clase_ids
-        GROUP BY c.id, c.nombre
-        ORDER BY avg_grade DESC
-        LIMIT 5;
-        """)
-        q_courses = q_courses.bindparams(bindparam('clase_ids', expanding=True))
+        courses = promedio_repository.top_cursos(limit=5)
+    except Exception as e:
+        print("[DEBUG DASHBOARD ADMIN] courses query failed:", e)
         courses = []
-        for row in db.execute(q_courses, {"clase_ids": clase_ids}).fetchall():
-            try:
-                courses.append(dict(row._mapping))
-            except Exception:
-                try:
-                    courses.append(dict(row))
-                except Exception:
-                    courses.append({f"col_{i}": v for i, v in enumerate(row)})
 
-        # Alumnos con peores promedios dentro de sus clases
-        q_low_students = text(f"""
-        SELECT a.id AS alumno_id, CONCAT(a.nombres, ' ', a.apellido_paterno) AS nombre, AVG(n.valor_numerico) AS avg_grade
-        FROM sga_notas.notas n
-        JOIN sga_personas.matriculas_clase m ON n.matricula_clase_id = m.id
-        JOIN sga_personas.alumnos a ON m.alumno_id = a.id
-        JOIN sga_academico.clases cl ON m.clase_id = cl.id
-        WHERE n.is_deleted = FALSE AND n.valor_numerico IS NOT NULL AND cl.id IN :clase_ids
-        GROUP BY a.id, a.nombres, a.apellido_paterno
-        ORDER BY avg_grade ASC
-        LIMIT 10;
-        """)
-        q_low_students = q_low_students.bindparams(bindparam('clase_ids', expanding=True))
+    try:
+        low_students = promedio_repository.alumnos_promedio_bajo(limit=10)
+    except Exception as e:
+        print("[DEBUG DASHBOARD ADMIN] low_students query failed:", e)
         low_students = []
-        for row in db.execute(q_low_students, {"clase_ids": clase_ids}).fetchall():
-            try:
-                low_students.append(dict(row._mapping))
-            except Exception:
-                try:
-                    low_students.append(dict(row))
-                except Exception:
-                    low_students.append({f"col_{i}": v for i, v in enumerate(row)})
-
-        # Género entre sus alumnos
-        q_gender = text(f"""
-        SELECT
-            SUM(CASE WHEN a.genero = 'M' THEN 1 ELSE 0 END) AS male,
-            SUM(CASE WHEN a.genero = 'F' THEN 1 ELSE 0 END) AS female,
-            SUM(CASE WHEN a.genero NOT IN ('M','F') THEN 1 ELSE 0 END) AS other,
-            COUNT(DISTINCT a.id) AS total
-        FROM sga_personas.alumnos a
-        JOIN sga_personas.matriculas_clase m ON a.id = m.alumno_id
-        WHERE m.clase_id IN :clase_ids AND a.is_deleted = FALSE;
-        """)
-        q_gender = q_gender.bindparams(bindparam('clase_ids', expanding=True))
-        g = db.execute(q_gender, {"clase_ids": clase_ids}).fetchone()
-        male = int(g[0] or 0); female = int(g[1] or 0); other = int(g[2] or 0); total_students = int(g[3] or 0)
+
+    # 4) Porcentaje por género (con manejo de errores)
+    try:
+        q_gender = text("""
+            SELECT
+                SUM(CASE WHEN a.genero = 'M' THEN 1 ELSE 0 END) AS male,
+                SUM(CASE WHEN a.genero = 'F' THEN 1 ELSE 0 END) AS female,
+                SUM(CASE WHEN a.genero NOT IN ('M','F') THEN 1 ELSE 0 END) AS other,
+                COUNT(*) AS total
+            FROM sga_personas.alumnos a
+            WHERE a.is_deleted = FALSE;
+            """)
+        g = db.execute(q_gender).fetchone()
+        male = int(g[0] or 0)
+        female = int(g[1] or 0)
+        other = int(g[2] or 0)
+        total_students = int(g[3] or 0)
         gender_pct = {
             "male_pct": round((male/total_students*100) if total_students>0 else 0,2),
             "female_pct": round((female/total_students*100) if total_students>0 else 0,2),
             "other_pct": round((other/total_students*100) if total_students>0 else 0,2),
             "total_students": total_students
         }
+    except Exception as e:
+        print("[DEBUG DASHBOARD ADMIN] gender query failed:", e)
+        gender_pct = {"male_pct":0,"female_pct":0,"other_pct":0,"total_students":0}
 
-        return {
-            "tercio_top_count": tercio,
-            "quinto_top_count": quinto,
-            "decimo_top_count": decimo,
-            "top_courses": courses,
-            "low_students": low_students,
-            "gender": gender_pct
-        }
+    return {
+        **ranking,
+        "top_courses": courses,
+        "low_students": low_students,
+        "gender": gender_pct
+    }
+
+
+@router.get("/dashboard/docente")
+async def dashboard_docente(
+    authorization: Optional[str] = Header(None),
+    settings = Depends(get_settings),
+    cache: SnapshotCache = Depends(get_dashboard_cache),
+):
+    """Métricas del dashboard para DOCENTE (limitadas a sus clases), desde un snapshot por docente."""
+    try:
+        principal = authenticate(authorization, settings)
+        user_id = principal.user_id
+
+        snapshot = await cache.get(
+            f"docente:{user_id}",
+            lambda: _snapshot_en_thread(_calcular_dashboard_docente, user_id),
+        )
+        return _respuesta_snapshot(snapshot)
     except Exception as e:
         import traceback
         traceback.print_exc()
         return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content={"error":"INTERNAL_ERROR","message":str(e)})
 
 
+def _calcular_dashboard_docente(db: Session, user_id: str) -> dict:
+    from sqlalchemy import text, bindparam
+
+    # Obtener clases del docente
+    q_clases = text("SELECT id FROM sga_academico.clases WHERE docente_user_id = :user_id AND is_deleted = FALSE")
+    clase_rows = db.execute(q_clases, {"user_id": user_id}).fetchall()
+    clase_ids = [r[0] for r in clase_rows]
+    if not clase_ids:
+        return {"message": "No hay clases asignadas", "top_courses": [], "low_students": [], "gender": {}}
+
+    # Ranking y percentiles del histograma de notas de sus clases
+    ranking = _ranking_histograma(SqlAlchemyHistogramaNotasRepository(db).obtener(clase_ids=clase_ids))
+
+    # Top cursos y alumnos con peores promedios dentro de sus clases (tabla promedios)
+    promedio_repository = SqlAlchemyPromedioRepository(db)
+    courses = promedio_repository.top_cursos(limit=5, clase_ids=clase_ids)
+    low_students = promedio_repository.alumnos_promedio_bajo(limit=10, clase_ids=clase_ids)
+
+    # Género entre sus alumnos
+    q_gender = text(f"""
+    SELECT
+        SUM(CASE WHEN a.genero = 'M' THEN 1 ELSE 0 END) AS male,
+        SUM(CASE WHEN a.genero = 'F' THEN 1 ELSE 0 END) AS female,
+        SUM(CASE WHEN a.genero NOT IN ('M','F') THEN 1 ELSE 0 END) AS other,
+        COUNT(DISTINCT a.id) AS total
+    FROM sga_personas.alumnos a
+    JOIN sga_personas.matriculas_clase m ON a.id = m.alumno_id
+    WHERE m.clase_id IN :clase_ids AND a.is_deleted = FALSE;
+    """)
+    q_gender = q_gender.bindparams(bindparam('clase_ids', expanding=True))
+    g = db.execute(q_gender, {"clase_ids": clase_ids}).fetchone()
+    male = int(g[0] or 0); female = int(g[1] or 0); other = int(g[2] or 0); total_students = int(g[3] or 0)
+    gender_pct = {
+        "male_pct": round((male/total_students*100) if total_students>0 else 0,2),
+        "female_pct": round((female/total_students*100) if total_students>0 else 0,2),
+        "other_pct": round((other/total_students*100) if total_students>0 else 0,2),
+        "total_students": total_students
+    }
+
+    return {
+        **ranking,
+        "top_courses": courses,
+        "low_students": low_students,
+        "gender": gender_pct
+    }
+
+
 @router.get("/dashboard/padre")
 async def dashboard_padre(
     authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db),
     settings = Depends(get_settings),
+    cache: SnapshotCache = Depends(get_dashboard_cache),
 ):
-    """Métricas del dashboard para PADRE: centradas en sus hijos."""
+    """Métricas del dashboard para PADRE: centradas en sus hijos, desde un snapshot por padre."""
     try:
         token = extract_bearer_token(authorization)
-        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
-        user_id = payload.get('user_id') or payload.get('sub')
-        import httpx
+        principal = verify_token(token, settings)
+        user_id = principal.user_id
 
-        # Pedir al servicio de personas los hijos del padre
-        async with httpx.AsyncClient() as client:
+        async def calcular() -> dict:
+            # Pedir al servicio de personas los hijos del padre
+            client = get_http_client()
             resp = await client.get(f"{settings.PERSONAS_SERVICE_URL}/v1/relaciones/padre/{user_id}", headers={"Authorization": f"Bearer {token}"})
             if resp.status_code != 200:
-                return JSONResponse(status_code=status.HTTP_403_FORBIDDEN, content={"error":"Forbidden","message":"No se pudieron obtener los hijos del padre"})
+                raise ForbiddenException("No se pudieron obtener los hijos del padre")
             hijos = resp.json().get("hijos", [])
             alumno_ids = [h.get("alumno_id") for h in hijos]
+            if not alumno_ids:
+                return {"message": "No tiene hijos asociados", "top_courses": [], "low_students": [], "gender": {}}
+            return await _snapshot_en_thread(_calcular_dashboard_padre, alumno_ids)
+
+        snapshot = await cache.get(f"padre:{user_id}", calcular)
+        return _respuesta_snapshot(snapshot)
+    except ForbiddenException as e:
+        return JSONResponse(status_code=status.HTTP_403_FORBIDDEN, content={"error":"Forbidden","message":e.message})
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content={"error":"INTERNAL_ERROR","message":str(e)})
 
-        if not alumno_ids:
-            return {"message": "No tiene hijos asociados", "top_courses": [], "low_students": [], "gender": {}}
 
-        from sqlalchemy import text
+def _calcular_dashboard_padre(db: Session, alumno_ids: list) -> dict:
+    from sqlalchemy import text, bindparam
 
-        # Promedios de sus hijos
-        q_low_students = text("""
-        SELECT a.id AS alumno_id, CONCAT(a.nombres, ' ', a.apellido_paterno) AS nombre, AVG(n.valor_numerico) AS avg_grade
-        FROM sga_notas.notas n
-        JOIN sga_personas.matriculas_clase m ON n.matricula_clase_id = m.id
-        JOIN sga_personas.alumnos a ON m.alumno_id = a.id
-        WHERE n.is_deleted = FALSE AND n.valor_numerico IS NOT NULL AND a.id IN :alumno_ids
-        GROUP BY a.id, a.nombres, a.apellido_paterno
-        ORDER BY avg_grade ASC
-        LIMIT 10;
-        """)
-        q_low_students = q_low_students.bindparams(bindparam('alumno_ids', expanding=True))
-        low_students = []
-        for row in db.execute(q_low_students, {"alumno_ids": alumno_ids}).fetchall():
-            try:
-                low_students.append(dict(row._mapping))
-            except Exception:
-                try:
-                    low_students.append(dict(row))
-                except Exception:
-                    low_students.append({f"col_{i}": v for i, v in enumerate(row)})
+    # Promedios de sus hijos (tabla promedios)
+    low_students = SqlAlchemyPromedioRepository(db).alumnos_promedio_bajo(limit=10, alumno_ids=alumno_ids)
 
-        # Género de sus hijos
-        q_gender = text("""
-        SELECT
-            SUM(CASE WHEN a.genero = 'M' THEN 1 ELSE 0 END) AS male,
-            SUM(CASE WHEN a.genero = 'F' THEN 1 ELSE 0 END) AS female,
-            SUM(CASE WHEN a.genero NOT IN ('M','F') THEN 1 ELSE 0 END) AS other,
-            COUNT(*) AS total
-        FROM sga_personas.alumnos a
-        WHERE a.id IN :alumno_ids AND a.is_deleted = FALSE;
-        """)
-        q_gender = q_gender.bindparams(bindparam('alumno_ids', expanding=True))
-        g = db.execute(q_gender, {"alumno_ids": alumno_ids}).fetchone()
-        male = int(g[0] or 0); female = int(g[1] or 0); other = int(g[2] or 0); total_students = int(g[3] or 0)
-        gender_pct = {
-            "male_pct": round((male/total_students*100) if total_students>0 else 0,2),
-            "female_pct": round((female/total_students*100) if total_students>0 else 0,2),
-            "other_pct": round((other/total_students*100) if total_students>0 else 0,2),
-            "total_children": total_students
-        }
+    # Género de sus hijos
+    q_gender = text("""
+    SELECT
+        SUM(CASE WHEN a.genero = 'M' THEN 1 ELSE 0 END) AS male,
+        SUM(CASE WHEN a.genero = 'F' THEN 1 ELSE 0 END) AS female,
+        SUM(CASE WHEN a.genero NOT IN ('M','F') THEN 1 ELSE 0 END) AS other,
+        COUNT(*) AS total
+    FROM sga_personas.alumnos a
+    WHERE a.id IN :alumno_ids AND a.is_deleted = FALSE;
+    """)
+    q_gender = q_gender.bindparams(bindparam('alumno_ids', expanding=True))
+    g = db.execute(q_gender, {"alumno_ids": alumno_ids}).fetchone()
+    male = int(g[0] or 0); female = int(g[1] or 0); other = int(g[2] or 0); total_students = int(g[3] or 0)
+    gender_pct = {
+        "male_pct": round((male/total_students*100) if total_students>0 else 0,2),
+        "female_pct": round((female/total_students*100) if total_students>0 else 0,2),
+        "other_pct": round((other/total_students*100) if total_students>0 else 0,2),
+        "total_children": total_students
+    }
 
-        return {"low_students": low_students, "gender": gender_pct}
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content={"error":"INTERNAL_ERROR","message":str(e)})
+    return {"low_students": low_students, "gender": gender_pct}
 
 
 # ============================================================================
@@ -1068,9 +970,8 @@ async def create_tipo_evaluacion(
     db: Session = Depends(get_db),
 ):
     try:
-        token = extract_bearer_token(authorization)
-        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
-        rol = payload.get("rol_nombre")
+        principal = authenticate(authorization, settings)
+        rol = principal.rol
         
         if rol != "ADMIN":
             return JSONResponse(
@@ -1114,14 +1015,15 @@ async def create_tipo_evaluacion(
 async def list_tipos_evaluacion(
     offset: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
+        from sqlalchemy import select, func
         from app.infrastructure.db.models import TipoEvaluacionModel
         
-        query = db.query(TipoEvaluacionModel).filter(TipoEvaluacionModel.status == "ACTIVO")
-        total = query.count()
-        tipos = query.offset(offset).limit(limit).all()
+        query = select(TipoEvaluacionModel).where(TipoEvaluacionModel.status == "ACTIVO")
+        total = (await db.execute(select(func.count()).select_from(query.subquery()))).scalar_one()
+        tipos = (await db.execute(query.offset(offset).limit(limit))).scalars().all()
         
         return {
             "tipos_evaluacion": [
@@ -1154,9 +1056,8 @@ async def update_tipo_evaluacion(
     db: Session = Depends(get_db),
 ):
     try:
-        token = extract_bearer_token(authorization)
-        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
-        rol = payload.get("rol_nombre")
+        principal = authenticate(authorization, settings)
+        rol = principal.rol
         
         if rol != "ADMIN":
             return JSONResponse(
@@ -1177,11 +1078,18 @@ async def update_tipo_evaluacion(
             tipo.codigo = request.codigo
         if request.nombre is not None:
             tipo.nombre = request.nombre
+        peso_cambiado = request.peso_default is not None and request.peso_default != tipo.peso_default
         if request.peso_default is not None:
             tipo.peso_default = request.peso_default
         if request.descripcion is not None:
             tipo.descripcion = request.descripcion
         
+        # Las notas sin peso propio usan peso_default: sus promedios ponderados se recalculan
+        # en la misma transacción que el cambio de peso (el recálculo lee el peso ya escrito)
+        if peso_cambiado:
+            db.flush()
+            SqlAlchemyPromedioRepository(db).recalcular(tipo_evaluacion_id=tipo_id, commit=False)
+        
         db.commit()
         db.refresh(tipo)
         
@@ -1193,6 +1101,7 @@ async def update_tipo_evaluacion(
             "status": tipo.status
         }
     except Exception as e:
+        db.rollback()
         import traceback
         traceback.print_exc()
         return JSONResponse(
@@ -1209,9 +1118,8 @@ async def delete_tipo_evaluacion(
     db: Session = Depends(get_db),
 ):
     try:
-        token = extract_bearer_token(authorization)
-        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
-        rol = payload.get("rol_nombre")
+        principal = authenticate(authorization, settings)
+        rol = principal.rol
         
         if rol != "ADMIN":
             return JSONResponse(
@@ -1253,9 +1161,8 @@ async def create_escala(
     db: Session = Depends(get_db),
 ):
     try:
-        token = extract_bearer_token(authorization)
-        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
-        rol = payload.get("rol_nombre")
+        principal = authenticate(authorization, settings)
+        rol = principal.rol
         
         if rol != "ADMIN":
             return JSONResponse(
@@ -1304,9 +1211,8 @@ async def update_escala(
     db: Session = Depends(get_db),
 ):
     try:
-        token = extract_bearer_token(authorization)
-        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
-        rol = payload.get("rol_nombre")
+        principal = authenticate(authorization, settings)
+        rol = principal.rol
         
         if rol != "ADMIN":
             return JSONResponse(
@@ -1361,9 +1267,8 @@ async def delete_escala(
     db: Session = Depends(get_db),
 ):
     try:
-        token = extract_bearer_token(authorization)
-        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
-        rol = payload.get("rol_nombre")
+        principal = authenticate(authorization, settings)
+        rol = principal.rol
         
         if rol != "ADMIN":
             return JSONResponse(
@@ -1406,10 +1311,9 @@ async def update_nota(
     db: Session = Depends(get_db),
 ):
     try:
-        token = extract_bearer_token(authorization)
-        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
-        rol = payload.get("rol_nombre")
-        user_id = payload.get("user_id")
+        principal = authenticate(authorization, settings)
+        rol = principal.rol
+        user_id = principal.user_id
         
         if rol not in ["ADMIN", "DOCENTE"]:
             return JSONResponse(
@@ -1417,8 +1321,8 @@ async def update_nota(
                 content={"error": "Forbidden", "message": "Solo ADMIN o DOCENTE pueden editar notas"}
             )
         
-        from app.infrastructure.db.models import NotaModel
-        nota = db.query(NotaModel).filter(NotaModel.id == nota_id, NotaModel.is_deleted == False).first()
+        nota_repository = SqlAlchemyNotaRepository(db)
+        nota = nota_repository.find_by_id(nota_id)
         
         if not nota:
             return JSONResponse(
@@ -1433,21 +1337,14 @@ async def update_nota(
                 content={"error": "Forbidden", "message": "Solo puedes editar tus propias notas"}
             )
         
-        if request.tipo_evaluacion_id is not None:
-            nota.tipo_evaluacion_id = request.tipo_evaluacion_id
-        if request.escala_id is not None:
-            nota.escala_id = request.escala_id
-        if request.valor_literal is not None:
-            nota.valor_literal = request.valor_literal
-        if request.valor_numerico is not None:
-            nota.valor_numerico = request.valor_numerico
-        if request.peso is not None:
-            nota.peso = request.peso
-        if request.observaciones is not None:
-            nota.observaciones = request.observaciones
-        
-        db.commit()
-        db.refresh(nota)
+        # Solo los campos enviados; el repositorio mantiene la tabla promedios en la misma transacción
+        cambios = {campo: valor for campo, valor in request.dict().items() if valor is not None}
+        nota = nota_repository.update(nota_id, cambios)
+        if not nota:
+            return JSONResponse(
+                status_code=status.HTTP_404_NOT_FOUND,
+                content={"error": "NotFound", "message": "Nota no encontrada"}
+            )
         
         response_data = {
             "id": nota.id,
@@ -1466,7 +1363,7 @@ async def update_nota(
             AuditHelper.log_action(
                 session=db,
                 user_id=user_id,
-                username=payload.get("sub"),
+                username=principal.username,
                 rol_nombre=rol,
                 accion=AccionAuditoria.UPDATE_NOTA,
                 entidad="Nota",
@@ -1499,10 +1396,9 @@ async def delete_nota(
     db: Session = Depends(get_db),
 ):
     try:
-        token = extract_bearer_token(authorization)
-        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
-        rol = payload.get("rol_nombre")
-        user_id = payload.get("user_id")
+        principal = authenticate(authorization, settings)
+        rol = principal.rol
+        user_id = principal.user_id
         
         if rol not in ["ADMIN", "DOCENTE"]:
             return JSONResponse(
@@ -1510,8 +1406,8 @@ async def delete_nota(
                 content={"error": "Forbidden", "message": "Solo ADMIN o DOCENTE pueden eliminar notas"}
             )
         
-        from app.infrastructure.db.models import NotaModel
-        nota = db.query(NotaModel).filter(NotaModel.id == nota_id).first()
+        nota_repository = SqlAlchemyNotaRepository(db)
+        nota = nota_repository.find_by_id(nota_id)
         
         if not nota:
             return JSONResponse(
@@ -1526,15 +1422,14 @@ async def delete_nota(
                 content={"error": "Forbidden", "message": "Solo puedes eliminar tus propias notas"}
             )
         
-        nota.is_deleted = True
-        db.commit()
+        nota_repository.soft_delete(nota_id)
         
         # AUDITORÍA
         try:
             AuditHelper.log_action(
                 session=db,
                 user_id=user_id,
-                username=payload.get("sub"),
+                username=principal.username,
                 rol_nombre=rol,
                 accion=AccionAuditoria.DELETE_NOTA,
                 entidad="Nota",
@@ -1558,3 +1453,102 @@ async def delete_nota(
             content={"error": "INTERNAL_ERROR", "message": str(e)}
         )
 
+
+
+@router.post("/internal/umbrales/invalidar")
+async def invalidar_umbrales(
+    authorization: Optional[str] = Header(None),
+    settings = Depends(get_settings),
+    umbral_cache: UmbralCache = Depends(get_umbral_cache),
+):
+    """
+    Aviso de Académico tras crear/editar/eliminar un umbral de alerta.
+    Recarga la tabla en memoria de esta réplica; las demás la recargan al vencer el TTL.
+
+    Requiere el token del ADMIN que hizo el cambio (Académico lo reenvía): cada
+    aviso cuesta una recarga completa de la tabla desde Académico.
+    """
+    try:
+        principal = authenticate(authorization, settings)
+        if principal.rol != "ADMIN":
+            return JSONResponse(
+                status_code=status.HTTP_403_FORBIDDEN,
+                content={"error": "Forbidden", "message": "Solo ADMIN puede invalidar la caché de umbrales"}
+            )
+
+        umbral_cache.invalidar()
+        recargado = await umbral_cache.refresh(solo_si_vencido=True)
+        return {"invalidado": True, "recargado": recargado, "umbrales": umbral_cache.total}
+    except UnauthorizedException as e:
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"error": e.code, "message": e.message}
+        )
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"error": "INTERNAL_ERROR", "message": str(e)}
+        )
+
+
+@router.get("/auditoria")
+async def list_auditoria(
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    limit: int = Query(50, ge=1, le=MAX_AUDITORIA_LIMIT),
+    desde: Optional[datetime] = Query(None, description="created_at mínimo (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="created_at máximo (exclusivo)"),
+    user_id: Optional[str] = Query(None),
+    entidad: Optional[str] = Query(None),
+    entidad_id: Optional[str] = Query(None),
+    accion: Optional[str] = Query(None),
+    exitoso: Optional[bool] = Query(None),
+    authorization: Optional[str] = Header(None),
+    settings = Depends(get_settings),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Auditoría de Notas Service (solo ADMIN), paginada por cursor sobre (created_at, id)"""
+    try:
+        principal = authenticate(authorization, settings)
+        if principal.rol != "ADMIN":
+            return JSONResponse(
+                status_code=status.HTTP_403_FORBIDDEN,
+                content={"error": "Forbidden", "message": "Solo ADMIN puede consultar la auditoría"}
+            )
+
+        return await listar_auditoria(
+            db,
+            limit=limit,
+            cursor=cursor,
+            desde=desde,
+            hasta=hasta,
+            user_id=user_id,
+            entidad=entidad,
+            entidad_id=entidad_id,
+            accion=accion,
+            exitoso=exitoso,
+        )
+    except UnauthorizedException as e:
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"error": e.code, "message": e.message}
+        )
+    except ForbiddenException as e:
+        return JSONResponse(
+            status_code=status.HTTP_403_FORBIDDEN,
+            content={"error": e.code, "message": e.message}
+        )
+    except DomainException as e:
+        # Cursor o filtros inválidos
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": e.code, "message": e.message}
+        )
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"error": "InternalError", "message": str(e)}
+        )
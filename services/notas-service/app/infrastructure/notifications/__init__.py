@@ -0,0 +1 @@
+# Notas Service - Infrastructure Notifications Package Init
@@ -0,0 +1,113 @@
+# Notas Service - Transportes de notificaciones (SMTP / log)
+import asyncio
+import smtplib
+import threading
+from email.message import EmailMessage
+from typing import Optional
+from shared.common import Settings
+from app.domain import OutboxNotificacion, NotificacionTransport
+
+
+class LogTransport(NotificacionTransport):
+    """No envía nada: imprime el mensaje. Útil en desarrollo y para medir el despachador sin red."""
+
+    def __init__(self, verbose: bool = False):
+        self.verbose = verbose
+
+    async def send(self, outbox: OutboxNotificacion) -> None:
+        if self.verbose:
+            print(f"[outbox] {outbox.tipo} -> {outbox.destinatario}: {outbox.asunto}")
+
+
+class SmtpTransport(NotificacionTransport):
+    """
+    Envía EMAIL por SMTP. Sirve cualquier servidor local de pruebas
+    (p. ej. `python -m aiosmtpd -n -l localhost:1025` o MailHog).
+
+    smtplib es bloqueante, así que cada envío corre en un hilo; cada hilo
+    reutiliza su propia conexión SMTP entre mensajes.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        sender: str,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = False,
+        timeout: float = 10.0,
+    ):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connection(self) -> smtplib.SMTP:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            try:
+                if conn.noop()[0] == 250:
+                    return conn
+            except smtplib.SMTPException:
+                pass
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            conn.starttls()
+        if self.user:
+            conn.login(self.user, self.password or "")
+        self._local.conn = conn
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def _send_sync(self, outbox: OutboxNotificacion) -> None:
+        msg = EmailMessage()
+        msg["From"] = self.sender
+        msg["To"] = outbox.destinatario
+        msg["Subject"] = outbox.asunto or "Notificación"
+        msg.set_content(outbox.mensaje)
+        try:
+            self._connection().send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Conexión reutilizada que el servidor cerró: reintentar una vez con una nueva
+            self._local.conn = None
+            self._connection().send_message(msg)
+
+    async def send(self, outbox: OutboxNotificacion) -> None:
+        if outbox.tipo != "EMAIL":
+            raise ValueError(f"SmtpTransport no soporta notificaciones de tipo {outbox.tipo}")
+        await asyncio.to_thread(self._send_sync, outbox)
+
+    async def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.quit()
+            except Exception:
+                pass
+
+
+def build_transport(settings: Settings, nombre: Optional[str] = None) -> NotificacionTransport:
+    """Crea el transporte configurado en OUTBOX_TRANSPORT (o el indicado)"""
+    nombre = (nombre or settings.OUTBOX_TRANSPORT or "log").lower()
+    if nombre == "smtp":
+        return SmtpTransport(
+            host=settings.SMTP_HOST,
+            port=settings.SMTP_PORT,
+            sender=settings.SMTP_FROM,
+            user=settings.SMTP_USER,
+            password=settings.SMTP_PASSWORD,
+            starttls=settings.SMTP_STARTTLS,
+            timeout=settings.SMTP_TIMEOUT,
+        )
+    if nombre == "log":
+        return LogTransport(verbose=settings.DEBUG)
+    raise ValueError(f"OUTBOX_TRANSPORT desconocido: {nombre}")
@@ -0,0 +1 @@
+# Notas Service - Infrastructure Workers Package Init
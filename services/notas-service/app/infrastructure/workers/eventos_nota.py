@@ -0,0 +1,57 @@
+# Notas Service - Worker: consumidor de eventos NOTA_REGISTRADA
+import asyncio
+import os
+import socket
+from shared.common import Settings
+from app.infrastructure.db.repositories import (
+    SqlAlchemyEventoDominioRepository,
+    SqlAlchemyAlertaRepository,
+    SqlAlchemyOutboxRepository,
+    SqlAlchemyMatriculaProyeccionRepository,
+)
+from app.infrastructure.clients.personas_client import PersonasServiceClient
+from app.infrastructure.clients.academico_client import AcademicoServiceClient
+from app.infrastructure.cache.umbral_cache import get_umbral_cache
+from app.application.use_cases.procesar_eventos_nota import ProcesarEventosNotaUseCase
+
+
+def build_eventos_nota_job(session_factory, settings: Settings):
+    """Crea la corrutina que drena los eventos pendientes por lotes, con su propia sesión de BD"""
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+
+    async def procesar():
+        total = {"eventos": 0, "alertas": 0, "notificaciones": 0}
+        while True:
+            db = session_factory()
+            try:
+                use_case = ProcesarEventosNotaUseCase(
+                    evento_repository=SqlAlchemyEventoDominioRepository(db),
+                    alerta_repository=SqlAlchemyAlertaRepository(db),
+                    outbox_repository=SqlAlchemyOutboxRepository(db),
+                    proyeccion_repository=SqlAlchemyMatriculaProyeccionRepository(db),
+                    personas_client=PersonasServiceClient(
+                        base_url=settings.PERSONAS_SERVICE_URL or "http://localhost:8003", settings=settings
+                    ),
+                    academico_client=AcademicoServiceClient(base_url=settings.ACADEMICO_SERVICE_URL or "http://localhost:8002"),
+                    umbral_cache=get_umbral_cache(),
+                    db_session=db,
+                    worker_id=worker_id,
+                    batch_size=settings.EVENTOS_BATCH_SIZE,
+                    max_intentos=settings.EVENTOS_MAX_INTENTOS,
+                    backoff_base_seconds=settings.EVENTOS_BACKOFF_BASE_SECONDS,
+                    backoff_max_seconds=settings.EVENTOS_BACKOFF_MAX_SECONDS,
+                    stale_after_seconds=settings.EVENTOS_STALE_SECONDS,
+                )
+                result = await use_case.execute()
+            finally:
+                await asyncio.to_thread(db.close)
+            for k in total:
+                total[k] += result[k]
+            # Lote incompleto: la cola quedó vacía hasta el próximo ciclo
+            if result["eventos"] < settings.EVENTOS_BATCH_SIZE:
+                break
+        if total["eventos"]:
+            print(f"[eventos-nota] {total}")
+        return total
+
+    return procesar
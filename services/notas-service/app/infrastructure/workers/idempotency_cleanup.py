@@ -0,0 +1,32 @@
+# Notas Service - Worker: limpieza de Idempotency-Keys expiradas
+import asyncio
+from app.infrastructure.db.repositories import SqlAlchemyIdempotencyRepository
+
+CLEANUP_BATCH_SIZE = 1000
+
+
+def build_idempotency_cleanup_job(session_factory):
+    """Crea la corrutina que borra por lotes las claves cuyo expires_at ya pasó"""
+
+    def _limpiar() -> int:
+        db = session_factory()
+        try:
+            repo = SqlAlchemyIdempotencyRepository(db)
+            borradas = 0
+            while True:
+                n = repo.delete_expired(CLEANUP_BATCH_SIZE)
+                borradas += n
+                if n < CLEANUP_BATCH_SIZE:
+                    break
+            return borradas
+        finally:
+            db.close()
+
+    async def limpiar():
+        # Los DELETE son síncronos (PyMySQL): se ejecutan en un hilo, fuera del event loop
+        borradas = await asyncio.to_thread(_limpiar)
+        if borradas:
+            print(f"[idempotency-cleanup] {borradas} claves expiradas eliminadas")
+        return borradas
+
+    return limpiar
@@ -0,0 +1,42 @@
+# Notas Service - Tareas periódicas en segundo plano
+import asyncio
+import traceback
+from typing import Awaitable, Callable, Optional
+
+
+class PeriodicTask:
+    """
+    Ejecuta una corrutina cada `interval_seconds` mientras el servicio está levantado.
+    Se arranca y detiene desde el lifespan de la aplicación; un error en una
+    ejecución se registra y no detiene las siguientes.
+    """
+
+    def __init__(self, name: str, interval_seconds: float, job: Callable[[], Awaitable[object]]):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.job = job
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.job()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                print(f"[{self.name}] Error en ejecución periódica")
+                traceback.print_exc()
+            await asyncio.sleep(self.interval_seconds)
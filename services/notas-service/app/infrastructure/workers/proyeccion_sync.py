@@ -0,0 +1,30 @@
+# Notas Service - Worker: sincronización de la proyección de matrículas
+import asyncio
+from shared.common import Settings
+from app.infrastructure.db.repositories import SqlAlchemyMatriculaProyeccionRepository
+from app.infrastructure.clients.personas_client import PersonasServiceClient
+from app.infrastructure.clients.academico_client import AcademicoServiceClient
+from app.application.use_cases.sincronizar_proyeccion import SincronizarProyeccionUseCase
+
+
+def build_proyeccion_sync_job(session_factory, settings: Settings):
+    """Crea la corrutina que ejecuta un ciclo de sincronización con su propia sesión de BD"""
+
+    async def sincronizar():
+        db = session_factory()
+        try:
+            use_case = SincronizarProyeccionUseCase(
+                proyeccion_repository=SqlAlchemyMatriculaProyeccionRepository(db),
+                personas_client=PersonasServiceClient(
+                    base_url=settings.PERSONAS_SERVICE_URL or "http://localhost:8003", settings=settings
+                ),
+                academico_client=AcademicoServiceClient(base_url=settings.ACADEMICO_SERVICE_URL or "http://localhost:8002"),
+            )
+            result = await use_case.execute()
+            if any(result.values()):
+                print(f"[proyeccion-sync] {result}")
+            return result
+        finally:
+            await asyncio.to_thread(db.close)
+
+    return sincronizar
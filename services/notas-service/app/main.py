@@ -1,8 +1,22 @@
 # Notas Service - Main Application
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from shared.common import get_settings, create_db_engine, create_session_factory
+from fastapi.responses import PlainTextResponse
+from shared.common import (
+    get_settings, create_db_engine, create_session_factory, create_async_db_engine, create_async_session_factory,
+    init_http_client, close_http_client, render_pool_metrics,
+    init_audit_sink, close_audit_sink,
+    init_token_verifier, init_revocaciones, close_revocaciones,
+)
 from app.infrastructure.http import dependencies
+from app.infrastructure.workers.periodic import PeriodicTask
+from app.infrastructure.workers.proyeccion_sync import build_proyeccion_sync_job
+from app.infrastructure.workers.idempotency_cleanup import build_idempotency_cleanup_job
+from app.infrastructure.workers.eventos_nota import build_eventos_nota_job
+from app.infrastructure.clients.academico_client import AcademicoServiceClient
+from app.infrastructure.cache.umbral_cache import init_umbral_cache
+from app.infrastructure.cache.snapshot_cache import init_dashboard_cache, init_conteo_cache
 
 settings = get_settings()
 settings.APP_NAME = "Notas Service"
@@ -12,14 +26,99 @@ settings.DB_NAME = "sga_notas"
 print(f"🔧 CORS_ORIGINS type: {type(settings.CORS_ORIGINS)}")
 print(f"🔧 CORS_ORIGINS value: {settings.CORS_ORIGINS}")
 
-engine = create_db_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+engine = create_db_engine(settings.DATABASE_URL, echo=settings.DEBUG, settings=settings)
 session_factory = create_session_factory(engine)
 dependencies.set_session_factory(session_factory)
 
+# Clave JWT preparada una vez; los tokens verificados se reutilizan hasta su exp
+init_token_verifier(settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM, settings.JWT_VERIFY_CACHE_SIZE)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Cliente HTTP compartido (keep-alive) para llamadas a otros servicios
+    init_http_client(settings)
+    
+    # Engine async (aiomysql) para los handlers que consultan con AsyncSession
+    async_engine = create_async_db_engine(settings.ASYNC_DATABASE_URL, echo=settings.DEBUG, settings=settings)
+    dependencies.set_async_session_factory(create_async_session_factory(async_engine))
+    
+    # Auditoría por lotes: los handlers encolan y un task escribe en segundo plano
+    init_audit_sink(session_factory, settings)
+    
+    # JTIs revocados en memoria, al día con el feed de revocaciones de IAM
+    init_revocaciones(settings)
+    
+    # Tabla de umbrales de alerta en memoria: se carga antes de aceptar tráfico
+    umbral_cache = init_umbral_cache(
+        AcademicoServiceClient(base_url=settings.ACADEMICO_SERVICE_URL or "http://localhost:8002"),
+        ttl_seconds=settings.UMBRAL_CACHE_TTL_SECONDS,
+        reintento_seconds=settings.UMBRAL_CACHE_RETRY_SECONDS,
+    )
+    if await umbral_cache.refresh():
+        print(f"✅ Umbrales de alerta cargados: {umbral_cache.total}")
+    else:
+        print("⚠️ No se pudieron cargar los umbrales de alerta; se reintentará en segundo plano")
+    
+    # Snapshots de dashboards por rol y ámbito (stale-while-revalidate)
+    init_dashboard_cache(
+        ttl_seconds=settings.DASHBOARD_CACHE_TTL_SECONDS,
+        max_stale_seconds=settings.DASHBOARD_CACHE_MAX_STALE_SECONDS,
+        max_entries=settings.DASHBOARD_CACHE_MAX_ENTRIES,
+    )
+    
+    # Total aproximado de GET /v1/notas: un COUNT por rol + filtros cada TTL, no uno por página
+    init_conteo_cache(
+        ttl_seconds=settings.NOTAS_TOTAL_CACHE_TTL_SECONDS,
+        max_stale_seconds=settings.NOTAS_TOTAL_CACHE_MAX_STALE_SECONDS,
+        max_entries=settings.NOTAS_TOTAL_CACHE_MAX_ENTRIES,
+    )
+    
+    # Proyección local de matrículas/clases usada para filtros por rol y enriquecimiento
+    background_tasks = []
+    if settings.PROYECCION_SYNC_ENABLED:
+        background_tasks.append(PeriodicTask(
+            "proyeccion-sync",
+            settings.PROYECCION_SYNC_INTERVAL_SECONDS,
+            build_proyeccion_sync_job(session_factory, settings),
+        ))
+    # Alertas por nota baja: consumidor de eventos NOTA_REGISTRADA
+    if settings.EVENTOS_CONSUMER_ENABLED:
+        background_tasks.append(PeriodicTask(
+            "eventos-nota",
+            settings.EVENTOS_POLL_INTERVAL_SECONDS,
+            build_eventos_nota_job(session_factory, settings),
+        ))
+    # Recarga de umbrales al vencer el TTL o tras una invalidación
+    background_tasks.append(PeriodicTask(
+        "umbral-cache",
+        settings.UMBRAL_CACHE_RETRY_SECONDS,
+        lambda: umbral_cache.refresh(solo_si_vencido=True),
+    ))
+    # Purga de Idempotency-Keys vencidas
+    background_tasks.append(PeriodicTask(
+        "idempotency-cleanup",
+        settings.IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS,
+        build_idempotency_cleanup_job(session_factory),
+    ))
+    for task in background_tasks:
+        task.start()
+    
+    yield
+    
+    for task in background_tasks:
+        await task.stop()
+    await close_revocaciones()
+    await close_audit_sink()
+    await close_http_client()
+    await async_engine.dispose()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     debug=settings.DEBUG,
+    lifespan=lifespan,
 )
 
 # CORS - Configuración explícita
@@ -57,6 +156,13 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Métricas del pool de conexiones a BD (formato Prometheus)"""
+    return render_pool_metrics(settings.APP_NAME)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8004)
@@ -0,0 +1,145 @@
+# Notas Service - Despachador de outbox_notificaciones (proceso independiente)
+#
+# Uso:
+#   python -m app.outbox_dispatcher                 # bucle continuo (una o varias réplicas)
+#   python -m app.outbox_dispatcher --drain         # vacía la cola, muestra el throughput y termina
+#   python -m app.outbox_dispatcher --transport smtp --batch-size 200 --concurrency 20
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import time
+import traceback
+from collections import deque
+from shared.common import get_settings, create_db_engine, create_session_factory
+from app.infrastructure.db.repositories import SqlAlchemyOutboxRepository
+from app.infrastructure.notifications.transports import build_transport
+from app.application.use_cases.despachar_outbox import DespacharOutboxUseCase
+
+
+class DispatcherStats:
+    """Contadores del despachador y tasa de envío (mensajes/segundo)"""
+
+    def __init__(self, window_seconds: float = 60.0):
+        self.started_at = time.monotonic()
+        self.enviados = 0
+        self.fallidos = 0
+        self.liberados = 0
+        self.lotes = 0
+        self.window_seconds = window_seconds
+        self._ventana = deque()  # (instante, enviados)
+
+    def registrar(self, result: dict) -> None:
+        ahora = time.monotonic()
+        self.enviados += result["enviados"]
+        self.fallidos += result["fallidos"]
+        self.liberados += result["liberados"]
+        if result["reclamados"]:
+            self.lotes += 1
+            self._ventana.append((ahora, result["enviados"]))
+        while self._ventana and self._ventana[0][0] < ahora - self.window_seconds:
+            self._ventana.popleft()
+
+    def tasa_total(self) -> float:
+        elapsed = time.monotonic() - self.started_at
+        return self.enviados / elapsed if elapsed > 0 else 0.0
+
+    def tasa_ventana(self) -> float:
+        if not self._ventana:
+            return 0.0
+        elapsed = min(self.window_seconds, time.monotonic() - self.started_at)
+        return sum(n for _, n in self._ventana) / elapsed if elapsed > 0 else 0.0
+
+    def resumen(self) -> str:
+        return (
+            f"enviados={self.enviados} fallidos={self.fallidos} liberados={self.liberados} "
+            f"lotes={self.lotes} tasa={self.tasa_ventana():.1f} msg/s (últimos {self.window_seconds:.0f}s) "
+            f"tasa_total={self.tasa_total():.1f} msg/s"
+        )
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Despachador de outbox_notificaciones")
+    parser.add_argument("--transport", choices=["log", "smtp"], default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--drain", action="store_true", help="Terminar cuando no queden mensajes listos")
+    parser.add_argument("--worker-id", default=None)
+    return parser.parse_args()
+
+
+async def run(args) -> DispatcherStats:
+    settings = get_settings()
+    settings.APP_NAME = "Notas Outbox Dispatcher"
+    settings.DB_NAME = "sga_notas"
+
+    engine = create_db_engine(settings.DATABASE_URL, echo=False, settings=settings)
+    session_factory = create_session_factory(engine)
+    transport = build_transport(settings, args.transport)
+    worker_id = args.worker_id or f"{socket.gethostname()}-{os.getpid()}"
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass  # Windows
+
+    stats = DispatcherStats()
+    ultimo_reporte = time.monotonic()
+    print(f"[outbox-dispatcher] worker={worker_id} transport={transport.__class__.__name__}")
+
+    try:
+        while not stop.is_set():
+            db = session_factory()
+            try:
+                use_case = DespacharOutboxUseCase(
+                    outbox_repository=SqlAlchemyOutboxRepository(db),
+                    transport=transport,
+                    worker_id=worker_id,
+                    batch_size=args.batch_size or settings.OUTBOX_BATCH_SIZE,
+                    concurrency=args.concurrency or settings.OUTBOX_CONCURRENCY,
+                    max_intentos=settings.OUTBOX_MAX_INTENTOS,
+                    backoff_base_seconds=settings.OUTBOX_BACKOFF_BASE_SECONDS,
+                    backoff_max_seconds=settings.OUTBOX_BACKOFF_MAX_SECONDS,
+                    stale_after_seconds=settings.OUTBOX_STALE_SECONDS,
+                )
+                result = await use_case.execute()
+            except Exception:
+                print("[outbox-dispatcher] Error procesando lote")
+                traceback.print_exc()
+                result = None
+            finally:
+                db.close()
+
+            if result is not None:
+                stats.registrar(result)
+
+            if time.monotonic() - ultimo_reporte >= settings.OUTBOX_STATS_INTERVAL_SECONDS:
+                print(f"[outbox-dispatcher] {stats.resumen()}")
+                ultimo_reporte = time.monotonic()
+
+            # Con un lote lleno se sigue sin esperar; si la cola quedó vacía se espera al siguiente sondeo
+            if result is None or result["reclamados"] < (args.batch_size or settings.OUTBOX_BATCH_SIZE):
+                if args.drain and result is not None:
+                    break
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=settings.OUTBOX_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+    finally:
+        await transport.close()
+        engine.dispose()
+
+    print(f"[outbox-dispatcher] fin: {stats.resumen()}")
+    return stats
+
+
+def main():
+    asyncio.run(run(_parse_args()))
+
+
+if __name__ == "__main__":
+    main()
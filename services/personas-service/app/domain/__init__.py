@@ -1,6 +1,10 @@
 # Personas Service - Domain Package
 from .models import Alumno, Padre, RelacionPadreAlumno, MatriculaClase
-from .ports import AlumnoRepository, PadreRepository, RelacionPadreAlumnoRepository, MatriculaClaseRepository
+from .ports import (
+    AlumnoRepository, PadreRepository, RelacionPadreAlumnoRepository, MatriculaClaseRepository,
+    AsyncAlumnoRepository, AsyncMatriculaClaseRepository,
+)
+from .busqueda import ConsultaBusqueda, analizar_busqueda, normalizar_texto
 from .exceptions import (
     AlumnoNotFoundException,
     PadreNotFoundException,
@@ -13,6 +17,8 @@ from .exceptions import (
 __all__ = [
     "Alumno", "Padre", "RelacionPadreAlumno", "MatriculaClase",
     "AlumnoRepository", "PadreRepository", "RelacionPadreAlumnoRepository", "MatriculaClaseRepository",
+    "AsyncAlumnoRepository", "AsyncMatriculaClaseRepository",
+    "ConsultaBusqueda", "analizar_busqueda", "normalizar_texto",
     "AlumnoNotFoundException", "PadreNotFoundException",
     "AlumnoAlreadyExistsException", "PadreAlreadyExistsException",
     "RelacionAlreadyExistsException", "MatriculaAlreadyExistsException",
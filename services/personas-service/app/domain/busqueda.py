@@ -0,0 +1,49 @@
+# Personas Service - Domain: búsqueda de alumnos
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+# Longitud mínima de palabra que indexa el parser ngram de MySQL (ngram_token_size)
+LONGITUD_MINIMA_PALABRA = 2
+# Dígitos mínimos para tratar la búsqueda como prefijo de DNI/código
+MINIMO_DIGITOS_PREFIJO = 3
+
+_NO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+_CODIGO = re.compile(r"^(?=.*\d)(?=.*[a-z])[a-z0-9-]+$")
+
+
+def normalizar_texto(valor: Optional[str]) -> str:
+    """Minúsculas, sin tildes ni signos: 'Núñez-Pérez' -> 'nunez perez'"""
+    if not valor:
+        return ""
+    sin_tildes = "".join(
+        c for c in unicodedata.normalize("NFKD", valor) if not unicodedata.combining(c)
+    )
+    return _NO_ALFANUMERICO.sub(" ", sin_tildes.lower()).strip()
+
+
+@dataclass
+class ConsultaBusqueda:
+    """
+    Búsqueda de alumnos ya interpretada:
+
+    - "documento": solo dígitos -> prefijo de DNI o de código (índices idx_dni/idx_codigo)
+    - "codigo": letras y dígitos sin espacios (A2025001, ALU2025) -> prefijo de código
+    - "texto": nombres/apellidos -> FULLTEXT sobre alumnos.search_text con todas las palabras
+    """
+    tipo: str
+    valor: str
+    palabras: List[str] = field(default_factory=list)
+
+
+def analizar_busqueda(termino: Optional[str]) -> Optional[ConsultaBusqueda]:
+    normalizado = normalizar_texto(termino)
+    if not normalizado:
+        return None
+    compacto = (termino or "").strip().lower()
+    if normalizado.isdigit() and len(normalizado) >= MINIMO_DIGITOS_PREFIJO:
+        return ConsultaBusqueda("documento", normalizado)
+    if " " not in compacto and _CODIGO.match(compacto):
+        return ConsultaBusqueda("codigo", compacto.upper())
+    return ConsultaBusqueda("texto", normalizado, normalizado.split())
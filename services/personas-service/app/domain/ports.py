@@ -1,7 +1,9 @@
 # Personas Service - Domain Ports
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from datetime import datetime
+from typing import Optional, List, Dict, Tuple
 from .models import Alumno, Padre, RelacionPadreAlumno, MatriculaClase
+from .busqueda import ConsultaBusqueda
 
 
 class AlumnoRepository(ABC):
@@ -48,6 +50,10 @@ class RelacionPadreAlumnoRepository(ABC):
     @abstractmethod
     def find_by_alumno(self, alumno_id: str) -> List[RelacionPadreAlumno]:
         pass
+    
+    @abstractmethod
+    def find_padres_by_alumnos(self, alumno_ids: List[str]) -> List[Tuple[RelacionPadreAlumno, Padre]]:
+        pass
 
 
 class MatriculaClaseRepository(ABC):
@@ -66,3 +72,49 @@ class MatriculaClaseRepository(ABC):
     @abstractmethod
     def find_by_alumno(self, alumno_id: str) -> List[MatriculaClase]:
         pass
+    
+    @abstractmethod
+    def find_by_ids(self, matricula_ids: List[str]) -> List[MatriculaClase]:
+        pass
+    
+    @abstractmethod
+    def find_cambios(self, desde: Optional[datetime], desde_id: Optional[str], limit: int = 500) -> List[MatriculaClase]:
+        pass
+
+
+class AsyncAlumnoRepository(ABC):
+    """Lecturas de alumnos sobre una sesión async (no bloquean el event loop)"""
+    
+    @abstractmethod
+    async def buscar(self, consulta: Optional[ConsultaBusqueda], offset: int = 0, limit: int = 20) -> Tuple[List[Alumno], int]:
+        """Página de alumnos (los más relevantes primero si hay búsqueda) y total de coincidencias"""
+        pass
+    
+    @abstractmethod
+    async def find_activos_by_clase(self, clase_id: str) -> List[Alumno]:
+        """Alumnos activos con matrícula activa en la clase"""
+        pass
+
+
+class AsyncMatriculaClaseRepository(ABC):
+    """Lecturas de matrículas sobre una sesión async"""
+    
+    @abstractmethod
+    async def buscar(
+        self,
+        alumno_id: Optional[str] = None,
+        clase_id: Optional[str] = None,
+        status: Optional[str] = None,
+        consulta: Optional[ConsultaBusqueda] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> Tuple[List[MatriculaClase], int]:
+        pass
+    
+    @abstractmethod
+    async def find_by_ids(self, matricula_ids: List[str]) -> List[MatriculaClase]:
+        pass
+    
+    @abstractmethod
+    async def contar_activas_por_clase(self, clase_ids: List[str]) -> Dict[str, int]:
+        pass
@@ -0,0 +1,105 @@
+# Personas Service - Infrastructure DB Async Repositories
+from typing import Optional, List, Dict, Tuple
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain import *
+from .models import *
+from .repositories import alumno_model_to_domain, matricula_model_to_domain
+from .busqueda_alumnos import criterio_busqueda_alumnos, orden_busqueda_alumnos
+
+
+class AsyncSqlAlchemyAlumnoRepository(AsyncAlumnoRepository):
+    """Lecturas de alumnos de los listados y de la lista de clase del docente"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def buscar(self, consulta: Optional[ConsultaBusqueda], offset: int = 0, limit: int = 20) -> Tuple[List[Alumno], int]:
+        filtros = [AlumnoModel.is_deleted == False]
+        orden = []
+        if consulta:
+            # Prefijo de DNI/código o FULLTEXT sobre search_text (sin LIKE '%x%')
+            filtro, relevancia = criterio_busqueda_alumnos(consulta, self.session.bind.dialect.name)
+            filtros.append(filtro)
+            orden = orden_busqueda_alumnos(relevancia)
+
+        total = await self.session.scalar(select(func.count(AlumnoModel.id)).where(*filtros))
+        result = await self.session.execute(
+            select(AlumnoModel).where(*filtros).order_by(*orden).offset(offset).limit(limit)
+        )
+        return [alumno_model_to_domain(m) for m in result.scalars().all()], int(total or 0)
+
+    async def find_activos_by_clase(self, clase_id: str) -> List[Alumno]:
+        result = await self.session.execute(
+            select(AlumnoModel).join(
+                MatriculaClaseModel, AlumnoModel.id == MatriculaClaseModel.alumno_id
+            ).where(
+                MatriculaClaseModel.clase_id == clase_id,
+                MatriculaClaseModel.status == 'ACTIVO',
+                MatriculaClaseModel.is_deleted == False,
+                AlumnoModel.status == 'ACTIVO',
+                AlumnoModel.is_deleted == False,
+            )
+        )
+        return [alumno_model_to_domain(m) for m in result.scalars().all()]
+
+
+class AsyncSqlAlchemyMatriculaClaseRepository(AsyncMatriculaClaseRepository):
+    """Variante async de las lecturas de matrículas (listado, lote de Notas y conteos por clase)"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def buscar(
+        self,
+        alumno_id: Optional[str] = None,
+        clase_id: Optional[str] = None,
+        status: Optional[str] = None,
+        consulta: Optional[ConsultaBusqueda] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> Tuple[List[MatriculaClase], int]:
+        query = select(MatriculaClaseModel).where(MatriculaClaseModel.is_deleted == False)
+        orden = []
+        if consulta:
+            # Join con AlumnoModel para buscar por nombre/código/DNI con los índices de alumnos
+            query = query.join(AlumnoModel, MatriculaClaseModel.alumno_id == AlumnoModel.id)
+            filtro, relevancia = criterio_busqueda_alumnos(consulta, self.session.bind.dialect.name)
+            query = query.where(filtro)
+            orden = orden_busqueda_alumnos(relevancia)
+        if alumno_id:
+            query = query.where(MatriculaClaseModel.alumno_id == alumno_id)
+        if clase_id:
+            query = query.where(MatriculaClaseModel.clase_id == clase_id)
+        if status:
+            query = query.where(MatriculaClaseModel.status == status)
+
+        total = await self.session.scalar(
+            query.with_only_columns(func.count(MatriculaClaseModel.id)).order_by(None)
+        )
+        result = await self.session.execute(query.order_by(*orden).offset(offset).limit(limit))
+        return [matricula_model_to_domain(m) for m in result.scalars().all()], int(total or 0)
+
+    async def find_by_ids(self, matricula_ids: List[str]) -> List[MatriculaClase]:
+        """Resuelve un lote de matrículas con una sola consulta IN (...)"""
+        if not matricula_ids:
+            return []
+        result = await self.session.execute(
+            select(MatriculaClaseModel).where(
+                MatriculaClaseModel.id.in_(matricula_ids),
+                MatriculaClaseModel.is_deleted == False,
+            )
+        )
+        return [matricula_model_to_domain(m) for m in result.scalars().all()]
+
+    async def contar_activas_por_clase(self, clase_ids: List[str]) -> Dict[str, int]:
+        if not clase_ids:
+            return {}
+        result = await self.session.execute(
+            select(MatriculaClaseModel.clase_id, func.count(MatriculaClaseModel.id)).where(
+                MatriculaClaseModel.clase_id.in_(clase_ids),
+                MatriculaClaseModel.status == 'ACTIVO',
+                MatriculaClaseModel.is_deleted == False,
+            ).group_by(MatriculaClaseModel.clase_id)
+        )
+        return {clase_id: total for clase_id, total in result.all()}
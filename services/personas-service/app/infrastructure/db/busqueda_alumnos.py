@@ -0,0 +1,59 @@
+# Personas Service - Búsqueda indexada de alumnos
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, desc, func, or_, text
+from sqlalchemy.sql.elements import ColumnElement
+from app.domain.busqueda import ConsultaBusqueda, LONGITUD_MINIMA_PALABRA
+from .models import AlumnoModel
+
+_MATCH_SQL = "MATCH (sga_personas.alumnos.search_text) AGAINST (:busqueda_ft IN BOOLEAN MODE)"
+
+
+def _escapar_like(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def criterio_busqueda_alumnos(consulta: ConsultaBusqueda, dialecto: str) -> Tuple[ColumnElement, Optional[ColumnElement]]:
+    """
+    (filtro WHERE, expresión de relevancia para ORDER BY DESC o None) sobre AlumnoModel.
+
+    - documento/codigo: prefijo (LIKE 'x%') sobre idx_dni / idx_codigo, rango de índice
+    - texto en MySQL: MATCH ... AGAINST en modo booleano sobre ft_alumnos_search
+      (parser ngram), exigiendo todas las palabras y ordenando por relevancia
+    - texto en otros motores (SQLite en pruebas): LIKE por palabra sobre las columnas
+      (search_text es una columna generada con funciones de MySQL; sin plegado de tildes)
+    """
+    if consulta.tipo == "documento":
+        prefijo = f"{_escapar_like(consulta.valor)}%"
+        return (
+            or_(AlumnoModel.dni.like(prefijo, escape="\\"), AlumnoModel.codigo_alumno.like(prefijo, escape="\\")),
+            None,
+        )
+    if consulta.tipo == "codigo":
+        return AlumnoModel.codigo_alumno.like(f"{_escapar_like(consulta.valor)}%", escape="\\"), None
+
+    indexables = [p for p in consulta.palabras if len(p) >= LONGITUD_MINIMA_PALABRA]
+    if dialecto == "mysql" and indexables:
+        # Las palabras normalizadas solo tienen [a-z0-9], así que las frases entre comillas no necesitan escape
+        # (la collation *_ci de la columna ignora tildes y mayúsculas al comparar)
+        booleano = " ".join(f'+"{p}"' for p in indexables)
+        match = text(_MATCH_SQL).bindparams(busqueda_ft=booleano)
+        # Palabras de una letra (iniciales) no están en el índice ngram: se exigen como prefijo
+        iniciales = [
+            or_(AlumnoModel.search_text.like(f"{p}%"), AlumnoModel.search_text.like(f"% {p}%"))
+            for p in consulta.palabras if len(p) < LONGITUD_MINIMA_PALABRA
+        ]
+        return and_(match, *iniciales), match
+
+    columnas = (
+        AlumnoModel.nombres, AlumnoModel.apellido_paterno, AlumnoModel.apellido_materno,
+        AlumnoModel.codigo_alumno, AlumnoModel.dni,
+    )
+    return and_(*(
+        or_(*(func.lower(c).like(f"%{p}%") for c in columnas)) for p in consulta.palabras
+    )), None
+
+
+def orden_busqueda_alumnos(relevancia: Optional[ColumnElement]) -> List[ColumnElement]:
+    """Relevancia FULLTEXT (si la hay) y luego apellidos y nombres"""
+    orden = [desc(relevancia)] if relevancia is not None else []
+    return orden + [AlumnoModel.apellido_paterno, AlumnoModel.apellido_materno, AlumnoModel.nombres]
@@ -1,9 +1,16 @@
 # Personas Service - Infrastructure DB Models
-from sqlalchemy import Column, String, Integer, Boolean, TIMESTAMP, ForeignKey, Date, Text
+from sqlalchemy import Column, String, Integer, Boolean, TIMESTAMP, ForeignKey, Date, Text, Computed
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from shared.common import Base
 
+# Columna generada STORED (igual en bootstrap.sql y la migración 014): MySQL la mantiene
+# en toda escritura, también en los INSERT de seed.sql que no pasan por el ORM
+SEARCH_TEXT_SQL = (
+    "LOWER(REGEXP_REPLACE(CONCAT_WS(' ', nombres, apellido_paterno, apellido_materno, "
+    "codigo_alumno, dni), '[^[:alnum:]]+', ' '))"
+)
+
 
 class AlumnoModel(Base):
     __tablename__ = "alumnos"
@@ -23,6 +30,8 @@ class AlumnoModel(Base):
     foto_url = Column(String(255))
     status = Column(String(20), nullable=False, default="ACTIVO", index=True)
     is_deleted = Column(Boolean, nullable=False, default=False)
+    # Nombres, apellidos, código y DNI en minúsculas y sin signos (FULLTEXT ngram, ver busqueda_alumnos)
+    search_text = Column(String(500), Computed(SEARCH_TEXT_SQL, persisted=True))
     created_at = Column(TIMESTAMP, nullable=False, server_default=func.current_timestamp())
     updated_at = Column(TIMESTAMP, nullable=False, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
     
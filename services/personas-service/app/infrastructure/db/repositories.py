@@ -1,9 +1,14 @@
 # Personas Service - Infrastructure DB Repositories
-from typing import Optional, List
+from datetime import datetime
+from typing import Optional, List, Tuple
+from sqlalchemy import and_, or_, func, text
 from sqlalchemy.orm import Session
 from app.domain import *
 from .models import *
 
+# Segundos que debe tener un cambio antes de publicarse en el feed de cambios
+FEED_SETTLE_SECONDS = 5
+
 
 def alumno_model_to_domain(model: AlumnoModel) -> Alumno:
     return Alumno(
@@ -188,6 +193,19 @@ class SqlAlchemyRelacionPadreAlumnoRepository(RelacionPadreAlumnoRepository):
         ).all()
         return [relacion_model_to_domain(m) for m in models]
     
+    def find_padres_by_alumnos(self, alumno_ids: List[str]) -> List[Tuple[RelacionPadreAlumno, Padre]]:
+        """Relaciones activas y sus padres para un lote de alumnos (una sola consulta con JOIN)"""
+        if not alumno_ids:
+            return []
+        rows = self.session.query(RelacionPadreAlumnoModel, PadreModel).join(
+            PadreModel, PadreModel.id == RelacionPadreAlumnoModel.padre_id
+        ).filter(
+            RelacionPadreAlumnoModel.alumno_id.in_(alumno_ids),
+            RelacionPadreAlumnoModel.is_deleted == False,
+            PadreModel.is_deleted == False,
+        ).all()
+        return [(relacion_model_to_domain(r), padre_model_to_domain(p)) for r, p in rows]
+    
     def find_by_padre_and_alumno_including_deleted(self, padre_id: str, alumno_id: str) -> Optional[RelacionPadreAlumno]:
         """Busca una relación específica entre padre y alumno, incluyendo las eliminadas (soft deleted)"""
         model = self.session.query(RelacionPadreAlumnoModel).filter(
@@ -251,6 +269,35 @@ class SqlAlchemyMatriculaClaseRepository(MatriculaClaseRepository):
         ).all()
         return [matricula_model_to_domain(m) for m in models]
     
+    def find_by_ids(self, matricula_ids: List[str]) -> List[MatriculaClase]:
+        """Resuelve un lote de matrículas con una sola consulta IN (...)"""
+        if not matricula_ids:
+            return []
+        models = self.session.query(MatriculaClaseModel).filter(
+            MatriculaClaseModel.id.in_(matricula_ids),
+            MatriculaClaseModel.is_deleted == False
+        ).all()
+        return [matricula_model_to_domain(m) for m in models]
+    
+    def find_cambios(self, desde: Optional[datetime], desde_id: Optional[str], limit: int = 500) -> List[MatriculaClase]:
+        """
+        Feed de cambios ordenado por (updated_at, id), incluye bajas lógicas.
+        Paginación keyset: devuelve las matrículas posteriores a (desde, desde_id).
+        """
+        query = self.session.query(MatriculaClaseModel).filter(
+            # Solo cambios asentados: una transacción aún abierta no debe quedar detrás de la marca de agua
+            MatriculaClaseModel.updated_at < func.date_sub(func.now(), text(f"INTERVAL {FEED_SETTLE_SECONDS} SECOND"))
+        )
+        if desde is not None:
+            query = query.filter(or_(
+                MatriculaClaseModel.updated_at > desde,
+                and_(MatriculaClaseModel.updated_at == desde, MatriculaClaseModel.id > (desde_id or ""))
+            ))
+        models = query.order_by(
+            MatriculaClaseModel.updated_at.asc(), MatriculaClaseModel.id.asc()
+        ).limit(limit).all()
+        return [matricula_model_to_domain(m) for m in models]
+    
     def find_all(self, alumno_id: Optional[str] = None, clase_id: Optional[str] = None,
                  offset: int = 0, limit: int = 20) -> List[MatriculaClase]:
         query = self.session.query(MatriculaClaseModel).filter(
@@ -1,6 +1,8 @@
 # Personas Service - HTTP Dependencies
 from functools import lru_cache
+from typing import AsyncGenerator
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
 from shared.common import get_settings as get_common_settings, Settings
 from app.infrastructure.db.repositories import *
@@ -11,6 +13,7 @@ from app.application.use_cases.matricular_alumno import MatricularAlumnoUseCase
 
 
 _session_factory = None
+_async_session_factory = None
 
 
 def set_session_factory(factory):
@@ -28,6 +31,19 @@ def get_db() -> Session:
         db.close()
 
 
+def set_async_session_factory(factory):
+    global _async_session_factory
+    _async_session_factory = factory
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Sesión async: las consultas no bloquean el event loop mientras esperan a MySQL"""
+    if _async_session_factory is None:
+        raise RuntimeError("Async session factory not initialized")
+    async with _async_session_factory() as db:
+        yield db
+
+
 @lru_cache()
 def get_settings() -> Settings:
     return get_common_settings()
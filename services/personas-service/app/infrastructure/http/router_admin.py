@@ -3,14 +3,26 @@ from fastapi import APIRouter, Depends, Header, status, Query
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional
-from datetime import date
+from datetime import date, datetime
 from sqlalchemy.orm import Session
-from shared.common import DomainException, extract_bearer_token, decode_jwt_token
+from shared.common import DomainException, UnauthorizedException, ForbiddenException, extract_bearer_token, decode_jwt_token, authenticate, ROL_SERVICIO, listar_auditoria, MAX_AUDITORIA_LIMIT
 from app.infrastructure.http.dependencies import *
+from app.infrastructure.db.async_repositories import AsyncSqlAlchemyAlumnoRepository, AsyncSqlAlchemyMatriculaClaseRepository
+from app.domain import analizar_busqueda
 
 
 router = APIRouter(prefix="/v1", tags=["personas"])
 
+# Límite de IDs por llamada bulk (los clientes trocean listas más grandes)
+MAX_BULK_IDS = 1000
+
+
+def _requerir_servicio_o_admin(authorization: Optional[str], settings) -> None:
+    """Endpoints internos con datos personales: solo tokens de servicio (rol SERVICE) o ADMIN"""
+    principal = authenticate(authorization, settings)
+    if principal.rol not in ["ADMIN", ROL_SERVICIO]:
+        raise ForbiddenException("Solo servicios internos o ADMIN pueden usar este endpoint", code="Forbidden")
+
 
 # Request Models
 class CreateAlumnoRequest(BaseModel):
@@ -126,34 +138,11 @@ async def list_alumnos(
     search: Optional[str] = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    from app.infrastructure.db.models import AlumnoModel
-    from sqlalchemy import func, or_
-
-    # Construir query base
-    query = db.query(AlumnoModel).filter(AlumnoModel.is_deleted == False)
-
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                AlumnoModel.nombres.like(search_term),
-                AlumnoModel.apellido_paterno.like(search_term),
-                AlumnoModel.apellido_materno.like(search_term),
-                AlumnoModel.codigo_alumno.like(search_term),
-                AlumnoModel.dni.like(search_term)
-            )
-        )
-
-    # Calcular total
-    try:
-        total_count = query.with_entities(func.count(AlumnoModel.id)).scalar() or 0
-    except Exception:
-        total_count = len(query.all())
-
-    # Paginación
-    alumnos = query.offset(offset).limit(limit).all()
+    # Búsqueda indexada (prefijo de DNI/código o FULLTEXT); más relevantes primero
+    repo = AsyncSqlAlchemyAlumnoRepository(db)
+    alumnos, total_count = await repo.buscar(analizar_busqueda(search), offset=offset, limit=limit)
 
     return {
         "alumnos": [
@@ -174,7 +163,7 @@ async def list_alumnos(
                 "status": a.status,
             } for a in alumnos
         ],
-        "total": int(total_count),
+        "total": total_count,
     }
 
 
@@ -640,43 +629,18 @@ async def list_matriculas(
     search: Optional[str] = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    from app.infrastructure.db.models import MatriculaClaseModel, AlumnoModel
-    from sqlalchemy import func, or_
-
-    # Construir query base para poder calcular total y luego aplicar offset/limit
-    query = db.query(MatriculaClaseModel).filter(MatriculaClaseModel.is_deleted == False)
-    
-    if search:
-        # Join con AlumnoModel para buscar por nombre/código
-        query = query.join(AlumnoModel, MatriculaClaseModel.alumno_id == AlumnoModel.id)
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                AlumnoModel.nombres.like(search_term),
-                AlumnoModel.apellido_paterno.like(search_term),
-                AlumnoModel.apellido_materno.like(search_term),
-                AlumnoModel.codigo_alumno.like(search_term)
-            )
-        )
-
-    if alumno_id:
-        query = query.filter(MatriculaClaseModel.alumno_id == alumno_id)
-    if clase_id:
-        query = query.filter(MatriculaClaseModel.clase_id == clase_id)
-    if status:
-        query = query.filter(MatriculaClaseModel.status == status)
-
-    # Calcular total de coincidencias (sin limit/offset)
-    try:
-        total_count = query.with_entities(func.count(MatriculaClaseModel.id)).scalar() or 0
-    except Exception:
-        # Fallback simple si la función count falla por compatibilidad
-        total_count = len(query.all())
-
-    # Obtener los registros paginados
-    models = query.offset(offset).limit(limit).all()
+    # Total de coincidencias (sin limit/offset) y página pedida
+    repo = AsyncSqlAlchemyMatriculaClaseRepository(db)
+    models, total_count = await repo.buscar(
+        alumno_id=alumno_id,
+        clase_id=clase_id,
+        status=status,
+        consulta=analizar_busqueda(search),
+        offset=offset,
+        limit=limit,
+    )
 
     return {
         "matriculas": [
@@ -688,7 +652,7 @@ async def list_matriculas(
                 "status": m.status,
             } for m in models
         ],
-        "total": int(total_count),
+        "total": total_count,
     }
 
 
@@ -813,6 +777,63 @@ async def get_padres_by_alumno(
     return {"relaciones": relaciones_json}
 
 
+class AlumnoIdsRequest(BaseModel):
+    alumno_ids: list[str]
+
+
+@router.post("/relaciones/bulk")
+async def get_padres_by_alumnos_bulk(
+    request: AlumnoIdsRequest,
+    authorization: Optional[str] = Header(None),
+    settings = Depends(get_settings),
+    db: Session = Depends(get_db),
+):
+    """Endpoint usado por Notas Service: padres de un lote de alumnos en una sola consulta"""
+    try:
+        _requerir_servicio_o_admin(authorization, settings)
+        if len(request.alumno_ids) > MAX_BULK_IDS:
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"error": "ValidationError", "message": f"Máximo {MAX_BULK_IDS} alumnos por solicitud"}
+            )
+        
+        from app.infrastructure.db.repositories import SqlAlchemyRelacionPadreAlumnoRepository
+        relacion_repo = SqlAlchemyRelacionPadreAlumnoRepository(db)
+        filas = relacion_repo.find_padres_by_alumnos(list(set(request.alumno_ids)))
+        
+        padres_por_alumno = {}
+        for rel, padre in filas:
+            padres_por_alumno.setdefault(rel.alumno_id, []).append({
+                "id": padre.id,
+                "nombres": padre.nombres,
+                "apellido_paterno": padre.apellido_paterno,
+                "apellido_materno": padre.apellido_materno,
+                "email": padre.email,
+                "celular": padre.celular,
+                "tipo_relacion": rel.tipo_relacion,
+                "es_contacto_principal": rel.es_contacto_principal,
+            })
+        
+        return {"padres_por_alumno": padres_por_alumno}
+    except UnauthorizedException as e:
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"error": e.code, "message": e.message}
+        )
+    except ForbiddenException as e:
+        return JSONResponse(
+            status_code=status.HTTP_403_FORBIDDEN,
+            content={"error": e.code, "message": e.message}
+        )
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"error": "INTERNAL_ERROR", "message": str(e)}
+        )
+
+
 @router.get("/relaciones/padre/{padre_id}")
 async def get_hijos_by_padre(
     padre_id: str,
@@ -843,6 +864,57 @@ async def get_hijos_by_padre(
     return {"hijos": hijos_json}
 
 
+@router.get("/matriculas/cambios")
+async def get_matriculas_cambios(
+    desde: Optional[datetime] = Query(None, description="updated_at del último cambio procesado"),
+    desde_id: Optional[str] = Query(None, description="id del último cambio procesado"),
+    limit: int = Query(500, ge=1, le=MAX_BULK_IDS),
+    authorization: Optional[str] = Header(None),
+    settings = Depends(get_settings),
+    db: Session = Depends(get_db),
+):
+    """
+    Endpoint usado por Notas Service: feed de cambios de matrículas (altas, cambios
+    de estado y bajas lógicas) ordenado por (updated_at, id) para su proyección local.
+    """
+    try:
+        _requerir_servicio_o_admin(authorization, settings)
+        from app.infrastructure.db.repositories import SqlAlchemyMatriculaClaseRepository
+        repo = SqlAlchemyMatriculaClaseRepository(db)
+        matriculas = repo.find_cambios(desde, desde_id, limit)
+        
+        return {
+            "matriculas": [
+                {
+                    "id": m.id,
+                    "alumno_id": m.alumno_id,
+                    "clase_id": m.clase_id,
+                    "status": m.status,
+                    "is_deleted": m.is_deleted,
+                    "updated_at": m.updated_at.isoformat() if m.updated_at else None,
+                } for m in matriculas
+            ],
+            "has_more": len(matriculas) == limit,
+        }
+    except UnauthorizedException as e:
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"error": e.code, "message": e.message}
+        )
+    except ForbiddenException as e:
+        return JSONResponse(
+            status_code=status.HTTP_403_FORBIDDEN,
+            content={"error": e.code, "message": e.message}
+        )
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"error": "INTERNAL_ERROR", "message": str(e)}
+        )
+
+
 @router.get("/matriculas/{matricula_id}")
 async def get_matricula_info(
     matricula_id: str,
@@ -872,7 +944,7 @@ async def get_alumnos_por_clase(
     clase_id: str,
     authorization: Optional[str] = Header(None),
     settings = Depends(get_settings),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Obtener alumnos matriculados en una clase específica"""
     try:
@@ -886,20 +958,8 @@ async def get_alumnos_por_clase(
                 content={"error": "Forbidden", "message": "Solo ADMIN o DOCENTE pueden ver alumnos"}
             )
         
-        from app.infrastructure.db.models import AlumnoModel, MatriculaClaseModel
-        # Query para obtener alumnos matriculados en la clase específica
-        query = db.query(AlumnoModel).join(
-            MatriculaClaseModel,
-            AlumnoModel.id == MatriculaClaseModel.alumno_id
-        ).filter(
-            MatriculaClaseModel.clase_id == clase_id,
-            MatriculaClaseModel.status == 'ACTIVO',
-            MatriculaClaseModel.is_deleted == False,
-            AlumnoModel.status == 'ACTIVO',
-            AlumnoModel.is_deleted == False
-        )
-        
-        alumnos_matriculados = query.all()
+        # Alumnos activos con matrícula activa en la clase
+        alumnos_matriculados = await AsyncSqlAlchemyAlumnoRepository(db).find_activos_by_clase(clase_id)
         
         return {
             "alumnos": [
@@ -931,32 +991,12 @@ class ClaseIdsRequest(BaseModel):
 @router.post("/matriculas/counts")
 async def get_matriculas_counts(
     request: ClaseIdsRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Obtener conteo de alumnos matriculados para una lista de clases"""
     try:
-        from app.infrastructure.db.models import MatriculaClaseModel
-        from sqlalchemy import func
-        
-        if not request.clase_ids:
-            return {}
-
-        # Query para contar matrículas activas por clase
-        results = db.query(
-            MatriculaClaseModel.clase_id,
-            func.count(MatriculaClaseModel.id)
-        ).filter(
-            MatriculaClaseModel.clase_id.in_(request.clase_ids),
-            MatriculaClaseModel.status == 'ACTIVO',
-            MatriculaClaseModel.is_deleted == False
-        ).group_by(
-            MatriculaClaseModel.clase_id
-        ).all()
-        
-        # Convertir a diccionario {clase_id: count}
-        counts = {r[0]: r[1] for r in results}
-        
-        return counts
+        # {clase_id: matrículas activas}
+        return await AsyncSqlAlchemyMatriculaClaseRepository(db).contar_activas_por_clase(request.clase_ids)
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -964,3 +1004,104 @@ async def get_matriculas_counts(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"error": "INTERNAL_ERROR", "message": str(e)}
         )
+
+
+class MatriculaIdsRequest(BaseModel):
+    matricula_ids: list[str]
+
+
+@router.post("/matriculas/bulk")
+async def get_matriculas_bulk(
+    request: MatriculaIdsRequest,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Endpoint usado por Notas Service: resuelve un lote de matrículas en una sola consulta"""
+    try:
+        if len(request.matricula_ids) > MAX_BULK_IDS:
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"error": "ValidationError", "message": f"Máximo {MAX_BULK_IDS} matrículas por solicitud"}
+            )
+        
+        repo = AsyncSqlAlchemyMatriculaClaseRepository(db)
+        matriculas = await repo.find_by_ids(list(set(request.matricula_ids)))
+        
+        return {
+            "matriculas": [
+                {
+                    "id": m.id,
+                    "alumno_id": m.alumno_id,
+                    "clase_id": m.clase_id,
+                    "status": m.status,
+                } for m in matriculas
+            ]
+        }
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"error": "INTERNAL_ERROR", "message": str(e)}
+        )
+
+
+@router.get("/auditoria")
+async def list_auditoria(
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    limit: int = Query(50, ge=1, le=MAX_AUDITORIA_LIMIT),
+    desde: Optional[datetime] = Query(None, description="created_at mínimo (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="created_at máximo (exclusivo)"),
+    user_id: Optional[str] = Query(None),
+    entidad: Optional[str] = Query(None),
+    entidad_id: Optional[str] = Query(None),
+    accion: Optional[str] = Query(None),
+    exitoso: Optional[bool] = Query(None),
+    authorization: Optional[str] = Header(None),
+    settings = Depends(get_settings),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Auditoría de Personas Service (solo ADMIN), paginada por cursor sobre (created_at, id)"""
+    try:
+        token = extract_bearer_token(authorization)
+        payload = decode_jwt_token(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
+        if payload.get("rol_nombre") != "ADMIN":
+            return JSONResponse(
+                status_code=status.HTTP_403_FORBIDDEN,
+                content={"error": "Forbidden", "message": "Solo ADMIN puede consultar la auditoría"}
+            )
+
+        return await listar_auditoria(
+            db,
+            limit=limit,
+            cursor=cursor,
+            desde=desde,
+            hasta=hasta,
+            user_id=user_id,
+            entidad=entidad,
+            entidad_id=entidad_id,
+            accion=accion,
+            exitoso=exitoso,
+        )
+    except UnauthorizedException as e:
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"error": e.code, "message": e.message}
+        )
+    except ForbiddenException as e:
+        return JSONResponse(
+            status_code=status.HTTP_403_FORBIDDEN,
+            content={"error": e.code, "message": e.message}
+        )
+    except DomainException as e:
+        # Cursor o filtros inválidos
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": e.code, "message": e.message}
+        )
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"error": "InternalError", "message": str(e)}
+        )
@@ -2,7 +2,7 @@
 from fastapi import APIRouter, Depends, Header, status
 from fastapi.responses import JSONResponse
 from typing import Optional
-from shared.common import DomainException, extract_bearer_token, decode_jwt_token
+from shared.common import DomainException, extract_bearer_token, decode_jwt_token, get_http_client
 from app.infrastructure.http.dependencies import get_settings
 from sqlalchemy.orm import Session
 from app.infrastructure.http.dependencies import get_db
@@ -32,18 +32,17 @@ async def get_alumnos_por_clase(
             )
         
         # Verificar que la clase pertenece al docente (llamada al servicio académico)
-        import httpx
-        async with httpx.AsyncClient() as client:
-            headers = {"Authorization": authorization} if authorization else {}
-            academico_url = f"http://localhost:8002/v1/docente/clases/{clase_id}/verificar"
+        client = get_http_client()
+        headers = {"Authorization": authorization} if authorization else {}
+        academico_url = f"http://localhost:8002/v1/docente/clases/{clase_id}/verificar"
             
-            verification_response = await client.get(academico_url, headers=headers)
+        verification_response = await client.get(academico_url, headers=headers)
             
-            if verification_response.status_code != 200:
-                return JSONResponse(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    content={"error": "Forbidden", "message": "No tienes acceso a esta clase"}
-                )
+        if verification_response.status_code != 200:
+            return JSONResponse(
+                status_code=status.HTTP_403_FORBIDDEN,
+                content={"error": "Forbidden", "message": "No tienes acceso a esta clase"}
+            )
         
         # Obtener alumnos matriculados en la clase
         from app.infrastructure.db.models import AlumnoModel, MatriculaClaseModel
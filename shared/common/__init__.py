@@ -1,6 +1,10 @@
 # Shared Common Package
 from .config import Settings, get_settings
-from .database import Base, create_db_engine, create_session_factory, get_db_session
+from .database import (
+    Base, create_db_engine, create_session_factory, get_db_session,
+    create_async_db_engine, create_async_session_factory, get_async_db_session,
+)
+from .db_metrics import render_pool_metrics
 from .exceptions import (
     DomainException,
     NotFoundException,
@@ -9,12 +13,28 @@ from .exceptions import (
     UnauthorizedException,
     ForbiddenException,
     BusinessRuleException,
+    TooManyRequestsException,
+)
+from .jwt_utils import (
+    create_jwt_token, decode_jwt_token, extract_bearer_token,
+    Principal, TokenVerifier, init_token_verifier, get_token_verifier, verify_token, authenticate,
+    ROL_SERVICIO, create_service_token, get_service_token,
+)
+from .password_utils import (
+    hash_password, verify_password, validate_password_strength,
+    PasswordHasherPool, init_password_pool, get_password_pool, close_password_pool,
+)
+from .utils import (
+    generate_uuid, current_timestamp, to_dict, paginate_query, encode_keyset_cursor, decode_keyset_cursor,
 )
-from .jwt_utils import create_jwt_token, decode_jwt_token, extract_bearer_token
-from .password_utils import hash_password, verify_password, validate_password_strength
-from .utils import generate_uuid, current_timestamp, to_dict, paginate_query
 from .audit import AuditoriaLog, AccionAuditoria
 from .audit_helper import AuditHelper
+from .audit_sink import AuditSink, init_audit_sink, get_audit_sink, close_audit_sink
+from .audit_query import listar_auditoria, encode_audit_cursor, decode_audit_cursor, MAX_AUDITORIA_LIMIT
+from .revocation import (
+    BloomFilter, RevocationSet, RevocationPoller, init_revocaciones, get_revocation_set, close_revocaciones,
+)
+from .http_client import create_http_client, init_http_client, get_http_client, close_http_client
 
 __all__ = [
     # Config
@@ -25,6 +45,10 @@ __all__ = [
     "create_db_engine",
     "create_session_factory",
     "get_db_session",
+    "create_async_db_engine",
+    "create_async_session_factory",
+    "get_async_db_session",
+    "render_pool_metrics",
     # Exceptions
     "DomainException",
     "NotFoundException",
@@ -33,21 +57,57 @@ __all__ = [
     "UnauthorizedException",
     "ForbiddenException",
     "BusinessRuleException",
+    "TooManyRequestsException",
     # JWT
     "create_jwt_token",
     "decode_jwt_token",
     "extract_bearer_token",
+    "Principal",
+    "TokenVerifier",
+    "init_token_verifier",
+    "get_token_verifier",
+    "verify_token",
+    "authenticate",
+    "ROL_SERVICIO",
+    "create_service_token",
+    "get_service_token",
     # Password
     "hash_password",
     "verify_password",
     "validate_password_strength",
+    "PasswordHasherPool",
+    "init_password_pool",
+    "get_password_pool",
+    "close_password_pool",
     # Utils
     "generate_uuid",
     "current_timestamp",
     "to_dict",
     "paginate_query",
+    "encode_keyset_cursor",
+    "decode_keyset_cursor",
     # Audit
     "AuditoriaLog",
     "AccionAuditoria",
     "AuditHelper",
+    "AuditSink",
+    "init_audit_sink",
+    "get_audit_sink",
+    "close_audit_sink",
+    "listar_auditoria",
+    "encode_audit_cursor",
+    "decode_audit_cursor",
+    "MAX_AUDITORIA_LIMIT",
+    # Revocación de sesiones
+    "BloomFilter",
+    "RevocationSet",
+    "RevocationPoller",
+    "init_revocaciones",
+    "get_revocation_set",
+    "close_revocaciones",
+    # HTTP Client
+    "create_http_client",
+    "init_http_client",
+    "get_http_client",
+    "close_http_client",
 ]
@@ -10,6 +10,7 @@ class AccionAuditoria(str, Enum):
     LOGIN = "LOGIN"
     LOGOUT = "LOGOUT"
     LOGIN_FAILED = "LOGIN_FAILED"
+    REVOKE_SESSIONS = "REVOKE_SESSIONS"
     
     # Gestión de Usuarios
     REGISTER = "REGISTER"
@@ -1,13 +1,105 @@
 # Shared Common - Audit Helper
-from typing import Optional, Dict, Any
+import json
+from typing import Optional, Dict, Any, List
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from .audit import AuditoriaLog, AccionAuditoria
+from .audit_sink import get_audit_sink
 from .utils import generate_uuid
 from datetime import datetime
 
 
+_INSERT_AUDITORIA_SQL = text("""
+INSERT INTO auditoria_logs (
+    id, user_id, username, rol_nombre, accion, entidad, entidad_id,
+    descripcion, datos_anteriores, datos_nuevos, ip_address, user_agent,
+    endpoint, metodo_http, exitoso, codigo_respuesta, mensaje_error, created_at
+) VALUES (
+    :id, :user_id, :username, :rol_nombre, :accion, :entidad, :entidad_id,
+    :descripcion, :datos_anteriores, :datos_nuevos, :ip_address, :user_agent,
+    :endpoint, :metodo_http, :exitoso, :codigo_respuesta, :mensaje_error, :created_at
+)
+""")
+
+
+def _log_params(log: AuditoriaLog) -> Dict[str, Any]:
+    """Parámetros de inserción para un AuditoriaLog"""
+    return {
+        "id": log.id,
+        "user_id": log.user_id,
+        "username": log.username,
+        "rol_nombre": log.rol_nombre,
+        "accion": log.accion,
+        "entidad": log.entidad,
+        "entidad_id": log.entidad_id,
+        "descripcion": log.descripcion,
+        "datos_anteriores": json.dumps(log.datos_anteriores) if log.datos_anteriores else None,
+        "datos_nuevos": json.dumps(log.datos_nuevos) if log.datos_nuevos else None,
+        "ip_address": log.ip_address,
+        "user_agent": log.user_agent,
+        "endpoint": log.endpoint,
+        "metodo_http": log.metodo_http,
+        "exitoso": log.exitoso,
+        "codigo_respuesta": log.codigo_respuesta,
+        "mensaje_error": log.mensaje_error,
+        "created_at": log.created_at,
+    }
+
+
+def _build_log(
+    user_id: Optional[str],
+    username: Optional[str],
+    rol_nombre: Optional[str],
+    accion: AccionAuditoria,
+    entidad: str,
+    entidad_id: Optional[str] = None,
+    descripcion: Optional[str] = None,
+    datos_anteriores: Optional[Dict[str, Any]] = None,
+    datos_nuevos: Optional[Dict[str, Any]] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+    endpoint: Optional[str] = None,
+    metodo_http: Optional[str] = None,
+    exitoso: bool = True,
+    codigo_respuesta: Optional[int] = None,
+    mensaje_error: Optional[str] = None,
+) -> AuditoriaLog:
+    return AuditoriaLog(
+        id=generate_uuid(),
+        user_id=user_id,
+        username=username,
+        rol_nombre=rol_nombre,
+        accion=accion.value if isinstance(accion, AccionAuditoria) else accion,
+        entidad=entidad,
+        entidad_id=entidad_id,
+        descripcion=descripcion,
+        datos_anteriores=datos_anteriores,
+        datos_nuevos=datos_nuevos,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        endpoint=endpoint,
+        metodo_http=metodo_http,
+        exitoso=exitoso,
+        codigo_respuesta=codigo_respuesta,
+        mensaje_error=mensaje_error,
+        created_at=datetime.utcnow(),
+    )
+
+
+def _encolar(logs: List[AuditoriaLog]) -> bool:
+    """Entrega los registros al AuditSink del proceso; False si no hay sink o la cola está llena"""
+    sink = get_audit_sink()
+    return sink is not None and sink.enqueue(logs)
+
+
 class AuditHelper:
-    """Helper para facilitar el registro de auditoría"""
+    """
+    Helper para facilitar el registro de auditoría.
+    
+    Con el AuditSink del servicio activo los registros se encolan y se escriben por
+    lotes en segundo plano; sin sink (scripts, tests) o con la cola llena se
+    insertan en la sesión del llamador.
+    """
     
     @staticmethod
     def log_action(
@@ -33,7 +125,7 @@ class AuditHelper:
         Registra una acción en la tabla de auditoría
         
         Args:
-            session: Sesión de SQLAlchemy
+            session: Sesión de SQLAlchemy (solo se usa si no hay AuditSink disponible)
             user_id: ID del usuario que realiza la acción
             username: Nombre de usuario
             rol_nombre: Rol del usuario
@@ -54,16 +146,11 @@ class AuditHelper:
         Returns:
             AuditoriaLog creado
         """
-        from .database import Base
-        
-        # Crear modelo SQLAlchemy dinámicamente
-        # Nota: Esto asume que cada servicio tiene su tabla auditoria_logs
-        log = AuditoriaLog(
-            id=generate_uuid(),
+        log = _build_log(
             user_id=user_id,
             username=username,
             rol_nombre=rol_nombre,
-            accion=accion.value if isinstance(accion, AccionAuditoria) else accion,
+            accion=accion,
             entidad=entidad,
             entidad_id=entidad_id,
             descripcion=descripcion,
@@ -76,50 +163,44 @@ class AuditHelper:
             exitoso=exitoso,
             codigo_respuesta=codigo_respuesta,
             mensaje_error=mensaje_error,
-            created_at=datetime.utcnow(),
         )
         
+        if _encolar([log]):
+            return log
+        
         # Insertar en BD usando SQL directo para evitar problemas de modelo
-        import json
+        session.execute(_INSERT_AUDITORIA_SQL, _log_params(log))
+        session.commit()
         
-        sql = """
-        INSERT INTO auditoria_logs (
-            id, user_id, username, rol_nombre, accion, entidad, entidad_id,
-            descripcion, datos_anteriores, datos_nuevos, ip_address, user_agent,
-            endpoint, metodo_http, exitoso, codigo_respuesta, mensaje_error, created_at
-        ) VALUES (
-            :id, :user_id, :username, :rol_nombre, :accion, :entidad, :entidad_id,
-            :descripcion, :datos_anteriores, :datos_nuevos, :ip_address, :user_agent,
-            :endpoint, :metodo_http, :exitoso, :codigo_respuesta, :mensaje_error, :created_at
-        )
+        return log
+    
+    @staticmethod
+    def log_actions(
+        session: Session,
+        acciones: List[Dict[str, Any]],
+        commit: bool = True,
+    ) -> List[AuditoriaLog]:
         """
+        Registra varias acciones con un único INSERT por lote (executemany,
+        que PyMySQL agrupa en un INSERT multi-fila), o las encola en el AuditSink.
         
-        session.execute(
-            sql,
-            {
-                "id": log.id,
-                "user_id": log.user_id,
-                "username": log.username,
-                "rol_nombre": log.rol_nombre,
-                "accion": log.accion,
-                "entidad": log.entidad,
-                "entidad_id": log.entidad_id,
-                "descripcion": log.descripcion,
-                "datos_anteriores": json.dumps(log.datos_anteriores) if log.datos_anteriores else None,
-                "datos_nuevos": json.dumps(log.datos_nuevos) if log.datos_nuevos else None,
-                "ip_address": log.ip_address,
-                "user_agent": log.user_agent,
-                "endpoint": log.endpoint,
-                "metodo_http": log.metodo_http,
-                "exitoso": log.exitoso,
-                "codigo_respuesta": log.codigo_respuesta,
-                "mensaje_error": log.mensaje_error,
-                "created_at": log.created_at,
-            }
-        )
-        session.commit()
+        Args:
+            session: Sesión de SQLAlchemy
+            acciones: Lista de dicts con los mismos argumentos que log_action (sin session)
+            commit: Si se confirma la transacción al terminar
+            
+        Returns:
+            Lista de AuditoriaLog creados
+        """
+        logs = [_build_log(**accion) for accion in acciones]
+        if not logs or _encolar(logs):
+            return logs
         
-        return log
+        session.execute(_INSERT_AUDITORIA_SQL, [_log_params(log) for log in logs])
+        if commit:
+            session.commit()
+        
+        return logs
     
     @staticmethod
     def log_login(
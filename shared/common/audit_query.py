@@ -0,0 +1,111 @@
+# Shared Common - Consulta paginada de auditoría
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import DateTime, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from .utils import encode_keyset_cursor, decode_keyset_cursor
+
+# Máximo de registros por página de GET /v1/auditoria
+MAX_AUDITORIA_LIMIT = 500
+
+_COLUMNAS_AUDITORIA = """
+    id, user_id, username, rol_nombre, accion, entidad, entidad_id, descripcion,
+    datos_anteriores, datos_nuevos, ip_address, user_agent, endpoint, metodo_http,
+    exitoso, codigo_respuesta, mensaje_error, created_at
+"""
+
+
+def encode_audit_cursor(created_at: datetime, log_id: str) -> str:
+    """Cursor opaco con la posición (created_at, id) del último registro devuelto"""
+    return encode_keyset_cursor(created_at, log_id)
+
+
+def decode_audit_cursor(cursor: str) -> Tuple[datetime, str]:
+    return decode_keyset_cursor(cursor, "Cursor de auditoría inválido")
+
+
+def _json(valor: Any) -> Any:
+    if isinstance(valor, (str, bytes)):
+        try:
+            return json.loads(valor)
+        except ValueError:
+            return valor
+    return valor
+
+
+async def listar_auditoria(
+    db: AsyncSession,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    user_id: Optional[str] = None,
+    entidad: Optional[str] = None,
+    entidad_id: Optional[str] = None,
+    accion: Optional[str] = None,
+    exitoso: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """
+    Página de auditoria_logs del servicio, de la más reciente a la más antigua.
+
+    Paginación keyset sobre (created_at, id): cada página sigue al cursor de la
+    anterior con un rango sobre idx_created_at_id, sin OFFSET, así que la página 1000
+    cuesta lo mismo que la primera. Con desde/hasta MySQL además descarta las
+    particiones mensuales fuera del rango.
+    """
+    limit = max(1, min(limit, MAX_AUDITORIA_LIMIT))
+    condiciones = []
+    params: Dict[str, Any] = {"limit": limit + 1}
+
+    if cursor:
+        cursor_created_at, cursor_id = decode_audit_cursor(cursor)
+        condiciones.append(
+            "(created_at < :cursor_created_at OR (created_at = :cursor_created_at AND id < :cursor_id))"
+        )
+        params["cursor_created_at"] = cursor_created_at
+        params["cursor_id"] = cursor_id
+    if desde is not None:
+        condiciones.append("created_at >= :desde")
+        params["desde"] = desde
+    if hasta is not None:
+        condiciones.append("created_at < :hasta")
+        params["hasta"] = hasta
+    for columna, valor in (
+        ("user_id", user_id),
+        ("entidad", entidad),
+        ("entidad_id", entidad_id),
+        ("accion", accion),
+        ("exitoso", exitoso),
+    ):
+        if valor is not None:
+            condiciones.append(f"{columna} = :{columna}")
+            params[columna] = valor
+
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    sql = text(f"""
+        SELECT {_COLUMNAS_AUDITORIA}
+        FROM auditoria_logs
+        {where}
+        ORDER BY created_at DESC, id DESC
+        LIMIT :limit
+    """).columns(created_at=DateTime)
+    filas = (await db.execute(sql, params)).mappings().all()
+
+    has_more = len(filas) > limit
+    filas = filas[:limit]
+    items = []
+    for fila in filas:
+        item = dict(fila)
+        item["datos_anteriores"] = _json(item["datos_anteriores"])
+        item["datos_nuevos"] = _json(item["datos_nuevos"])
+        item["exitoso"] = bool(item["exitoso"])
+        item["created_at"] = item["created_at"].isoformat() if item["created_at"] else None
+        items.append(item)
+
+    next_cursor = None
+    if has_more:
+        ultima = filas[-1]
+        next_cursor = encode_audit_cursor(ultima["created_at"], ultima["id"])
+
+    return {"items": items, "next_cursor": next_cursor, "has_more": has_more}
@@ -0,0 +1,162 @@
+# Shared Common - Escritura de auditoría por lotes
+import asyncio
+import threading
+import traceback
+from collections import deque
+from typing import Deque, List, Optional
+from .audit import AuditoriaLog
+
+
+class AuditSink:
+    """
+    Cola en memoria de AuditoriaLog que se vuelca a auditoria_logs en segundo plano.
+
+    - enqueue() no toca la BD: la petición no paga un INSERT + COMMIT por auditoría
+    - Un task vacía la cola cada flush_interval_seconds, o antes si se juntan batch_size
+      registros, con un INSERT multi-fila por lote en su propia sesión
+    - La cola es acotada (max_queue): si está llena enqueue() devuelve False y
+      AuditHelper escribe el registro en la sesión del llamador, como antes
+    - stop() vuelca lo pendiente antes de cerrar el servicio
+
+    enqueue() puede llamarse desde el event loop o desde threads (asyncio.to_thread).
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        batch_size: int = 500,
+        flush_interval_seconds: float = 1.0,
+        max_queue: int = 10000,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_queue = max_queue
+        self._cola: Deque[AuditoriaLog] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._despertar: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.escritos = 0
+        self.rechazados = 0  # Cola llena: se escribieron en la sesión del llamador
+        self.errores = 0
+
+    @property
+    def activo(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pendientes(self) -> int:
+        return len(self._cola)
+
+    def enqueue(self, logs: List[AuditoriaLog]) -> bool:
+        """Encola los registros; False (sin encolar ninguno) si no caben o el sink no corre"""
+        if not self.activo:
+            return False
+        with self._lock:
+            if len(self._cola) + len(logs) > self.max_queue:
+                self.rechazados += len(logs)
+                return False
+            self._cola.extend(logs)
+            lleno = len(self._cola) >= self.batch_size
+        if lleno:
+            self._avisar()
+        return True
+
+    def _avisar(self) -> None:
+        try:
+            if asyncio.get_running_loop() is self._loop:
+                self._despertar.set()
+                return
+        except RuntimeError:
+            pass  # Llamado desde otro thread
+        self._loop.call_soon_threadsafe(self._despertar.set)
+
+    def start(self) -> None:
+        if self.activo:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._despertar = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="audit-sink")
+
+    async def stop(self) -> None:
+        """Detiene el task y vuelca todo lo pendiente"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._cola:
+            if not await asyncio.to_thread(self.flush):
+                print(f"[audit-sink] {len(self._cola)} registros de auditoría sin escribir al cerrar")
+                break
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._despertar.wait(), timeout=self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._despertar.clear()
+            while self._cola:
+                if not await asyncio.to_thread(self.flush) or len(self._cola) < self.batch_size:
+                    break
+
+    def flush(self) -> bool:
+        """Escribe un lote; si falla lo devuelve a la cola para el siguiente intento"""
+        from .audit_helper import _INSERT_AUDITORIA_SQL, _log_params
+
+        with self._flush_lock:
+            with self._lock:
+                lote = [self._cola.popleft() for _ in range(min(self.batch_size, len(self._cola)))]
+            if not lote:
+                return True
+            db = self.session_factory()
+            try:
+                db.execute(_INSERT_AUDITORIA_SQL, [_log_params(log) for log in lote])
+                db.commit()
+                self.escritos += len(lote)
+                return True
+            except Exception:
+                db.rollback()
+                self.errores += 1
+                print(f"[audit-sink] Error escribiendo {len(lote)} registros de auditoría")
+                traceback.print_exc()
+                with self._lock:
+                    self._cola.extendleft(reversed(lote))
+                return False
+            finally:
+                db.close()
+
+
+_audit_sink: Optional[AuditSink] = None
+
+
+def init_audit_sink(session_factory, settings) -> Optional[AuditSink]:
+    """Crea y arranca el sink del proceso (debe llamarse dentro del event loop)"""
+    global _audit_sink
+    if not settings.AUDIT_SINK_ENABLED:
+        _audit_sink = None
+        return None
+    _audit_sink = AuditSink(
+        session_factory,
+        batch_size=settings.AUDIT_SINK_BATCH_SIZE,
+        flush_interval_seconds=settings.AUDIT_SINK_FLUSH_INTERVAL_SECONDS,
+        max_queue=settings.AUDIT_SINK_MAX_QUEUE,
+    )
+    _audit_sink.start()
+    return _audit_sink
+
+
+def get_audit_sink() -> Optional[AuditSink]:
+    return _audit_sink
+
+
+async def close_audit_sink() -> None:
+    global _audit_sink
+    if _audit_sink is not None:
+        await _audit_sink.stop()
+        _audit_sink = None
@@ -16,10 +16,34 @@ class Settings(BaseSettings):
     DB_PASSWORD: str
     DB_NAME: str
     
+    # Pool de conexiones por proceso (uvicorn worker). Con N workers y R réplicas MySQL
+    # ve hasta N × R × (DB_POOL_SIZE + DB_MAX_OVERFLOW) conexiones por engine.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # Segundos esperando una conexión libre antes de fallar
+    DB_POOL_RECYCLE: int = 3600
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_USE_LIFO: bool = False  # LIFO deja enfriar las conexiones sobrantes y que el recycle las cierre
+    # Pool del engine async; si no se definen se usan los valores del sync
+    DB_ASYNC_POOL_SIZE: Optional[int] = None
+    DB_ASYNC_MAX_OVERFLOW: Optional[int] = None
+    
     # JWT
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_MINUTES: int = 1440  # 24 horas
+    JWT_VERIFY_CACHE_SIZE: int = 10000  # Tokens verificados que guarda cada proceso (LRU)
+    
+    # Hash/verificación de contraseñas (bcrypt) en un pool acotado fuera del event loop
+    PASSWORD_POOL_WORKERS: Optional[int] = None  # None: un thread por core
+    PASSWORD_POOL_MAX_PENDING: int = 64  # En cola además de los que corren; el resto recibe 429
+    PASSWORD_POOL_RETRY_AFTER_SECONDS: int = 1
+    
+    # Revocación de sesiones: cada servicio sigue el feed de JTIs revocados de IAM
+    REVOCATION_ENABLED: bool = True
+    REVOCATION_POLL_INTERVAL_SECONDS: float = 5.0
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+    REVOCATION_BLOOM_FP_RATE: float = 0.001
     
     # Application
     APP_NAME: str
@@ -39,6 +63,72 @@ class Settings(BaseSettings):
     IAM_SERVICE_URL: Optional[str] = None
     NOTAS_SERVICE_URL: Optional[str] = None
     
+    # Auditoría por lotes (AuditSink): cola en memoria volcada en segundo plano
+    AUDIT_SINK_ENABLED: bool = True
+    AUDIT_SINK_BATCH_SIZE: int = 500
+    AUDIT_SINK_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_SINK_MAX_QUEUE: int = 10000
+    
+    # HTTP Client compartido (llamadas entre servicios)
+    HTTP_CLIENT_TIMEOUT: float = 10.0
+    HTTP_CLIENT_CONNECT_TIMEOUT: float = 3.0
+    HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST: int = 50
+    HTTP_CLIENT_MAX_KEEPALIVE_PER_HOST: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CLIENT_HTTP2: bool = True  # Solo con URLs https:// (ALPN); por http:// se usa HTTP/1.1
+    
+    # Notas: proyección local de matrículas/clases (feed de cambios de Personas y Académico)
+    PROYECCION_SYNC_ENABLED: bool = True
+    PROYECCION_SYNC_INTERVAL_SECONDS: int = 30
+    
+    # Notas: Idempotency-Key en registro de notas por lote
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_WAIT_TIMEOUT_SECONDS: float = 30.0
+    IDEMPOTENCY_STALE_SECONDS: int = 120
+    IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS: int = 600
+    
+    # Notas: consumidor de eventos NOTA_REGISTRADA (alertas por nota baja)
+    EVENTOS_CONSUMER_ENABLED: bool = True
+    EVENTOS_POLL_INTERVAL_SECONDS: float = 1.0
+    EVENTOS_BATCH_SIZE: int = 200
+    EVENTOS_MAX_INTENTOS: int = 10
+    EVENTOS_BACKOFF_BASE_SECONDS: int = 5
+    EVENTOS_BACKOFF_MAX_SECONDS: int = 600
+    EVENTOS_STALE_SECONDS: int = 120
+    
+    # Notas: caché en memoria de umbrales de alerta (Académico avisa de cada cambio)
+    UMBRAL_CACHE_TTL_SECONDS: int = 300
+    UMBRAL_CACHE_RETRY_SECONDS: int = 30
+
+    # Snapshots de dashboards (notas): vigencia y ventana en la que se sirve el
+    # snapshot vencido mientras se recalcula en segundo plano
+    DASHBOARD_CACHE_TTL_SECONDS: int = 60
+    DASHBOARD_CACHE_MAX_STALE_SECONDS: int = 600
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 1000
+    
+    # Total aproximado de GET /v1/notas (conteo cacheado por rol + filtros)
+    NOTAS_TOTAL_CACHE_TTL_SECONDS: int = 60
+    NOTAS_TOTAL_CACHE_MAX_STALE_SECONDS: int = 900
+    NOTAS_TOTAL_CACHE_MAX_ENTRIES: int = 5000
+    
+    # Notas: despachador de outbox_notificaciones (python -m app.outbox_dispatcher)
+    OUTBOX_TRANSPORT: str = "log"  # log, smtp
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_CONCURRENCY: int = 10
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 2.0
+    OUTBOX_MAX_INTENTOS: int = 5
+    OUTBOX_BACKOFF_BASE_SECONDS: int = 30
+    OUTBOX_BACKOFF_MAX_SECONDS: int = 3600
+    OUTBOX_STALE_SECONDS: int = 300
+    OUTBOX_STATS_INTERVAL_SECONDS: float = 10.0
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 1025
+    SMTP_USER: Optional[str] = None
+    SMTP_PASSWORD: Optional[str] = None
+    SMTP_FROM: str = "no-reply@sga.local"
+    SMTP_STARTTLS: bool = False
+    SMTP_TIMEOUT: float = 10.0
+    
     @field_validator('CORS_ORIGINS', mode='before')
     @classmethod
     def parse_cors_origins(cls, v):
@@ -60,6 +150,11 @@ class Settings(BaseSettings):
     def DATABASE_URL(self) -> str:
         """Construye la URL de conexión a MySQL"""
         return f"mysql+pymysql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}?charset=utf8mb4"
+    
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        """URL de conexión a MySQL para el engine async (aiomysql)"""
+        return f"mysql+aiomysql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}?charset=utf8mb4"
 
 
 def get_settings() -> Settings:
@@ -1,21 +1,39 @@
 # Shared Common - Database utils
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from typing import AsyncGenerator, Generator, Optional
 from .config import Settings
+from .db_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_engine
 
 Base = declarative_base()
 
 
-def create_db_engine(database_url: str, echo: bool = False):
-    """Crea el engine de SQLAlchemy"""
-    return create_engine(
+def _pool_options(settings: Optional[Settings], pool_size: Optional[int] = None, max_overflow: Optional[int] = None) -> dict:
+    """Parámetros del pool desde Settings (DB_POOL_*); sin settings, los valores por defecto de SQLAlchemy"""
+    if settings is None:
+        return {"pool_pre_ping": True, "pool_recycle": 3600}
+    return {
+        "pool_size": pool_size if pool_size is not None else settings.DB_POOL_SIZE,
+        "max_overflow": max_overflow if max_overflow is not None else settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_use_lifo": settings.DB_POOL_USE_LIFO,
+    }
+
+
+def create_db_engine(database_url: str, echo: bool = False, settings: Optional[Settings] = None, nombre: str = "sync"):
+    """Crea el engine de SQLAlchemy con el pool de Settings, instrumentado para /metrics"""
+    engine = create_engine(
         database_url,
         echo=echo,
-        pool_pre_ping=True,
-        pool_recycle=3600,
+        poolclass=InstrumentedQueuePool,
+        **_pool_options(settings),
     )
+    instrument_engine(engine, nombre)
+    return engine
 
 
 def create_session_factory(engine):
@@ -30,3 +48,39 @@ def get_db_session(session_factory) -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def create_async_db_engine(
+    database_url: str,
+    echo: bool = False,
+    settings: Optional[Settings] = None,
+    nombre: str = "async",
+) -> AsyncEngine:
+    """
+    Crea el engine async de SQLAlchemy (driver aiomysql, ver Settings.ASYNC_DATABASE_URL).
+    Las consultas con AsyncSession no bloquean el event loop del worker de uvicorn.
+    """
+    opciones = _pool_options(
+        settings,
+        pool_size=settings.DB_ASYNC_POOL_SIZE if settings else None,
+        max_overflow=settings.DB_ASYNC_MAX_OVERFLOW if settings else None,
+    )
+    engine = create_async_engine(
+        database_url,
+        echo=echo,
+        poolclass=InstrumentedAsyncQueuePool,
+        **opciones,
+    )
+    instrument_engine(engine.sync_engine, nombre)
+    return engine
+
+
+def create_async_session_factory(engine: AsyncEngine):
+    """Crea el session factory async (sin expirar objetos al confirmar: no hay lazy load en async)"""
+    return async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db_session(session_factory) -> AsyncGenerator[AsyncSession, None]:
+    """Dependency para obtener sesión async de BD"""
+    async with session_factory() as db:
+        yield db
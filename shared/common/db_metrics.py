@@ -0,0 +1,146 @@
+# Shared Common - Métricas del pool de conexiones a BD
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Límites (segundos) del histograma de espera por una conexión del pool
+BUCKETS_ESPERA = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class PoolMetrics:
+    """Contadores de un pool de conexiones (uno por engine), seguros entre threads"""
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.conexiones_creadas = 0
+        self.conexiones_invalidadas = 0
+        self.overflow_eventos = 0  # Conexiones abiertas por encima de pool_size
+        self.timeouts = 0  # "QueuePool limit ... reached"
+        self.espera_buckets = [0] * len(BUCKETS_ESPERA)
+        self.espera_suma = 0.0
+        self.espera_cantidad = 0
+
+    def registrar_espera(self, segundos: float) -> None:
+        with self._lock:
+            self.espera_suma += segundos
+            self.espera_cantidad += 1
+            for i, limite in enumerate(BUCKETS_ESPERA):
+                if segundos <= limite:
+                    self.espera_buckets[i] += 1
+
+    def incrementar(self, contador: str) -> None:
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+
+class _InstrumentedPoolMixin:
+    """
+    Mide cuánto espera cada petición por una conexión (incluye abrirla o el pre-ping)
+    y cuenta los desbordes por encima de pool_size y los timeouts del pool.
+    """
+    _metricas: Optional[PoolMetrics] = None
+
+    def connect(self):
+        inicio = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            if self._metricas is not None:
+                self._metricas.incrementar("timeouts")
+            raise
+        finally:
+            if self._metricas is not None:
+                self._metricas.registrar_espera(time.perf_counter() - inicio)
+
+    def _create_connection(self):
+        # QueuePool ya incrementó _overflow: > 0 significa conexión de overflow
+        if self._metricas is not None and self._overflow > 0:
+            self._metricas.incrementar("overflow_eventos")
+        return super()._create_connection()
+
+    def recreate(self):
+        # engine.dispose() recrea el pool; las métricas siguen con el nuevo
+        pool = super().recreate()
+        pool._metricas = self._metricas
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# Engines instrumentados del proceso: (nombre, engine sync subyacente, métricas)
+_engines: List[Tuple[str, Engine, PoolMetrics]] = []
+
+
+def instrument_engine(engine: Engine, nombre: str) -> PoolMetrics:
+    """Engancha los eventos del pool de `engine` y lo registra para /metrics"""
+    metricas = PoolMetrics(nombre)
+    engine.pool._metricas = metricas
+    event.listen(engine, "checkout", lambda *_: metricas.incrementar("checkouts"))
+    event.listen(engine, "checkin", lambda *_: metricas.incrementar("checkins"))
+    event.listen(engine, "connect", lambda *_: metricas.incrementar("conexiones_creadas"))
+    event.listen(engine, "invalidate", lambda *_: metricas.incrementar("conexiones_invalidadas"))
+    _engines[:] = [e for e in _engines if e[0] != nombre]
+    _engines.append((nombre, engine, metricas))
+    return metricas
+
+
+def render_pool_metrics(servicio: str) -> str:
+    """Métricas de todos los pools del proceso en formato de texto de Prometheus"""
+    series: Dict[str, Tuple[str, str, List[str]]] = {
+        "sga_db_pool_size": ("gauge", "Conexiones fijas configuradas (pool_size)", []),
+        "sga_db_pool_max_overflow": ("gauge", "Conexiones extra permitidas (max_overflow)", []),
+        "sga_db_pool_checked_out": ("gauge", "Conexiones prestadas ahora mismo", []),
+        "sga_db_pool_idle": ("gauge", "Conexiones abiertas libres en el pool", []),
+        "sga_db_pool_overflow": ("gauge", "Conexiones de overflow abiertas ahora mismo", []),
+        "sga_db_pool_checkouts_total": ("counter", "Conexiones entregadas por el pool", []),
+        "sga_db_pool_checkins_total": ("counter", "Conexiones devueltas al pool", []),
+        "sga_db_pool_connections_created_total": ("counter", "Conexiones nuevas abiertas contra MySQL", []),
+        "sga_db_pool_connections_invalidated_total": ("counter", "Conexiones invalidadas", []),
+        "sga_db_pool_overflow_events_total": ("counter", "Conexiones abiertas por encima de pool_size", []),
+        "sga_db_pool_timeouts_total": ("counter", "Esperas que agotaron pool_timeout", []),
+        "sga_db_pool_wait_seconds": ("histogram", "Espera por una conexión del pool", []),
+    }
+    for nombre, engine, m in _engines:
+        pool = engine.pool
+        labels = f'service="{servicio}",engine="{nombre}"'
+        checked_out = pool.checkedout() if isinstance(pool, QueuePool) else 0
+        valores = {
+            "sga_db_pool_size": pool.size() if isinstance(pool, QueuePool) else 0,
+            "sga_db_pool_max_overflow": getattr(pool, "_max_overflow", 0),
+            "sga_db_pool_checked_out": checked_out,
+            "sga_db_pool_idle": pool.checkedin() if isinstance(pool, QueuePool) else 0,
+            "sga_db_pool_overflow": max(pool.overflow(), 0) if isinstance(pool, QueuePool) else 0,
+            "sga_db_pool_checkouts_total": m.checkouts,
+            "sga_db_pool_checkins_total": m.checkins,
+            "sga_db_pool_connections_created_total": m.conexiones_creadas,
+            "sga_db_pool_connections_invalidated_total": m.conexiones_invalidadas,
+            "sga_db_pool_overflow_events_total": m.overflow_eventos,
+            "sga_db_pool_timeouts_total": m.timeouts,
+        }
+        for serie, valor in valores.items():
+            series[serie][2].append(f"{serie}{{{labels}}} {valor}")
+        histograma = series["sga_db_pool_wait_seconds"][2]
+        for limite, cantidad in zip(BUCKETS_ESPERA, m.espera_buckets):
+            histograma.append(f'sga_db_pool_wait_seconds_bucket{{{labels},le="{limite}"}} {cantidad}')
+        histograma.append(f'sga_db_pool_wait_seconds_bucket{{{labels},le="+Inf"}} {m.espera_cantidad}')
+        histograma.append(f"sga_db_pool_wait_seconds_sum{{{labels}}} {m.espera_suma:.6f}")
+        histograma.append(f"sga_db_pool_wait_seconds_count{{{labels}}} {m.espera_cantidad}")
+
+    lineas = []
+    for serie, (tipo, ayuda, muestras) in series.items():
+        lineas.append(f"# HELP {serie} {ayuda}")
+        lineas.append(f"# TYPE {serie} {tipo}")
+        lineas.extend(muestras)
+    return "\n".join(lineas) + "\n"
@@ -38,3 +38,10 @@ class ForbiddenException(DomainException):
 class BusinessRuleException(DomainException):
     """Violación de regla de negocio"""
     pass
+
+
+class TooManyRequestsException(DomainException):
+    """Capacidad saturada - reintentar pasados retry_after segundos"""
+    def __init__(self, message: str, retry_after: int = 1, code: Optional[str] = None):
+        super().__init__(message, code)
+        self.retry_after = retry_after
@@ -0,0 +1,98 @@
+# Shared Common - Cliente HTTP compartido (pool de conexiones entre servicios)
+import importlib.util
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from .config import Settings, get_settings
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    """HTTP/2 solo se habilita si el paquete h2 está instalado (httpx[http2])"""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _usa_http2(url: str, http2: bool) -> bool:
+    """
+    httpx negocia HTTP/2 por ALPN dentro de TLS: solo tiene efecto con https://.
+    No se usa h2c (HTTP/2 sin TLS con conocimiento previo) porque los servicios
+    corren en uvicorn, que solo habla HTTP/1.1; con http:// se queda en HTTP/1.1 + keep-alive.
+    """
+    return http2 and urlsplit(url).scheme == "https"
+
+
+def _host_pattern(url: str) -> Optional[str]:
+    """Convierte una URL base de servicio en un patrón de montaje de httpx (scheme://host:port)"""
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        return None
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def create_http_client(settings: Settings) -> httpx.AsyncClient:
+    """
+    Crea un httpx.AsyncClient con keep-alive y límites de conexión por host.
+
+    Cada servicio conocido (IAM, Académico, Personas, Notas) se monta con su
+    propio transporte, de modo que los límites de conexiones se aplican por
+    host destino y un servicio lento no agota el pool de los demás.
+    HTTP_CLIENT_HTTP2 solo aplica a los servicios publicados por https:// (ver _usa_http2);
+    con las URLs http:// por defecto todo el tráfico entre servicios es HTTP/1.1.
+    """
+    http2 = settings.HTTP_CLIENT_HTTP2 and _http2_available()
+    timeout = httpx.Timeout(
+        settings.HTTP_CLIENT_TIMEOUT,
+        connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT,
+    )
+    per_host_limits = httpx.Limits(
+        max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST,
+        max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE_PER_HOST,
+        keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+    )
+
+    mounts: Dict[str, httpx.AsyncBaseTransport] = {}
+    for url in (
+        settings.IAM_SERVICE_URL,
+        settings.ACADEMICO_SERVICE_URL,
+        settings.PERSONAS_SERVICE_URL,
+        settings.NOTAS_SERVICE_URL,
+    ):
+        pattern = _host_pattern(url) if url else None
+        if pattern and pattern not in mounts:
+            mounts[pattern] = httpx.AsyncHTTPTransport(limits=per_host_limits, http2=_usa_http2(url, http2))
+
+    return httpx.AsyncClient(
+        timeout=timeout,
+        limits=per_host_limits,
+        http2=http2,
+        mounts=mounts,
+    )
+
+
+def init_http_client(settings: Optional[Settings] = None) -> httpx.AsyncClient:
+    """Inicializa el cliente compartido (llamar en el arranque del servicio)"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client(settings or get_settings())
+    return _http_client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Devuelve el cliente HTTP compartido del proceso.
+    Si el servicio no lo inicializó en el arranque, se crea bajo demanda.
+    """
+    if _http_client is None or _http_client.is_closed:
+        return init_http_client()
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Cierra el cliente compartido y libera sus conexiones (llamar al apagar el servicio)"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
@@ -1,8 +1,14 @@
 # Shared Common - JWT Utils
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Dict, Optional
-from jose import JWTError, jwt
+from typing import Any, Dict, Optional, Tuple
+from jose import JWTError, jwk, jwt
 from .exceptions import UnauthorizedException
+from .revocation import get_revocation_set
 
 
 def create_jwt_token(
@@ -25,12 +31,8 @@ def decode_jwt_token(
     secret_key: str,
     algorithm: str = "HS256"
 ) -> Dict:
-    """Decodifica y valida un JWT token"""
-    try:
-        payload = jwt.decode(token, secret_key, algorithms=[algorithm])
-        return payload
-    except JWTError as e:
-        raise UnauthorizedException(f"Token inválido: {str(e)}")
+    """Decodifica y valida un JWT token (con la caché del TokenVerifier de esa clave)"""
+    return dict(get_token_verifier(secret_key, algorithm).verify(token).claims)
 
 
 def extract_bearer_token(authorization: Optional[str]) -> str:
@@ -43,3 +45,162 @@ def extract_bearer_token(authorization: Optional[str]) -> str:
         raise UnauthorizedException("Formato de Authorization inválido. Use: Bearer <token>")
     
     return parts[1]
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Usuario autenticado de una petición, tomado de los claims del JWT"""
+    user_id: Optional[str]
+    rol: str
+    username: Optional[str] = None
+    jti: Optional[str] = None
+    exp: Optional[int] = None
+    claims: Dict[str, Any] = field(default_factory=dict, compare=False, repr=False)
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> "Principal":
+        """Admite los nombres de claim alternativos (sub, rol, role) de tokens antiguos"""
+        rol = payload.get("rol_nombre") or payload.get("rol") or payload.get("role") or ""
+        return cls(
+            user_id=payload.get("user_id") or payload.get("sub"),
+            rol=rol.upper() if isinstance(rol, str) else rol,
+            username=payload.get("username"),
+            jti=payload.get("jti"),
+            exp=payload.get("exp"),
+            claims=payload,
+        )
+
+
+class TokenVerifier:
+    """
+    Verificación de JWT con la clave preparada una sola vez y una LRU de tokens ya verificados.
+
+    - La clave HMAC se construye en __init__; jwt.decode con una clave en texto la
+      vuelve a parsear y construir en cada llamada
+    - Un token verificado se guarda por su SHA-256 hasta su `exp`: una misma sesión
+      pega a los cuatro servicios y a varios endpoints por pantalla, y solo la primera
+      petición de cada proceso paga el parseo y la firma
+    - Tokens sin `exp` no se guardan; la LRU está acotada a max_entries
+    - Cada verificación consulta el RevocationSet del proceso (logout / cierre forzado)
+    """
+
+    def __init__(self, secret_key: str, algorithm: str = "HS256", max_entries: int = 10000):
+        self.algorithm = algorithm
+        self.max_entries = max_entries
+        self._key = jwk.construct(secret_key, algorithm)
+        self._cache: "OrderedDict[bytes, Tuple[Principal, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def verify(self, token: str) -> Principal:
+        principal = self._verificado(token)
+        # La revocación se comprueba siempre, también con el token en caché
+        revocaciones = get_revocation_set()
+        if revocaciones is not None and principal.jti and revocaciones.is_revoked(principal.jti):
+            raise UnauthorizedException("Sesión revocada")
+        return principal
+
+    def _verificado(self, token: str) -> Principal:
+        clave = hashlib.sha256(token.encode("utf-8")).digest()
+        ahora = time.time()
+        with self._lock:
+            entrada = self._cache.get(clave)
+            if entrada is not None:
+                if entrada[1] > ahora:
+                    self._cache.move_to_end(clave)
+                    self.hits += 1
+                    return entrada[0]
+                del self._cache[clave]
+            self.misses += 1
+
+        try:
+            payload = jwt.decode(token, self._key, algorithms=[self.algorithm])
+        except JWTError as e:
+            raise UnauthorizedException(f"Token inválido: {str(e)}")
+
+        principal = Principal.from_payload(payload)
+        if isinstance(principal.exp, (int, float)):
+            with self._lock:
+                self._cache[clave] = (principal, float(principal.exp))
+                self._cache.move_to_end(clave)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return principal
+
+    def authenticate(self, authorization: Optional[str]) -> Principal:
+        """Principal del header Authorization (UnauthorizedException si falta o es inválido)"""
+        return self.verify(extract_bearer_token(authorization))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+# Verificadores del proceso por (clave, algoritmo)
+_verifiers: Dict[Tuple[str, str], TokenVerifier] = {}
+_verifiers_lock = threading.Lock()
+
+
+def init_token_verifier(secret_key: str, algorithm: str = "HS256", max_entries: int = 10000) -> TokenVerifier:
+    """Prepara el verificador al arrancar el servicio (clave construida y caché vacía)"""
+    verifier = TokenVerifier(secret_key, algorithm, max_entries)
+    with _verifiers_lock:
+        _verifiers[(secret_key, algorithm)] = verifier
+    return verifier
+
+
+def get_token_verifier(secret_key: str, algorithm: str = "HS256") -> TokenVerifier:
+    """Verificador de esa clave; se crea con los valores por defecto si no se inicializó"""
+    verifier = _verifiers.get((secret_key, algorithm))
+    if verifier is None:
+        with _verifiers_lock:
+            verifier = _verifiers.get((secret_key, algorithm))
+            if verifier is None:
+                verifier = _verifiers[(secret_key, algorithm)] = TokenVerifier(secret_key, algorithm)
+    return verifier
+
+
+def verify_token(token: str, settings) -> Principal:
+    """Principal de un token ya extraído (cuando además se reenvía a otros servicios)"""
+    return get_token_verifier(settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM).verify(token)
+
+
+def authenticate(authorization: Optional[str], settings) -> Principal:
+    """Principal del header Authorization con la clave JWT de `settings`"""
+    return get_token_verifier(settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM).authenticate(authorization)
+
+
+# Rol de los tokens que un servicio emite para llamar a endpoints internos de otro
+ROL_SERVICIO = "SERVICE"
+SERVICE_TOKEN_MINUTES = 5
+
+# Token vigente por (servicio, clave, algoritmo): (token, epoch de renovación)
+_service_tokens: Dict[Tuple[str, str, str], Tuple[str, float]] = {}
+_service_tokens_lock = threading.Lock()
+
+
+def create_service_token(servicio: str, settings, expiration_minutes: int = SERVICE_TOKEN_MINUTES) -> str:
+    """JWT de corta duración con rol SERVICE firmado con el JWT_SECRET_KEY compartido"""
+    return create_jwt_token(
+        {"sub": servicio, "rol_nombre": ROL_SERVICIO, "servicio": servicio},
+        settings.JWT_SECRET_KEY,
+        settings.JWT_ALGORITHM,
+        expiration_minutes,
+    )
+
+
+def get_service_token(servicio: str, settings) -> str:
+    """
+    Token de servicio reutilizado entre llamadas y renovado en la última quinta parte
+    de su vigencia (el receptor lo verifica una vez y lo sirve desde su caché)
+    """
+    clave = (servicio, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
+    ahora = time.time()
+    with _service_tokens_lock:
+        vigente = _service_tokens.get(clave)
+        if vigente is None or vigente[1] <= ahora:
+            token = create_service_token(servicio, settings)
+            _service_tokens[clave] = (token, ahora + SERVICE_TOKEN_MINUTES * 60 * 0.8)
+            return token
+        return vigente[0]
@@ -1,5 +1,11 @@
 # Shared Common - Password Utils
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
 from passlib.context import CryptContext
+from .exceptions import TooManyRequestsException
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -34,3 +40,90 @@ def validate_password_strength(password: str) -> tuple[bool, str]:
         return False, "La contraseña debe contener al menos un número"
     
     return True, ""
+
+
+T = TypeVar("T")
+
+
+class PasswordHasherPool:
+    """
+    Pool acotado de threads para bcrypt (hash y verificación), fuera del event loop.
+
+    - bcrypt (backend C vía cffi) suelta el GIL: `workers` threads usan hasta
+      `workers` cores, y el event loop sigue atendiendo el resto de peticiones
+      mientras se verifica una contraseña
+    - Como mucho workers + max_pending operaciones en curso o en cola; la siguiente
+      falla al instante con TooManyRequestsException (429 + Retry-After) en lugar de
+      encolarse detrás de varios segundos de bcrypt
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: int = 64, retry_after_seconds: int = 1):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.retry_after_seconds = retry_after_seconds
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._en_curso = 0
+        self.rechazadas = 0
+
+    @property
+    def capacidad(self) -> int:
+        return self.workers + self.max_pending
+
+    @property
+    def en_curso(self) -> int:
+        return self._en_curso
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._ejecutar(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._ejecutar(hash_password, password)
+
+    async def _ejecutar(self, fn: Callable[..., T], *args) -> T:
+        with self._lock:
+            if self._en_curso >= self.capacidad:
+                self.rechazadas += 1
+                raise TooManyRequestsException(
+                    "Demasiadas solicitudes de autenticación en curso, reintente en unos segundos",
+                    retry_after=self.retry_after_seconds,
+                )
+            self._en_curso += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            with self._lock:
+                self._en_curso -= 1
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_password_pool: Optional[PasswordHasherPool] = None
+
+
+def init_password_pool(settings) -> PasswordHasherPool:
+    global _password_pool
+    if _password_pool is not None:
+        _password_pool.shutdown()
+    _password_pool = PasswordHasherPool(
+        workers=settings.PASSWORD_POOL_WORKERS,
+        max_pending=settings.PASSWORD_POOL_MAX_PENDING,
+        retry_after_seconds=settings.PASSWORD_POOL_RETRY_AFTER_SECONDS,
+    )
+    return _password_pool
+
+
+def get_password_pool() -> PasswordHasherPool:
+    """Pool del proceso; con valores por defecto si el servicio no lo inicializó (scripts)"""
+    global _password_pool
+    if _password_pool is None:
+        _password_pool = PasswordHasherPool()
+    return _password_pool
+
+
+def close_password_pool() -> None:
+    global _password_pool
+    if _password_pool is not None:
+        _password_pool.shutdown()
+        _password_pool = None
@@ -0,0 +1,227 @@
+# Shared Common - Revocación de sesiones (filtro de Bloom + conjunto exacto)
+import asyncio
+import hashlib
+import math
+import threading
+import time
+import traceback
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+def _epoch(valor: Any) -> Optional[float]:
+    """ISO-8601 o datetime (naive = UTC, como los escribe IAM) a epoch"""
+    if valor is None or isinstance(valor, (int, float)):
+        return valor
+    if isinstance(valor, str):
+        valor = datetime.fromisoformat(valor)
+    if valor.tzinfo is None:
+        valor = valor.replace(tzinfo=timezone.utc)
+    return valor.timestamp()
+
+
+class BloomFilter:
+    """Filtro de Bloom sobre un bytearray: sin falsos negativos, falsos positivos ~tasa_fp"""
+
+    def __init__(self, capacidad: int = 100000, tasa_fp: float = 0.001):
+        capacidad = max(capacidad, 1)
+        self.bits = max(8, int(-capacidad * math.log(tasa_fp) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.bits / capacidad * math.log(2)))
+        self._datos = bytearray((self.bits + 7) // 8)
+
+    def _posiciones(self, valor: str):
+        # Doble hashing (Kirsch-Mitzenmacher): k posiciones a partir de un solo SHA-256
+        digest = hashlib.sha256(valor.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def add(self, valor: str) -> None:
+        for p in self._posiciones(valor):
+            self._datos[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, valor: str) -> bool:
+        return all(self._datos[p >> 3] & (1 << (p & 7)) for p in self._posiciones(valor))
+
+
+class RevocationSet:
+    """
+    JTIs revocados que aún no expiraron, consultables sin ir a la BD.
+
+    - is_revoked() mira primero el filtro de Bloom: casi todos los tokens no están
+      revocados y se descartan con k lecturas de bits
+    - Un positivo del filtro se confirma en el conjunto exacto jti -> exp, así que un
+      falso positivo nunca cierra la sesión de nadie
+    - purgar() quita las revocaciones de tokens ya expirados (el JWT se rechaza solo)
+      y reconstruye el filtro, que no admite borrados
+    """
+
+    def __init__(self, capacidad: int = 100000, tasa_fp: float = 0.001):
+        self.capacidad = capacidad
+        self.tasa_fp = tasa_fp
+        self._bloom = BloomFilter(capacidad, tasa_fp)
+        self._exactos: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.sincronizado = False  # True tras la primera carga completa desde IAM
+
+    def __len__(self) -> int:
+        return len(self._exactos)
+
+    def add(self, jti: str, expires_at: Any = None) -> None:
+        """Registra un JTI revocado; expires_at en epoch, datetime o ISO (None: hasta reiniciar)"""
+        exp = _epoch(expires_at)
+        with self._lock:
+            self._exactos[jti] = exp if exp is not None else math.inf
+            self._bloom.add(jti)
+            if len(self._exactos) > self.capacidad:
+                # Filtro lleno: se redimensiona para mantener la tasa de falsos positivos
+                self.capacidad *= 2
+                self._reconstruir()
+
+    def is_revoked(self, jti: str) -> bool:
+        if jti not in self._bloom:
+            return False
+        return jti in self._exactos
+
+    def purgar(self, ahora: Optional[float] = None) -> int:
+        ahora = ahora if ahora is not None else time.time()
+        with self._lock:
+            vencidos = [jti for jti, exp in self._exactos.items() if exp <= ahora]
+            for jti in vencidos:
+                del self._exactos[jti]
+            if vencidos:
+                self._reconstruir()
+        return len(vencidos)
+
+    def _reconstruir(self) -> None:
+        bloom = BloomFilter(self.capacidad, self.tasa_fp)
+        for jti in self._exactos:
+            bloom.add(jti)
+        self._bloom = bloom
+
+
+# fetch(desde, desde_jti, limit) -> {"revocaciones": [{jti, expires_at, revoked_at}], "has_more": bool}
+FetchRevocaciones = Callable[[Optional[str], Optional[str], int], Awaitable[Dict[str, Any]]]
+
+
+class RevocationPoller:
+    """
+    Mantiene un RevocationSet al día leyendo el feed de revocaciones de IAM por
+    deltas, con cursor (revoked_at, jti). La primera pasada carga todas las
+    revocaciones vigentes; las siguientes solo lo nuevo desde el último cursor.
+    """
+
+    def __init__(
+        self,
+        revocaciones: RevocationSet,
+        fetch: FetchRevocaciones,
+        interval_seconds: float = 5.0,
+        page_size: int = 1000,
+        purga_seconds: float = 300.0,
+    ):
+        self.revocaciones = revocaciones
+        self.fetch = fetch
+        self.interval_seconds = interval_seconds
+        self.page_size = page_size
+        self.purga_seconds = purga_seconds
+        self._cursor: Tuple[Optional[str], Optional[str]] = (None, None)
+        self._ultima_purga = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    async def sincronizar(self) -> int:
+        """Aplica todas las páginas pendientes del feed; devuelve cuántas revocaciones leyó"""
+        leidas = 0
+        while True:
+            desde, desde_jti = self._cursor
+            pagina = await self.fetch(desde, desde_jti, self.page_size)
+            items: List[Dict[str, Any]] = pagina.get("revocaciones", [])
+            for item in items:
+                self.revocaciones.add(item["jti"], item.get("expires_at"))
+            if items:
+                self._cursor = (items[-1]["revoked_at"], items[-1]["jti"])
+                leidas += len(items)
+            if not pagina.get("has_more"):
+                break
+        self.revocaciones.sincronizado = True
+        if time.monotonic() - self._ultima_purga >= self.purga_seconds:
+            self.revocaciones.purgar()
+            self._ultima_purga = time.monotonic()
+        return leidas
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="revocation-poller")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sincronizar()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                print("[revocaciones] Error sincronizando revocaciones de IAM")
+                traceback.print_exc()
+            await asyncio.sleep(self.interval_seconds)
+
+
+def build_http_fetch(settings) -> FetchRevocaciones:
+    """fetch contra GET {IAM_SERVICE_URL}/v1/auth/revocaciones con el cliente HTTP compartido"""
+    from .http_client import get_http_client
+
+    url = f"{settings.IAM_SERVICE_URL or 'http://localhost:8001'}/v1/auth/revocaciones"
+
+    async def fetch(desde: Optional[str], desde_jti: Optional[str], limit: int) -> Dict[str, Any]:
+        params: Dict[str, Any] = {"limit": limit}
+        if desde is not None:
+            params["desde"] = desde
+            params["desde_jti"] = desde_jti
+        resp = await get_http_client().get(url, params=params)
+        resp.raise_for_status()
+        return resp.json()
+
+    return fetch
+
+
+_revocation_set: Optional[RevocationSet] = None
+_revocation_poller: Optional[RevocationPoller] = None
+
+
+def init_revocaciones(settings, fetch: Optional[FetchRevocaciones] = None) -> Optional[RevocationSet]:
+    """
+    Crea el RevocationSet del proceso y arranca su poller (dentro del event loop).
+    Sin `fetch` se usa el feed HTTP de IAM; IAM pasa uno que lee su propia BD.
+    """
+    global _revocation_set, _revocation_poller
+    if not settings.REVOCATION_ENABLED:
+        _revocation_set = None
+        return None
+    _revocation_set = RevocationSet(settings.REVOCATION_BLOOM_CAPACITY, settings.REVOCATION_BLOOM_FP_RATE)
+    _revocation_poller = RevocationPoller(
+        _revocation_set,
+        fetch or build_http_fetch(settings),
+        interval_seconds=settings.REVOCATION_POLL_INTERVAL_SECONDS,
+    )
+    _revocation_poller.start()
+    return _revocation_set
+
+
+def get_revocation_set() -> Optional[RevocationSet]:
+    return _revocation_set
+
+
+async def close_revocaciones() -> None:
+    global _revocation_set, _revocation_poller
+    if _revocation_poller is not None:
+        await _revocation_poller.stop()
+        _revocation_poller = None
+    _revocation_set = None
@@ -1,7 +1,9 @@
 # Shared Common - Utils
+import base64
 import uuid
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
+from .exceptions import ValidationException
 
 
 def generate_uuid() -> str:
@@ -33,3 +35,20 @@ def paginate_query(query, offset: int = 0, limit: int = 20, max_limit: int = 100
     limit = min(limit, max_limit)
     
     return query.offset(offset).limit(limit)
+
+
+def encode_keyset_cursor(created_at: datetime, row_id: str) -> str:
+    """Cursor opaco de paginación keyset con la posición (created_at, id) de la última fila"""
+    crudo = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(crudo).decode("ascii").rstrip("=")
+
+
+def decode_keyset_cursor(cursor: str, mensaje: str = "Cursor inválido") -> Tuple[datetime, str]:
+    """Inverso de encode_keyset_cursor; ValidationException(mensaje) si el cursor no es válido"""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        crudo = base64.urlsafe_b64decode(cursor + relleno).decode("utf-8")
+        created_at, row_id = crudo.split("|", 1)
+        return datetime.fromisoformat(created_at), row_id
+    except Exception:
+        raise ValidationException(mensaje)
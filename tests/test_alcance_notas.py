@@ -0,0 +1,101 @@
+"""
+Pruebas del alcance de GET /v1/notas (notas-service) con matrículas sin proyectar.
+
+El filtro por rol y por clase_id/alumno_id se resuelve sobre matriculas_proyeccion;
+las notas de una matrícula que el worker de sincronización todavía no copió se
+resuelven en Personas/Académico con las mismas reglas en lugar de quedar fuera.
+"""
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.pool import StaticPool
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "services", "notas-service")]
+
+from app.infrastructure.db.alcance_notas import (  # noqa: E402
+    criterio_alcance_notas, filtro_proyeccion, matriculas_remotas_en_alcance, matriculas_sin_proyeccion_query,
+)
+from app.infrastructure.db.models import MatriculaProyeccionModel, NotaModel  # noqa: E402
+
+# Matrículas proyectadas: (matricula_clase_id, alumno_id, clase_id, docente_user_id)
+PROYECTADAS = [("M1", "A1", "C1", "D1"), ("M2", "A2", "C2", "D2")]
+# Notas: (id, matricula_clase_id); M3 y M4 aún no están en la proyección
+NOTAS = [("N1", "M1"), ("N2", "M2"), ("N3", "M3"), ("N4", "M4")]
+# Lo que devolverían Personas (matrículas) y Académico (clases) para M3 y M4
+REMOTAS = {"M3": {"alumno_id": "A1", "clase_id": "C1"}, "M4": {"alumno_id": "A4", "clase_id": "C2"}}
+CLASES = {"C1": {"docente_user_id": "D1", "is_deleted": False}, "C2": {"docente_user_id": "D2", "is_deleted": False}}
+
+
+@pytest.fixture
+def conn():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+
+    @event.listens_for(engine, "connect")
+    def _esquemas(dbapi_connection, _):
+        dbapi_connection.execute("ATTACH DATABASE ':memory:' AS sga_notas")
+
+    with engine.begin() as c:
+        c.execute(text(
+            "CREATE TABLE sga_notas.notas (id TEXT PRIMARY KEY, matricula_clase_id TEXT, periodo_id TEXT, "
+            "tipo_evaluacion_id TEXT, is_deleted BOOLEAN DEFAULT FALSE)"
+        ))
+        c.execute(text(
+            "CREATE TABLE sga_notas.matriculas_proyeccion (matricula_clase_id TEXT PRIMARY KEY, alumno_id TEXT, "
+            "clase_id TEXT, docente_user_id TEXT, is_deleted BOOLEAN DEFAULT FALSE, clase_is_deleted BOOLEAN DEFAULT FALSE)"
+        ))
+        c.execute(
+            text("INSERT INTO sga_notas.matriculas_proyeccion (matricula_clase_id, alumno_id, clase_id, docente_user_id) "
+                 "VALUES (:m, :a, :c, :d)"),
+            [{"m": m, "a": a, "c": cl, "d": d} for m, a, cl, d in PROYECTADAS],
+        )
+        c.execute(
+            text("INSERT INTO sga_notas.notas (id, matricula_clase_id, periodo_id) VALUES (:id, :m, 'P1')"),
+            [{"id": i, "m": m} for i, m in NOTAS],
+        )
+    with engine.connect() as c:
+        yield c
+
+
+def _notas_visibles(conn, rol, user_id, remotas=REMOTAS, clases=CLASES, hijo_ids=None, clase_id=None, alumno_id=None):
+    proy = MatriculaProyeccionModel
+    filtro = filtro_proyeccion(rol, user_id, hijo_ids, clase_id, alumno_id)
+    autorizadas = matriculas_remotas_en_alcance(remotas, clases, rol, user_id, hijo_ids, clase_id, alumno_id)
+    query = select(NotaModel.id).outerjoin(proy, proy.matricula_clase_id == NotaModel.matricula_clase_id).where(
+        NotaModel.is_deleted == False, criterio_alcance_notas(filtro, autorizadas)
+    )
+    return sorted(conn.execute(query).scalars().all())
+
+
+def test_detecta_matriculas_sin_proyeccion(conn):
+    assert sorted(conn.execute(matriculas_sin_proyeccion_query(periodo_id="P1")).scalars().all()) == ["M3", "M4"]
+    assert conn.execute(matriculas_sin_proyeccion_query(periodo_id="P2")).scalars().all() == []
+
+
+def test_docente_ve_notas_de_matricula_sin_proyectar_de_su_clase(conn):
+    assert _notas_visibles(conn, "DOCENTE", "D1") == ["N1", "N3"]
+    assert _notas_visibles(conn, "DOCENTE", "D2") == ["N2", "N4"]
+
+
+def test_docente_no_ve_matricula_sin_proyectar_de_clase_eliminada(conn):
+    clases = {**CLASES, "C1": {"docente_user_id": "D1", "is_deleted": True}}
+    assert _notas_visibles(conn, "DOCENTE", "D1", clases=clases) == ["N1"]
+
+
+def test_padre_ve_notas_sin_proyectar_solo_de_sus_hijos(conn):
+    assert _notas_visibles(conn, "PADRE", "U1", hijo_ids=["A1"]) == ["N1", "N3"]
+    assert _notas_visibles(conn, "PADRE", "U1", hijo_ids=["A4"]) == ["N4"]
+
+
+def test_admin_filtra_por_clase_y_alumno_incluyendo_sin_proyectar(conn):
+    assert _notas_visibles(conn, "ADMIN", "U0", clase_id="C2") == ["N2", "N4"]
+    assert _notas_visibles(conn, "ADMIN", "U0", alumno_id="A1") == ["N1", "N3"]
+    assert filtro_proyeccion("ADMIN", "U0") is None
+
+
+def test_servicios_caidos_no_conceden_acceso(conn):
+    # Personas no respondió (sin matrículas remotas) o Académico no resolvió la clase
+    assert _notas_visibles(conn, "DOCENTE", "D1", remotas={}) == ["N1"]
+    assert _notas_visibles(conn, "DOCENTE", "D1", clases={}) == ["N1"]
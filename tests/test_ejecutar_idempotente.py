@@ -0,0 +1,111 @@
+"""
+Pruebas de EjecutarIdempotenteUseCase (Idempotency-Key de POST /v1/notas/batch).
+
+Solo se guarda como resultado lo que el handler devuelve; si el handler lanza
+(servicio caído, fallo de la transacción) la clave se libera y el reintento con la
+misma clave vuelve a ejecutar el lote en lugar de repetir el fallo. Mientras el
+handler corre la reserva se renueva, aunque el handler bloquee el event loop.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "services", "notas-service")]
+
+from app.application.use_cases.ejecutar_idempotente import EjecutarIdempotenteUseCase  # noqa: E402
+from app.domain import IdempotencyRecord, ServicioNoDisponibleException  # noqa: E402
+
+
+class IdempotencyRepositoryMemoria:
+    """Misma semántica que SqlAlchemyIdempotencyRepository, sin vencimientos"""
+
+    def __init__(self):
+        self.filas = {}
+        self.hilos = set()
+        self.renovaciones = 0
+
+    def reservar(self, key, user_id, request_hash, ttl_seconds):
+        self.hilos.add(threading.get_ident())
+        if (key, user_id) in self.filas:
+            return False
+        self.filas[(key, user_id)] = IdempotencyRecord(key, user_id, request_hash)
+        return True
+
+    def find(self, key, user_id, stale_after_seconds):
+        return self.filas.get((key, user_id))
+
+    def tomar_control(self, key, user_id, request_hash, ttl_seconds, stale_after_seconds):
+        return False
+
+    def completar(self, key, user_id, status_code, response_json):
+        self.hilos.add(threading.get_ident())
+        fila = self.filas[(key, user_id)]
+        fila.estado, fila.status_code, fila.response_json = "COMPLETADO", status_code, response_json
+
+    def renovar(self, key, user_id):
+        self.renovaciones += 1
+        fila = self.filas.get((key, user_id))
+        return bool(fila) and fila.estado == "EN_PROCESO"
+
+    def liberar(self, key, user_id):
+        if self.filas.get((key, user_id)) and self.filas[(key, user_id)].estado == "EN_PROCESO":
+            del self.filas[(key, user_id)]
+
+
+def _ejecutar(use_case, handler):
+    return asyncio.run(use_case.execute(key="K1", user_id="D1", request_hash="h", handler=handler))
+
+
+def test_fallo_transitorio_no_se_guarda():
+    repo = IdempotencyRepositoryMemoria()
+    use_case = EjecutarIdempotenteUseCase(repo)
+    llamadas = []
+
+    async def caido():
+        llamadas.append("caido")
+        raise ServicioNoDisponibleException("Personas Service no respondió")
+
+    async def ok():
+        llamadas.append("ok")
+        return 200, {"results": [{"status": "ok"}]}
+
+    with pytest.raises(ServicioNoDisponibleException):
+        _ejecutar(use_case, caido)
+    assert repo.filas == {}
+
+    # El reintento con la misma clave ejecuta el lote y ese resultado sí se guarda
+    assert _ejecutar(use_case, ok) == (200, {"results": [{"status": "ok"}]})
+    assert _ejecutar(use_case, ok) == (200, {"results": [{"status": "ok"}]})
+    assert llamadas == ["caido", "ok"]
+
+
+def test_repositorio_fuera_del_event_loop():
+    # Las llamadas síncronas a la BD no deben ejecutarse en el hilo del event loop
+    repo = IdempotencyRepositoryMemoria()
+
+    async def ok():
+        return 200, {"results": []}
+
+    _ejecutar(EjecutarIdempotenteUseCase(repo), ok)
+    assert repo.hilos and threading.get_ident() not in repo.hilos
+
+
+def test_lote_largo_renueva_la_reserva():
+    repo = IdempotencyRepositoryMemoria()
+    use_case = EjecutarIdempotenteUseCase(repo, stale_after_seconds=1, heartbeat_seconds=0.05)
+
+    async def lento():
+        await asyncio.sleep(0.2)
+        time.sleep(0.2)  # Consultas síncronas que bloquean el event loop
+        return 200, {"results": []}
+
+    _ejecutar(use_case, lento)
+    assert repo.renovaciones >= 4
+    renovaciones = repo.renovaciones
+    time.sleep(0.15)
+    assert repo.renovaciones == renovaciones  # El latido termina con el handler
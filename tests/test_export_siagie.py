@@ -0,0 +1,83 @@
+"""
+Pruebas de la exportación SIAGIE de notas-service (GET /v1/notas/export?layout=siagie).
+
+El pivote recibe las notas ordenadas (como las entrega la consulta del endpoint) y
+debe producir una fila por alumno-curso-periodo con N1..Nk y el promedio ponderado
+con las mismas reglas que la libreta (peso, o peso_default del tipo, o 1).
+"""
+import io
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "services", "notas-service")]
+
+from app.application.use_cases.exportar_siagie import CABECERA_SIAGIE, columnas_siagie, pivotar_siagie  # noqa: E402
+from app.infrastructure.export.xlsx_stream import stream_xlsx  # noqa: E402
+
+
+def _nota(matricula, columna, numerico=None, literal=None, peso=None, peso_default=None, periodo="P1", **alumno):
+    fila = {
+        "grado_nombre": "5°", "seccion_nombre": "A",
+        "alumno_nombres": "Juan", "alumno_apellidos": "Perez", "alumno_apellido_materno": "Rojas",
+        "numero_documento": "12345678", "curso_nombre": "Matemáticas",
+        "docente_nombres": "María", "docente_apellidos": "Gonzales",
+        "periodo_nombre": "2025-I", "matricula_clase_id": matricula, "periodo_id": periodo,
+        "columna_nota": columna, "valor_numerico": numerico, "valor_literal": literal,
+        "peso": peso, "peso_default": peso_default,
+    }
+    fila.update(alumno)
+    return fila
+
+
+def test_columnas_siagie():
+    assert columnas_siagie([]) == ["N1", "N2", "N3", "N4"]
+    assert columnas_siagie(["n2", "N10", "N5", None]) == ["N1", "N2", "N3", "N4", "N5", "N10"]
+
+
+def test_pivote_promedio_ponderado():
+    filas = [
+        _nota("M1", "N1", Decimal("16"), peso=Decimal("2")),
+        _nota("M1", "N2", Decimal("13"), peso_default=Decimal("1")),
+        _nota("M1", "N3", Decimal("15")),
+        _nota("M2", "N1", literal="AD", alumno_nombres="Ana", alumno_apellidos="Lopez", alumno_apellido_materno=None),
+        _nota("M2", "N2", literal="B", alumno_nombres="Ana", alumno_apellidos="Lopez", alumno_apellido_materno=None),
+        _nota("M2", "N1", Decimal("12"), periodo="P2", periodo_nombre="2025-II",
+              alumno_nombres="Ana", alumno_apellidos="Lopez", alumno_apellido_materno=None),
+    ]
+    columnas = columnas_siagie(f["columna_nota"] for f in filas)
+    resultado = list(pivotar_siagie(iter(filas), columnas))
+
+    assert resultado == [
+        ["5°", "A", "Perez Rojas, Juan", "12345678", "Matemáticas", "Gonzales, María", "2025-I",
+         Decimal("15.00"), Decimal("16"), Decimal("13"), Decimal("15"), ""],
+        # Solo literales: promedio en puntos AD=4..C=1 -> (4 + 2) / 2 = 3 -> A
+        ["5°", "A", "Lopez, Ana", "12345678", "Matemáticas", "Gonzales, María", "2025-I",
+         "A", "AD", "B", "", ""],
+        ["5°", "A", "Lopez, Ana", "12345678", "Matemáticas", "Gonzales, María", "2025-II",
+         Decimal("12.00"), Decimal("12"), "", "", ""],
+    ]
+
+
+def test_pivote_nota_mas_reciente_en_la_celda():
+    # Dos tipos de evaluación en la misma columna: la celda muestra la última, el promedio usa ambas
+    filas = [_nota("M1", "N1", Decimal("10")), _nota("M1", "N1", Decimal("20"))]
+    (fila,) = pivotar_siagie(filas, columnas_siagie(["N1"]))
+    assert fila[7] == Decimal("15.00")
+    assert fila[8] == Decimal("20")
+
+
+def test_siagie_xlsx():
+    openpyxl = pytest.importorskip("openpyxl")
+    filas = [_nota("M1", "N1", Decimal("15.5")), _nota("M1", "N2", Decimal("16"))]
+    columnas = columnas_siagie(["N1", "N2"])
+    contenido = b"".join(stream_xlsx(pivotar_siagie(filas, columnas), cabecera=CABECERA_SIAGIE + columnas))
+
+    ws = openpyxl.load_workbook(io.BytesIO(contenido), read_only=True).active
+    leidas = [list(f) for f in ws.iter_rows(values_only=True)]
+    assert leidas[0] == ["Grado", "Sección", "Alumno", "Documento", "Curso", "Docente", "Periodo", "Promedio", "N1", "N2", "N3", "N4"]
+    # Las celdas vacías no se escriben (en modo read_only openpyxl omite las del final)
+    assert leidas[1][:10] == ["5°", "A", "Perez Rojas, Juan", "12345678", "Matemáticas", "Gonzales, María", "2025-I", 15.75, 15.5, 16]
@@ -0,0 +1,133 @@
+"""
+Pruebas del registro masivo de notas (POST /v1/notas/batch, RegistrarNotaUseCase.execute_batch).
+
+Un item inválido no debe tumbar el lote: se rechaza en la validación previa
+(tipo de evaluación inexistente, valores fuera de rango) o, si llega a la BD y
+el upsert del lote falla (FK, CHECK), se reintenta item por item en savepoints
+y solo ese item queda con status "error".
+
+Las notas se escriben en SQLite con la FK y el CHECK de sga_notas.notas; el
+upsert multi-fila de MySQL se sustituye por un INSERT multi-fila equivalente.
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "services", "notas-service")]
+
+from app.application.use_cases.registrar_nota import RegistrarNotaUseCase  # noqa: E402
+
+
+class NotaRepositorySqlite:
+    """bulk_upsert con un único INSERT multi-fila: falla entero si una fila viola una restricción"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def bulk_upsert(self, notas, commit=True):
+        valores = ", ".join(f"(:id{i}, :m{i}, :t{i}, :v{i}, :l{i})" for i in range(len(notas)))
+        params = {}
+        for i, n in enumerate(notas):
+            params.update({f"id{i}": n.id, f"m{i}": n.matricula_clase_id, f"t{i}": n.tipo_evaluacion_id,
+                           f"v{i}": n.valor_numerico, f"l{i}": n.valor_literal})
+        self.session.execute(text(
+            f"INSERT INTO notas (id, matricula_clase_id, tipo_evaluacion_id, valor_numerico, valor_literal) VALUES {valores}"
+        ), params)
+        if commit:
+            self.session.commit()
+        return notas
+
+
+class EventoRepositorySqlite:
+    def __init__(self, session):
+        self.session = session
+
+    def add_many(self, eventos):
+        for e in eventos:
+            self.session.execute(text("INSERT INTO eventos (id, nota_id) VALUES (:id, :nota)"), {"id": e.id, "nota": e.agregado_id})
+
+
+class TipoEvaluacionRepositorySqlite:
+    def __init__(self, session):
+        self.session = session
+
+    def find_existing_ids(self, tipo_ids):
+        filas = self.session.execute(text("SELECT id FROM tipos_evaluacion")).all()
+        return [f[0] for f in filas if f[0] in tipo_ids]
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+
+    # pysqlite no emite BEGIN por sí mismo: necesario para que los SAVEPOINT funcionen
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, _):
+        dbapi_connection.isolation_level = None
+        dbapi_connection.execute("PRAGMA foreign_keys = ON")
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE tipos_evaluacion (id TEXT PRIMARY KEY)"))
+        conn.execute(text(
+            "CREATE TABLE notas (id TEXT PRIMARY KEY, matricula_clase_id TEXT NOT NULL, "
+            "tipo_evaluacion_id TEXT NOT NULL REFERENCES tipos_evaluacion(id), "
+            "valor_numerico NUMERIC, valor_literal TEXT, "
+            "CHECK (valor_literal IS NOT NULL OR valor_numerico IS NOT NULL))"
+        ))
+        conn.execute(text("CREATE TABLE eventos (id TEXT PRIMARY KEY, nota_id TEXT NOT NULL)"))
+        conn.execute(text("INSERT INTO tipos_evaluacion (id) VALUES ('T1')"))
+    with Session(engine) as session:
+        yield session
+
+
+def _item(matricula, tipo="T1", valor=15.0):
+    return {"matricula_clase_id": matricula, "tipo_evaluacion_id": tipo, "periodo_id": "P1",
+            "escala_id": "E1", "valor_numerico": valor, "columna_nota": "N1"}
+
+
+def _ejecutar(session, items, validar_tipos=True):
+    use_case = RegistrarNotaUseCase(
+        nota_repository=NotaRepositorySqlite(session),
+        evento_repository=EventoRepositorySqlite(session),
+        db_session=session,
+        tipo_evaluacion_repository=TipoEvaluacionRepositorySqlite(session) if validar_tipos else None,
+    )
+    return asyncio.run(use_case.execute_batch(items=items, registrado_por_user_id="D1"))
+
+
+def _guardadas(session):
+    notas = [r[0] for r in session.execute(text("SELECT matricula_clase_id FROM notas ORDER BY matricula_clase_id"))]
+    eventos = session.execute(text("SELECT COUNT(*) FROM eventos")).scalar_one()
+    return notas, eventos
+
+
+def test_item_invalido_se_rechaza_en_la_validacion(session):
+    items = [_item("M1"), _item("M2", tipo="NO-EXISTE"), _item("M3", valor=1500), _item("M4")]
+    resultados = _ejecutar(session, items)
+
+    assert [r["status"] for r in resultados] == ["ok", "error", "error", "ok"]
+    assert resultados[1]["message"] == "Tipo de evaluación no encontrado"
+    assert "fuera de rango" in resultados[2]["message"]
+    assert _guardadas(session) == (["M1", "M4"], 2)
+
+
+def test_fallo_del_lote_en_bd_se_reintenta_por_item(session):
+    # Sin validación de tipos la FK falla en la BD: el INSERT multi-fila se cae entero
+    items = [_item("M1"), _item("M2", tipo="NO-EXISTE"), _item("M3")]
+    resultados = _ejecutar(session, items, validar_tipos=False)
+
+    assert [r["status"] for r in resultados] == ["ok", "error", "ok"]
+    assert resultados[1]["matricula_clase_id"] == "M2"
+    assert resultados[1]["message"].startswith("No se pudo guardar la nota")
+    # Nota y evento del item fallido deshechos por su savepoint; los demás confirmados
+    assert _guardadas(session) == (["M1", "M3"], 2)
@@ -0,0 +1,74 @@
+"""
+Pruebas del escritor XLSX en streaming de notas-service (GET /v1/notas/export?format=xlsx).
+
+El archivo generado se vuelve a abrir con openpyxl para comprobar que es un .xlsx
+válido, y se verifica que el generador entrega trozos a medida que consume filas
+(primer trozo antes de leer el cursor, memoria acotada al tamaño de trozo).
+"""
+import io
+import os
+import sys
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "services", "notas-service")]
+
+from app.infrastructure.export.xlsx_stream import columna_excel, stream_xlsx  # noqa: E402
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def _leer(chunks):
+    wb = openpyxl.load_workbook(io.BytesIO(b"".join(chunks)), read_only=True)
+    ws = wb.active
+    return ws.title, [list(fila) for fila in ws.iter_rows(values_only=True)]
+
+
+def test_columna_excel():
+    assert [columna_excel(i) for i in (0, 25, 26, 51, 52, 701, 702)] == ["A", "Z", "AA", "AZ", "BA", "ZZ", "AAA"]
+
+
+def test_xlsx_valido_con_tipos():
+    filas = [
+        ["Núñez & <Pérez>", Decimal("15.50"), 18, None, "AD", datetime(2025, 3, 1, 8, 30)],
+        ["con\x01control", 0, 12.25, "", True, "  espacios  "],
+    ]
+    titulo, leidas = _leer(stream_xlsx(filas, cabecera=["alumno", "nota", "n2", "n3", "lit", "fecha"], nombre_hoja="Notas"))
+
+    assert titulo == "Notas"
+    assert leidas[0] == ["alumno", "nota", "n2", "n3", "lit", "fecha"]
+    assert leidas[1] == ["Núñez & <Pérez>", 15.5, 18, None, "AD", "2025-03-01T08:30:00"]
+    assert leidas[2] == ["concontrol", 0, 12.25, None, True, "  espacios  "]
+
+
+def test_streaming_por_trozos():
+    consumidas = []
+
+    def filas():
+        for i in range(20000):
+            consumidas.append(i)
+            yield [f"alumno {i}", i % 20, "N1", f"periodo-{i % 4}"]
+
+    generador = stream_xlsx(filas(), cabecera=["alumno", "nota", "columna", "periodo"], chunk_bytes=16 * 1024)
+
+    # Las partes fijas del zip salen antes de tocar el cursor
+    primero = next(generador)
+    assert primero.startswith(b"PK") and not consumidas
+
+    chunks = [primero]
+    maximo = 0
+    for chunk in generador:
+        # Cada trozo sale antes de consumir todas las filas y no crece con el total
+        if len(chunks) == 2:
+            assert len(consumidas) < 20000
+        maximo = max(maximo, len(chunk))
+        chunks.append(chunk)
+
+    assert len(chunks) > 3
+    assert maximo < 64 * 1024
+    _, leidas = _leer(chunks)
+    assert len(leidas) == 20001
+    assert leidas[-1] == ["alumno 19999", 19, "N1", "periodo-3"]
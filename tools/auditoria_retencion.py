@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+tools/auditoria_retencion.py
+
+Retención de auditoria_logs (particionada por mes, ver migración 008):
+
+ 1. Archiva cada partición mensual más vieja que --meses-retencion a
+    `<destino>/<schema>/auditoria_logs_<particion>.jsonl.gz` (un registro JSON por línea)
+ 2. Verifica que el archivo tenga tantas filas como la partición y la elimina con
+    DROP PARTITION (instantáneo, sin DELETE fila a fila ni fragmentar la tabla)
+ 3. Divide p_futuro para que existan las particiones de los próximos --meses-futuros
+
+Pensado para correr una vez al día o al mes (cron / CronJob). Es idempotente: un
+archivo ya escrito se reescribe y una partición ya eliminada no vuelve a aparecer.
+
+Uso:
+    python tools/auditoria_retencion.py --meses-retencion 12 --destino /backups/auditoria
+    python tools/auditoria_retencion.py --dry-run
+
+Conexión: variables DB_HOST, DB_PORT, DB_USER, DB_PASSWORD (usuario con ALTER sobre
+los schemas sga_*). Requiere: pymysql.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import pymysql
+    import pymysql.cursors
+except Exception:
+    print("Error: pymysql no está disponible. Instálalo con: pip install pymysql")
+    raise
+
+
+SCHEMAS = ("sga_iam", "sga_academico", "sga_personas", "sga_notas")
+TABLA = "auditoria_logs"
+PARTICION_FUTURO = "p_futuro"
+FILAS_POR_LOTE = 5000
+
+
+def primer_dia_mes(anio: int, mes: int) -> datetime:
+    """Primer instante del mes en UTC; admite meses fuera de 1..12 (desplazamientos)"""
+    anio += (mes - 1) // 12
+    mes = (mes - 1) % 12 + 1
+    return datetime(anio, mes, 1, tzinfo=timezone.utc)
+
+
+def conectar(args) -> "pymysql.Connection":
+    conn = pymysql.connect(
+        host=args.host,
+        port=args.port,
+        user=args.user,
+        password=args.password,
+        charset="utf8mb4",
+        autocommit=True,
+    )
+    with conn.cursor() as cursor:
+        # Los límites de partición y created_at se interpretan en UTC
+        cursor.execute("SET time_zone = '+00:00'")
+    return conn
+
+
+def listar_particiones(conn, schema: str) -> list:
+    """[(nombre, límite superior en epoch o None para MAXVALUE)] en orden"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT PARTITION_NAME, PARTITION_DESCRIPTION
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+            """,
+            (schema, TABLA),
+        )
+        return [
+            (nombre, None if descripcion == "MAXVALUE" else int(descripcion))
+            for nombre, descripcion in cursor.fetchall()
+        ]
+
+
+def _serializar(valor):
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    return str(valor)
+
+
+def archivar_particion(conn, schema: str, particion: str, destino: Path) -> int:
+    """Vuelca la partición a .jsonl.gz (escritura atómica vía archivo temporal); devuelve las filas"""
+    carpeta = destino / schema
+    carpeta.mkdir(parents=True, exist_ok=True)
+    archivo = carpeta / f"{TABLA}_{particion}.jsonl.gz"
+    temporal = archivo.with_suffix(".gz.tmp")
+
+    filas = 0
+    # SSCursor: las filas se leen en streaming, sin cargar el mes entero en memoria
+    with conn.cursor(pymysql.cursors.SSDictCursor) as cursor, gzip.open(temporal, "wt", encoding="utf-8") as salida:
+        cursor.execute(f"SELECT * FROM `{schema}`.`{TABLA}` PARTITION (`{particion}`) ORDER BY created_at, id")
+        while True:
+            lote = cursor.fetchmany(FILAS_POR_LOTE)
+            if not lote:
+                break
+            for fila in lote:
+                for columna in ("datos_anteriores", "datos_nuevos"):
+                    if isinstance(fila.get(columna), str):
+                        try:
+                            fila[columna] = json.loads(fila[columna])
+                        except ValueError:
+                            pass
+                salida.write(json.dumps(fila, ensure_ascii=False, default=_serializar))
+                salida.write("\n")
+            filas += len(lote)
+    os.replace(temporal, archivo)
+
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM `{schema}`.`{TABLA}` PARTITION (`{particion}`)")
+        en_bd = cursor.fetchone()[0]
+    if en_bd != filas:
+        raise RuntimeError(
+            f"{schema}.{particion}: se archivaron {filas} filas pero la partición tiene {en_bd}; no se elimina"
+        )
+    print(f"  {particion}: {filas} filas -> {archivo}")
+    return filas
+
+
+def retener(conn, schema: str, limite: datetime, destino: Path, dry_run: bool) -> None:
+    """Archiva y elimina las particiones cuyo rango termina antes de `limite`"""
+    corte = int(limite.timestamp())
+    particiones = listar_particiones(conn, schema)
+    if not particiones:
+        print(f"  {schema}.{TABLA} no está particionada (aplicar migración 008); se omite")
+        return
+    vencidas = [nombre for nombre, hasta in particiones if hasta is not None and hasta <= corte]
+    # MySQL no permite eliminar la única partición de rango que queda
+    vencidas = vencidas[: len(particiones) - 1]
+    if not vencidas:
+        print(f"  Sin particiones anteriores a {limite.date()}")
+    for particion in vencidas:
+        archivar_particion(conn, schema, particion, destino)
+        if dry_run:
+            print(f"  [dry-run] ALTER TABLE {schema}.{TABLA} DROP PARTITION {particion}")
+            continue
+        with conn.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE `{schema}`.`{TABLA}` DROP PARTITION `{particion}`")
+        print(f"  {particion} eliminada")
+
+
+def crear_futuras(conn, schema: str, hasta: datetime, dry_run: bool) -> None:
+    """Divide p_futuro en particiones mensuales hasta `hasta` (exclusivo)"""
+    particiones = listar_particiones(conn, schema)
+    if not particiones or particiones[-1][0] != PARTICION_FUTURO:
+        return
+    mensuales = [limite for _, limite in particiones if limite is not None]
+    if mensuales:
+        ultimo = datetime.fromtimestamp(mensuales[-1], tz=timezone.utc)
+    else:
+        ahora = datetime.now(timezone.utc)
+        ultimo = primer_dia_mes(ahora.year, ahora.month)
+
+    nuevas = []
+    inicio = ultimo
+    while inicio < hasta:
+        fin = primer_dia_mes(inicio.year, inicio.month + 1)
+        nuevas.append(
+            f"PARTITION p{inicio:%Y%m} VALUES LESS THAN (UNIX_TIMESTAMP('{fin:%Y-%m-%d %H:%M:%S}'))"
+        )
+        inicio = fin
+    if not nuevas:
+        return
+
+    sql = (
+        f"ALTER TABLE `{schema}`.`{TABLA}` REORGANIZE PARTITION `{PARTICION_FUTURO}` INTO ("
+        + ", ".join(nuevas)
+        + f", PARTITION `{PARTICION_FUTURO}` VALUES LESS THAN MAXVALUE)"
+    )
+    if dry_run:
+        print(f"  [dry-run] {sql}")
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(sql)
+    print(f"  {len(nuevas)} particiones nuevas hasta {hasta.date()}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Archiva y elimina particiones viejas de auditoria_logs")
+    parser.add_argument("--meses-retencion", type=int, default=12, help="Meses completos que se conservan en MySQL")
+    parser.add_argument("--meses-futuros", type=int, default=3, help="Meses por delante con partición propia")
+    parser.add_argument("--destino", default=os.getenv("AUDITORIA_ARCHIVO_DIR", "auditoria_archivo"))
+    parser.add_argument("--schemas", nargs="+", default=list(SCHEMAS))
+    parser.add_argument("--dry-run", action="store_true", help="Archiva pero no elimina ni crea particiones")
+    parser.add_argument("--host", default=os.getenv("DB_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("DB_PORT", "3306")))
+    parser.add_argument("--user", default=os.getenv("DB_USER", "root"))
+    parser.add_argument("--password", default=os.getenv("DB_PASSWORD", ""))
+    args = parser.parse_args()
+
+    ahora = datetime.now(timezone.utc)
+    limite = primer_dia_mes(ahora.year, ahora.month - args.meses_retencion)
+    hasta = primer_dia_mes(ahora.year, ahora.month + args.meses_futuros + 1)
+    destino = Path(args.destino)
+
+    conn = conectar(args)
+    errores = 0
+    try:
+        for schema in args.schemas:
+            print(f"{schema}.{TABLA}")
+            try:
+                retener(conn, schema, limite, destino, args.dry_run)
+                crear_futuras(conn, schema, hasta, args.dry_run)
+            except Exception as e:
+                errores += 1
+                print(f"  Error: {e}")
+    finally:
+        conn.close()
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+tools/bench_login.py
+
+Benchmark en proceso de la verificación bcrypt del login (sin BD ni HTTP):
+
+ - antes:   verify_password() síncrono dentro del handler async (bloquea el event loop)
+ - despues: PasswordHasherPool (threads acotados + 429 inmediato al saturarse)
+
+Por cada modo lanza --clientes logins concurrentes durante --segundos y reporta
+logins/s, logins/s por core, el retraso del event loop (p50/p99 de un ticker de
+10 ms, lo que sufren las demás peticiones mientras tanto) y los rechazos 429.
+
+Uso:
+    python tools/bench_login.py
+    python tools/bench_login.py --clientes 200 --segundos 10 --workers 4 --max-pending 16
+
+Requiere: passlib + bcrypt (requirements de iam-service).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from shared.common.exceptions import TooManyRequestsException  # noqa: E402
+from shared.common.password_utils import PasswordHasherPool, hash_password, verify_password  # noqa: E402
+
+PASSWORD = "Password123"
+TICK_SECONDS = 0.01
+
+
+async def _ticker(retrasos: list, fin: float) -> None:
+    """Mide cuánto tarde despierta un sleep de 10 ms: el lag del event loop"""
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        retrasos.append(time.perf_counter() - inicio - TICK_SECONDS)
+
+
+async def _correr(verify, clientes: int, segundos: float, hashed: str) -> dict:
+    resultado = {"ok": 0, "rechazadas": 0}
+    retrasos: list = []
+    fin = time.perf_counter() + segundos
+
+    async def cliente():
+        while time.perf_counter() < fin:
+            try:
+                await verify(PASSWORD, hashed)
+                resultado["ok"] += 1
+            except TooManyRequestsException as e:
+                resultado["rechazadas"] += 1
+                # El cliente respeta Retry-After (acotado a lo que queda de la corrida)
+                await asyncio.sleep(min(e.retry_after, max(fin - time.perf_counter(), 0)))
+
+    inicio = time.perf_counter()
+    await asyncio.gather(_ticker(retrasos, fin), *(cliente() for _ in range(clientes)))
+    resultado["duracion"] = time.perf_counter() - inicio
+    retrasos.sort()
+    resultado["lag_p50_ms"] = statistics.median(retrasos) * 1000 if retrasos else 0.0
+    resultado["lag_p99_ms"] = retrasos[int(len(retrasos) * 0.99) - 1] * 1000 if retrasos else 0.0
+    resultado["lag_muestras"] = len(retrasos)
+    return resultado
+
+
+def _imprimir(nombre: str, r: dict, cores: int) -> None:
+    por_segundo = r["ok"] / r["duracion"]
+    print(
+        f"{nombre:<8} logins/s={por_segundo:8.1f}  por core={por_segundo / cores:7.1f}  "
+        f"lag p50={r['lag_p50_ms']:7.1f} ms  p99={r['lag_p99_ms']:7.1f} ms  "
+        f"(ticks={r['lag_muestras']})  429={r['rechazadas']}"
+    )
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Throughput de login (bcrypt) antes/después del pool")
+    parser.add_argument("--clientes", type=int, default=50, help="Logins concurrentes")
+    parser.add_argument("--segundos", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=None, help="Threads del pool (por defecto: cores)")
+    parser.add_argument("--max-pending", type=int, default=16, help="Cola máxima antes de responder 429")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    hashed = hash_password(PASSWORD)
+    print(f"cores={cores} clientes={args.clientes} segundos={args.segundos}")
+
+    async def verify_en_loop(plain, hashed_password):
+        # Lo que hacía LoginUseCase.execute: bcrypt síncrono dentro del handler
+        return verify_password(plain, hashed_password)
+
+    _imprimir("antes", await _correr(verify_en_loop, args.clientes, args.segundos, hashed), cores)
+
+    pool = PasswordHasherPool(workers=args.workers, max_pending=args.max_pending)
+    try:
+        _imprimir("despues", await _correr(pool.verify, args.clientes, args.segundos, hashed), cores)
+    finally:
+        pool.shutdown()
+    print(f"pool: workers={pool.workers} capacidad={pool.capacidad}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))